@@ -761,6 +761,15 @@ AZURE_STORAGE_ENDPOINT = os.environ.get("AZURE_STORAGE_ENDPOINT", None)
 AZURE_STORAGE_CONTAINER_NAME = os.environ.get("AZURE_STORAGE_CONTAINER_NAME", None)
 AZURE_STORAGE_KEY = os.environ.get("AZURE_STORAGE_KEY", None)
 
+# Local copies of S3, GCS and Azure objects are kept up to this many megabytes,
+# least recently used first out. 0 keeps all of them.
+try:
+    STORAGE_LOCAL_CACHE_MAX_SIZE = int(
+        os.environ.get("STORAGE_LOCAL_CACHE_MAX_SIZE", "1024")
+    )
+except ValueError:
+    STORAGE_LOCAL_CACHE_MAX_SIZE = 1024
+
 ####################################
 # File Upload DIR
 ####################################
@@ -1426,6 +1435,73 @@ Strictly return in JSON format:
 </chat_history>
 """
 
+ENABLE_COMBINED_TASK_GENERATION = PersistentConfig(
+    "ENABLE_COMBINED_TASK_GENERATION",
+    "task.combined.enable",
+    os.environ.get("ENABLE_COMBINED_TASK_GENERATION", "False").lower() == "true",
+)
+
+COMBINED_TASK_GENERATION_PROMPT_TEMPLATE = PersistentConfig(
+    "COMBINED_TASK_GENERATION_PROMPT_TEMPLATE",
+    "task.combined.prompt_template",
+    os.environ.get("COMBINED_TASK_GENERATION_PROMPT_TEMPLATE", ""),
+)
+
+DEFAULT_COMBINED_TASK_GENERATION_PROMPT_TEMPLATE = """### Task:
+Analyze the chat history and generate, in a single response:
+1. A concise, 3-5 word title with an emoji summarizing the chat history.
+2. 1-3 broad tags categorizing the main themes of the chat history, along with 1-3 more specific subtopic tags.
+3. 1-3 broad and relevant search queries for the last user message, unless it is absolutely certain that no additional information is required.
+
+### Guidelines:
+- Respond **EXCLUSIVELY** with a JSON object. Any form of extra commentary, explanation, or additional text is strictly prohibited.
+- Use the chat's primary language for the title and tags; default to English if multilingual.
+- Use emojis in the title that enhance understanding of the topic, but avoid quotation marks or special formatting.
+- Start tags with high-level domains (e.g. Science, Technology, Philosophy, Arts, Politics, Business, Health, Sports, Entertainment, Education). If content is too short or too diverse, use only ["General"].
+- Keep each search query distinct, concise and relevant. If and only if no useful results can be retrieved by a search, use an empty list.
+- Today's date is: {{CURRENT_DATE}}.
+
+### Output:
+Strictly return in JSON format:
+{
+  "title": "your concise title here",
+  "tags": ["tag1", "tag2", "tag3"],
+  "queries": ["query1", "query2"]
+}
+
+### Chat History:
+<chat_history>
+{{MESSAGES:END:6}}
+</chat_history>
+"""
+
+try:
+    TASK_MODEL_HISTORY_TOKEN_BUDGET = int(
+        os.environ.get("TASK_MODEL_HISTORY_TOKEN_BUDGET", "2000")
+    )
+except ValueError:
+    TASK_MODEL_HISTORY_TOKEN_BUDGET = 2000
+
+# Responses of non-streamed task model calls, reused for identical prompts
+ENABLE_TASK_RESPONSE_CACHE = (
+    os.environ.get("ENABLE_TASK_RESPONSE_CACHE", "False").lower() == "true"
+)
+
+# Share the cached responses between workers through Redis (REDIS_URL)
+ENABLE_TASK_RESPONSE_CACHE_REDIS = (
+    os.environ.get("ENABLE_TASK_RESPONSE_CACHE_REDIS", "False").lower() == "true"
+)
+
+try:
+    TASK_RESPONSE_CACHE_TTL = int(os.environ.get("TASK_RESPONSE_CACHE_TTL", "600"))
+except ValueError:
+    TASK_RESPONSE_CACHE_TTL = 600
+
+try:
+    TASK_RESPONSE_CACHE_SIZE = int(os.environ.get("TASK_RESPONSE_CACHE_SIZE", "1000"))
+except ValueError:
+    TASK_RESPONSE_CACHE_SIZE = 1000
+
 ENABLE_AUTOCOMPLETE_GENERATION = PersistentConfig(
     "ENABLE_AUTOCOMPLETE_GENERATION",
     "task.autocomplete.enable",
@@ -2244,6 +2320,20 @@ PLAYWRIGHT_TIMEOUT = PersistentConfig(
     int(os.environ.get("PLAYWRIGHT_TIMEOUT", "10000")),
 )
 
+# Browser contexts kept open for loading pages, one page loads per context at a time
+try:
+    PLAYWRIGHT_MAX_CONTEXTS = int(os.environ.get("PLAYWRIGHT_MAX_CONTEXTS", "4"))
+except ValueError:
+    PLAYWRIGHT_MAX_CONTEXTS = 4
+
+# Pages loaded in a context before it is replaced by a fresh one
+try:
+    PLAYWRIGHT_CONTEXT_MAX_PAGES = int(
+        os.environ.get("PLAYWRIGHT_CONTEXT_MAX_PAGES", "50")
+    )
+except ValueError:
+    PLAYWRIGHT_CONTEXT_MAX_PAGES = 50
+
 FIRECRAWL_API_KEY = PersistentConfig(
     "FIRECRAWL_API_KEY",
     "rag.web.loader.firecrawl_api_key",
@@ -2256,6 +2346,28 @@ FIRECRAWL_API_BASE_URL = PersistentConfig(
     os.environ.get("FIRECRAWL_API_BASE_URL", "https://api.firecrawl.dev"),
 )
 
+WEB_LOADER_CACHE_DIR = f"{CACHE_DIR}/web"
+
+# Extracted pages are kept on disk up to this many megabytes
+try:
+    WEB_LOADER_CACHE_MAX_SIZE = int(os.getenv("WEB_LOADER_CACHE_MAX_SIZE", "256"))
+except ValueError:
+    WEB_LOADER_CACHE_MAX_SIZE = 256
+
+# Seconds a cached page is used without asking the server, unless the page
+# sets its own max-age. After that it is revalidated with ETag/Last-Modified.
+try:
+    WEB_LOADER_CACHE_TTL = int(os.getenv("WEB_LOADER_CACHE_TTL", "3600"))
+except ValueError:
+    WEB_LOADER_CACHE_TTL = 3600
+
+try:
+    WEB_LOADER_PER_HOST_CONCURRENCY = int(
+        os.getenv("WEB_LOADER_PER_HOST_CONCURRENCY", "4")
+    )
+except ValueError:
+    WEB_LOADER_PER_HOST_CONCURRENCY = 4
+
 
 ####################################
 # Images
@@ -2515,6 +2627,21 @@ WHISPER_VAD_FILTER = PersistentConfig(
     os.getenv("WHISPER_VAD_FILTER", "False").lower() == "true",
 )
 
+# Long recordings are split at silences into chunks of at most this many
+# seconds, which are transcribed in parallel. 0 transcribes them in one piece.
+try:
+    AUDIO_STT_CHUNK_DURATION = int(os.getenv("AUDIO_STT_CHUNK_DURATION", "600"))
+except ValueError:
+    AUDIO_STT_CHUNK_DURATION = 600
+
+# Chunks of one recording transcribed at the same time, and the number of
+# faster-whisper workers. All chunks run in the media executor, so
+# MEDIA_EXECUTOR_WORKERS bounds them across recordings.
+try:
+    AUDIO_STT_CHUNK_WORKERS = int(os.getenv("AUDIO_STT_CHUNK_WORKERS", "4"))
+except ValueError:
+    AUDIO_STT_CHUNK_WORKERS = 4
+
 
 # Add Deepgram configuration
 DEEPGRAM_API_KEY = PersistentConfig(
@@ -2622,6 +2749,19 @@ AUDIO_TTS_AZURE_SPEECH_OUTPUT_FORMAT = PersistentConfig(
     ),
 )
 
+# Synthesized speech is cached on disk up to this many megabytes, least
+# recently used first out. 0 keeps all of it.
+try:
+    AUDIO_TTS_CACHE_MAX_SIZE = int(os.getenv("AUDIO_TTS_CACHE_MAX_SIZE", "512"))
+except ValueError:
+    AUDIO_TTS_CACHE_MAX_SIZE = 512
+
+# Sentences synthesized ahead of the one being streamed
+try:
+    AUDIO_TTS_STREAM_CONCURRENCY = int(os.getenv("AUDIO_TTS_STREAM_CONCURRENCY", "3"))
+except ValueError:
+    AUDIO_TTS_STREAM_CONCURRENCY = 3
+
 
 ####################################
 # LDAP
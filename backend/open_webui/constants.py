@@ -112,6 +112,7 @@ class TASKS(str, Enum):
     DEFAULT = lambda task="": f"{task if task else 'generation'}"
     TITLE_GENERATION = "title_generation"
     TAGS_GENERATION = "tags_generation"
+    COMBINED_TASK_GENERATION = "combined_task_generation"
     EMOJI_GENERATION = "emoji_generation"
     QUERY_GENERATION = "query_generation"
     IMAGE_PROMPT_GENERATION = "image_prompt_generation"
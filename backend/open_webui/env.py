@@ -320,6 +320,18 @@ ENABLE_REALTIME_CHAT_SAVE = (
     os.environ.get("ENABLE_REALTIME_CHAT_SAVE", "False").lower() == "true"
 )
 
+# Relay streamed chunks that only carry plain text without reprocessing the
+# whole message for each of them
+ENABLE_STREAM_FAST_PATH = (
+    os.environ.get("ENABLE_STREAM_FAST_PATH", "True").lower() == "true"
+)
+
+# Store chat messages as individual rows in the `chat_message` table instead of
+# inside the `chat.chat` JSON blob. Legacy chats are migrated lazily on write.
+ENABLE_CHAT_MESSAGE_TABLE = (
+    os.environ.get("ENABLE_CHAT_MESSAGE_TABLE", "False").lower() == "true"
+)
+
 ####################################
 # REDIS
 ####################################
@@ -328,6 +340,13 @@ REDIS_URL = os.environ.get("REDIS_URL", "")
 REDIS_SENTINEL_HOSTS = os.environ.get("REDIS_SENTINEL_HOSTS", "")
 REDIS_SENTINEL_PORT = os.environ.get("REDIS_SENTINEL_PORT", "26379")
 
+# Seconds the chat generation tasks of a node stay listed once it stops
+# renewing them, e.g. after a crash
+try:
+    TASK_REGISTRY_TTL = int(os.environ.get("TASK_REGISTRY_TTL", "30"))
+except ValueError:
+    TASK_REGISTRY_TTL = 30
+
 ####################################
 # UVICORN WORKERS
 ####################################
@@ -356,6 +375,53 @@ BYPASS_MODEL_ACCESS_CONTROL = (
     os.environ.get("BYPASS_MODEL_ACCESS_CONTROL", "False").lower() == "true"
 )
 
+# Password hashing and LDAP binds run in a dedicated thread pool of this size
+try:
+    AUTH_EXECUTOR_WORKERS = int(os.environ.get("AUTH_EXECUTOR_WORKERS", "4"))
+except ValueError:
+    AUTH_EXECUTOR_WORKERS = 4
+
+# Sizes of the thread pools running the other blocking work, see utils/executors.py
+try:
+    RAG_EXECUTOR_WORKERS = int(os.environ.get("RAG_EXECUTOR_WORKERS", "4"))
+except ValueError:
+    RAG_EXECUTOR_WORKERS = 4
+
+try:
+    RAG_QUERY_EXECUTOR_WORKERS = int(os.environ.get("RAG_QUERY_EXECUTOR_WORKERS", "8"))
+except ValueError:
+    RAG_QUERY_EXECUTOR_WORKERS = 8
+
+try:
+    INGESTION_EXECUTOR_WORKERS = int(os.environ.get("INGESTION_EXECUTOR_WORKERS", "4"))
+except ValueError:
+    INGESTION_EXECUTOR_WORKERS = 4
+
+try:
+    MEDIA_EXECUTOR_WORKERS = int(os.environ.get("MEDIA_EXECUTOR_WORKERS", "4"))
+except ValueError:
+    MEDIA_EXECUTOR_WORKERS = 4
+
+try:
+    WEB_EXECUTOR_WORKERS = int(os.environ.get("WEB_EXECUTOR_WORKERS", "4"))
+except ValueError:
+    WEB_EXECUTOR_WORKERS = 4
+
+try:
+    BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", "12"))
+except ValueError:
+    BCRYPT_ROUNDS = 12
+
+# Re-hash stored passwords on successful sign in when their cost differs from BCRYPT_ROUNDS
+ENABLE_PASSWORD_REHASH = (
+    os.environ.get("ENABLE_PASSWORD_REHASH", "False").lower() == "true"
+)
+
+try:
+    LDAP_POOL_SIZE = int(os.environ.get("LDAP_POOL_SIZE", "4"))
+except ValueError:
+    LDAP_POOL_SIZE = 4
+
 ####################################
 # WEBUI_SECRET_KEY
 ####################################
@@ -439,6 +505,187 @@ else:
     except Exception:
         AIOHTTP_CLIENT_TIMEOUT_TOOL_SERVER_DATA = 10
 
+# Model list and tool server backends that failed this many times in a row are
+# skipped for a while instead of adding their full timeout to every refresh,
+# 0 always tries them
+try:
+    UPSTREAM_CIRCUIT_BREAKER_FAILURES = int(
+        os.environ.get("UPSTREAM_CIRCUIT_BREAKER_FAILURES", "3")
+    )
+except ValueError:
+    UPSTREAM_CIRCUIT_BREAKER_FAILURES = 3
+
+# Seconds a failing backend is skipped before it is tried again
+try:
+    UPSTREAM_CIRCUIT_BREAKER_RESET_TIMEOUT = int(
+        os.environ.get("UPSTREAM_CIRCUIT_BREAKER_RESET_TIMEOUT", "30")
+    )
+except ValueError:
+    UPSTREAM_CIRCUIT_BREAKER_RESET_TIMEOUT = 30
+
+####################################
+# CODE INTERPRETER
+####################################
+
+# Started Jupyter kernels kept ready per server, 0 starts a kernel per execution
+try:
+    JUPYTER_KERNEL_POOL_SIZE = int(os.environ.get("JUPYTER_KERNEL_POOL_SIZE", "2"))
+except ValueError:
+    JUPYTER_KERNEL_POOL_SIZE = 2
+
+# Kernels unused for this many seconds are shut down
+try:
+    JUPYTER_KERNEL_IDLE_TIMEOUT = int(
+        os.environ.get("JUPYTER_KERNEL_IDLE_TIMEOUT", "600")
+    )
+except ValueError:
+    JUPYTER_KERNEL_IDLE_TIMEOUT = 600
+
+try:
+    JUPYTER_MAX_KERNELS_PER_USER = int(
+        os.environ.get("JUPYTER_MAX_KERNELS_PER_USER", "2")
+    )
+except ValueError:
+    JUPYTER_MAX_KERNELS_PER_USER = 2
+
+# Keep one kernel per chat, so variables persist between turns
+ENABLE_JUPYTER_KERNEL_PER_CHAT = (
+    os.environ.get("ENABLE_JUPYTER_KERNEL_PER_CHAT", "False").lower() == "true"
+)
+
+####################################
+# TOOL CALLS
+####################################
+
+# Tool calls returned in one response run concurrently, up to this many at a time
+try:
+    TOOL_CALL_MAX_CONCURRENCY = int(os.environ.get("TOOL_CALL_MAX_CONCURRENCY", "8"))
+except ValueError:
+    TOOL_CALL_MAX_CONCURRENCY = 8
+
+TOOL_CALL_TIMEOUT = os.environ.get("TOOL_CALL_TIMEOUT", "")
+
+if TOOL_CALL_TIMEOUT == "":
+    TOOL_CALL_TIMEOUT = None
+else:
+    try:
+        TOOL_CALL_TIMEOUT = int(TOOL_CALL_TIMEOUT)
+    except Exception:
+        TOOL_CALL_TIMEOUT = None
+
+####################################
+# IMAGE GENERATION
+####################################
+
+# Longest side in pixels of the thumbnail stored next to each generated image,
+# 0 disables thumbnails
+try:
+    IMAGE_GENERATION_THUMBNAIL_SIZE = int(
+        os.environ.get("IMAGE_GENERATION_THUMBNAIL_SIZE", "0")
+    )
+except ValueError:
+    IMAGE_GENERATION_THUMBNAIL_SIZE = 0
+
+####################################
+# WEB SEARCH
+####################################
+
+# Search engine requests in flight at once, across all users
+try:
+    WEB_SEARCH_MAX_CONCURRENT_QUERIES = int(
+        os.environ.get("WEB_SEARCH_MAX_CONCURRENT_QUERIES", "8")
+    )
+except ValueError:
+    WEB_SEARCH_MAX_CONCURRENT_QUERIES = 8
+
+# Web search results are indexed in memory for the turn only, an index that
+# is not discarded (e.g. the request failed) is dropped after this many seconds
+try:
+    WEB_SEARCH_INDEX_TTL = int(os.environ.get("WEB_SEARCH_INDEX_TTL", "600"))
+except ValueError:
+    WEB_SEARCH_INDEX_TTL = 600
+
+# Embeddings of web page chunks are kept this many seconds so popular pages are
+# not embedded again, 0 disables the cache
+try:
+    WEB_SEARCH_EMBEDDING_CACHE_TTL = int(
+        os.environ.get("WEB_SEARCH_EMBEDDING_CACHE_TTL", "3600")
+    )
+except ValueError:
+    WEB_SEARCH_EMBEDDING_CACHE_TTL = 3600
+
+try:
+    WEB_SEARCH_EMBEDDING_CACHE_SIZE = int(
+        os.environ.get("WEB_SEARCH_EMBEDDING_CACHE_SIZE", "10000")
+    )
+except ValueError:
+    WEB_SEARCH_EMBEDDING_CACHE_SIZE = 10000
+
+####################################
+# OLLAMA LOAD BALANCING
+####################################
+
+# random, round_robin (weighted by the connection's "weight"), least_requests
+# or model_affinity (prefer nodes that already have the model loaded)
+OLLAMA_LOAD_BALANCING_STRATEGY = os.environ.get(
+    "OLLAMA_LOAD_BALANCING_STRATEGY", "least_requests"
+).lower()
+
+# Keep requests of the same chat on the same node so its KV cache stays warm
+OLLAMA_STICKY_SESSIONS = (
+    os.environ.get("OLLAMA_STICKY_SESSIONS", "False").lower() == "true"
+)
+
+try:
+    OLLAMA_FAILURE_THRESHOLD = int(os.environ.get("OLLAMA_FAILURE_THRESHOLD", "3"))
+except ValueError:
+    OLLAMA_FAILURE_THRESHOLD = 3
+
+try:
+    OLLAMA_EJECTION_TIME = int(os.environ.get("OLLAMA_EJECTION_TIME", "30"))
+except ValueError:
+    OLLAMA_EJECTION_TIME = 30
+
+try:
+    OLLAMA_LOADED_MODELS_TTL = int(os.environ.get("OLLAMA_LOADED_MODELS_TTL", "15"))
+except ValueError:
+    OLLAMA_LOADED_MODELS_TTL = 15
+
+####################################
+# WEBHOOKS
+####################################
+
+try:
+    WEBHOOK_TIMEOUT = int(os.environ.get("WEBHOOK_TIMEOUT", "10"))
+except ValueError:
+    WEBHOOK_TIMEOUT = 10
+
+try:
+    WEBHOOK_MAX_CONCURRENCY = int(os.environ.get("WEBHOOK_MAX_CONCURRENCY", "8"))
+except ValueError:
+    WEBHOOK_MAX_CONCURRENCY = 8
+
+try:
+    WEBHOOK_QUEUE_SIZE = int(os.environ.get("WEBHOOK_QUEUE_SIZE", "1000"))
+except ValueError:
+    WEBHOOK_QUEUE_SIZE = 1000
+
+try:
+    WEBHOOK_MAX_RETRIES = int(os.environ.get("WEBHOOK_MAX_RETRIES", "3"))
+except ValueError:
+    WEBHOOK_MAX_RETRIES = 3
+
+try:
+    WEBHOOK_RETRY_BACKOFF = float(os.environ.get("WEBHOOK_RETRY_BACKOFF", "1"))
+except ValueError:
+    WEBHOOK_RETRY_BACKOFF = 1.0
+
+# Notifications to the same URL queued within this window are sent as one request
+try:
+    WEBHOOK_COALESCE_WINDOW = float(os.environ.get("WEBHOOK_COALESCE_WINDOW", "1"))
+except ValueError:
+    WEBHOOK_COALESCE_WINDOW = 1.0
+
 ####################################
 # OFFLINE_MODE
 ####################################
@@ -50,7 +50,7 @@ from open_webui.utils.audit import AuditLevel, AuditLoggingMiddleware
 from open_webui.utils.logger import start_logger
 from open_webui.socket.main import (
     app as socket_app,
-    periodic_usage_pool_cleanup,
+    periodic_usage_broadcast,
 )
 from open_webui.routers import (
     audio,
@@ -316,6 +316,8 @@ from open_webui.config import (
     ENABLE_SEARCH_QUERY_GENERATION,
     ENABLE_RETRIEVAL_QUERY_GENERATION,
     ENABLE_AUTOCOMPLETE_GENERATION,
+    ENABLE_COMBINED_TASK_GENERATION,
+    COMBINED_TASK_GENERATION_PROMPT_TEMPLATE,
     TITLE_GENERATION_PROMPT_TEMPLATE,
     TAGS_GENERATION_PROMPT_TEMPLATE,
     IMAGE_PROMPT_GENERATION_PROMPT_TEMPLATE,
@@ -375,11 +377,25 @@ from open_webui.utils.auth import (
 )
 from open_webui.utils.oauth import OAuthManager
 from open_webui.utils.security_headers import SecurityHeadersMiddleware
+from open_webui.utils.webhook import webhook_dispatcher
+from open_webui.utils.code_interpreter import close_kernel_pools
+from open_webui.utils.images.comfyui import close_comfyui_clients
+from open_webui.routers.images import close_image_session
+from open_webui.retrieval.web.main import close_search_session
+from open_webui.retrieval.web.fetch import close_fetch_sessions
+from open_webui.retrieval.web.browser import close_browser_pools
+from open_webui.utils.executors import (
+    start_executors,
+    shutdown_executors,
+    get_executors_stats,
+)
+from open_webui.routers.audio import load_speech_pipeline
 
 from open_webui.tasks import (
     list_task_ids_by_chat_id,
     stop_task,
     list_tasks,
+    TASK_REGISTRY,
 )  # Import from tasks.py
 
 from open_webui.utils.redis import get_sentinels_from_env
@@ -435,8 +451,27 @@ async def lifespan(app: FastAPI):
     if LICENSE_KEY:
         get_license_data(app, LICENSE_KEY)
 
-    asyncio.create_task(periodic_usage_pool_cleanup())
+    asyncio.create_task(periodic_usage_broadcast())
+    webhook_dispatcher.start()
+    await TASK_REGISTRY.start()
+    start_executors()
+
+    # Move profile images stored inline in the user table into storage
+    asyncio.create_task(asyncio.to_thread(Users.offload_profile_images))
+
+    # Load the local speech model now rather than on the first request
+    if app.state.config.TTS_ENGINE == "transformers":
+        asyncio.create_task(asyncio.to_thread(load_speech_pipeline, app))
     yield
+    await webhook_dispatcher.stop()
+    await close_kernel_pools()
+    await close_comfyui_clients()
+    await close_image_session()
+    await close_search_session()
+    await close_fetch_sessions()
+    await close_browser_pools()
+    await TASK_REGISTRY.close()
+    shutdown_executors()
 
 
 app = FastAPI(
@@ -834,6 +869,7 @@ app.state.config.ENABLE_RETRIEVAL_QUERY_GENERATION = ENABLE_RETRIEVAL_QUERY_GENE
 app.state.config.ENABLE_AUTOCOMPLETE_GENERATION = ENABLE_AUTOCOMPLETE_GENERATION
 app.state.config.ENABLE_TAGS_GENERATION = ENABLE_TAGS_GENERATION
 app.state.config.ENABLE_TITLE_GENERATION = ENABLE_TITLE_GENERATION
+app.state.config.ENABLE_COMBINED_TASK_GENERATION = ENABLE_COMBINED_TASK_GENERATION
 
 
 app.state.config.TITLE_GENERATION_PROMPT_TEMPLATE = TITLE_GENERATION_PROMPT_TEMPLATE
@@ -846,6 +882,9 @@ app.state.config.TOOLS_FUNCTION_CALLING_PROMPT_TEMPLATE = (
     TOOLS_FUNCTION_CALLING_PROMPT_TEMPLATE
 )
 app.state.config.QUERY_GENERATION_PROMPT_TEMPLATE = QUERY_GENERATION_PROMPT_TEMPLATE
+app.state.config.COMBINED_TASK_GENERATION_PROMPT_TEMPLATE = (
+    COMBINED_TASK_GENERATION_PROMPT_TEMPLATE
+)
 app.state.config.AUTOCOMPLETE_GENERATION_PROMPT_TEMPLATE = (
     AUTOCOMPLETE_GENERATION_PROMPT_TEMPLATE
 )
@@ -1222,7 +1261,7 @@ async def stop_task_endpoint(task_id: str, user=Depends(get_verified_user)):
 
 @app.get("/api/tasks")
 async def list_tasks_endpoint(user=Depends(get_verified_user)):
-    return {"tasks": list_tasks()}
+    return {"tasks": await list_tasks()}
 
 
 @app.get("/api/tasks/chat/{chat_id}")
@@ -1231,12 +1270,17 @@ async def list_tasks_by_chat_id_endpoint(chat_id: str, user=Depends(get_verified
     if chat is None or chat.user_id != user.id:
         return {"task_ids": []}
 
-    task_ids = list_task_ids_by_chat_id(chat_id)
+    task_ids = await list_task_ids_by_chat_id(chat_id)
 
     print(f"Task IDs for chat {chat_id}: {task_ids}")
     return {"task_ids": task_ids}
 
 
+@app.get("/api/executors")
+async def get_executors_stats_endpoint(user=Depends(get_admin_user)):
+    return get_executors_stats()
+
+
 ##################################
 #
 # Config Endpoints
@@ -0,0 +1,138 @@
+"""Add chat_message table
+
+Revision ID: b7c2f1d9e4a3
+Revises: 030b587256b3
+Create Date: 2025-05-20 10:00:00.000000
+
+"""
+
+import time
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.sql import table, column
+
+revision = "b7c2f1d9e4a3"
+down_revision = "030b587256b3"
+branch_labels = None
+depends_on = None
+
+
+chat = table(
+    "chat",
+    column("id", sa.Text()),
+    column("user_id", sa.Text()),
+    column("chat", sa.JSON()),
+)
+chat_message = table(
+    "chat_message",
+    column("chat_id", sa.Text()),
+    column("id", sa.Text()),
+    column("parent_id", sa.Text()),
+    column("role", sa.Text()),
+    column("content", sa.Text()),
+    column("data", sa.JSON()),
+    column("created_at", sa.BigInteger()),
+    column("updated_at", sa.BigInteger()),
+)
+
+
+def _get_content_text(message: dict):
+    content = message.get("content")
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return " ".join(
+            part.get("text", "")
+            for part in content
+            if isinstance(part, dict) and part.get("type") == "text"
+        )
+    return None
+
+
+def upgrade():
+    op.create_table(
+        "chat_message",
+        sa.Column("chat_id", sa.Text(), nullable=False),
+        sa.Column("id", sa.Text(), nullable=False),
+        sa.Column("parent_id", sa.Text(), nullable=True),
+        sa.Column("role", sa.Text(), nullable=True),
+        sa.Column("content", sa.Text(), nullable=True),
+        sa.Column("data", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.BigInteger(), nullable=True),
+        sa.Column("updated_at", sa.BigInteger(), nullable=True),
+        sa.PrimaryKeyConstraint("chat_id", "id"),
+    )
+    op.create_index(
+        "chat_message_parent_id_idx", "chat_message", ["chat_id", "parent_id"]
+    )
+
+    # Copy the messages of every chat into rows, whatever ENABLE_CHAT_MESSAGE_TABLE
+    # is set to when the migration runs. The blobs are left as they are: they
+    # stay the source of truth until a chat is split on its first write with
+    # the flag enabled, so turning the flag on or off later needs no migration.
+    conn = op.get_bind()
+    ts = int(time.time())
+
+    # Shared chats are read-only snapshots and keep the legacy shape
+    result = conn.execute(
+        sa.select(chat.c.id, chat.c.chat).where(~chat.c.user_id.like("shared-%"))
+    )
+    for row in result.fetchall():
+        blob = row.chat or {}
+        history = blob.get("history")
+        if not isinstance(history, dict) or "messages" not in history:
+            continue
+
+        messages = history.get("messages") or {}
+        if messages:
+            conn.execute(
+                sa.insert(chat_message),
+                [
+                    {
+                        "chat_id": row.id,
+                        "id": message_id,
+                        "parent_id": message.get("parentId"),
+                        "role": message.get("role"),
+                        "content": _get_content_text(message),
+                        "data": message,
+                        "created_at": message.get("timestamp", ts),
+                        "updated_at": ts,
+                    }
+                    for message_id, message in messages.items()
+                ],
+            )
+
+
+def downgrade():
+    # Put the messages of split chats back into their blobs first
+    conn = op.get_bind()
+
+    messages = {}
+    for row in conn.execute(
+        sa.select(chat_message.c.chat_id, chat_message.c.id, chat_message.c.data)
+    ).fetchall():
+        messages.setdefault(row.chat_id, {})[row.id] = row.data
+
+    for row in conn.execute(sa.select(chat.c.id, chat.c.chat)).fetchall():
+        blob = row.chat or {}
+        history = blob.get("history")
+        if not isinstance(history, dict) or "messages" in history:
+            continue
+
+        chat_messages = messages.get(row.id, {})
+        message_list = []
+        message_id = history.get("currentId")
+        while message_id in chat_messages and len(message_list) < len(chat_messages):
+            message_list.append(chat_messages[message_id])
+            message_id = chat_messages[message_id].get("parentId")
+
+        blob = {
+            **blob,
+            "history": {**history, "messages": chat_messages},
+            "messages": message_list[::-1],
+        }
+        conn.execute(sa.update(chat).where(chat.c.id == row.id).values(chat=blob))
+
+    op.drop_index("chat_message_parent_id_idx", table_name="chat_message")
+    op.drop_table("chat_message")
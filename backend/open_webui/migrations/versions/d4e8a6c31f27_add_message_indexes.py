@@ -0,0 +1,35 @@
+"""Add message indexes for channel pagination
+
+Revision ID: d4e8a6c31f27
+Revises: b7c2f1d9e4a3
+Create Date: 2025-05-21 10:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "d4e8a6c31f27"
+down_revision = "b7c2f1d9e4a3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Keyset pagination of a channel or thread walks (created_at, id) in reverse
+    op.create_index(
+        "message_channel_id_parent_id_created_at_idx",
+        "message",
+        ["channel_id", "parent_id", "created_at", "id"],
+    )
+    # Reply counts are aggregated by parent_id
+    op.create_index("message_parent_id_idx", "message", ["parent_id"])
+    op.create_index(
+        "message_reaction_message_id_idx", "message_reaction", ["message_id"]
+    )
+
+
+def downgrade():
+    op.drop_index("message_reaction_message_id_idx", table_name="message_reaction")
+    op.drop_index("message_parent_id_idx", table_name="message")
+    op.drop_index("message_channel_id_parent_id_created_at_idx", table_name="message")
@@ -0,0 +1,26 @@
+"""Add content hash to file table
+
+Revision ID: e3a7c9b5d2f1
+Revises: d4e8a6c31f27
+Create Date: 2025-05-28 10:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "e3a7c9b5d2f1"
+down_revision = "d4e8a6c31f27"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # SHA-256 of the uploaded bytes, unlike hash which is that of the extracted text
+    op.add_column("file", sa.Column("content_hash", sa.String(), nullable=True))
+    op.create_index("file_content_hash_idx", "file", ["content_hash"])
+
+
+def downgrade():
+    op.drop_index("file_content_hash_idx", table_name="file")
+    op.drop_column("file", "content_hash")
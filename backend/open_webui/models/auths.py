@@ -4,10 +4,10 @@ from typing import Optional
 
 from open_webui.internal.db import Base, get_db
 from open_webui.models.users import UserModel, Users
-from open_webui.env import SRC_LOG_LEVELS
+from open_webui.env import SRC_LOG_LEVELS, ENABLE_PASSWORD_REHASH
 from pydantic import BaseModel
 from sqlalchemy import Boolean, Column, String, Text
-from open_webui.utils.auth import verify_password
+from open_webui.utils.auth import verify_and_update_password
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MODELS"])
@@ -133,7 +133,14 @@ class AuthsTable:
             with get_db() as db:
                 auth = db.query(Auth).filter_by(email=email, active=True).first()
                 if auth:
-                    if verify_password(password, auth.password):
+                    valid, new_hash = verify_and_update_password(
+                        password, auth.password
+                    )
+                    if valid:
+                        if new_hash and ENABLE_PASSWORD_REHASH:
+                            auth.password = new_hash
+                            db.commit()
+
                         user = Users.get_user_by_id(auth.id)
                         return user
                     else:
@@ -0,0 +1,190 @@
+import logging
+import time
+from typing import Optional
+
+from open_webui.internal.db import Base, get_db
+from open_webui.env import SRC_LOG_LEVELS
+
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import BigInteger, Column, Text, JSON, Index
+from sqlalchemy.orm import Session
+
+####################
+# ChatMessage DB Schema
+####################
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+
+class ChatMessage(Base):
+    __tablename__ = "chat_message"
+
+    chat_id = Column(Text, primary_key=True)
+    id = Column(Text, primary_key=True)
+
+    parent_id = Column(Text, nullable=True)
+    role = Column(Text, nullable=True)
+    content = Column(Text, nullable=True)
+
+    # The full message dict, exactly as stored in `history.messages[id]`
+    data = Column(JSON)
+
+    created_at = Column(BigInteger)
+    updated_at = Column(BigInteger)
+
+    __table_args__ = (Index("chat_message_parent_id_idx", "chat_id", "parent_id"),)
+
+
+class ChatMessageModel(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    chat_id: str
+    id: str
+
+    parent_id: Optional[str] = None
+    role: Optional[str] = None
+    content: Optional[str] = None
+
+    data: dict
+
+    created_at: int  # timestamp in epoch
+    updated_at: int  # timestamp in epoch
+
+
+def _get_content_text(message: dict) -> Optional[str]:
+    content = message.get("content")
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        # OpenAI style content parts
+        return " ".join(
+            part.get("text", "")
+            for part in content
+            if isinstance(part, dict) and part.get("type") == "text"
+        )
+    return None
+
+
+def _apply_message_columns(row: ChatMessage, message: dict, ts: int) -> None:
+    row.parent_id = message.get("parentId")
+    row.role = message.get("role")
+    row.content = _get_content_text(message)
+    row.data = message
+    row.updated_at = ts
+
+
+class ChatMessageTable:
+    def get_messages_by_chat_id(self, chat_id: str) -> dict[str, dict]:
+        with get_db() as db:
+            rows = (
+                db.query(ChatMessage.id, ChatMessage.data)
+                .filter_by(chat_id=chat_id)
+                .all()
+            )
+            return {row.id: row.data for row in rows}
+
+    def get_messages_by_chat_ids(self, chat_ids: list[str]) -> dict[str, dict]:
+        """
+        Returns a mapping of chat_id -> {message_id: message} loaded with a single query.
+        """
+        if not chat_ids:
+            return {}
+
+        with get_db() as db:
+            rows = (
+                db.query(ChatMessage.chat_id, ChatMessage.id, ChatMessage.data)
+                .filter(ChatMessage.chat_id.in_(chat_ids))
+                .all()
+            )
+
+            messages = {}
+            for row in rows:
+                messages.setdefault(row.chat_id, {})[row.id] = row.data
+            return messages
+
+    def get_message_by_chat_id_and_id(self, chat_id: str, id: str) -> Optional[dict]:
+        with get_db() as db:
+            row = db.get(ChatMessage, (chat_id, id))
+            return row.data if row else None
+
+    # The writes below run in the session of the caller, which commits them
+    # together with the chat row, and raise on error.
+
+    def upsert_message(self, db: Session, chat_id: str, id: str, message: dict):
+        """
+        Merges `message` into the stored message, only touching the single row.
+        """
+        ts = int(time.time())
+        row = db.get(ChatMessage, (chat_id, id))
+
+        if row:
+            _apply_message_columns(row, {**(row.data or {}), **message}, ts)
+        else:
+            row = ChatMessage(chat_id=chat_id, id=id, created_at=ts)
+            _apply_message_columns(row, {"id": id, **message}, ts)
+            db.add(row)
+
+    def add_message_status(self, db: Session, chat_id: str, id: str, status: dict):
+        row = db.get(ChatMessage, (chat_id, id))
+        if row is None:
+            return
+
+        data = row.data or {}
+        row.data = {
+            **data,
+            "statusHistory": [*data.get("statusHistory", []), status],
+        }
+        row.updated_at = int(time.time())
+
+    def sync_messages_by_chat_id(
+        self,
+        db: Session,
+        chat_id: str,
+        messages: dict[str, dict],
+        replace: bool = False,
+    ):
+        """
+        Writes the messages that changed. Rows missing from `messages` are only
+        deleted with `replace`, when `messages` is the whole history, e.g. a
+        legacy blob being migrated. A full save from the frontend may be older
+        than a message streamed into its own row meanwhile, so deleting
+        messages is left to `delete_messages_by_chat_id_and_ids`.
+        """
+        ts = int(time.time())
+        rows = {
+            row.id: row
+            for row in db.query(ChatMessage).filter_by(chat_id=chat_id).all()
+        }
+
+        for id, message in messages.items():
+            row = rows.pop(id, None)
+            if row is None:
+                row = ChatMessage(chat_id=chat_id, id=id, created_at=ts)
+                _apply_message_columns(row, message, ts)
+                db.add(row)
+            elif row.data != message:
+                _apply_message_columns(row, message, ts)
+
+        if replace:
+            for row in rows.values():
+                db.delete(row)
+
+        # Make the new rows visible to the writes that follow in the session
+        db.flush()
+
+    def delete_messages_by_chat_id_and_ids(
+        self, db: Session, chat_id: str, ids: list[str]
+    ):
+        db.query(ChatMessage).filter(
+            ChatMessage.chat_id == chat_id, ChatMessage.id.in_(ids)
+        ).delete()
+
+    def delete_messages_by_chat_id(self, db: Session, chat_id: str):
+        db.query(ChatMessage).filter_by(chat_id=chat_id).delete()
+
+    def delete_messages_by_chat_ids(self, db: Session, chat_ids: list[str]):
+        db.query(ChatMessage).filter(ChatMessage.chat_id.in_(chat_ids)).delete()
+
+
+ChatMessages = ChatMessageTable()
@@ -6,7 +6,8 @@ from typing import Optional
 
 from open_webui.internal.db import Base, get_db
 from open_webui.models.tags import TagModel, Tag, Tags
-from open_webui.env import SRC_LOG_LEVELS
+from open_webui.models.chat_messages import ChatMessage, ChatMessages
+from open_webui.env import SRC_LOG_LEVELS, ENABLE_CHAT_MESSAGE_TABLE
 
 from pydantic import BaseModel, ConfigDict
 from sqlalchemy import BigInteger, Boolean, Column, String, Text, JSON
@@ -104,10 +105,96 @@ class ChatTitleIdResponse(BaseModel):
     created_at: int
 
 
+def _split_chat(chat: dict) -> tuple[dict, Optional[dict]]:
+    """
+    Splits a legacy shaped chat into the blob stored on the `chat` row and the
+    messages stored as `chat_message` rows. Returns `None` messages when the
+    chat should be stored as is.
+    """
+    history = chat.get("history")
+    if (
+        not ENABLE_CHAT_MESSAGE_TABLE
+        or not isinstance(history, dict)
+        or "messages" not in history
+    ):
+        return chat, None
+
+    blob = {
+        **{key: value for key, value in chat.items() if key != "messages"},
+        "history": {key: value for key, value in history.items() if key != "messages"},
+    }
+    return blob, history.get("messages") or {}
+
+
+def _has_message_rows(chat: dict) -> bool:
+    """
+    Chats split by `_split_chat` keep their messages as `chat_message` rows. In
+    legacy chats the blob holds them, and any rows are stale copies.
+    """
+    history = chat.get("history")
+    return isinstance(history, dict) and "messages" not in history
+
+
+def _get_message_list(messages: dict, message_id: Optional[str]) -> list[dict]:
+    """Walks up the parent links from `message_id` to the root of the branch."""
+    message_list = []
+
+    visited = set()
+    while message_id and message_id in messages and message_id not in visited:
+        visited.add(message_id)
+        message_list.append(messages[message_id])
+        message_id = messages[message_id].get("parentId")
+
+    return message_list[::-1]
+
+
+def _merge_chat(chat: dict, messages: dict) -> dict:
+    """Reassembles the legacy `history.messages` and `messages` shape for the frontend."""
+    if not _has_message_rows(chat):
+        return chat
+
+    history = chat["history"]
+    chat = {**chat, "history": {**history, "messages": messages}}
+
+    if "messages" not in chat:
+        chat["messages"] = _get_message_list(messages, history.get("currentId"))
+    return chat
+
+
 class ChatTable:
+    def _to_chat_model(self, chat_item: Chat) -> ChatModel:
+        chat = ChatModel.model_validate(chat_item)
+        if _has_message_rows(chat.chat):
+            chat.chat = _merge_chat(
+                chat.chat, ChatMessages.get_messages_by_chat_id(chat.id)
+            )
+        return chat
+
+    def _to_chat_models(self, chat_items: list[Chat]) -> list[ChatModel]:
+        chats = [ChatModel.model_validate(chat_item) for chat_item in chat_items]
+        chat_ids = [chat.id for chat in chats if _has_message_rows(chat.chat)]
+        if chat_ids:
+            messages = ChatMessages.get_messages_by_chat_ids(chat_ids)
+            for chat in chats:
+                chat.chat = _merge_chat(chat.chat, messages.get(chat.id, {}))
+        return chats
+
+    def _migrate_chat_messages(self, db, chat_item: Chat) -> None:
+        """
+        Moves message bodies still embedded in a legacy chat blob into `chat_message`
+        rows, so that single message writes can be applied to the rows directly.
+        """
+        blob, messages = _split_chat(chat_item.chat or {})
+        if messages is not None:
+            ChatMessages.sync_messages_by_chat_id(
+                db, chat_item.id, messages, replace=True
+            )
+            chat_item.chat = blob
+
     def insert_new_chat(self, user_id: str, form_data: ChatForm) -> Optional[ChatModel]:
         with get_db() as db:
             id = str(uuid.uuid4())
+            blob, messages = _split_chat(form_data.chat)
             chat = ChatModel(
                 **{
                     "id": id,
@@ -117,23 +204,33 @@ class ChatTable:
                         if "title" in form_data.chat
                         else "New Chat"
                     ),
-                    "chat": form_data.chat,
+                    "chat": blob,
                     "created_at": int(time.time()),
                     "updated_at": int(time.time()),
                 }
             )
 
+            if messages is not None:
+                ChatMessages.sync_messages_by_chat_id(db, id, messages)
+
             result = Chat(**chat.model_dump())
             db.add(result)
             db.commit()
             db.refresh(result)
-            return ChatModel.model_validate(result) if result else None
+            return (
+                ChatModel.model_validate(result).model_copy(
+                    update={"chat": form_data.chat}
+                )
+                if result
+                else None
+            )
 
     def import_chat(
         self, user_id: str, form_data: ChatImportForm
     ) -> Optional[ChatModel]:
         with get_db() as db:
             id = str(uuid.uuid4())
+            blob, messages = _split_chat(form_data.chat)
             chat = ChatModel(
                 **{
                     "id": id,
@@ -143,7 +240,7 @@ class ChatTable:
                         if "title" in form_data.chat
                         else "New Chat"
                     ),
-                    "chat": form_data.chat,
+                    "chat": blob,
                     "meta": form_data.meta,
                     "pinned": form_data.pinned,
                     "folder_id": form_data.folder_id,
@@ -152,42 +249,74 @@ class ChatTable:
                 }
             )
 
+            if messages is not None:
+                ChatMessages.sync_messages_by_chat_id(db, id, messages)
+
             result = Chat(**chat.model_dump())
             db.add(result)
             db.commit()
             db.refresh(result)
-            return ChatModel.model_validate(result) if result else None
+            return (
+                ChatModel.model_validate(result).model_copy(
+                    update={"chat": form_data.chat}
+                )
+                if result
+                else None
+            )
 
     def update_chat_by_id(self, id: str, chat: dict) -> Optional[ChatModel]:
         try:
             with get_db() as db:
                 chat_item = db.get(Chat, id)
-                chat_item.chat = chat
+
+                blob, messages = _split_chat(chat)
+                if messages is not None:
+                    # Rows of a legacy chat are stale copies, a split chat only
+                    # loses messages through delete_messages_by_id_and_message_ids
+                    ChatMessages.sync_messages_by_chat_id(
+                        db,
+                        id,
+                        messages,
+                        replace=not _has_message_rows(chat_item.chat),
+                    )
+
+                chat_item.chat = blob
                 chat_item.title = chat["title"] if "title" in chat else "New Chat"
                 chat_item.updated_at = int(time.time())
                 db.commit()
                 db.refresh(chat_item)
 
-                return ChatModel.model_validate(chat_item)
+                return ChatModel.model_validate(chat_item).model_copy(
+                    update={"chat": chat}
+                )
         except Exception:
             return None
 
     def update_chat_title_by_id(self, id: str, title: str) -> Optional[ChatModel]:
-        chat = self.get_chat_by_id(id)
-        if chat is None:
-            return None
+        try:
+            with get_db() as db:
+                chat_item = db.get(Chat, id)
+                if chat_item is None:
+                    return None
 
-        chat = chat.chat
-        chat["title"] = title
+                chat_item.chat = {**chat_item.chat, "title": title}
+                chat_item.title = title
+                chat_item.updated_at = int(time.time())
+                db.commit()
+                db.refresh(chat_item)
 
-        return self.update_chat_by_id(id, chat)
+                return ChatModel.model_validate(chat_item)
+        except Exception:
+            return None
 
     def update_chat_tags_by_id(
         self, id: str, tags: list[str], user
     ) -> Optional[ChatModel]:
-        chat = self.get_chat_by_id(id)
-        if chat is None:
-            return None
+        with get_db() as db:
+            chat_item = db.get(Chat, id)
+            if chat_item is None:
+                return None
+            chat = ChatModel.model_validate(chat_item)
 
         self.delete_all_tags_by_id_and_user_id(id, user.id)
 
@@ -200,14 +329,17 @@ class ChatTable:
                 continue
 
             self.add_chat_tag_by_id_and_user_id_and_tag_name(id, user.id, tag_name)
-        return self.get_chat_by_id(id)
+
+        with get_db() as db:
+            return ChatModel.model_validate(db.get(Chat, id))
 
     def get_chat_title_by_id(self, id: str) -> Optional[str]:
-        chat = self.get_chat_by_id(id)
-        if chat is None:
-            return None
+        with get_db() as db:
+            chat_item = db.get(Chat, id)
+            if chat_item is None:
+                return None
 
-        return chat.chat.get("title", "New Chat")
+            return chat_item.chat.get("title", "New Chat")
 
     def get_messages_by_chat_id(self, id: str) -> Optional[dict]:
         chat = self.get_chat_by_id(id)
@@ -219,15 +351,44 @@ class ChatTable:
     def get_message_by_id_and_message_id(
         self, id: str, message_id: str
     ) -> Optional[dict]:
-        chat = self.get_chat_by_id(id)
-        if chat is None:
-            return None
+        with get_db() as db:
+            chat_item = db.get(Chat, id)
+            if chat_item is None:
+                return None
 
-        return chat.chat.get("history", {}).get("messages", {}).get(message_id, {})
+            chat = chat_item.chat
+            if _has_message_rows(chat):
+                return ChatMessages.get_message_by_chat_id_and_id(id, message_id) or {}
+            return chat.get("history", {}).get("messages", {}).get(message_id, {})
 
     def upsert_message_to_chat_by_id_and_message_id(
         self, id: str, message_id: str, message: dict
     ) -> Optional[ChatModel]:
+        if ENABLE_CHAT_MESSAGE_TABLE:
+            try:
+                with get_db() as db:
+                    chat_item = db.get(Chat, id)
+                    if chat_item is None:
+                        return None
+
+                    self._migrate_chat_messages(db, chat_item)
+                    ChatMessages.upsert_message(db, id, message_id, message)
+
+                    history = chat_item.chat.get("history", {})
+                    chat_item.chat = {
+                        **chat_item.chat,
+                        "history": {**history, "currentId": message_id},
+                    }
+                    chat_item.updated_at = int(time.time())
+                    db.commit()
+                    db.refresh(chat_item)
+
+                    # Only the blob, reading every message back on each
+                    # streamed chunk would cost O(history)
+                    return ChatModel.model_validate(chat_item)
+            except Exception:
+                return None
+
         chat = self.get_chat_by_id(id)
         if chat is None:
             return None
@@ -251,6 +412,24 @@ class ChatTable:
     def add_message_status_to_chat_by_id_and_message_id(
         self, id: str, message_id: str, status: dict
     ) -> Optional[ChatModel]:
+        if ENABLE_CHAT_MESSAGE_TABLE:
+            try:
+                with get_db() as db:
+                    chat_item = db.get(Chat, id)
+                    if chat_item is None:
+                        return None
+
+                    self._migrate_chat_messages(db, chat_item)
+                    ChatMessages.add_message_status(db, id, message_id, status)
+
+                    chat_item.updated_at = int(time.time())
+                    db.commit()
+                    db.refresh(chat_item)
+
+                    return ChatModel.model_validate(chat_item)
+            except Exception:
+                return None
+
         chat = self.get_chat_by_id(id)
         if chat is None:
             return None
@@ -266,6 +445,26 @@ class ChatTable:
         chat["history"] = history
         return self.update_chat_by_id(id, chat)
 
+    def delete_messages_by_id_and_message_ids(
+        self, id: str, message_ids: list[str]
+    ) -> bool:
+        """
+        Deletes messages of a split chat, the only way its rows are deleted. The
+        blob of a legacy chat is replaced as a whole by the next update instead.
+        """
+        try:
+            with get_db() as db:
+                chat_item = db.get(Chat, id)
+                if chat_item is None:
+                    return False
+
+                ChatMessages.delete_messages_by_chat_id_and_ids(db, id, message_ids)
+                chat_item.updated_at = int(time.time())
+                db.commit()
+                return True
+        except Exception:
+            return False
+
     def insert_shared_chat_by_chat_id(self, chat_id: str) -> Optional[ChatModel]:
         with get_db() as db:
             # Get the existing chat to share
@@ -274,12 +473,13 @@ class ChatTable:
             if chat.share_id:
                 return self.get_chat_by_id_and_user_id(chat.share_id, "shared")
             # Create a new chat with the same data, but with a new ID
+            # Shared chats are read-only snapshots and keep the legacy blob shape
             shared_chat = ChatModel(
                 **{
                     "id": str(uuid.uuid4()),
                     "user_id": f"shared-{chat_id}",
                     "title": chat.title,
-                    "chat": chat.chat,
+                    "chat": self._to_chat_model(chat).chat,
                     "created_at": chat.created_at,
                     "updated_at": int(time.time()),
                 }
@@ -310,7 +510,7 @@ class ChatTable:
                     return self.insert_shared_chat_by_chat_id(chat_id)
 
                 shared_chat.title = chat.title
-                shared_chat.chat = chat.chat
+                shared_chat.chat = self._to_chat_model(chat).chat
 
                 shared_chat.updated_at = int(time.time())
                 db.commit()
@@ -387,7 +587,7 @@ class ChatTable:
                 # .limit(limit).offset(skip)
                 .all()
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(all_chats)
 
     def get_chat_list_by_user_id(
         self,
@@ -409,7 +609,7 @@ class ChatTable:
                 query = query.limit(limit)
 
             all_chats = query.all()
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(all_chats)
 
     def get_chat_title_id_list_by_user_id(
         self,
@@ -460,13 +660,13 @@ class ChatTable:
                 .order_by(Chat.updated_at.desc())
                 .all()
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(all_chats)
 
     def get_chat_by_id(self, id: str) -> Optional[ChatModel]:
         try:
             with get_db() as db:
                 chat = db.get(Chat, id)
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(chat)
         except Exception:
             return None
 
@@ -488,7 +688,7 @@ class ChatTable:
         try:
             with get_db() as db:
                 chat = db.query(Chat).filter_by(id=id, user_id=user_id).first()
-                return ChatModel.model_validate(chat)
+                return self._to_chat_model(chat)
         except Exception:
             return None
 
@@ -499,7 +699,7 @@ class ChatTable:
                 # .limit(limit).offset(skip)
                 .order_by(Chat.updated_at.desc())
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(all_chats)
 
     def get_chats_by_user_id(self, user_id: str) -> list[ChatModel]:
         with get_db() as db:
@@ -508,7 +708,7 @@ class ChatTable:
                 .filter_by(user_id=user_id)
                 .order_by(Chat.updated_at.desc())
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(all_chats)
 
     def get_pinned_chats_by_user_id(self, user_id: str) -> list[ChatModel]:
         with get_db() as db:
@@ -517,7 +717,7 @@ class ChatTable:
                 .filter_by(user_id=user_id, pinned=True, archived=False)
                 .order_by(Chat.updated_at.desc())
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(all_chats)
 
     def get_archived_chats_by_user_id(self, user_id: str) -> list[ChatModel]:
         with get_db() as db:
@@ -526,7 +726,7 @@ class ChatTable:
                 .filter_by(user_id=user_id, archived=True)
                 .order_by(Chat.updated_at.desc())
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(all_chats)
 
     def get_chats_by_user_id_and_search_text(
         self,
@@ -569,13 +769,31 @@ class ChatTable:
 
             # Check if the database dialect is either 'sqlite' or 'postgresql'
             dialect_name = db.bind.dialect.name
+
+            # Split chats no longer carry their messages in the blob. The rows
+            # of legacy chats are stale copies, the blob search covers those.
+            if dialect_name == "sqlite":
+                is_split_chat = text(
+                    "json_type(Chat.chat, '$.history') = 'object' "
+                    "AND json_type(Chat.chat, '$.history.messages') IS NULL"
+                )
+            else:
+                is_split_chat = text(
+                    "json_typeof(Chat.chat->'history') = 'object' "
+                    "AND Chat.chat->'history'->'messages' IS NULL"
+                )
+            text_match = Chat.title.ilike(f"%{search_text}%") | and_(
+                is_split_chat,
+                exists().where(
+                    ChatMessage.chat_id == Chat.id,
+                    func.lower(ChatMessage.content).like(f"%{search_text}%"),
+                ),
+            )
             if dialect_name == "sqlite":
                 # SQLite case: using JSON1 extension for JSON searching
                 query = query.filter(
                     (
-                        Chat.title.ilike(
-                            f"%{search_text}%"
-                        )  # Case-insensitive search in title
+                        text_match  # Case-insensitive search in title (and message rows)
                         | text(
                             """
                             EXISTS (
@@ -622,9 +840,7 @@ class ChatTable:
                 # PostgreSQL relies on proper JSON query for search
                 query = query.filter(
                     (
-                        Chat.title.ilike(
-                            f"%{search_text}%"
-                        )  # Case-insensitive search in title
+                        text_match  # Case-insensitive search in title (and message rows)
                         | text(
                             """
                             EXISTS (
@@ -677,7 +893,7 @@ class ChatTable:
             log.info(f"The number of chats: {len(all_chats)}")
 
             # Validate and return chats
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(all_chats)
 
     def get_chats_by_folder_id_and_user_id(
         self, folder_id: str, user_id: str
@@ -690,7 +906,7 @@ class ChatTable:
             query = query.order_by(Chat.updated_at.desc())
 
             all_chats = query.all()
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(all_chats)
 
     def get_chats_by_folder_ids_and_user_id(
         self, folder_ids: list[str], user_id: str
@@ -705,7 +921,7 @@ class ChatTable:
             query = query.order_by(Chat.updated_at.desc())
 
             all_chats = query.all()
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(all_chats)
 
     def update_chat_folder_id_by_id_and_user_id(
         self, id: str, user_id: str, folder_id: str
@@ -757,7 +973,7 @@ class ChatTable:
 
             all_chats = query.all()
             log.debug(f"all_chats: {all_chats}")
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._to_chat_models(all_chats)
 
     def add_chat_tag_by_id_and_user_id_and_tag_name(
         self, id: str, user_id: str, tag_name: str
@@ -854,6 +1070,7 @@ class ChatTable:
     def delete_chat_by_id(self, id: str) -> bool:
         try:
             with get_db() as db:
+                ChatMessages.delete_messages_by_chat_id(db, id)
                 db.query(Chat).filter_by(id=id).delete()
                 db.commit()
 
@@ -864,7 +1081,9 @@ class ChatTable:
     def delete_chat_by_id_and_user_id(self, id: str, user_id: str) -> bool:
         try:
             with get_db() as db:
-                db.query(Chat).filter_by(id=id, user_id=user_id).delete()
+                if db.query(Chat).filter_by(id=id, user_id=user_id).delete():
+                    # Same session, a second one would wait for this one's lock
+                    ChatMessages.delete_messages_by_chat_id(db, id)
                 db.commit()
 
                 return True and self.delete_shared_chat_by_chat_id(id)
@@ -876,6 +1095,11 @@ class ChatTable:
             with get_db() as db:
                 self.delete_shared_chats_by_user_id(user_id)
 
+                chat_ids = [
+                    chat.id for chat in db.query(Chat.id).filter_by(user_id=user_id)
+                ]
+                ChatMessages.delete_messages_by_chat_ids(db, chat_ids)
+
                 db.query(Chat).filter_by(user_id=user_id).delete()
                 db.commit()
 
@@ -888,6 +1112,14 @@ class ChatTable:
     ) -> bool:
         try:
             with get_db() as db:
+                chat_ids = [
+                    chat.id
+                    for chat in db.query(Chat.id).filter_by(
+                        user_id=user_id, folder_id=folder_id
+                    )
+                ]
+                ChatMessages.delete_messages_by_chat_ids(db, chat_ids)
+
                 db.query(Chat).filter_by(user_id=user_id, folder_id=folder_id).delete()
                 db.commit()
 
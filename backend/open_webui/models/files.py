@@ -20,6 +20,7 @@ class File(Base):
     id = Column(String, primary_key=True)
     user_id = Column(String)
     hash = Column(Text, nullable=True)
+    content_hash = Column(String, nullable=True, index=True)
 
     filename = Column(Text)
     path = Column(Text, nullable=True)
@@ -39,6 +40,7 @@ class FileModel(BaseModel):
     id: str
     user_id: str
     hash: Optional[str] = None
+    content_hash: Optional[str] = None
 
     filename: str
     path: Optional[str] = None
@@ -90,6 +92,7 @@ class FileMetadataResponse(BaseModel):
 class FileForm(BaseModel):
     id: str
     hash: Optional[str] = None
+    content_hash: Optional[str] = None
     filename: str
     path: str
     data: dict = {}
@@ -179,6 +182,20 @@ class FilesTable:
                 for file in db.query(File).filter_by(user_id=user_id).all()
             ]
 
+    def get_processed_file_by_content_hash(
+        self, content_hash: str, exclude_id: Optional[str] = None
+    ) -> Optional[FileModel]:
+        """Returns a file with the same bytes whose text was already extracted."""
+        with get_db() as db:
+            query = db.query(File).filter(File.content_hash == content_hash)
+            if exclude_id:
+                query = query.filter(File.id != exclude_id)
+
+            for file in query.order_by(File.created_at.desc()).limit(10):
+                if (file.data or {}).get("content"):
+                    return FileModel.model_validate(file)
+            return None
+
     def update_file_hash_by_id(self, id: str, hash: str) -> Optional[FileModel]:
         with get_db() as db:
             try:
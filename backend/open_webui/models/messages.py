@@ -129,13 +129,15 @@ class MessageTable:
                 return None
 
             reactions = self.get_reactions_by_message_id(id)
-            replies = self.get_replies_by_message_id(id)
+            reply_count, latest_reply_at = self.get_reply_stats_by_message_ids(
+                [id]
+            ).get(id, (0, None))
 
             return MessageResponse(
                 **{
                     **MessageModel.model_validate(message).model_dump(),
-                    "latest_reply_at": replies[0].created_at if replies else None,
-                    "reply_count": len(replies),
+                    "latest_reply_at": latest_reply_at,
+                    "reply_count": reply_count,
                     "reactions": reactions,
                 }
             )
@@ -150,6 +152,32 @@ class MessageTable:
             )
             return [MessageModel.model_validate(message) for message in all_messages]
 
+    def get_reply_stats_by_message_ids(
+        self, ids: list[str]
+    ) -> dict[str, tuple[int, Optional[int]]]:
+        """
+        Returns a mapping of message_id -> (reply_count, latest_reply_at),
+        aggregated in a single query. Messages without replies are omitted.
+        """
+        if not ids:
+            return {}
+
+        with get_db() as db:
+            rows = (
+                db.query(
+                    Message.parent_id,
+                    func.count(Message.id),
+                    func.max(Message.created_at),
+                )
+                .filter(Message.parent_id.in_(ids))
+                .group_by(Message.parent_id)
+                .all()
+            )
+            return {
+                parent_id: (count, latest_reply_at)
+                for parent_id, count, latest_reply_at in rows
+            }
+
     def get_reply_user_ids_by_message_id(self, id: str) -> list[str]:
         with get_db() as db:
             return [
@@ -157,22 +185,42 @@ class MessageTable:
                 for message in db.query(Message).filter_by(parent_id=id).all()
             ]
 
+    def _filter_before(self, query, before: Optional[tuple[int, str]]):
+        # Keyset pagination on (created_at, id) so deep pages cost the same as the first
+        if before:
+            created_at, id = before
+            query = query.filter(
+                or_(
+                    Message.created_at < created_at,
+                    and_(Message.created_at == created_at, Message.id < id),
+                )
+            )
+        return query.order_by(Message.created_at.desc(), Message.id.desc())
+
     def get_messages_by_channel_id(
-        self, channel_id: str, skip: int = 0, limit: int = 50
+        self,
+        channel_id: str,
+        skip: int = 0,
+        limit: int = 50,
+        before: Optional[tuple[int, str]] = None,
     ) -> list[MessageModel]:
         with get_db() as db:
-            all_messages = (
-                db.query(Message)
-                .filter_by(channel_id=channel_id, parent_id=None)
-                .order_by(Message.created_at.desc())
-                .offset(skip)
-                .limit(limit)
-                .all()
-            )
+            query = db.query(Message).filter_by(channel_id=channel_id, parent_id=None)
+            query = self._filter_before(query, before)
+
+            if skip and not before:
+                query = query.offset(skip)
+
+            all_messages = query.limit(limit).all()
             return [MessageModel.model_validate(message) for message in all_messages]
 
     def get_messages_by_parent_id(
-        self, channel_id: str, parent_id: str, skip: int = 0, limit: int = 50
+        self,
+        channel_id: str,
+        parent_id: str,
+        skip: int = 0,
+        limit: int = 50,
+        before: Optional[tuple[int, str]] = None,
     ) -> list[MessageModel]:
         with get_db() as db:
             message = db.get(Message, parent_id)
@@ -180,14 +228,15 @@ class MessageTable:
             if not message:
                 return []
 
-            all_messages = (
-                db.query(Message)
-                .filter_by(channel_id=channel_id, parent_id=parent_id)
-                .order_by(Message.created_at.desc())
-                .offset(skip)
-                .limit(limit)
-                .all()
+            query = db.query(Message).filter_by(
+                channel_id=channel_id, parent_id=parent_id
             )
+            query = self._filter_before(query, before)
+
+            if skip and not before:
+                query = query.offset(skip)
+
+            all_messages = query.limit(limit).all()
 
             # If length of all_messages is less than limit, then add the parent message
             if len(all_messages) < limit:
@@ -243,6 +292,40 @@ class MessageTable:
 
             return [Reactions(**reaction) for reaction in reactions.values()]
 
+    def get_reactions_by_message_ids(
+        self, ids: list[str]
+    ) -> dict[str, list[Reactions]]:
+        """
+        Returns a mapping of message_id -> reactions, loaded in a single query.
+        """
+        if not ids:
+            return {}
+
+        with get_db() as db:
+            rows = (
+                db.query(
+                    MessageReaction.message_id,
+                    MessageReaction.name,
+                    MessageReaction.user_id,
+                )
+                .filter(MessageReaction.message_id.in_(ids))
+                .order_by(MessageReaction.created_at)
+                .all()
+            )
+
+            reactions = {}
+            for message_id, name, user_id in rows:
+                reaction = reactions.setdefault(message_id, {}).setdefault(
+                    name, {"name": name, "user_ids": [], "count": 0}
+                )
+                reaction["user_ids"].append(user_id)
+                reaction["count"] += 1
+
+            return {
+                message_id: [Reactions(**reaction) for reaction in names.values()]
+                for message_id, names in reactions.items()
+            }
+
     def remove_reaction_by_id_and_user_id_and_name(
         self, id: str, user_id: str, name: str
     ) -> bool:
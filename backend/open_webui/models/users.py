@@ -6,6 +6,7 @@ from open_webui.internal.db import Base, JSONField, get_db
 
 from open_webui.models.chats import Chats
 from open_webui.models.groups import Groups
+from open_webui.utils.avatar import offload_profile_image_url
 
 
 from pydantic import BaseModel, ConfigDict
@@ -36,6 +37,21 @@ class User(Base):
     oauth_sub = Column(Text, unique=True)
 
 
+# Columns loaded by list queries, which leave out the settings and info blobs
+USER_LIST_COLUMNS = [
+    User.id,
+    User.name,
+    User.email,
+    User.role,
+    User.profile_image_url,
+    User.last_active_at,
+    User.updated_at,
+    User.created_at,
+    User.api_key,
+    User.oauth_sub,
+]
+
+
 class UserSettings(BaseModel):
     ui: Optional[dict] = {}
     model_config = ConfigDict(extra="allow")
@@ -111,7 +127,7 @@ class UsersTable:
                     "name": name,
                     "email": email,
                     "role": role,
-                    "profile_image_url": profile_image_url,
+                    "profile_image_url": offload_profile_image_url(profile_image_url),
                     "last_active_at": int(time.time()),
                     "created_at": int(time.time()),
                     "updated_at": int(time.time()),
@@ -159,12 +175,28 @@ class UsersTable:
         except Exception:
             return None
 
+    def _query_users(self, db, include_settings: bool = False):
+        if include_settings:
+            return db.query(User)
+        return db.query(*USER_LIST_COLUMNS)
+
+    @staticmethod
+    def _to_user_model(user) -> UserModel:
+        if isinstance(user, User):
+            return UserModel.model_validate(user)
+        return UserModel.model_validate(user._asdict())
+
     def get_users(
-        self, skip: Optional[int] = None, limit: Optional[int] = None
+        self,
+        skip: Optional[int] = None,
+        limit: Optional[int] = None,
+        include_settings: bool = False,
     ) -> list[UserModel]:
         with get_db() as db:
 
-            query = db.query(User).order_by(User.created_at.desc())
+            query = self._query_users(db, include_settings).order_by(
+                User.created_at.desc()
+            )
 
             if skip:
                 query = query.offset(skip)
@@ -173,12 +205,18 @@ class UsersTable:
 
             users = query.all()
 
-            return [UserModel.model_validate(user) for user in users]
+            return [self._to_user_model(user) for user in users]
 
-    def get_users_by_user_ids(self, user_ids: list[str]) -> list[UserModel]:
+    def get_users_by_user_ids(
+        self, user_ids: list[str], include_settings: bool = False
+    ) -> list[UserModel]:
         with get_db() as db:
-            users = db.query(User).filter(User.id.in_(user_ids)).all()
-            return [UserModel.model_validate(user) for user in users]
+            users = (
+                self._query_users(db, include_settings)
+                .filter(User.id.in_(user_ids))
+                .all()
+            )
+            return [self._to_user_model(user) for user in users]
 
     def get_num_users(self) -> Optional[int]:
         with get_db() as db:
@@ -224,7 +262,7 @@ class UsersTable:
         try:
             with get_db() as db:
                 db.query(User).filter_by(id=id).update(
-                    {"profile_image_url": profile_image_url}
+                    {"profile_image_url": offload_profile_image_url(profile_image_url)}
                 )
                 db.commit()
 
@@ -261,6 +299,14 @@ class UsersTable:
 
     def update_user_by_id(self, id: str, updated: dict) -> Optional[UserModel]:
         try:
+            if "profile_image_url" in updated:
+                updated = {
+                    **updated,
+                    "profile_image_url": offload_profile_image_url(
+                        updated["profile_image_url"]
+                    ),
+                }
+
             with get_db() as db:
                 db.query(User).filter_by(id=id).update(updated)
                 db.commit()
@@ -325,6 +371,30 @@ class UsersTable:
         except Exception:
             return None
 
+    def offload_profile_images(self) -> int:
+        """
+        Moves profile images stored inline as data URLs into the storage
+        provider. Returns the number of users updated.
+        """
+        count = 0
+        with get_db() as db:
+            users = (
+                db.query(User.id, User.profile_image_url)
+                .filter(User.profile_image_url.like("data:%"))
+                .all()
+            )
+
+            for user in users:
+                profile_image_url = offload_profile_image_url(user.profile_image_url)
+                if profile_image_url != user.profile_image_url:
+                    db.query(User).filter_by(id=user.id).update(
+                        {"profile_image_url": profile_image_url}
+                    )
+                    db.commit()
+                    count += 1
+
+        return count
+
     def get_valid_user_ids(self, user_ids: list[str]) -> list[str]:
         with get_db() as db:
             users = db.query(User).filter(User.id.in_(user_ids)).all()
@@ -1,10 +1,12 @@
 import logging
 import os
+import threading
+import time
+from collections import OrderedDict
 from typing import Optional, Union
 
 import requests
 import hashlib
-from concurrent.futures import ThreadPoolExecutor
 
 from huggingface_hub import snapshot_download
 from langchain.retrievers import ContextualCompressionRetriever, EnsembleRetriever
@@ -12,7 +14,7 @@ from langchain_community.retrievers import BM25Retriever
 from langchain_core.documents import Document
 
 from open_webui.config import VECTOR_DB
-from open_webui.retrieval.vector.connector import VECTOR_DB_CLIENT
+from open_webui.retrieval.vector.connector import get_vector_db_client
 
 from open_webui.models.users import UserModel
 from open_webui.models.files import Files
@@ -24,12 +26,15 @@ from open_webui.env import (
     SRC_LOG_LEVELS,
     OFFLINE_MODE,
     ENABLE_FORWARD_USER_INFO_HEADERS,
+    WEB_SEARCH_EMBEDDING_CACHE_TTL,
+    WEB_SEARCH_EMBEDDING_CACHE_SIZE,
 )
 from open_webui.config import (
     RAG_EMBEDDING_QUERY_PREFIX,
     RAG_EMBEDDING_CONTENT_PREFIX,
     RAG_EMBEDDING_PREFIX_FIELD_NAME,
 )
+from open_webui.utils.executors import RAG_QUERY_EXECUTOR
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["RAG"])
@@ -52,7 +57,7 @@ class VectorSearchRetriever(BaseRetriever):
         *,
         run_manager: CallbackManagerForRetrieverRun,
     ) -> list[Document]:
-        result = VECTOR_DB_CLIENT.search(
+        result = get_vector_db_client(self.collection_name).search(
             collection_name=self.collection_name,
             vectors=[self.embedding_function(query, RAG_EMBEDDING_QUERY_PREFIX)],
             limit=self.top_k,
@@ -78,7 +83,7 @@ def query_doc(
 ):
     try:
         log.debug(f"query_doc:doc {collection_name}")
-        result = VECTOR_DB_CLIENT.search(
+        result = get_vector_db_client(collection_name).search(
             collection_name=collection_name,
             vectors=[query_embedding],
             limit=k,
@@ -96,7 +101,9 @@ def query_doc(
 def get_doc(collection_name: str, user: UserModel = None):
     try:
         log.debug(f"get_doc:doc {collection_name}")
-        result = VECTOR_DB_CLIENT.get(collection_name=collection_name)
+        result = get_vector_db_client(collection_name).get(
+            collection_name=collection_name
+        )
 
         if result:
             log.info(f"query_doc:result {result.ids} {result.metadatas}")
@@ -300,9 +307,9 @@ def query_collection_with_hybrid_search(
             log.debug(
                 f"query_collection_with_hybrid_search:VECTOR_DB_CLIENT.get:collection {collection_name}"
             )
-            collection_results[collection_name] = VECTOR_DB_CLIENT.get(
-                collection_name=collection_name
-            )
+            collection_results[collection_name] = get_vector_db_client(
+                collection_name
+            ).get(collection_name=collection_name)
         except Exception as e:
             log.exception(f"Failed to fetch collection {collection_name}: {e}")
             collection_results[collection_name] = None
@@ -337,9 +344,10 @@ def query_collection_with_hybrid_search(
         for q in queries
     ]
 
-    with ThreadPoolExecutor() as executor:
-        future_results = [executor.submit(process_query, cn, q) for cn, q in tasks]
-        task_results = [future.result() for future in future_results]
+    future_results = [
+        RAG_QUERY_EXECUTOR.submit(process_query, cn, q) for cn, q in tasks
+    ]
+    task_results = [future.result() for future in future_results]
 
     for result, err in task_results:
         if err is not None:
@@ -756,6 +764,74 @@ def generate_embeddings(
         return embeddings[0] if isinstance(text, str) else embeddings
 
 
+class EmbeddingCache:
+    """
+    Bounded LRU of embeddings that expire after `ttl` seconds, keyed by the
+    embedding model and the text.
+    """
+
+    def __init__(self, ttl: int, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        self.entries: OrderedDict[str, tuple[float, list[float]]] = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_size > 0
+
+    @staticmethod
+    def get_key(model: str, text: str) -> str:
+        return hashlib.sha256(f"{model}\n{text}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[list[float]]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] > self.ttl:
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: str, embedding: list[float]):
+        with self.lock:
+            self.entries[key] = (time.monotonic(), embedding)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+
+web_search_embedding_cache = EmbeddingCache(
+    WEB_SEARCH_EMBEDDING_CACHE_TTL, WEB_SEARCH_EMBEDDING_CACHE_SIZE
+)
+
+
+def generate_cached_embeddings(
+    cache: EmbeddingCache, model: str, texts: list[str], embedding_function
+) -> list[list[float]]:
+    """
+    Embeds the texts in one batch, only sending the ones that are not cached.
+    `embedding_function` takes a list of texts and returns their embeddings.
+    """
+    if not cache.enabled:
+        return embedding_function(texts)
+
+    keys = [cache.get_key(model, text) for text in texts]
+    embeddings = [cache.get(key) for key in keys]
+
+    missing = [idx for idx, embedding in enumerate(embeddings) if embedding is None]
+    if missing:
+        log.debug(f"Embedding {len(missing)} of {len(texts)} texts, rest is cached")
+        new_embeddings = embedding_function([texts[idx] for idx in missing])
+        for idx, embedding in zip(missing, new_embeddings):
+            embeddings[idx] = embedding
+            cache.put(keys[idx], embedding)
+
+    return embeddings
+
+
 import operator
 from typing import Optional, Sequence
 
@@ -24,3 +24,15 @@ else:
     from open_webui.retrieval.vector.dbs.chroma import ChromaClient
 
     VECTOR_DB_CLIENT = ChromaClient()
+
+from open_webui.retrieval.vector.memory import (
+    EPHEMERAL_COLLECTION_PREFIX,
+    MEMORY_VECTOR_DB_CLIENT,
+)
+
+
+def get_vector_db_client(collection_name: str):
+    """Ephemeral collections are kept in memory, all others in the vector DB."""
+    if collection_name and collection_name.startswith(EPHEMERAL_COLLECTION_PREFIX):
+        return MEMORY_VECTOR_DB_CLIENT
+    return VECTOR_DB_CLIENT
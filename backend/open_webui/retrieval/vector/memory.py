@@ -0,0 +1,169 @@
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+
+from open_webui.retrieval.vector.main import GetResult, SearchResult, VectorItem
+from open_webui.env import WEB_SEARCH_INDEX_TTL
+
+EPHEMERAL_COLLECTION_PREFIX = "web-search-ephemeral-"
+
+
+class MemoryCollection:
+    def __init__(self):
+        self.ids: list[str] = []
+        self.documents: list[str] = []
+        self.metadatas: list[dict] = []
+        self.vectors: Optional[np.ndarray] = None
+        self.created_at = time.monotonic()
+
+
+class MemoryClient:
+    """
+    Vector store kept in process memory, for collections that only live for a
+    request. Collections are dropped after `ttl` seconds in any case.
+    """
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.collections: dict[str, MemoryCollection] = {}
+
+    def _expire(self):
+        now = time.monotonic()
+        for name, collection in list(self.collections.items()):
+            if self.ttl > 0 and now - collection.created_at > self.ttl:
+                del self.collections[name]
+
+    def _get_collection(self, collection_name: str) -> Optional[MemoryCollection]:
+        with self.lock:
+            self._expire()
+            return self.collections.get(collection_name)
+
+    def has_collection(self, collection_name: str) -> bool:
+        return self._get_collection(collection_name) is not None
+
+    def delete_collection(self, collection_name: str):
+        with self.lock:
+            self.collections.pop(collection_name, None)
+
+    def search(
+        self, collection_name: str, vectors: list[list[float | int]], limit: int
+    ) -> Optional[SearchResult]:
+        collection = self._get_collection(collection_name)
+        if collection is None or collection.vectors is None:
+            return None
+
+        queries = np.asarray(vectors, dtype=np.float32)
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True) + 1e-12
+        # Cosine similarity mapped to 0 (worst) -> 1 (best), as the other clients
+        scores = (queries @ collection.vectors.T + 1) / 2
+
+        ids, distances, documents, metadatas = [], [], [], []
+        for row in scores:
+            top = np.argsort(-row)[:limit]
+            ids.append([collection.ids[idx] for idx in top])
+            distances.append([float(row[idx]) for idx in top])
+            documents.append([collection.documents[idx] for idx in top])
+            metadatas.append([collection.metadatas[idx] for idx in top])
+
+        return SearchResult(
+            ids=ids, distances=distances, documents=documents, metadatas=metadatas
+        )
+
+    def query(
+        self, collection_name: str, filter: dict, limit: Optional[int] = None
+    ) -> Optional[GetResult]:
+        collection = self._get_collection(collection_name)
+        if collection is None:
+            return None
+
+        indexes = [
+            idx
+            for idx, metadata in enumerate(collection.metadatas)
+            if all(metadata.get(key) == value for key, value in filter.items())
+        ][:limit]
+        return GetResult(
+            ids=[[collection.ids[idx] for idx in indexes]],
+            documents=[[collection.documents[idx] for idx in indexes]],
+            metadatas=[[collection.metadatas[idx] for idx in indexes]],
+        )
+
+    def get(self, collection_name: str) -> Optional[GetResult]:
+        collection = self._get_collection(collection_name)
+        if collection is None:
+            return None
+
+        return GetResult(
+            ids=[list(collection.ids)],
+            documents=[list(collection.documents)],
+            metadatas=[list(collection.metadatas)],
+        )
+
+    def insert(self, collection_name: str, items: list[VectorItem]):
+        if not items:
+            return
+
+        items = [
+            VectorItem(**item) if isinstance(item, dict) else item for item in items
+        ]
+        vectors = np.asarray([item.vector for item in items], dtype=np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12
+
+        with self.lock:
+            self._expire()
+            collection = self.collections.setdefault(
+                collection_name, MemoryCollection()
+            )
+            collection.ids.extend(item.id for item in items)
+            collection.documents.extend(item.text for item in items)
+            collection.metadatas.extend(item.metadata for item in items)
+            collection.vectors = (
+                vectors
+                if collection.vectors is None
+                else np.concatenate([collection.vectors, vectors])
+            )
+
+    def upsert(self, collection_name: str, items: list[VectorItem]):
+        ids = {item["id"] if isinstance(item, dict) else item.id for item in items}
+        self.delete(collection_name, ids=list(ids))
+        self.insert(collection_name, items)
+
+    def delete(
+        self,
+        collection_name: str,
+        ids: Optional[list[str]] = None,
+        filter: Optional[dict] = None,
+    ):
+        with self.lock:
+            collection = self.collections.get(collection_name)
+            if collection is None:
+                return
+
+            keep = [
+                idx
+                for idx, (item_id, metadata) in enumerate(
+                    zip(collection.ids, collection.metadatas)
+                )
+                if not (
+                    (ids is not None and item_id in ids)
+                    or (
+                        filter is not None
+                        and all(metadata.get(k) == v for k, v in filter.items())
+                    )
+                )
+            ]
+            collection.ids = [collection.ids[idx] for idx in keep]
+            collection.documents = [collection.documents[idx] for idx in keep]
+            collection.metadatas = [collection.metadatas[idx] for idx in keep]
+            collection.vectors = (
+                collection.vectors[keep] if collection.vectors is not None else None
+            )
+
+    def reset(self):
+        with self.lock:
+            self.collections = {}
+
+
+MEMORY_VECTOR_DB_CLIENT = MemoryClient(WEB_SEARCH_INDEX_TTL)
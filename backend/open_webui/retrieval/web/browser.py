@@ -0,0 +1,188 @@
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from open_webui.config import PLAYWRIGHT_MAX_CONTEXTS, PLAYWRIGHT_CONTEXT_MAX_PAGES
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+# Not needed to read the text of a page
+BLOCKED_RESOURCE_TYPES = {"image", "font", "media"}
+
+
+async def block_resources(route):
+    if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+class BrowserPool:
+    """
+    Long-lived Playwright browser, local or remote, with up to `max_contexts`
+    reusable contexts. Each context loads one page at a time and is replaced
+    after `max_pages` pages so cookies and memory do not pile up.
+
+    A retired pool closes its browser once the pages in use are loaded.
+    """
+
+    def __init__(
+        self,
+        ws_url: Optional[str] = None,
+        headless: bool = True,
+        proxy: Optional[dict] = None,
+        ignore_https_errors: bool = False,
+        max_contexts: int = 4,
+        max_pages: int = 50,
+    ):
+        self.ws_url = ws_url
+        self.headless = headless
+        self.proxy = proxy
+        self.ignore_https_errors = ignore_https_errors
+        self.max_contexts = max(1, max_contexts)
+        self.max_pages = max_pages
+
+        self.playwright = None
+        self.browser = None
+        self.lock = asyncio.Lock()
+        self.semaphore = asyncio.Semaphore(self.max_contexts)
+        # Idle contexts with the number of pages they have loaded
+        self.idle: list[tuple[object, int]] = []
+        self.active = 0  # callers using or waiting for a context
+        self.retired = False
+
+    async def get_browser(self):
+        async with self.lock:
+            if self.browser is not None and self.browser.is_connected():
+                return self.browser
+
+            # The browser crashed or the remote one went away
+            self.idle = []
+            if self.playwright is None:
+                from playwright.async_api import async_playwright
+
+                self.playwright = await async_playwright().start()
+
+            if self.ws_url:
+                self.browser = await self.playwright.chromium.connect(self.ws_url)
+            else:
+                self.browser = await self.playwright.chromium.launch(
+                    headless=self.headless, proxy=self.proxy
+                )
+            return self.browser
+
+    async def new_context(self):
+        browser = await self.get_browser()
+        context = await browser.new_context(
+            ignore_https_errors=self.ignore_https_errors
+        )
+        await context.route("**/*", block_resources)
+        return context
+
+    @asynccontextmanager
+    async def context(self):
+        """Yields a context for loading one page, waits while all are in use."""
+        self.active += 1
+        try:
+            async with self.semaphore:
+                if self.idle and self.browser.is_connected():
+                    context, pages = self.idle.pop()
+                else:
+                    context, pages = await self.new_context(), 0
+
+                try:
+                    yield context
+                except BaseException:
+                    # The context may be left in any state, start over with a new one
+                    await self.close_context(context)
+                    raise
+
+                pages += 1
+                if pages >= self.max_pages or not self.browser.is_connected():
+                    await self.close_context(context)
+                else:
+                    self.idle.append((context, pages))
+        finally:
+            self.active -= 1
+            if self.retired and not self.active:
+                await self.close()
+
+    async def retire(self):
+        """Closes the pool once it is no longer in use."""
+        self.retired = True
+        if not self.active:
+            await self.close()
+
+    async def close_context(self, context):
+        try:
+            await context.close()
+        except Exception as e:
+            log.debug(f"Error closing browser context: {e}")
+
+    async def close(self):
+        for context, _ in self.idle:
+            await self.close_context(context)
+        self.idle = []
+
+        if self.browser is not None:
+            try:
+                await self.browser.close()
+            except Exception as e:
+                log.debug(f"Error closing browser: {e}")
+            self.browser = None
+
+        if self.playwright is not None:
+            await self.playwright.stop()
+            self.playwright = None
+
+
+browser_pools: dict[str, BrowserPool] = {}
+# Pools of previous loader settings that still have pages loading
+retired_browser_pools: set[BrowserPool] = set()
+
+
+async def get_browser_pool(
+    ws_url: Optional[str] = None,
+    headless: bool = True,
+    proxy: Optional[dict] = None,
+    ignore_https_errors: bool = False,
+) -> BrowserPool:
+    key = json.dumps([ws_url, headless, proxy, ignore_https_errors], sort_keys=True)
+    if key not in browser_pools:
+        # The loader settings changed, the old pools go once their pages are loaded
+        for pool in list(retired_browser_pools):
+            if not pool.active:
+                retired_browser_pools.discard(pool)
+
+        for old_key in list(browser_pools):
+            pool = browser_pools.pop(old_key)
+            try:
+                await pool.retire()
+            except Exception as e:
+                log.debug(f"Error closing browser pool: {e}")
+            if pool.active:
+                retired_browser_pools.add(pool)
+
+        browser_pools[key] = BrowserPool(
+            ws_url=ws_url,
+            headless=headless,
+            proxy=proxy,
+            ignore_https_errors=ignore_https_errors,
+            max_contexts=PLAYWRIGHT_MAX_CONTEXTS,
+            max_pages=PLAYWRIGHT_CONTEXT_MAX_PAGES,
+        )
+    return browser_pools[key]
+
+
+async def close_browser_pools():
+    for pool in [*browser_pools.values(), *retired_browser_pools]:
+        try:
+            await pool.close()
+        except Exception as e:
+            log.debug(f"Error closing browser pool: {e}")
+    browser_pools.clear()
+    retired_browser_pools.clear()
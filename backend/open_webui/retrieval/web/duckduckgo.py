@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from typing import Optional
 
@@ -10,7 +11,20 @@ log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["RAG"])
 
 
-def search_duckduckgo(
+def get_duckduckgo_results(query: str, count: int) -> list[dict]:
+    # Use the DDGS context manager to create a DDGS object
+    with DDGS() as ddgs:
+        # Use the ddgs.text() method to perform the search
+        try:
+            return ddgs.text(
+                query, safesearch="moderate", max_results=count, backend="lite"
+            )
+        except RatelimitException as e:
+            log.error(f"RatelimitException: {e}")
+            return []
+
+
+async def search_duckduckgo(
     query: str, count: int, filter_list: Optional[list[str]] = None
 ) -> list[SearchResult]:
     """
@@ -22,16 +36,8 @@ def search_duckduckgo(
     Returns:
         list[SearchResult]: A list of search results
     """
-    # Use the DDGS context manager to create a DDGS object
-    search_results = []
-    with DDGS() as ddgs:
-        # Use the ddgs.text() method to perform the search
-        try:
-            search_results = ddgs.text(
-                query, safesearch="moderate", max_results=count, backend="lite"
-            )
-        except RatelimitException as e:
-            log.error(f"RatelimitException: {e}")
+    # DDGS has no async client, run it off the event loop
+    search_results = await asyncio.to_thread(get_duckduckgo_results, query, count)
     if filter_list:
         search_results = get_filtered_results(search_results, filter_list)
 
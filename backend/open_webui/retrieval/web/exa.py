@@ -2,9 +2,8 @@ import logging
 from dataclasses import dataclass
 from typing import Optional
 
-import requests
 from open_webui.env import SRC_LOG_LEVELS
-from open_webui.retrieval.web.main import SearchResult
+from open_webui.retrieval.web.main import SearchResult, request_json
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["RAG"])
@@ -19,7 +18,7 @@ class ExaResult:
     text: str
 
 
-def search_exa(
+async def search_exa(
     api_key: str,
     query: str,
     count: int,
@@ -46,11 +45,9 @@ def search_exa(
     }
 
     try:
-        response = requests.post(
-            f"{EXA_API_BASE}/search", headers=headers, json=payload
+        data = await request_json(
+            "POST", f"{EXA_API_BASE}/search", headers=headers, json=payload
         )
-        response.raise_for_status()
-        data = response.json()
 
         results = []
         for result in data["results"]:
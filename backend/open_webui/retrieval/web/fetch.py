@@ -0,0 +1,235 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+import aiohttp
+
+from open_webui.config import (
+    WEB_LOADER_CACHE_DIR,
+    WEB_LOADER_CACHE_MAX_SIZE,
+    WEB_LOADER_CACHE_TTL,
+    WEB_LOADER_PER_HOST_CONCURRENCY,
+)
+from open_webui.env import SRC_LOG_LEVELS
+from open_webui.utils.executors import WEB_EXECUTOR
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+try:
+    import lxml  # noqa: F401
+
+    DEFAULT_PARSER = "lxml"
+except ImportError:
+    DEFAULT_PARSER = "html.parser"
+
+
+def extract_metadata(soup, url):
+    metadata = {"source": url}
+    if title := soup.find("title"):
+        metadata["title"] = title.get_text()
+    if description := soup.find("meta", attrs={"name": "description"}):
+        metadata["description"] = description.get("content", "No description found.")
+    if html := soup.find("html"):
+        metadata["language"] = html.get("lang", "No language found.")
+    return metadata
+
+
+def extract_page(html: str, url: str, parser: Optional[str] = None, **kwargs) -> dict:
+    """Extracts the text and metadata out of a page, runs in a worker thread."""
+    from bs4 import BeautifulSoup
+
+    if parser is None:
+        parser = "xml" if url.endswith(".xml") else DEFAULT_PARSER
+
+    soup = BeautifulSoup(html, parser)
+    return {"text": soup.get_text(**kwargs), "metadata": extract_metadata(soup, url)}
+
+
+class WebPageCache:
+    """
+    Size bounded LRU of extracted pages on disk, one JSON file per URL. The
+    modification time of a file is its last use, so the order survives
+    restarts.
+    """
+
+    def __init__(self, directory: Path, max_size: int):
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        self.entries: OrderedDict[str, int] = OrderedDict()
+        self.size = 0
+
+        files = sorted(
+            (path for path in directory.glob("*.json") if path.is_file()),
+            key=lambda path: path.stat().st_mtime,
+        )
+        for path in files:
+            self.entries[path.stem] = path.stat().st_size
+            self.size += self.entries[path.stem]
+
+    @staticmethod
+    def get_key(url: str) -> str:
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def get(self, url: str) -> Optional[dict]:
+        name = self.get_key(url)
+        file_path = self.directory / f"{name}.json"
+        try:
+            with open(file_path, "r") as f:
+                page = json.load(f)
+            os.utime(file_path)
+        except (OSError, ValueError):
+            with self.lock:
+                if name in self.entries:
+                    self.size -= self.entries.pop(name)
+            return None
+
+        with self.lock:
+            if name in self.entries:
+                self.entries.move_to_end(name)
+        return page if page.get("url") == url else None
+
+    def put(self, url: str, page: dict):
+        name = self.get_key(url)
+        data = json.dumps(page).encode("utf-8")
+
+        tmp_file_path = self.directory / f"{name}.{uuid.uuid4()}.tmp"
+        with open(tmp_file_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_file_path, self.directory / f"{name}.json")
+
+        with self.lock:
+            if name in self.entries:
+                self.size -= self.entries.pop(name)
+            self.entries[name] = len(data)
+            self.size += len(data)
+
+            while self.size > self.max_size and len(self.entries) > 1:
+                name, size = self.entries.popitem(last=False)
+                self.size -= size
+                try:
+                    os.remove(self.directory / f"{name}.json")
+                except OSError:
+                    pass
+
+
+web_page_cache = WebPageCache(
+    Path(WEB_LOADER_CACHE_DIR), WEB_LOADER_CACHE_MAX_SIZE * 1024 * 1024
+)
+
+fetch_sessions: dict[bool, aiohttp.ClientSession] = {}
+
+
+def get_fetch_session(trust_env: bool = False) -> aiohttp.ClientSession:
+    """Shared session, at most WEB_LOADER_PER_HOST_CONCURRENCY connections per host."""
+    session = fetch_sessions.get(trust_env)
+    if session is None or session.closed:
+        session = aiohttp.ClientSession(
+            trust_env=trust_env,
+            connector=aiohttp.TCPConnector(
+                limit_per_host=max(1, WEB_LOADER_PER_HOST_CONCURRENCY)
+            ),
+        )
+        fetch_sessions[trust_env] = session
+    return session
+
+
+async def close_fetch_sessions():
+    for session in list(fetch_sessions.values()):
+        await session.close()
+    fetch_sessions.clear()
+
+
+def get_max_age(headers) -> Optional[int]:
+    """Seconds the response may be used without revalidation, None if it may not be stored."""
+    cache_control = headers.get("Cache-Control", "").lower()
+    if "no-store" in cache_control or "private" in cache_control:
+        return None
+    if "no-cache" in cache_control:
+        return 0
+    if match := re.search(r"max-age=(\d+)", cache_control):
+        return int(match.group(1))
+    return WEB_LOADER_CACHE_TTL
+
+
+async def fetch_page(
+    url: str,
+    trust_env: bool = False,
+    raise_for_status: bool = False,
+    parser: Optional[str] = None,
+    get_text_kwargs: Optional[dict] = None,
+    retries: int = 3,
+    cooldown: int = 2,
+    backoff: float = 1.5,
+    **kwargs,
+) -> dict:
+    """
+    Returns the text and metadata of a page. A cached copy is used while it is
+    fresh, and revalidated with ETag/Last-Modified once it is not.
+    """
+    page = await WEB_EXECUTOR.run(web_page_cache.get, url)
+    if page and page["expires_at"] > time.time():
+        return page
+
+    headers = dict(kwargs.pop("headers", None) or {})
+    if page and page.get("etag"):
+        headers["If-None-Match"] = page["etag"]
+    if page and page.get("last_modified"):
+        headers["If-Modified-Since"] = page["last_modified"]
+
+    for i in range(retries):
+        try:
+            async with get_fetch_session(trust_env).get(
+                url, headers=headers, **kwargs
+            ) as response:
+                max_age = get_max_age(response.headers)
+
+                if response.status == 304 and page:
+                    page["expires_at"] = time.time() + (max_age or 0)
+                    await WEB_EXECUTOR.run(web_page_cache.put, url, page)
+                    return page
+
+                if raise_for_status:
+                    response.raise_for_status()
+                html = await response.text(errors="replace")
+                break
+        except aiohttp.ClientConnectionError as e:
+            if i == retries - 1:
+                raise
+            log.warning(
+                f"Error fetching {url} with attempt {i + 1}/{retries}: {e}. Retrying..."
+            )
+            await asyncio.sleep(cooldown * backoff**i)
+
+    page = await WEB_EXECUTOR.run(
+        extract_page, html, url, parser, **(get_text_kwargs or {})
+    )
+
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    if (
+        response.status == 200
+        and max_age is not None
+        and (max_age > 0 or etag or last_modified)
+    ):
+        page = {
+            **page,
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "expires_at": time.time() + max_age,
+        }
+        await WEB_EXECUTOR.run(web_page_cache.put, url, page)
+    return page
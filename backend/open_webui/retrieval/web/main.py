@@ -1,3 +1,5 @@
+import asyncio
+import aiohttp
 import validators
 
 from typing import Optional
@@ -5,6 +7,8 @@ from urllib.parse import urlparse
 
 from pydantic import BaseModel
 
+from open_webui.env import AIOHTTP_CLIENT_TIMEOUT, WEB_SEARCH_MAX_CONCURRENT_QUERIES
+
 
 def get_filtered_results(results, filter_list):
     if not filter_list:
@@ -24,3 +28,35 @@ class SearchResult(BaseModel):
     link: str
     title: Optional[str]
     snippet: Optional[str]
+
+
+search_session: Optional[aiohttp.ClientSession] = None
+search_semaphore: Optional[asyncio.Semaphore] = None
+
+
+def get_search_session() -> aiohttp.ClientSession:
+    global search_session
+    if search_session is None or search_session.closed:
+        search_session = aiohttp.ClientSession(
+            trust_env=True, timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT)
+        )
+    return search_session
+
+
+def get_search_semaphore() -> asyncio.Semaphore:
+    global search_semaphore
+    if search_semaphore is None:
+        search_semaphore = asyncio.Semaphore(max(1, WEB_SEARCH_MAX_CONCURRENT_QUERIES))
+    return search_semaphore
+
+
+async def close_search_session():
+    if search_session is not None:
+        await search_session.close()
+
+
+async def request_json(method: str, url: str, **kwargs):
+    """Sends a request with the shared search session and returns the JSON body."""
+    async with get_search_session().request(method, url, **kwargs) as response:
+        response.raise_for_status()
+        return await response.json(content_type=None)
@@ -1,15 +1,18 @@
 import logging
 from typing import Optional, List
-import requests
 
-from open_webui.retrieval.web.main import SearchResult, get_filtered_results
+from open_webui.retrieval.web.main import (
+    SearchResult,
+    get_filtered_results,
+    request_json,
+)
 from open_webui.env import SRC_LOG_LEVELS
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["RAG"])
 
 
-def search_perplexity(
+async def search_perplexity(
     api_key: str,
     query: str,
     count: int,
@@ -51,10 +54,7 @@ def search_perplexity(
         }
 
         # Make the API request
-        response = requests.request("POST", url, json=payload, headers=headers)
-
-        # Parse the JSON response
-        json_response = response.json()
+        json_response = await request_json("POST", url, json=payload, headers=headers)
 
         # Extract citations from the response
         citations = json_response.get("citations", [])
@@ -2,15 +2,18 @@ import logging
 from typing import Optional
 from urllib.parse import urlencode
 
-import requests
-from open_webui.retrieval.web.main import SearchResult, get_filtered_results
+from open_webui.retrieval.web.main import (
+    SearchResult,
+    get_filtered_results,
+    request_json,
+)
 from open_webui.env import SRC_LOG_LEVELS
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["RAG"])
 
 
-def search_serply(
+async def search_serply(
     api_key: str,
     query: str,
     count: int,
@@ -48,10 +51,7 @@ def search_serply(
         "X-Proxy-Location": proxy_location,
     }
 
-    response = requests.request("GET", url, headers=headers)
-    response.raise_for_status()
-
-    json_response = response.json()
+    json_response = await request_json("GET", url, headers=headers)
     log.info(f"results from serply search: {json_response}")
 
     results = sorted(
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import json
 from typing import Optional, List
@@ -10,7 +11,7 @@ log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["RAG"])
 
 
-def search_sougou(
+async def search_sougou(
     sougou_api_sid: str,
     sougou_api_sk: str,
     query: str,
@@ -35,12 +36,11 @@ def search_sougou(
         common_client = CommonClient(
             "tms", "2020-12-29", cred, "", profile=client_profile
         )
-        results = [
-            json.loads(page)
-            for page in common_client.call_json("SearchPro", json.loads(params))[
-                "Response"
-            ]["Pages"]
-        ]
+        # The Tencent Cloud SDK is blocking, run it off the event loop
+        response = await asyncio.to_thread(
+            common_client.call_json, "SearchPro", json.loads(params)
+        )
+        results = [json.loads(page) for page in response["Response"]["Pages"]]
         sorted_results = sorted(
             results, key=lambda x: x.get("scour", 0.0), reverse=True
         )
@@ -1,15 +1,14 @@
 import logging
 from typing import Optional
 
-import requests
-from open_webui.retrieval.web.main import SearchResult
+from open_webui.retrieval.web.main import SearchResult, request_json
 from open_webui.env import SRC_LOG_LEVELS
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["RAG"])
 
 
-def search_tavily(
+async def search_tavily(
     api_key: str,
     query: str,
     count: int,
@@ -27,10 +26,7 @@ def search_tavily(
     """
     url = "https://api.tavily.com/search"
     data = {"query": query, "api_key": api_key}
-    response = requests.post(url, json=data)
-    response.raise_for_status()
-
-    json_response = response.json()
+    json_response = await request_json("POST", url, json=data)
 
     raw_search_results = json_response.get("results", [])
 
@@ -25,6 +25,8 @@ from langchain_community.document_loaders.firecrawl import FireCrawlLoader
 from langchain_community.document_loaders.base import BaseLoader
 from langchain_core.documents import Document
 from open_webui.retrieval.loaders.tavily import TavilyLoader
+from open_webui.retrieval.web.fetch import extract_metadata, fetch_page
+from open_webui.retrieval.web.browser import BrowserPool, get_browser_pool
 from open_webui.constants import ERROR_MESSAGES
 from open_webui.config import (
     ENABLE_RAG_LOCAL_WEB_FETCH,
@@ -88,17 +90,6 @@ def resolve_hostname(hostname):
     return ipv4_addresses, ipv6_addresses
 
 
-def extract_metadata(soup, url):
-    metadata = {"source": url}
-    if title := soup.find("title"):
-        metadata["title"] = title.get_text()
-    if description := soup.find("meta", attrs={"name": "description"}):
-        metadata["description"] = description.get("content", "No description found.")
-    if html := soup.find("html"):
-        metadata["language"] = html.get("lang", "No language found.")
-    return metadata
-
-
 def verify_ssl_cert(url: str) -> bool:
     """Verify SSL certificate for the given URL."""
     if not url.startswith("https://"):
@@ -449,36 +440,46 @@ class SafePlaywrightURLLoader(PlaywrightURLLoader, RateLimitMixin, URLProcessing
                     raise e
             browser.close()
 
-    async def alazy_load(self) -> AsyncIterator[Document]:
-        """Safely load URLs asynchronously with support for remote browser."""
-        from playwright.async_api import async_playwright
-
-        async with async_playwright() as p:
-            # Use remote browser if ws_endpoint is provided, otherwise use local browser
-            if self.playwright_ws_url:
-                browser = await p.chromium.connect(self.playwright_ws_url)
-            else:
-                browser = await p.chromium.launch(
-                    headless=self.headless, proxy=self.proxy
-                )
-
-            for url in self.urls:
+    async def _load_page(self, pool: BrowserPool, url: str) -> Optional[Document]:
+        try:
+            await self._safe_process_url(url)
+            async with pool.context() as context:
+                page = await context.new_page()
+                page.set_default_timeout(self.playwright_timeout)
                 try:
-                    await self._safe_process_url(url)
-                    page = await browser.new_page()
                     response = await page.goto(url, timeout=self.playwright_timeout)
                     if response is None:
                         raise ValueError(f"page.goto() returned None for url {url}")
 
-                    text = await self.evaluator.evaluate_async(page, browser, response)
-                    metadata = {"source": url}
-                    yield Document(page_content=text, metadata=metadata)
-                except Exception as e:
-                    if self.continue_on_failure:
-                        log.exception(f"Error loading {url}: {e}")
-                        continue
-                    raise e
-            await browser.close()
+                    text = await asyncio.wait_for(
+                        self.evaluator.evaluate_async(page, pool.browser, response),
+                        timeout=self.playwright_timeout / 1000,
+                    )
+                finally:
+                    await page.close()
+            return Document(page_content=text, metadata={"source": url})
+        except Exception as e:
+            if self.continue_on_failure:
+                log.exception(f"Error loading {url}: {e}")
+                return None
+            raise e
+
+    async def alazy_load(self) -> AsyncIterator[Document]:
+        """Safely load URLs concurrently with the shared browser pool."""
+        # We'll use the remote browser if playwright_ws_url is provided
+        pool = await get_browser_pool(
+            ws_url=self.playwright_ws_url,
+            headless=self.headless,
+            proxy=self.proxy,
+            ignore_https_errors=not self.verify_ssl,
+        )
+
+        documents = await asyncio.gather(
+            *[self._load_page(pool, url) for url in self.urls]
+        )
+        for document in documents:
+            if document is not None:
+                yield document
 
 
 class SafeWebBaseLoader(WebBaseLoader):
@@ -493,61 +494,6 @@ class SafeWebBaseLoader(WebBaseLoader):
         super().__init__(*args, **kwargs)
         self.trust_env = trust_env
 
-    async def _fetch(
-        self, url: str, retries: int = 3, cooldown: int = 2, backoff: float = 1.5
-    ) -> str:
-        async with aiohttp.ClientSession(trust_env=self.trust_env) as session:
-            for i in range(retries):
-                try:
-                    kwargs: Dict = dict(
-                        headers=self.session.headers,
-                        cookies=self.session.cookies.get_dict(),
-                    )
-                    if not self.session.verify:
-                        kwargs["ssl"] = False
-
-                    async with session.get(
-                        url, **(self.requests_kwargs | kwargs)
-                    ) as response:
-                        if self.raise_for_status:
-                            response.raise_for_status()
-                        return await response.text()
-                except aiohttp.ClientConnectionError as e:
-                    if i == retries - 1:
-                        raise
-                    else:
-                        log.warning(
-                            f"Error fetching {url} with attempt "
-                            f"{i + 1}/{retries}: {e}. Retrying..."
-                        )
-                        await asyncio.sleep(cooldown * backoff**i)
-        raise ValueError("retry count exceeded")
-
-    def _unpack_fetch_results(
-        self, results: Any, urls: List[str], parser: Union[str, None] = None
-    ) -> List[Any]:
-        """Unpack fetch results into BeautifulSoup objects."""
-        from bs4 import BeautifulSoup
-
-        final_results = []
-        for i, result in enumerate(results):
-            url = urls[i]
-            if parser is None:
-                if url.endswith(".xml"):
-                    parser = "xml"
-                else:
-                    parser = self.default_parser
-                self._check_parser(parser)
-            final_results.append(BeautifulSoup(result, parser, **self.bs_kwargs))
-        return final_results
-
-    async def ascrape_all(
-        self, urls: List[str], parser: Union[str, None] = None
-    ) -> List[Any]:
-        """Async fetch all urls, then return soups for all results."""
-        results = await self.fetch_all(urls)
-        return self._unpack_fetch_results(results, urls, parser=parser)
-
     def lazy_load(self) -> Iterator[Document]:
         """Lazy load text from the url(s) in web_path with error handling."""
         for path in self.web_paths:
@@ -563,21 +509,40 @@ class SafeWebBaseLoader(WebBaseLoader):
                 # Log the error and continue with the next URL
                 log.exception(f"Error loading {path}: {e}")
 
+    async def _fetch_page(
+        self, url: str, semaphore: asyncio.Semaphore
+    ) -> Optional[dict]:
+        async with semaphore:
+            kwargs: Dict = dict(
+                headers=self.session.headers,
+                cookies=self.session.cookies.get_dict(),
+            )
+            if not self.session.verify:
+                kwargs["ssl"] = False
+
+            try:
+                return await fetch_page(
+                    url,
+                    trust_env=self.trust_env,
+                    raise_for_status=self.raise_for_status,
+                    get_text_kwargs=self.bs_get_text_kwargs,
+                    **(self.requests_kwargs | kwargs),
+                )
+            except Exception as e:
+                if not self.continue_on_failure:
+                    raise e
+                log.warning(f"Error fetching {url}, skipping: {e}")
+                return None
+
     async def alazy_load(self) -> AsyncIterator[Document]:
         """Async lazy load text from the url(s) in web_path."""
-        results = await self.ascrape_all(self.web_paths)
-        for path, soup in zip(self.web_paths, results):
-            text = soup.get_text(**self.bs_get_text_kwargs)
-            metadata = {"source": path}
-            if title := soup.find("title"):
-                metadata["title"] = title.get_text()
-            if description := soup.find("meta", attrs={"name": "description"}):
-                metadata["description"] = description.get(
-                    "content", "No description found."
-                )
-            if html := soup.find("html"):
-                metadata["language"] = html.get("lang", "No language found.")
-            yield Document(page_content=text, metadata=metadata)
+        semaphore = asyncio.Semaphore(self.requests_per_second)
+        pages = await asyncio.gather(
+            *[self._fetch_page(path, semaphore) for path in self.web_paths]
+        )
+        for page in pages:
+            if page is not None:
+                yield Document(page_content=page["text"], metadata=page["metadata"])
 
     async def aload(self) -> list[Document]:
         """Load data into Document objects."""
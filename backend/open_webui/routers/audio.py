@@ -1,10 +1,18 @@
+import asyncio
 import hashlib
+import io
 import json
 import logging
 import os
+import re
+import shutil
+import subprocess
+import threading
 import uuid
+from collections import OrderedDict, deque
 from functools import lru_cache
 from pathlib import Path
+from typing import Optional
 from pydub import AudioSegment
 from pydub.silence import split_on_silence
 
@@ -18,13 +26,15 @@ from fastapi import (
     FastAPI,
     File,
     HTTPException,
+    Query,
     Request,
     UploadFile,
     status,
     APIRouter,
 )
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from pydantic import BaseModel
 
 
@@ -33,6 +43,10 @@ from open_webui.config import (
     WHISPER_MODEL_AUTO_UPDATE,
     WHISPER_MODEL_DIR,
     CACHE_DIR,
+    AUDIO_STT_CHUNK_DURATION,
+    AUDIO_STT_CHUNK_WORKERS,
+    AUDIO_TTS_CACHE_MAX_SIZE,
+    AUDIO_TTS_STREAM_CONCURRENCY,
 )
 
 from open_webui.constants import ERROR_MESSAGES
@@ -43,6 +57,8 @@ from open_webui.env import (
     DEVICE_TYPE,
     ENABLE_FORWARD_USER_INFO_HEADERS,
 )
+from open_webui.utils.misc import calculate_sha256, calculate_sha256_string
+from open_webui.utils.executors import MEDIA_EXECUTOR
 
 
 router = APIRouter()
@@ -59,6 +75,8 @@ log.setLevel(SRC_LOG_LEVELS["AUDIO"])
 SPEECH_CACHE_DIR = CACHE_DIR / "audio" / "speech"
 SPEECH_CACHE_DIR.mkdir(parents=True, exist_ok=True)
 
+TRANSCRIPTION_CACHE_DIR = CACHE_DIR / "audio" / "transcriptions" / "cache"
+TRANSCRIPTION_CACHE_DIR.mkdir(parents=True, exist_ok=True)
 
 ##########################################
 #
@@ -67,7 +85,17 @@ SPEECH_CACHE_DIR.mkdir(parents=True, exist_ok=True)
 ##########################################
 
 from pydub import AudioSegment
-from pydub.utils import mediainfo
+from pydub.utils import get_encoder_name, mediainfo
+
+
+def run_ffmpeg(args: list[str]) -> subprocess.CompletedProcess:
+    # ffmpeg streams through the file, pydub would decode all of it into memory
+    return subprocess.run(
+        [get_encoder_name(), "-hide_banner", "-nostdin", *args],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
 
 
 def get_audio_format(file_path):
@@ -92,9 +120,98 @@ def get_audio_format(file_path):
 
 def convert_audio_to_wav(file_path, output_path, conversion_type):
     """Convert MP4/OGG audio file to WAV format."""
-    audio = AudioSegment.from_file(file_path, format=conversion_type)
-    audio.export(output_path, format="wav")
-    log.info(f"Converted {file_path} to {output_path}")
+    run_ffmpeg(["-y", "-i", file_path, "-f", "wav", output_path])
+    log.info(f"Converted {file_path} ({conversion_type}) to {output_path}")
+
+
+def get_audio_duration(file_path) -> float:
+    try:
+        return float(mediainfo(file_path).get("duration", 0))
+    except Exception:
+        return 0.0
+
+
+def detect_silences(file_path) -> list[tuple[float, float]]:
+    """Returns the (start, end) of the silences in the audio, in seconds."""
+    result = run_ffmpeg(
+        ["-i", file_path, "-af", "silencedetect=noise=-30dB:d=0.5", "-f", "null", "-"]
+    )
+    starts = re.findall(r"silence_start: ([\d.]+)", result.stderr)
+    ends = re.findall(r"silence_end: ([\d.]+)", result.stderr)
+    return [(float(start), float(end)) for start, end in zip(starts, ends)]
+
+
+def get_chunk_ranges(
+    duration: float, silences: list[tuple[float, float]], max_duration: float
+) -> list[tuple[float, float]]:
+    """
+    Splits the audio into (start, end) ranges of at most max_duration seconds,
+    cutting in the middle of the last silence before the limit when there is
+    one in the second half of the chunk.
+    """
+    ranges = []
+    start = 0.0
+    while duration - start > max_duration:
+        limit = start + max_duration
+        cut = limit
+        for silence_start, silence_end in silences:
+            middle = (silence_start + silence_end) / 2
+            if start + max_duration / 2 < middle <= limit:
+                cut = middle
+        ranges.append((start, cut))
+        start = cut
+    ranges.append((start, duration))
+    return ranges
+
+
+def split_audio(file_path, max_duration: int) -> list[str]:
+    """
+    Splits a long recording at silences into 16 kHz mono WAV chunks. Returns
+    the chunk paths, or an empty list if the recording is short enough.
+    """
+    duration = get_audio_duration(file_path)
+    if max_duration <= 0 or duration <= max_duration:
+        return []
+
+    ranges = get_chunk_ranges(duration, detect_silences(file_path), max_duration)
+
+    file_dir = os.path.dirname(file_path)
+    id = os.path.splitext(os.path.basename(file_path))[0]
+    chunks = []
+    try:
+        for idx, (start, end) in enumerate(ranges):
+            chunk_path = f"{file_dir}/{id}_chunk{idx}.wav"
+            run_ffmpeg(
+                [
+                    "-y",
+                    "-ss",
+                    f"{start:.3f}",
+                    "-t",
+                    f"{end - start:.3f}",
+                    "-i",
+                    file_path,
+                    "-ac",
+                    "1",
+                    "-ar",
+                    "16000",
+                    chunk_path,
+                ]
+            )
+            chunks.append(chunk_path)
+    except Exception:
+        remove_files(chunks)
+        raise
+
+    log.info(f"Split {file_path} ({duration:.0f}s) into {len(chunks)} chunks")
+    return chunks
+
+
+def remove_files(file_paths: list[str]):
+    for file_path in file_paths:
+        try:
+            os.remove(file_path)
+        except OSError:
+            pass
 
 
 def set_faster_whisper_model(model: str, auto_update: bool = False):
@@ -106,6 +223,8 @@ def set_faster_whisper_model(model: str, auto_update: bool = False):
             "model_size_or_path": model,
             "device": DEVICE_TYPE if DEVICE_TYPE and DEVICE_TYPE == "cuda" else "cpu",
             "compute_type": "int8",
+            # Lets the chunks of a long recording be transcribed in parallel
+            "num_workers": max(1, AUDIO_STT_CHUNK_WORKERS),
             "download_root": WHISPER_MODEL_DIR,
             "local_files_only": not auto_update,
         }
@@ -216,6 +335,9 @@ async def update_audio_config(
             form_data.stt.WHISPER_MODEL, WHISPER_MODEL_AUTO_UPDATE
         )
 
+    if request.app.state.config.TTS_ENGINE == "transformers":
+        await run_in_threadpool(load_speech_pipeline, request.app)
+
     return {
         "tts": {
             "OPENAI_API_BASE_URL": request.app.state.config.TTS_OPENAI_API_BASE_URL,
@@ -242,46 +364,161 @@ async def update_audio_config(
     }
 
 
-def load_speech_pipeline(request):
+class SpeechCache:
+    """
+    Size bounded LRU of synthesized speech files. The modification time of a
+    file is its last use, so the order survives restarts. The size of an entry
+    counts its audio file and its .json payload sidecar.
+    """
+
+    SUFFIXES = (".mp3", ".json")
+
+    def __init__(self, directory: Path, max_size: int):
+        self.directory = directory
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        self.entries: OrderedDict[str, int] = OrderedDict()
+        self.size = 0
+
+        files = sorted(
+            (path for path in directory.glob("*.mp3") if path.is_file()),
+            key=lambda path: path.stat().st_mtime,
+        )
+        for path in files:
+            self.entries[path.stem] = self.get_entry_size(path.stem)
+            self.size += self.entries[path.stem]
+
+    def get_entry_size(self, name: str) -> int:
+        size = 0
+        for suffix in self.SUFFIXES:
+            try:
+                size += (self.directory / f"{name}{suffix}").stat().st_size
+            except OSError:
+                pass
+        return size
+
+    @staticmethod
+    def get_key(request: Request, payload: dict) -> str:
+        return hashlib.sha256(
+            json.dumps(
+                [
+                    payload,
+                    request.app.state.config.TTS_ENGINE,
+                    request.app.state.config.TTS_MODEL,
+                ],
+                sort_keys=True,
+            ).encode("utf-8")
+        ).hexdigest()
+
+    def get(self, name: str) -> Optional[Path]:
+        file_path = self.directory / f"{name}.mp3"
+        try:
+            os.utime(file_path)
+        except OSError:
+            with self.lock:
+                if name in self.entries:
+                    self.size -= self.entries.pop(name)
+            return None
+
+        with self.lock:
+            if name in self.entries:
+                self.entries.move_to_end(name)
+            else:
+                # Written by another worker
+                self.entries[name] = self.get_entry_size(name)
+                self.size += self.entries[name]
+        return file_path
+
+    def put(self, name: str, data: bytes, payload: dict) -> Path:
+        file_path = self.directory / f"{name}.mp3"
+        tmp_file_path = self.directory / f"{name}.{uuid.uuid4()}.tmp"
+        with open(tmp_file_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_file_path, file_path)
+
+        payload_data = json.dumps(payload).encode("utf-8")
+        with open(self.directory / f"{name}.json", "wb") as f:
+            f.write(payload_data)
+
+        with self.lock:
+            if name in self.entries:
+                self.size -= self.entries.pop(name)
+            self.entries[name] = len(data) + len(payload_data)
+            self.size += self.entries[name]
+            self._evict(keep=name)
+        return file_path
+
+    def _evict(self, keep: str):
+        if self.max_size <= 0:
+            return
+
+        while self.size > self.max_size and len(self.entries) > 1:
+            name, size = next(iter(self.entries.items()))
+            if name == keep:
+                break
+            del self.entries[name]
+            self.size -= size
+            for suffix in self.SUFFIXES:
+                try:
+                    os.remove(self.directory / f"{name}{suffix}")
+                except OSError:
+                    pass
+
+
+speech_cache = SpeechCache(SPEECH_CACHE_DIR, AUDIO_TTS_CACHE_MAX_SIZE * 1024 * 1024)
+
+speech_pipeline_lock = threading.Lock()
+
+
+def load_speech_pipeline(app: FastAPI):
     from transformers import pipeline
     from datasets import load_dataset
 
-    if request.app.state.speech_synthesiser is None:
-        request.app.state.speech_synthesiser = pipeline(
-            "text-to-speech", "microsoft/speecht5_tts"
-        )
+    with speech_pipeline_lock:
+        if app.state.speech_synthesiser is None:
+            app.state.speech_synthesiser = pipeline(
+                "text-to-speech", "microsoft/speecht5_tts"
+            )
 
-    if request.app.state.speech_speaker_embeddings_dataset is None:
-        request.app.state.speech_speaker_embeddings_dataset = load_dataset(
-            "Matthijs/cmu-arctic-xvectors", split="validation"
-        )
+        if app.state.speech_speaker_embeddings_dataset is None:
+            app.state.speech_speaker_embeddings_dataset = load_dataset(
+                "Matthijs/cmu-arctic-xvectors", split="validation"
+            )
 
 
-@router.post("/speech")
-async def speech(request: Request, user=Depends(get_verified_user)):
-    body = await request.body()
-    name = hashlib.sha256(
-        body
-        + str(request.app.state.config.TTS_ENGINE).encode("utf-8")
-        + str(request.app.state.config.TTS_MODEL).encode("utf-8")
-    ).hexdigest()
+def synthesize_speech_transformers(app: FastAPI, text: str) -> bytes:
+    import torch
+    import soundfile as sf
 
-    file_path = SPEECH_CACHE_DIR.joinpath(f"{name}.mp3")
-    file_body_path = SPEECH_CACHE_DIR.joinpath(f"{name}.json")
+    load_speech_pipeline(app)
 
-    # Check if the file already exists in the cache
-    if file_path.is_file():
-        return FileResponse(file_path)
+    embeddings_dataset = app.state.speech_speaker_embeddings_dataset
 
-    payload = None
+    speaker_index = 6799
     try:
-        payload = json.loads(body.decode("utf-8"))
-    except Exception as e:
-        log.exception(e)
-        raise HTTPException(status_code=400, detail="Invalid JSON payload")
+        speaker_index = embeddings_dataset["filename"].index(app.state.config.TTS_MODEL)
+    except Exception:
+        pass
+
+    speaker_embedding = torch.tensor(
+        embeddings_dataset[speaker_index]["xvector"]
+    ).unsqueeze(0)
 
+    speech = app.state.speech_synthesiser(
+        text,
+        forward_params={"speaker_embeddings": speaker_embedding},
+    )
+
+    buffer = io.BytesIO()
+    sf.write(buffer, speech["audio"], samplerate=speech["sampling_rate"], format="MP3")
+    return buffer.getvalue()
+
+
+async def synthesize_speech(request: Request, payload: dict, user) -> bytes:
+    """Synthesizes the payload's input with the configured engine."""
+    r = None
     if request.app.state.config.TTS_ENGINE == "openai":
-        payload["model"] = request.app.state.config.TTS_MODEL
+        payload = {**payload, "model": request.app.state.config.TTS_MODEL}
 
         try:
             timeout = aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT)
@@ -307,14 +544,7 @@ async def speech(request: Request, user=Depends(get_verified_user)):
                     },
                 ) as r:
                     r.raise_for_status()
-
-                    async with aiofiles.open(file_path, "wb") as f:
-                        await f.write(await r.read())
-
-                    async with aiofiles.open(file_body_path, "w") as f:
-                        await f.write(json.dumps(payload))
-
-            return FileResponse(file_path)
+                    return await r.read()
 
         except Exception as e:
             log.exception(e)
@@ -362,14 +592,7 @@ async def speech(request: Request, user=Depends(get_verified_user)):
                     },
                 ) as r:
                     r.raise_for_status()
-
-                    async with aiofiles.open(file_path, "wb") as f:
-                        await f.write(await r.read())
-
-                    async with aiofiles.open(file_body_path, "w") as f:
-                        await f.write(json.dumps(payload))
-
-            return FileResponse(file_path)
+                    return await r.read()
 
         except Exception as e:
             log.exception(e)
@@ -389,12 +612,6 @@ async def speech(request: Request, user=Depends(get_verified_user)):
             )
 
     elif request.app.state.config.TTS_ENGINE == "azure":
-        try:
-            payload = json.loads(body.decode("utf-8"))
-        except Exception as e:
-            log.exception(e)
-            raise HTTPException(status_code=400, detail="Invalid JSON payload")
-
         region = request.app.state.config.TTS_AZURE_SPEECH_REGION
         language = request.app.state.config.TTS_VOICE
         locale = "-".join(request.app.state.config.TTS_VOICE.split("-")[:1])
@@ -418,14 +635,7 @@ async def speech(request: Request, user=Depends(get_verified_user)):
                     data=data,
                 ) as r:
                     r.raise_for_status()
-
-                    async with aiofiles.open(file_path, "wb") as f:
-                        await f.write(await r.read())
-
-                    async with aiofiles.open(file_body_path, "w") as f:
-                        await f.write(json.dumps(payload))
-
-                    return FileResponse(file_path)
+                    return await r.read()
 
         except Exception as e:
             log.exception(e)
@@ -445,50 +655,236 @@ async def speech(request: Request, user=Depends(get_verified_user)):
             )
 
     elif request.app.state.config.TTS_ENGINE == "transformers":
-        payload = None
+        return await run_in_threadpool(
+            synthesize_speech_transformers, request.app, payload["input"]
+        )
+
+    raise HTTPException(
+        status_code=400,
+        detail=ERROR_MESSAGES.DEFAULT("Text-to-speech engine not configured"),
+    )
+
+
+async def get_speech_file(request: Request, payload: dict, user) -> Path:
+    """Returns the cached speech for the payload, synthesizing it if needed."""
+    name = speech_cache.get_key(request, payload)
+    if file_path := speech_cache.get(name):
+        return file_path
+
+    data = await synthesize_speech(request, payload, user)
+    return await run_in_threadpool(speech_cache.put, name, data, payload)
+
+
+def split_speech_text(text: str, split_on: str) -> list[str]:
+    if split_on == "paragraphs":
+        parts = re.split(r"\n\s*\n", text)
+    elif split_on == "punctuation":
+        parts = re.split(r"(?<=[.!?。！？])\s+", text)
+    else:
+        parts = [text]
+    return [part.strip() for part in parts if part.strip()]
+
+
+def get_speech_payload(body: bytes) -> dict:
+    try:
+        payload = json.loads(body.decode("utf-8"))
+    except Exception as e:
+        log.exception(e)
+        raise HTTPException(status_code=400, detail="Invalid JSON payload")
+
+    if not isinstance(payload, dict) or not isinstance(payload.get("input"), str):
+        raise HTTPException(status_code=400, detail="Invalid JSON payload")
+    return payload
+
+
+@router.post("/speech")
+async def speech(request: Request, user=Depends(get_verified_user)):
+    payload = get_speech_payload(await request.body())
+    return FileResponse(await get_speech_file(request, payload, user))
+
+
+def is_mp3_speech(request: Request, payload: dict) -> bool:
+    """MP3 frames can be concatenated, most other formats (e.g. WAV) can not."""
+    engine = request.app.state.config.TTS_ENGINE
+    if engine == "openai":
+        return payload.get("response_format", "mp3") == "mp3"
+    if engine == "azure":
+        output_format = request.app.state.config.TTS_AZURE_SPEECH_OUTPUT_FORMAT
+        return output_format.lower().endswith("-mp3")
+    return True
+
+
+@router.post("/speech/stream")
+async def speech_stream(request: Request, user=Depends(get_verified_user)):
+    """
+    Splits the input into sentences and streams their audio in order as soon
+    as each is ready. The following sentences are synthesized meanwhile, and
+    every sentence is cached on its own.
+
+    Only MP3 output is streamed, other formats are returned as a single file.
+    """
+    payload = get_speech_payload(await request.body())
+    if not is_mp3_speech(request, payload):
+        return FileResponse(await get_speech_file(request, payload, user))
+
+    sentences = split_speech_text(
+        payload["input"], request.app.state.config.TTS_SPLIT_ON
+    )
+    if not sentences:
+        raise HTTPException(status_code=400, detail="Invalid JSON payload")
+
+    semaphore = asyncio.Semaphore(max(1, AUDIO_TTS_STREAM_CONCURRENCY))
+
+    async def get_sentence_file(sentence):
+        async with semaphore:
+            return await get_speech_file(request, {**payload, "input": sentence}, user)
+
+    tasks = [asyncio.create_task(get_sentence_file(sentence)) for sentence in sentences]
+
+    # Wait for the first sentence, so a failing engine is still an HTTP error
+    try:
+        await asyncio.wait([tasks[0]])
+        tasks[0].result()
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+    async def stream():
         try:
-            payload = json.loads(body.decode("utf-8"))
+            for task in tasks:
+                async with aiofiles.open(await task, "rb") as f:
+                    yield await f.read()
         except Exception as e:
             log.exception(e)
-            raise HTTPException(status_code=400, detail="Invalid JSON payload")
+        finally:
+            for task in tasks:
+                task.cancel()
 
-        import torch
-        import soundfile as sf
+    return StreamingResponse(stream(), media_type="audio/mpeg")
 
-        load_speech_pipeline(request)
 
-        embeddings_dataset = request.app.state.speech_speaker_embeddings_dataset
+def get_transcription_cache_key(request: Request, file_path) -> str:
+    """The transcript depends on the audio, the engine, the model and the language."""
+    config = request.app.state.config
+    engine = config.STT_ENGINE
+    if engine == "":
+        settings = [config.WHISPER_MODEL, config.WHISPER_VAD_FILTER]
+    elif engine == "azure":
+        settings = [config.AUDIO_STT_AZURE_LOCALES]
+    else:
+        settings = [config.STT_MODEL]
 
-        speaker_index = 6799
-        try:
-            speaker_index = embeddings_dataset["filename"].index(
-                request.app.state.config.TTS_MODEL
-            )
-        except Exception:
-            pass
+    audio_hash = calculate_sha256(file_path, 1024 * 1024)
+    return calculate_sha256_string(json.dumps([audio_hash, engine, *settings]))
+
+
+def get_cached_transcription(
+    request: Request, file_path
+) -> tuple[Path, Optional[dict]]:
+    """Returns the cache file of the audio's transcript, and the transcript if cached."""
+    cache_file = (
+        TRANSCRIPTION_CACHE_DIR
+        / f"{get_transcription_cache_key(request, file_path)}.json"
+    )
+    if cache_file.is_file():
+        log.info(f"Using cached transcript {cache_file.name}")
+        with open(cache_file, "r") as f:
+            return cache_file, json.load(f)
+    return cache_file, None
+
+
+def save_transcription(file_path, cache_file: Path, data: dict):
+    if not cache_file.is_file():
+        with open(cache_file, "w") as f:
+            json.dump(data, f)
+
+    # save the transcript to a json file
+    file_dir = os.path.dirname(file_path)
+    id = os.path.basename(file_path).split(".")[0]
+    with open(f"{file_dir}/{id}.json", "w") as f:
+        json.dump(data, f)
 
-        speaker_embedding = torch.tensor(
-            embeddings_dataset[speaker_index]["xvector"]
-        ).unsqueeze(0)
 
-        speech = request.app.state.speech_synthesiser(
-            payload["input"],
-            forward_params={"speaker_embeddings": speaker_embedding},
+def prepare_transcription(request: Request, file_path) -> list[str]:
+    """Loads the whisper model if needed and splits long recordings into chunks."""
+    if (
+        request.app.state.config.STT_ENGINE == ""
+        and request.app.state.faster_whisper_model is None
+    ):
+        # Loaded once up front, not by every chunk
+        request.app.state.faster_whisper_model = set_faster_whisper_model(
+            request.app.state.config.WHISPER_MODEL
         )
+    return split_audio(file_path, AUDIO_STT_CHUNK_DURATION)
 
-        sf.write(file_path, speech["audio"], samplerate=speech["sampling_rate"])
 
-        async with aiofiles.open(file_body_path, "w") as f:
-            await f.write(json.dumps(payload))
+def iter_chunk_futures(request: Request, chunks: list[str]):
+    """
+    Submits the chunks to the media executor, at most AUDIO_STT_CHUNK_WORKERS
+    of them at a time, and yields their futures in order. Must not be called
+    from a media executor thread, where the chunks would run inline one by
+    one. Closing the generator cancels the chunks not started yet.
+    """
+    futures = deque()
+    next_idx = 0
+    try:
+        while futures or next_idx < len(chunks):
+            while next_idx < len(chunks) and len(futures) < max(
+                1, AUDIO_STT_CHUNK_WORKERS
+            ):
+                futures.append(
+                    MEDIA_EXECUTOR.submit(transcribe_file, request, chunks[next_idx])
+                )
+                next_idx += 1
+            yield futures[0]
+            futures.popleft()
+    finally:
+        for future in futures:
+            future.cancel()
+
 
-        return FileResponse(file_path)
+def get_partial_transcription(texts: list[str], chunks: list[str]) -> dict:
+    return {
+        "text": " ".join(text for text in texts if text),
+        "chunk": len(texts),
+        "chunks": len(chunks),
+    }
 
 
 def transcribe(request: Request, file_path):
+    """
+    Transcribes the audio file, reusing the transcript of the same audio when
+    it was transcribed before with the same settings. Long recordings are
+    split into chunks that are transcribed in parallel.
+    """
     log.info(f"transcribe: {file_path}")
+
+    cache_file, data = get_cached_transcription(request, file_path)
+    if data is None:
+        chunks = prepare_transcription(request, file_path)
+        if chunks:
+            chunk_futures = iter_chunk_futures(request, chunks)
+            texts = []
+            try:
+                for future in chunk_futures:
+                    texts.append(future.result().get("text", "").strip())
+            finally:
+                chunk_futures.close()
+                remove_files(chunks)
+
+            data = {"text": get_partial_transcription(texts, chunks)["text"]}
+        else:
+            data = transcribe_file(request, file_path)
+
+    save_transcription(file_path, cache_file, data)
+
+    log.debug(data)
+    return data
+
+
+def transcribe_file(request: Request, file_path):
     filename = os.path.basename(file_path)
-    file_dir = os.path.dirname(file_path)
-    id = filename.split(".")[0]
 
     if request.app.state.config.STT_ENGINE == "":
         if request.app.state.faster_whisper_model is None:
@@ -508,15 +904,7 @@ def transcribe(request: Request, file_path):
         )
 
         transcript = "".join([segment.text for segment in list(segments)])
-        data = {"text": transcript.strip()}
-
-        # save the transcript to a json file
-        transcript_file = f"{file_dir}/{id}.json"
-        with open(transcript_file, "w") as f:
-            json.dump(data, f)
-
-        log.debug(data)
-        return data
+        return {"text": transcript.strip()}
     elif request.app.state.config.STT_ENGINE == "openai":
         audio_format = get_audio_format(file_path)
         if audio_format:
@@ -540,14 +928,7 @@ def transcribe(request: Request, file_path):
             )
 
             r.raise_for_status()
-            data = r.json()
-
-            # save the transcript to a json file
-            transcript_file = f"{file_dir}/{id}.json"
-            with open(transcript_file, "w") as f:
-                json.dump(data, f)
-
-            return data
+            return r.json()
         except Exception as e:
             log.exception(e)
 
@@ -569,10 +950,6 @@ def transcribe(request: Request, file_path):
             if not mime:
                 mime = "audio/wav"  # fallback to wav if undetectable
 
-            # Read the audio file
-            with open(file_path, "rb") as f:
-                file_data = f.read()
-
             # Build headers and parameters
             headers = {
                 "Authorization": f"Token {request.app.state.config.DEEPGRAM_API_KEY}",
@@ -584,13 +961,14 @@ def transcribe(request: Request, file_path):
             if request.app.state.config.STT_MODEL:
                 params["model"] = request.app.state.config.STT_MODEL
 
-            # Make request to Deepgram API
-            r = requests.post(
-                "https://api.deepgram.com/v1/listen",
-                headers=headers,
-                params=params,
-                data=file_data,
-            )
+            # Make request to Deepgram API, streaming the audio file
+            with open(file_path, "rb") as f:
+                r = requests.post(
+                    "https://api.deepgram.com/v1/listen",
+                    headers=headers,
+                    params=params,
+                    data=f,
+                )
             r.raise_for_status()
             response_data = r.json()
 
@@ -604,14 +982,7 @@ def transcribe(request: Request, file_path):
                 raise Exception(
                     "Failed to parse Deepgram response - unexpected response format"
                 )
-            data = {"text": transcript.strip()}
-
-            # Save transcript
-            transcript_file = f"{file_dir}/{id}.json"
-            with open(transcript_file, "w") as f:
-                json.dump(data, f)
-
-            return data
+            return {"text": transcript.strip()}
 
         except Exception as e:
             log.exception(e)
@@ -705,15 +1076,7 @@ def transcribe(request: Request, file_path):
             if not transcript:
                 raise ValueError("Empty transcript in response")
 
-            data = {"text": transcript}
-
-            # Save transcript to json file (consistent with other providers)
-            transcript_file = f"{file_dir}/{id}.json"
-            with open(transcript_file, "w") as f:
-                json.dump(data, f)
-
-            log.debug(data)
-            return data
+            return {"text": transcript}
 
         except (KeyError, IndexError, ValueError) as e:
             log.exception("Error parsing Azure response")
@@ -742,25 +1105,81 @@ def transcribe(request: Request, file_path):
 def compress_audio(file_path):
     if os.path.getsize(file_path) > MAX_FILE_SIZE:
         file_dir = os.path.dirname(file_path)
-        audio = AudioSegment.from_file(file_path)
-        audio = audio.set_frame_rate(16000).set_channels(1)  # Compress audio
+        id = os.path.splitext(os.path.basename(file_path))[0]
         compressed_path = f"{file_dir}/{id}_compressed.opus"
-        audio.export(compressed_path, format="opus", bitrate="32k")
+        # Compress audio
+        run_ffmpeg(
+            [
+                "-y",
+                "-i",
+                file_path,
+                "-ac",
+                "1",
+                "-ar",
+                "16000",
+                "-c:a",
+                "libopus",
+                "-b:a",
+                "32k",
+                compressed_path,
+            ]
+        )
         log.debug(f"Compressed audio to {compressed_path}")
 
         if (
             os.path.getsize(compressed_path) > MAX_FILE_SIZE
-        ):  # Still larger than MAX_FILE_SIZE after compression
+            and AUDIO_STT_CHUNK_DURATION <= 0
+        ):  # Still larger than MAX_FILE_SIZE after compression, and not chunked
             raise Exception(ERROR_MESSAGES.FILE_TOO_LARGE(size=f"{MAX_FILE_SIZE_MB}MB"))
         return compressed_path
     else:
         return file_path
 
 
+async def stream_transcription(request: Request, file_path):
+    """
+    Yields server-sent events with the transcript so far as the chunks of a
+    long recording finish, then the full transcript with done set. The chunks
+    not transcribed yet are cancelled when the client goes away.
+    """
+    log.info(f"transcribe: {file_path}")
+    try:
+        cache_file, data = await run_in_threadpool(
+            get_cached_transcription, request, file_path
+        )
+        if data is None:
+            chunks = await run_in_threadpool(prepare_transcription, request, file_path)
+            if chunks:
+                chunk_futures = iter_chunk_futures(request, chunks)
+                texts = []
+                try:
+                    for future in chunk_futures:
+                        result = await asyncio.wrap_future(future)
+                        texts.append(result.get("text", "").strip())
+                        event = get_partial_transcription(texts, chunks)
+                        yield f"data: {json.dumps({**event, 'done': False})}\n\n"
+                finally:
+                    chunk_futures.close()
+                    remove_files(chunks)
+
+                data = {"text": get_partial_transcription(texts, chunks)["text"]}
+            else:
+                data = await MEDIA_EXECUTOR.run(transcribe_file, request, file_path)
+
+        await run_in_threadpool(save_transcription, file_path, cache_file, data)
+
+        event = {**data, "filename": file_path.split("/")[-1], "done": True}
+    except Exception as e:
+        log.exception(e)
+        event = {"error": ERROR_MESSAGES.DEFAULT(e), "done": True}
+    yield f"data: {json.dumps(event)}\n\n"
+
+
 @router.post("/transcriptions")
 def transcription(
     request: Request,
     file: UploadFile = File(...),
+    stream: bool = Query(False),
     user=Depends(get_verified_user),
 ):
     log.info(f"file.content_type: {file.content_type}")
@@ -778,14 +1197,13 @@ def transcription(
         id = uuid.uuid4()
 
         filename = f"{id}.{ext}"
-        contents = file.file.read()
 
         file_dir = f"{CACHE_DIR}/audio/transcriptions"
         os.makedirs(file_dir, exist_ok=True)
         file_path = f"{file_dir}/{filename}"
 
         with open(file_path, "wb") as f:
-            f.write(contents)
+            shutil.copyfileobj(file.file, f)
 
         try:
             try:
@@ -798,6 +1216,12 @@ def transcription(
                     detail=ERROR_MESSAGES.DEFAULT(e),
                 )
 
+            if stream:
+                return StreamingResponse(
+                    stream_transcription(request, file_path),
+                    media_type="text/event-stream",
+                )
+
             data = transcribe(request, file_path)
             file_path = file_path.split("/")[-1]
             return {**data, "filename": file_path}
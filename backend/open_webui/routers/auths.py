@@ -41,6 +41,7 @@ from open_webui.utils.auth import (
     get_verified_user,
     get_current_user,
     get_password_hash,
+    run_in_auth_executor,
 )
 from open_webui.utils.webhook import post_webhook
 from open_webui.utils.access_control import get_permissions
@@ -53,6 +54,8 @@ if ENABLE_LDAP.value:
     from ldap3 import Server, Connection, NONE, Tls
     from ldap3.utils.conv import escape_filter_chars
 
+    from open_webui.utils.ldap import ldap_connection_pool
+
 router = APIRouter()
 
 log = logging.getLogger(__name__)
@@ -149,10 +152,14 @@ async def update_password(
     if WEBUI_AUTH_TRUSTED_EMAIL_HEADER:
         raise HTTPException(400, detail=ERROR_MESSAGES.ACTION_PROHIBITED)
     if session_user:
-        user = Auths.authenticate_user(session_user.email, form_data.password)
+        user = await run_in_auth_executor(
+            Auths.authenticate_user, session_user.email, form_data.password
+        )
 
         if user:
-            hashed = get_password_hash(form_data.new_password)
+            hashed = await run_in_auth_executor(
+                get_password_hash, form_data.new_password
+            )
             return Auths.update_user_password_by_id(user.id, hashed)
         else:
             raise HTTPException(400, detail=ERROR_MESSAGES.INVALID_PASSWORD)
@@ -197,7 +204,8 @@ async def ldap_auth(request: Request, response: Response, form_data: LdapForm):
         log.error(f"TLS configuration error: {str(e)}")
         raise HTTPException(400, detail="Failed to configure TLS for LDAP connection.")
 
-    try:
+    def authenticate_ldap_user() -> tuple[str, str]:
+        # Runs in the auth executor, ldap3 calls block on network I/O
         server = Server(
             host=LDAP_SERVER_HOST,
             port=LDAP_SERVER_PORT,
@@ -205,17 +213,19 @@ async def ldap_auth(request: Request, response: Response, form_data: LdapForm):
             use_ssl=LDAP_USE_TLS,
             tls=tls,
         )
-        connection_app = Connection(
+        search_success, entries = ldap_connection_pool.search(
             server,
             LDAP_APP_DN,
             LDAP_APP_PASSWORD,
-            auto_bind="NONE",
-            authentication="SIMPLE" if LDAP_APP_DN else "ANONYMOUS",
-        )
-        if not connection_app.bind():
-            raise HTTPException(400, detail="Application account bind failed")
-
-        search_success = connection_app.search(
+            key=(
+                LDAP_SERVER_HOST,
+                LDAP_SERVER_PORT,
+                LDAP_USE_TLS,
+                LDAP_CA_CERT_FILE,
+                LDAP_CIPHERS,
+                LDAP_APP_DN,
+                LDAP_APP_PASSWORD,
+            ),
             search_base=LDAP_SEARCH_BASE,
             search_filter=f"(&({LDAP_ATTRIBUTE_FOR_USERNAME}={escape_filter_chars(form_data.user.lower())}){LDAP_SEARCH_FILTERS})",
             attributes=[
@@ -225,10 +235,10 @@ async def ldap_auth(request: Request, response: Response, form_data: LdapForm):
             ],
         )
 
-        if not search_success:
+        if not search_success or not entries:
             raise HTTPException(400, detail="User not found in the LDAP server")
 
-        entry = connection_app.entries[0]
+        entry = entries[0]
         username = str(entry[f"{LDAP_ATTRIBUTE_FOR_USERNAME}"]).lower()
         email = entry[f"{LDAP_ATTRIBUTE_FOR_MAIL}"].value  # retrive the Attribute value
         if not email:
@@ -243,83 +253,87 @@ async def ldap_auth(request: Request, response: Response, form_data: LdapForm):
         cn = str(entry["cn"])
         user_dn = entry.entry_dn
 
-        if username == form_data.user.lower():
-            connection_user = Connection(
-                server,
-                user_dn,
-                form_data.password,
-                auto_bind="NONE",
-                authentication="SIMPLE",
-            )
+        if username != form_data.user.lower():
+            raise HTTPException(400, "User record mismatch.")
+
+        connection_user = Connection(
+            server,
+            user_dn,
+            form_data.password,
+            auto_bind="NONE",
+            authentication="SIMPLE",
+        )
+        try:
             if not connection_user.bind():
                 raise HTTPException(400, "Authentication failed.")
+        finally:
+            connection_user.unbind()
 
-            user = Users.get_user_by_email(email)
-            if not user:
-                try:
-                    user_count = Users.get_num_users()
-
-                    role = (
-                        "admin"
-                        if user_count == 0
-                        else request.app.state.config.DEFAULT_USER_ROLE
-                    )
-
-                    user = Auths.insert_new_auth(
-                        email=email,
-                        password=str(uuid.uuid4()),
-                        name=cn,
-                        role=role,
-                    )
-
-                    if not user:
-                        raise HTTPException(
-                            500, detail=ERROR_MESSAGES.CREATE_USER_ERROR
-                        )
-
-                except HTTPException:
-                    raise
-                except Exception as err:
-                    log.error(f"LDAP user creation error: {str(err)}")
-                    raise HTTPException(
-                        500, detail="Internal error occurred during LDAP user creation."
-                    )
-
-            user = Auths.authenticate_user_by_trusted_header(email)
-
-            if user:
-                token = create_token(
-                    data={"id": user.id},
-                    expires_delta=parse_duration(
-                        request.app.state.config.JWT_EXPIRES_IN
-                    ),
+        return email, cn
+
+    try:
+        email, cn = await run_in_auth_executor(authenticate_ldap_user)
+
+        user = Users.get_user_by_email(email)
+        if not user:
+            try:
+                user_count = Users.get_num_users()
+
+                role = (
+                    "admin"
+                    if user_count == 0
+                    else request.app.state.config.DEFAULT_USER_ROLE
                 )
 
-                # Set the cookie token
-                response.set_cookie(
-                    key="token",
-                    value=token,
-                    httponly=True,  # Ensures the cookie is not accessible via JavaScript
+                user = Auths.insert_new_auth(
+                    email=email,
+                    password=str(uuid.uuid4()),
+                    name=cn,
+                    role=role,
                 )
 
-                user_permissions = get_permissions(
-                    user.id, request.app.state.config.USER_PERMISSIONS
+                if not user:
+                    raise HTTPException(500, detail=ERROR_MESSAGES.CREATE_USER_ERROR)
+
+            except HTTPException:
+                raise
+            except Exception as err:
+                log.error(f"LDAP user creation error: {str(err)}")
+                raise HTTPException(
+                    500, detail="Internal error occurred during LDAP user creation."
                 )
 
-                return {
-                    "token": token,
-                    "token_type": "Bearer",
-                    "id": user.id,
-                    "email": user.email,
-                    "name": user.name,
-                    "role": user.role,
-                    "profile_image_url": user.profile_image_url,
-                    "permissions": user_permissions,
-                }
-            else:
-                raise HTTPException(400, detail=ERROR_MESSAGES.INVALID_CRED)
+        user = Auths.authenticate_user_by_trusted_header(email)
+
+        if user:
+            token = create_token(
+                data={"id": user.id},
+                expires_delta=parse_duration(request.app.state.config.JWT_EXPIRES_IN),
+            )
+
+            # Set the cookie token
+            response.set_cookie(
+                key="token",
+                value=token,
+                httponly=True,  # Ensures the cookie is not accessible via JavaScript
+            )
+
+            user_permissions = get_permissions(
+                user.id, request.app.state.config.USER_PERMISSIONS
+            )
+
+            return {
+                "token": token,
+                "token_type": "Bearer",
+                "id": user.id,
+                "email": user.email,
+                "name": user.name,
+                "role": user.role,
+                "profile_image_url": user.profile_image_url,
+                "permissions": user_permissions,
+            }
         else:
-            raise HTTPException(400, "User record mismatch.")
+            raise HTTPException(400, detail=ERROR_MESSAGES.INVALID_CRED)
     except Exception as e:
         log.error(f"LDAP authentication error: {str(e)}")
         raise HTTPException(400, detail="LDAP authentication failed.")
@@ -356,7 +370,9 @@ async def signin(request: Request, response: Response, form_data: SigninForm):
         admin_password = "admin"
 
         if Users.get_user_by_email(admin_email.lower()):
-            user = Auths.authenticate_user(admin_email.lower(), admin_password)
+            user = await run_in_auth_executor(
+                Auths.authenticate_user, admin_email.lower(), admin_password
+            )
         else:
             if Users.get_num_users() != 0:
                 raise HTTPException(400, detail=ERROR_MESSAGES.EXISTING_USERS)
@@ -367,9 +383,13 @@ async def signin(request: Request, response: Response, form_data: SigninForm):
                 SignupForm(email=admin_email, password=admin_password, name="User"),
             )
 
-            user = Auths.authenticate_user(admin_email.lower(), admin_password)
+            user = await run_in_auth_executor(
+                Auths.authenticate_user, admin_email.lower(), admin_password
+            )
     else:
-        user = Auths.authenticate_user(form_data.email.lower(), form_data.password)
+        user = await run_in_auth_executor(
+            Auths.authenticate_user, form_data.email.lower(), form_data.password
+        )
 
     if user:
 
@@ -465,7 +485,7 @@ async def signup(request: Request, response: Response, form_data: SignupForm):
                 detail=ERROR_MESSAGES.PASSWORD_TOO_LONG,
             )
 
-        hashed = get_password_hash(form_data.password)
+        hashed = await run_in_auth_executor(get_password_hash, form_data.password)
         user = Auths.insert_new_auth(
             form_data.email.lower(),
             hashed,
@@ -585,7 +605,7 @@ async def add_user(form_data: AddUserForm, user=Depends(get_admin_user)):
         raise HTTPException(400, detail=ERROR_MESSAGES.EMAIL_TAKEN)
 
     try:
-        hashed = get_password_hash(form_data.password)
+        hashed = await run_in_auth_executor(get_password_hash, form_data.password)
         user = Auths.insert_new_auth(
             form_data.email.lower(),
             hashed,
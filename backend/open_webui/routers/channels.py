@@ -143,43 +143,61 @@ class MessageUserResponse(MessageResponse):
     user: UserNameResponse
 
 
-@router.get("/{id}/messages", response_model=list[MessageUserResponse])
-async def get_channel_messages(
-    id: str, skip: int = 0, limit: int = 50, user=Depends(get_verified_user)
-):
-    channel = Channels.get_channel_by_id(id)
-    if not channel:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail=ERROR_MESSAGES.NOT_FOUND
-        )
+def parse_message_cursor(before: Optional[str]) -> Optional[tuple[int, str]]:
+    # Cursors have the form `<created_at>,<id>` of the oldest message already loaded
+    if not before:
+        return None
 
-    if user.role != "admin" and not has_access(
-        user.id, type="read", access_control=channel.access_control
-    ):
+    try:
+        created_at, message_id = before.split(",", 1)
+        return int(created_at), message_id
+    except ValueError:
         raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, detail=ERROR_MESSAGES.DEFAULT()
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.DEFAULT("Invalid cursor"),
         )
 
-    message_list = Messages.get_messages_by_channel_id(id, skip, limit)
-    users = {}
+
+def get_message_user_responses(
+    message_list: list[MessageModel], include_replies: bool = True
+) -> list[MessageUserResponse]:
+    message_ids = [message.id for message in message_list]
+
+    users = {
+        user.id: user
+        for user in Users.get_users_by_user_ids(
+            list({message.user_id for message in message_list})
+        )
+    }
+    reactions = Messages.get_reactions_by_message_ids(message_ids)
+    reply_stats = (
+        Messages.get_reply_stats_by_message_ids(message_ids) if include_replies else {}
+    )
 
     messages = []
     for message in message_list:
-        if message.user_id not in users:
-            user = Users.get_user_by_id(message.user_id)
-            users[message.user_id] = user
-
-        replies = Messages.get_replies_by_message_id(message.id)
-        latest_reply_at = replies[0].created_at if replies else None
+        user = users.get(message.user_id)
+        if user is not None:
+            user = UserNameResponse(**user.model_dump())
+        else:
+            # Keep messages of deleted users, a short page reads as the end of
+            # the history to the frontend
+            user = UserNameResponse(
+                id=message.user_id,
+                name="Deleted User",
+                role="user",
+                profile_image_url="/user.png",
+            )
 
+        reply_count, latest_reply_at = reply_stats.get(message.id, (0, None))
         messages.append(
             MessageUserResponse(
                 **{
                     **message.model_dump(),
-                    "reply_count": len(replies),
+                    "reply_count": reply_count,
                     "latest_reply_at": latest_reply_at,
-                    "reactions": Messages.get_reactions_by_message_id(message.id),
-                    "user": UserNameResponse(**users[message.user_id].model_dump()),
+                    "reactions": reactions.get(message.id, []),
+                    "user": user,
                 }
             )
         )
@@ -187,13 +205,40 @@ async def get_channel_messages(
     return messages
 
 
+@router.get("/{id}/messages", response_model=list[MessageUserResponse])
+async def get_channel_messages(
+    id: str,
+    skip: int = 0,
+    limit: int = 50,
+    before: Optional[str] = None,
+    user=Depends(get_verified_user),
+):
+    channel = Channels.get_channel_by_id(id)
+    if not channel:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail=ERROR_MESSAGES.NOT_FOUND
+        )
+
+    if user.role != "admin" and not has_access(
+        user.id, type="read", access_control=channel.access_control
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail=ERROR_MESSAGES.DEFAULT()
+        )
+
+    message_list = Messages.get_messages_by_channel_id(
+        id, skip, limit, before=parse_message_cursor(before)
+    )
+    return get_message_user_responses(message_list)
+
+
 ############################
 # PostNewMessage
 ############################
 
 
 async def send_notification(name, webui_url, channel, message, active_user_ids):
-    users = get_users_with_access("read", channel.access_control)
+    users = get_users_with_access("read", channel.access_control, include_settings=True)
 
     for user in users:
         if user.id in active_user_ids:
@@ -299,7 +344,7 @@ async def post_new_message(
                         to=f"channel:{channel.id}",
                     )
 
-            active_user_ids = get_user_ids_from_room(f"channel:{channel.id}")
+            active_user_ids = await get_user_ids_from_room(f"channel:{channel.id}")
 
             background_tasks.add_task(
                 send_notification,
@@ -374,6 +419,7 @@ async def get_channel_thread_messages(
     message_id: str,
     skip: int = 0,
     limit: int = 50,
+    before: Optional[str] = None,
     user=Depends(get_verified_user),
 ):
     channel = Channels.get_channel_by_id(id)
@@ -389,28 +435,10 @@ async def get_channel_thread_messages(
             status_code=status.HTTP_403_FORBIDDEN, detail=ERROR_MESSAGES.DEFAULT()
         )
 
-    message_list = Messages.get_messages_by_parent_id(id, message_id, skip, limit)
-    users = {}
-
-    messages = []
-    for message in message_list:
-        if message.user_id not in users:
-            user = Users.get_user_by_id(message.user_id)
-            users[message.user_id] = user
-
-        messages.append(
-            MessageUserResponse(
-                **{
-                    **message.model_dump(),
-                    "reply_count": 0,
-                    "latest_reply_at": None,
-                    "reactions": Messages.get_reactions_by_message_id(message.id),
-                    "user": UserNameResponse(**users[message.user_id].model_dump()),
-                }
-            )
-        )
-
-    return messages
+    message_list = Messages.get_messages_by_parent_id(
+        id, message_id, skip, limit, before=parse_message_cursor(before)
+    )
+    return get_message_user_responses(message_list, include_replies=False)
 
 
 ############################
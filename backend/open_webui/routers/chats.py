@@ -366,6 +366,11 @@ async def update_chat_by_id(
     if chat:
         updated_chat = {**chat.chat, **form_data.chat}
         chat = Chats.update_chat_by_id(id, updated_chat)
+        if chat is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=ERROR_MESSAGES.DEFAULT(),
+            )
         return ChatResponse(**chat.model_dump())
     else:
         raise HTTPException(
@@ -399,7 +404,7 @@ async def update_chat_message_by_id(
             detail=ERROR_MESSAGES.ACCESS_PROHIBITED,
         )
 
-    chat = Chats.upsert_message_to_chat_by_id_and_message_id(
+    Chats.upsert_message_to_chat_by_id_and_message_id(
         id,
         message_id,
         {
@@ -428,9 +433,31 @@ async def update_chat_message_by_id(
             }
         )
 
+    chat = Chats.get_chat_by_id(id)
     return ChatResponse(**chat.model_dump())
 
 
+############################
+# DeleteChatMessagesById
+############################
+class MessageIdsForm(BaseModel):
+    message_ids: list[str]
+
+
+@router.delete("/{id}/messages", response_model=bool)
+async def delete_chat_messages_by_id(
+    id: str, form_data: MessageIdsForm, user=Depends(get_verified_user)
+):
+    chat = Chats.get_chat_by_id_and_user_id(id, user.id)
+    if chat:
+        return Chats.delete_messages_by_id_and_message_ids(id, form_data.message_ids)
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=ERROR_MESSAGES.ACCESS_PROHIBITED,
+        )
+
+
 ############################
 # SendChatMessageEventById
 ############################
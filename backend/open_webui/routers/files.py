@@ -16,6 +16,7 @@ from fastapi import (
     status,
     Query,
 )
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import FileResponse, StreamingResponse
 from open_webui.constants import ERROR_MESSAGES
 from open_webui.env import SRC_LOG_LEVELS
@@ -32,6 +33,7 @@ from open_webui.routers.retrieval import ProcessFileForm, process_file
 from open_webui.routers.audio import transcribe
 from open_webui.storage.provider import Storage
 from open_webui.utils.auth import get_admin_user, get_verified_user
+from open_webui.utils.executors import INGESTION_EXECUTOR
 from pydantic import BaseModel
 
 log = logging.getLogger(__name__)
@@ -78,7 +80,6 @@ def has_access_to_file(
 ############################
 
 
-@router.post("/", response_model=FileModelResponse)
 def upload_file(
     request: Request,
     file: UploadFile = File(...),
@@ -95,19 +96,20 @@ def upload_file(
         id = str(uuid.uuid4())
         name = filename
         filename = f"{id}_{filename}"
-        contents, file_path = Storage.upload_file(file.file, filename)
+        size, content_hash, file_path = Storage.upload_file(file.file, filename)
 
         file_item = Files.insert_new_file(
             user.id,
             FileForm(
                 **{
                     "id": id,
+                    "content_hash": content_hash,
                     "filename": name,
                     "path": file_path,
                     "meta": {
                         "name": name,
                         "content_type": file.content_type,
-                        "size": len(contents),
+                        "size": size,
                         "data": file_metadata,
                     },
                 }
@@ -159,6 +161,26 @@ def upload_file(
         )
 
 
+@router.post("/", response_model=FileModelResponse)
+async def upload_file_endpoint(
+    request: Request,
+    file: UploadFile = File(...),
+    user=Depends(get_verified_user),
+    file_metadata: dict = {},
+    process: bool = Query(True),
+):
+    # Storing, transcribing and processing the file block, they run in the
+    # shared ingestion threads
+    return await INGESTION_EXECUTOR.run(
+        upload_file,
+        request,
+        file,
+        user,
+        file_metadata=file_metadata,
+        process=process,
+    )
+
+
 ############################
 # List Files
 ############################
@@ -328,7 +350,8 @@ async def update_file_data_content_by_id(
         or has_access_to_file(id, "write", user)
     ):
         try:
-            process_file(
+            await INGESTION_EXECUTOR.run(
+                process_file,
                 request,
                 ProcessFileForm(file_id=id, content=form_data.content),
                 user=user,
@@ -369,7 +392,8 @@ async def get_file_content_by_id(
         or has_access_to_file(id, "read", user)
     ):
         try:
-            file_path = Storage.get_file(file.path)
+            # Downloads the file unless a current local copy exists
+            file_path = await run_in_threadpool(Storage.get_file, file.path)
             file_path = Path(file_path)
 
             # Check if the file already exists in the cache
@@ -437,7 +461,7 @@ async def get_html_file_content_by_id(id: str, user=Depends(get_verified_user)):
         or has_access_to_file(id, "read", user)
     ):
         try:
-            file_path = Storage.get_file(file.path)
+            file_path = await run_in_threadpool(Storage.get_file, file.path)
             file_path = Path(file_path)
 
             # Check if the file already exists in the cache
@@ -488,7 +512,7 @@ async def get_file_content_by_id(id: str, user=Depends(get_verified_user)):
         }
 
         if file_path:
-            file_path = Storage.get_file(file_path)
+            file_path = await run_in_threadpool(Storage.get_file, file_path)
             file_path = Path(file_path)
 
             # Check if the file already exists in the cache
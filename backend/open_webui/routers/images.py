@@ -6,20 +6,30 @@ import logging
 import mimetypes
 import re
 from pathlib import Path
-from typing import Optional
+from typing import Awaitable, Callable, Optional
 
+import aiohttp
 import requests
 from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile
+from fastapi.concurrency import run_in_threadpool
 from open_webui.config import CACHE_DIR
 from open_webui.constants import ERROR_MESSAGES
-from open_webui.env import ENABLE_FORWARD_USER_INFO_HEADERS, SRC_LOG_LEVELS
+from open_webui.env import (
+    AIOHTTP_CLIENT_TIMEOUT,
+    ENABLE_FORWARD_USER_INFO_HEADERS,
+    IMAGE_GENERATION_THUMBNAIL_SIZE,
+    SRC_LOG_LEVELS,
+)
 from open_webui.routers.files import upload_file
 from open_webui.utils.auth import get_admin_user, get_verified_user
+from open_webui.utils.executors import MEDIA_EXECUTOR
 from open_webui.utils.images.comfyui import (
     ComfyUIGenerateImageForm,
     ComfyUIWorkflow,
     comfyui_generate_image,
+    get_comfyui_client,
 )
+from PIL import Image
 from pydantic import BaseModel
 
 log = logging.getLogger(__name__)
@@ -430,20 +440,49 @@ def load_b64_image_data(b64_str):
         return None
 
 
-def load_url_image_data(url, headers=None):
-    try:
-        if headers:
-            r = requests.get(url, headers=headers)
-        else:
-            r = requests.get(url)
+image_session: Optional[aiohttp.ClientSession] = None
 
-        r.raise_for_status()
-        if r.headers["content-type"].split("/")[0] == "image":
-            mime_type = r.headers["content-type"]
-            return r.content, mime_type
-        else:
-            log.error("Url does not point to an image.")
-            return None
+
+def get_image_session() -> aiohttp.ClientSession:
+    global image_session
+    if image_session is None or image_session.closed:
+        image_session = aiohttp.ClientSession(
+            trust_env=True, timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT)
+        )
+    return image_session
+
+
+async def close_image_session():
+    if image_session is not None:
+        await image_session.close()
+
+
+async def post_json(url: str, payload: dict, headers: Optional[dict] = None) -> dict:
+    async with get_image_session().post(url, json=payload, headers=headers) as r:
+        try:
+            res = await r.json(content_type=None)
+        except Exception:
+            r.raise_for_status()
+            raise
+
+        if not r.ok:
+            error = res.get("error") if isinstance(res, dict) else None
+            if isinstance(error, dict) and "message" in error:
+                raise Exception(error["message"])
+            r.raise_for_status()
+        return res
+
+
+async def load_url_image_data(url, headers=None):
+    try:
+        async with get_image_session().get(url, headers=headers) as r:
+            r.raise_for_status()
+            if r.headers["content-type"].split("/")[0] == "image":
+                mime_type = r.headers["content-type"]
+                return await r.read(), mime_type
+            else:
+                log.error("Url does not point to an image.")
+                return None
 
     except Exception as e:
         log.exception(f"Error saving image: {e}")
@@ -459,20 +498,86 @@ def upload_image(request, image_metadata, image_data, content_type, user):
             "content-type": content_type,
         },
     )
-    file_item = upload_file(request, file, user, file_metadata=image_metadata)
+    # Generated images are not searchable, so skip the retrieval processing
+    file_item = upload_file(
+        request, file, user, file_metadata=image_metadata, process=False
+    )
     url = request.app.url_path_for("get_file_content_by_id", id=file_item.id)
     return url
 
 
+def create_thumbnail(image_data: bytes, size: int) -> Optional[bytes]:
+    try:
+        with Image.open(io.BytesIO(image_data)) as image:
+            image.thumbnail((size, size))
+            if image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA")
+
+            buffer = io.BytesIO()
+            image.save(buffer, format="WEBP")
+            return buffer.getvalue()
+    except Exception as e:
+        log.warning(f"Error creating thumbnail: {e}")
+        return None
+
+
+def store_image(request, image_metadata, image_data, content_type, user) -> dict:
+    image = {
+        "url": upload_image(request, image_metadata, image_data, content_type, user)
+    }
+
+    if IMAGE_GENERATION_THUMBNAIL_SIZE > 0:
+        thumbnail = create_thumbnail(image_data, IMAGE_GENERATION_THUMBNAIL_SIZE)
+        if thumbnail:
+            image["thumbnail_url"] = upload_image(
+                request,
+                {**image_metadata, "thumbnail": True},
+                thumbnail,
+                "image/webp",
+                user,
+            )
+
+    return image
+
+
+async def store_images(
+    request, image_metadata, images: list[Awaitable], user
+) -> list[dict]:
+    """
+    Loads (downloads or decodes) the generated images and stores them, all
+    of them at once.
+    """
+
+    async def load_and_store(image):
+        image = await image
+        if image is None:
+            raise Exception("Unable to load the generated image")
+
+        image_data, content_type = image
+        return await MEDIA_EXECUTOR.run(
+            store_image, request, image_metadata, image_data, content_type, user
+        )
+
+    return list(await asyncio.gather(*[load_and_store(image) for image in images]))
+
+
 @router.post("/generations")
 async def image_generations(
     request: Request,
     form_data: GenerateImageForm,
     user=Depends(get_verified_user),
+):
+    return await generate_images(request, form_data, user)
+
+
+async def generate_images(
+    request: Request,
+    form_data: GenerateImageForm,
+    user,
+    event_emitter: Optional[Callable[[dict], Awaitable]] = None,
 ):
     width, height = tuple(map(int, request.app.state.config.IMAGE_SIZE.split("x")))
 
-    r = None
     try:
         if request.app.state.config.IMAGE_GENERATION_ENGINE == "openai":
             headers = {}
@@ -503,28 +608,25 @@ async def image_generations(
                 "response_format": "b64_json",
             }
 
-            # Use asyncio.to_thread for the requests.post call
-            r = await asyncio.to_thread(
-                requests.post,
-                url=f"{request.app.state.config.IMAGES_OPENAI_API_BASE_URL}/images/generations",
-                json=data,
-                headers=headers,
+            res = await post_json(
+                f"{request.app.state.config.IMAGES_OPENAI_API_BASE_URL}/images/generations",
+                data,
+                headers,
             )
 
-            r.raise_for_status()
-            res = r.json()
-
-            images = []
-
-            for image in res["data"]:
-                if image_url := image.get("url", None):
-                    image_data, content_type = load_url_image_data(image_url, headers)
-                else:
-                    image_data, content_type = load_b64_image_data(image["b64_json"])
-
-                url = upload_image(request, data, image_data, content_type, user)
-                images.append({"url": url})
-            return images
+            return await store_images(
+                request,
+                data,
+                [
+                    (
+                        load_url_image_data(image["url"], headers)
+                        if image.get("url", None)
+                        else MEDIA_EXECUTOR.run(load_b64_image_data, image["b64_json"])
+                    )
+                    for image in res["data"]
+                ],
+                user,
+            )
 
         elif request.app.state.config.IMAGE_GENERATION_ENGINE == "gemini":
             headers = {}
@@ -540,26 +642,21 @@ async def image_generations(
                 },
             }
 
-            # Use asyncio.to_thread for the requests.post call
-            r = await asyncio.to_thread(
-                requests.post,
-                url=f"{request.app.state.config.IMAGES_GEMINI_API_BASE_URL}/models/{model}:predict",
-                json=data,
-                headers=headers,
+            res = await post_json(
+                f"{request.app.state.config.IMAGES_GEMINI_API_BASE_URL}/models/{model}:predict",
+                data,
+                headers,
             )
 
-            r.raise_for_status()
-            res = r.json()
-
-            images = []
-            for image in res["predictions"]:
-                image_data, content_type = load_b64_image_data(
-                    image["bytesBase64Encoded"]
-                )
-                url = upload_image(request, data, image_data, content_type, user)
-                images.append({"url": url})
-
-            return images
+            return await store_images(
+                request,
+                data,
+                [
+                    MEDIA_EXECUTOR.run(load_b64_image_data, image["bytesBase64Encoded"])
+                    for image in res["predictions"]
+                ],
+                user,
+            )
 
         elif request.app.state.config.IMAGE_GENERATION_ENGINE == "comfyui":
             data = {
@@ -589,37 +686,28 @@ async def image_generations(
             res = await comfyui_generate_image(
                 request.app.state.config.IMAGE_GENERATION_MODEL,
                 form_data,
-                user.id,
                 request.app.state.config.COMFYUI_BASE_URL,
                 request.app.state.config.COMFYUI_API_KEY,
+                event_emitter=event_emitter,
             )
             log.debug(f"res: {res}")
 
-            images = []
-
-            for image in res["data"]:
-                headers = None
-                if request.app.state.config.COMFYUI_API_KEY:
-                    headers = {
-                        "Authorization": f"Bearer {request.app.state.config.COMFYUI_API_KEY}"
-                    }
-
-                image_data, content_type = load_url_image_data(image["url"], headers)
-                url = upload_image(
-                    request,
-                    form_data.model_dump(exclude_none=True),
-                    image_data,
-                    content_type,
-                    user,
-                )
-                images.append({"url": url})
-            return images
+            client = get_comfyui_client(
+                request.app.state.config.COMFYUI_BASE_URL,
+                request.app.state.config.COMFYUI_API_KEY,
+            )
+            return await store_images(
+                request,
+                form_data.model_dump(exclude_none=True),
+                [client.get_image(image["url"]) for image in res["data"]],
+                user,
+            )
         elif (
             request.app.state.config.IMAGE_GENERATION_ENGINE == "automatic1111"
             or request.app.state.config.IMAGE_GENERATION_ENGINE == ""
         ):
             if form_data.model:
-                set_image_model(form_data.model)
+                await run_in_threadpool(set_image_model, request, form_data.model)
 
             data = {
                 "prompt": form_data.prompt,
@@ -643,34 +731,22 @@ async def image_generations(
             if request.app.state.config.AUTOMATIC1111_SCHEDULER:
                 data["scheduler"] = request.app.state.config.AUTOMATIC1111_SCHEDULER
 
-            # Use asyncio.to_thread for the requests.post call
-            r = await asyncio.to_thread(
-                requests.post,
-                url=f"{request.app.state.config.AUTOMATIC1111_BASE_URL}/sdapi/v1/txt2img",
-                json=data,
-                headers={"authorization": get_automatic1111_api_auth(request)},
+            res = await post_json(
+                f"{request.app.state.config.AUTOMATIC1111_BASE_URL}/sdapi/v1/txt2img",
+                data,
+                {"authorization": get_automatic1111_api_auth(request)},
             )
-
-            res = r.json()
             log.debug(f"res: {res}")
 
-            images = []
-
-            for image in res["images"]:
-                image_data, content_type = load_b64_image_data(image)
-                url = upload_image(
-                    request,
-                    {**data, "info": res["info"]},
-                    image_data,
-                    content_type,
-                    user,
-                )
-                images.append({"url": url})
-            return images
+            return await store_images(
+                request,
+                {**data, "info": res["info"]},
+                [
+                    MEDIA_EXECUTOR.run(load_b64_image_data, image)
+                    for image in res["images"]
+                ],
+                user,
+            )
     except Exception as e:
-        error = e
-        if r != None:
-            data = r.json()
-            if "error" in data:
-                error = data["error"]["message"]
-        raise HTTPException(status_code=400, detail=ERROR_MESSAGES.DEFAULT(error))
+        log.exception(e)
+        raise HTTPException(status_code=400, detail=ERROR_MESSAGES.DEFAULT(e))
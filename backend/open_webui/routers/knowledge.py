@@ -21,6 +21,7 @@ from open_webui.storage.provider import Storage
 
 from open_webui.constants import ERROR_MESSAGES
 from open_webui.utils.auth import get_verified_user
+from open_webui.utils.executors import INGESTION_EXECUTOR
 from open_webui.utils.access_control import has_access, has_permission
 
 
@@ -197,7 +198,8 @@ async def reindex_knowledge_files(request: Request, user=Depends(get_verified_us
             failed_files = []
             for file in files:
                 try:
-                    process_file(
+                    await INGESTION_EXECUTOR.run(
+                        process_file,
                         request,
                         ProcessFileForm(
                             file_id=file.id, collection_name=knowledge_base.id
@@ -318,7 +320,7 @@ class KnowledgeFileIdForm(BaseModel):
 
 
 @router.post("/{id}/file/add", response_model=Optional[KnowledgeFilesResponse])
-def add_file_to_knowledge_by_id(
+async def add_file_to_knowledge_by_id(
     request: Request,
     id: str,
     form_data: KnowledgeFileIdForm,
@@ -356,7 +358,8 @@ def add_file_to_knowledge_by_id(
 
     # Add content to the vector database
     try:
-        process_file(
+        await INGESTION_EXECUTOR.run(
+            process_file,
             request,
             ProcessFileForm(file_id=form_data.file_id, collection_name=id),
             user=user,
@@ -403,7 +406,7 @@ def add_file_to_knowledge_by_id(
 
 
 @router.post("/{id}/file/update", response_model=Optional[KnowledgeFilesResponse])
-def update_file_from_knowledge_by_id(
+async def update_file_from_knowledge_by_id(
     request: Request,
     id: str,
     form_data: KnowledgeFileIdForm,
@@ -435,13 +438,16 @@ def update_file_from_knowledge_by_id(
         )
 
     # Remove content from the vector database
-    VECTOR_DB_CLIENT.delete(
-        collection_name=knowledge.id, filter={"file_id": form_data.file_id}
+    await INGESTION_EXECUTOR.run(
+        VECTOR_DB_CLIENT.delete,
+        collection_name=knowledge.id,
+        filter={"file_id": form_data.file_id},
     )
 
     # Add content to the vector database
     try:
-        process_file(
+        await INGESTION_EXECUTOR.run(
+            process_file,
             request,
             ProcessFileForm(file_id=form_data.file_id, collection_name=id),
             user=user,
@@ -1,12 +1,7 @@
-# TODO: Implement a more intelligent load balancing mechanism for distributing requests among multiple backend instances.
-# Current implementation uses a simple round-robin approach (random.choice). Consider incorporating algorithms like weighted round-robin,
-# least connections, or least response time for better resource utilization and performance optimization.
-
 import asyncio
 import json
 import logging
 import os
-import random
 import re
 import time
 from typing import Optional, Union
@@ -46,6 +41,9 @@ from open_webui.utils.payload import (
 )
 from open_webui.utils.auth import get_admin_user, get_verified_user
 from open_webui.utils.access_control import has_access
+from open_webui.utils.circuit_breaker import get_circuit_breaker
+from open_webui.utils.singleflight import single_flight
+from open_webui.utils.balancer import LoadBalancer
 
 
 from open_webui.config import (
@@ -57,12 +55,25 @@ from open_webui.env import (
     AIOHTTP_CLIENT_TIMEOUT,
     AIOHTTP_CLIENT_TIMEOUT_MODEL_LIST,
     BYPASS_MODEL_ACCESS_CONTROL,
+    OLLAMA_LOAD_BALANCING_STRATEGY,
+    OLLAMA_STICKY_SESSIONS,
+    OLLAMA_FAILURE_THRESHOLD,
+    OLLAMA_EJECTION_TIME,
+    OLLAMA_LOADED_MODELS_TTL,
 )
 from open_webui.constants import ERROR_MESSAGES
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["OLLAMA"])
 
+ollama_balancer = LoadBalancer(
+    strategy=OLLAMA_LOAD_BALANCING_STRATEGY,
+    sticky_sessions=OLLAMA_STICKY_SESSIONS,
+    failure_threshold=OLLAMA_FAILURE_THRESHOLD,
+    ejection_time=OLLAMA_EJECTION_TIME,
+    loaded_models_ttl=OLLAMA_LOADED_MODELS_TTL,
+)
+
 
 ##########################################
 #
@@ -72,6 +83,11 @@ log.setLevel(SRC_LOG_LEVELS["OLLAMA"])
 
 
 async def send_get_request(url, key=None, user: UserModel = None):
+    breaker = get_circuit_breaker(url)
+    if not breaker.allow():
+        log.debug(f"Skipping {url}, it failed recently")
+        return None
+
     timeout = aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT_MODEL_LIST)
     try:
         async with aiohttp.ClientSession(timeout=timeout, trust_env=True) as session:
@@ -92,13 +108,21 @@ async def send_get_request(url, key=None, user: UserModel = None):
                     ),
                 },
             ) as response:
-                return await response.json()
+                res = await response.json()
+                breaker.record_success()
+                return res
     except Exception as e:
         # Handle connection error here
         log.error(f"Connection error: {e}")
+        breaker.record_failure()
         return None
 
 
+def get_models_flight_key(request: Request, user: UserModel = None):
+    # The model lists only differ between users when user info is forwarded
+    return user.id if ENABLE_FORWARD_USER_INFO_HEADERS and user else None
+
+
 async def cleanup_response(
     response: Optional[aiohttp.ClientResponse],
     session: Optional[aiohttp.ClientSession],
@@ -109,6 +133,22 @@ async def cleanup_response(
         await session.close()
 
 
+async def stream_response_content(
+    response: aiohttp.ClientResponse,
+    session: aiohttp.ClientSession,
+    on_close=None,
+):
+    # Cleans up in the generator rather than in a background task, which is
+    # skipped when the client disconnects mid-stream
+    try:
+        async for chunk in response.content:
+            yield chunk
+    finally:
+        if on_close:
+            on_close()
+        await cleanup_response(response, session)
+
+
 async def send_post_request(
     url: str,
     payload: Union[str, bytes],
@@ -116,9 +156,12 @@ async def send_post_request(
     key: Optional[str] = None,
     content_type: Optional[str] = None,
     user: UserModel = None,
+    url_idx: Optional[int] = None,
+    model: Optional[str] = None,
 ):
 
     r = None
+    started_at = ollama_balancer.start(url_idx) if url_idx is not None else None
     try:
         session = aiohttp.ClientSession(
             trust_env=True, timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT)
@@ -151,19 +194,33 @@ async def send_post_request(
                 response_headers["Content-Type"] = content_type
 
             return StreamingResponse(
-                r.content,
+                stream_response_content(
+                    r,
+                    session,
+                    on_close=(
+                        (
+                            lambda: ollama_balancer.finish(
+                                url_idx, started_at, model=model
+                            )
+                        )
+                        if url_idx is not None
+                        else None
+                    ),
+                ),
                 status_code=r.status,
                 headers=response_headers,
-                background=BackgroundTask(
-                    cleanup_response, response=r, session=session
-                ),
             )
         else:
             res = await r.json()
             await cleanup_response(r, session)
+            if url_idx is not None:
+                ollama_balancer.finish(url_idx, started_at, model=model)
             return res
 
     except Exception as e:
+        if url_idx is not None:
+            ollama_balancer.finish(url_idx, started_at, error=e)
+
         detail = None
 
         if r is not None:
@@ -188,6 +245,80 @@ def get_api_key(idx, url, configs):
     )  # Legacy support
 
 
+background_tasks = set()
+
+
+async def refresh_loaded_models(request: Request):
+    urls = request.app.state.config.OLLAMA_BASE_URLS
+    responses = await asyncio.gather(
+        *[
+            send_get_request(
+                f"{url}/api/ps",
+                get_api_key(idx, url, request.app.state.config.OLLAMA_API_CONFIGS),
+            )
+            for idx, url in enumerate(urls)
+        ]
+    )
+    update_loaded_models(responses)
+
+
+def update_loaded_models(responses: list[Optional[dict]]):
+    ollama_balancer.update_loaded_models(
+        {
+            idx: (
+                [
+                    model.get("model", model.get("name"))
+                    for model in response.get("models", [])
+                ]
+                if response
+                else None
+            )
+            for idx, response in enumerate(responses)
+        }
+    )
+
+
+def select_url_idx(
+    request: Request, model: str, urls: list[int], session_id: Optional[str] = None
+) -> int:
+    """
+    Picks one of the urls serving the model, see OLLAMA_LOAD_BALANCING_STRATEGY.
+    """
+    configs = request.app.state.config.OLLAMA_API_CONFIGS
+    base_urls = request.app.state.config.OLLAMA_BASE_URLS
+
+    if (
+        ollama_balancer.strategy == "model_affinity"
+        and len(urls) > 1
+        and ollama_balancer.should_refresh_loaded_models()
+    ):
+        # Refresh in the background, this request goes with what is known
+        task = asyncio.create_task(refresh_loaded_models(request))
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
+
+    weights = {}
+    prefix_ids = set()
+    for idx in urls:
+        api_config = configs.get(str(idx), configs.get(base_urls[idx], {}))
+        try:
+            weights[idx] = int(api_config.get("weight", 1))
+        except (TypeError, ValueError):
+            weights[idx] = 1
+        if api_config.get("prefix_id"):
+            prefix_ids.add(api_config["prefix_id"])
+
+    # /api/ps reports the models without the prefix of the connection
+    for prefix_id in prefix_ids:
+        if model.startswith(f"{prefix_id}."):
+            model = model[len(prefix_id) + 1 :]
+            break
+
+    return ollama_balancer.select(
+        urls, model=model, weights=weights, session_id=session_id
+    )
+
+
 ##########################################
 #
 # API routes
@@ -265,6 +396,15 @@ async def get_config(request: Request, user=Depends(get_admin_user)):
     }
 
 
+@router.get("/stats")
+async def get_stats(request: Request, user=Depends(get_admin_user)):
+    """
+    Load balancing state per url: in-flight requests, failures, health,
+    average latency and the models known to be loaded.
+    """
+    return ollama_balancer.get_stats(request.app.state.config.OLLAMA_BASE_URLS)
+
+
 class OllamaConfigForm(BaseModel):
     ENABLE_OLLAMA_API: Optional[bool] = None
     OLLAMA_BASE_URLS: list[str]
@@ -277,6 +417,9 @@ async def update_config(
 ):
     request.app.state.config.ENABLE_OLLAMA_API = form_data.ENABLE_OLLAMA_API
 
+    if request.app.state.config.OLLAMA_BASE_URLS != form_data.OLLAMA_BASE_URLS:
+        ollama_balancer.reset()
+
     request.app.state.config.OLLAMA_BASE_URLS = form_data.OLLAMA_BASE_URLS
     request.app.state.config.OLLAMA_API_CONFIGS = form_data.OLLAMA_API_CONFIGS
 
@@ -296,6 +439,7 @@ async def update_config(
 
 
 @cached(ttl=1)
+@single_flight(key=get_models_flight_key)
 async def get_all_models(request: Request, user: UserModel = None):
     log.info("get_all_models()")
     if request.app.state.config.ENABLE_OLLAMA_API:
@@ -552,6 +696,7 @@ async def get_ollama_loaded_models(request: Request, user=Depends(get_verified_u
             for idx, url in enumerate(request.app.state.config.OLLAMA_BASE_URLS)
         ]
         responses = await asyncio.gather(*request_tasks)
+        update_loaded_models(responses)
 
         return dict(zip(request.app.state.config.OLLAMA_BASE_URLS, responses))
     else:
@@ -796,50 +941,19 @@ async def show_model_info(
             detail=ERROR_MESSAGES.MODEL_NOT_FOUND(form_data.name),
         )
 
-    url_idx = random.choice(models[form_data.name]["urls"])
+    url_idx = select_url_idx(request, form_data.name, models[form_data.name]["urls"])
 
     url = request.app.state.config.OLLAMA_BASE_URLS[url_idx]
     key = get_api_key(url_idx, url, request.app.state.config.OLLAMA_API_CONFIGS)
 
-    try:
-        r = requests.request(
-            method="POST",
-            url=f"{url}/api/show",
-            headers={
-                "Content-Type": "application/json",
-                **({"Authorization": f"Bearer {key}"} if key else {}),
-                **(
-                    {
-                        "X-OpenWebUI-User-Name": user.name,
-                        "X-OpenWebUI-User-Id": user.id,
-                        "X-OpenWebUI-User-Email": user.email,
-                        "X-OpenWebUI-User-Role": user.role,
-                    }
-                    if ENABLE_FORWARD_USER_INFO_HEADERS and user
-                    else {}
-                ),
-            },
-            data=form_data.model_dump_json(exclude_none=True).encode(),
-        )
-        r.raise_for_status()
-
-        return r.json()
-    except Exception as e:
-        log.exception(e)
-
-        detail = None
-        if r is not None:
-            try:
-                res = r.json()
-                if "error" in res:
-                    detail = f"Ollama: {res['error']}"
-            except Exception:
-                detail = f"Ollama: {e}"
-
-        raise HTTPException(
-            status_code=r.status_code if r else 500,
-            detail=detail if detail else "Open WebUI: Server Connection Error",
-        )
+    return await send_post_request(
+        url=f"{url}/api/show",
+        payload=form_data.model_dump_json(exclude_none=True).encode(),
+        stream=False,
+        key=key,
+        user=user,
+        url_idx=url_idx,
+    )
 
 
 class GenerateEmbedForm(BaseModel):
@@ -870,7 +984,7 @@ async def embed(
             model = f"{model}:latest"
 
         if model in models:
-            url_idx = random.choice(models[model]["urls"])
+            url_idx = select_url_idx(request, model, models[model]["urls"])
         else:
             raise HTTPException(
                 status_code=400,
@@ -880,46 +994,14 @@ async def embed(
     url = request.app.state.config.OLLAMA_BASE_URLS[url_idx]
     key = get_api_key(url_idx, url, request.app.state.config.OLLAMA_API_CONFIGS)
 
-    try:
-        r = requests.request(
-            method="POST",
-            url=f"{url}/api/embed",
-            headers={
-                "Content-Type": "application/json",
-                **({"Authorization": f"Bearer {key}"} if key else {}),
-                **(
-                    {
-                        "X-OpenWebUI-User-Name": user.name,
-                        "X-OpenWebUI-User-Id": user.id,
-                        "X-OpenWebUI-User-Email": user.email,
-                        "X-OpenWebUI-User-Role": user.role,
-                    }
-                    if ENABLE_FORWARD_USER_INFO_HEADERS and user
-                    else {}
-                ),
-            },
-            data=form_data.model_dump_json(exclude_none=True).encode(),
-        )
-        r.raise_for_status()
-
-        data = r.json()
-        return data
-    except Exception as e:
-        log.exception(e)
-
-        detail = None
-        if r is not None:
-            try:
-                res = r.json()
-                if "error" in res:
-                    detail = f"Ollama: {res['error']}"
-            except Exception:
-                detail = f"Ollama: {e}"
-
-        raise HTTPException(
-            status_code=r.status_code if r else 500,
-            detail=detail if detail else "Open WebUI: Server Connection Error",
-        )
+    return await send_post_request(
+        url=f"{url}/api/embed",
+        payload=form_data.model_dump_json(exclude_none=True).encode(),
+        stream=False,
+        key=key,
+        user=user,
+        url_idx=url_idx,
+    )
 
 
 class GenerateEmbeddingsForm(BaseModel):
@@ -949,7 +1031,7 @@ async def embeddings(
             model = f"{model}:latest"
 
         if model in models:
-            url_idx = random.choice(models[model]["urls"])
+            url_idx = select_url_idx(request, model, models[model]["urls"])
         else:
             raise HTTPException(
                 status_code=400,
@@ -959,46 +1041,14 @@ async def embeddings(
     url = request.app.state.config.OLLAMA_BASE_URLS[url_idx]
     key = get_api_key(url_idx, url, request.app.state.config.OLLAMA_API_CONFIGS)
 
-    try:
-        r = requests.request(
-            method="POST",
-            url=f"{url}/api/embeddings",
-            headers={
-                "Content-Type": "application/json",
-                **({"Authorization": f"Bearer {key}"} if key else {}),
-                **(
-                    {
-                        "X-OpenWebUI-User-Name": user.name,
-                        "X-OpenWebUI-User-Id": user.id,
-                        "X-OpenWebUI-User-Email": user.email,
-                        "X-OpenWebUI-User-Role": user.role,
-                    }
-                    if ENABLE_FORWARD_USER_INFO_HEADERS and user
-                    else {}
-                ),
-            },
-            data=form_data.model_dump_json(exclude_none=True).encode(),
-        )
-        r.raise_for_status()
-
-        data = r.json()
-        return data
-    except Exception as e:
-        log.exception(e)
-
-        detail = None
-        if r is not None:
-            try:
-                res = r.json()
-                if "error" in res:
-                    detail = f"Ollama: {res['error']}"
-            except Exception:
-                detail = f"Ollama: {e}"
-
-        raise HTTPException(
-            status_code=r.status_code if r else 500,
-            detail=detail if detail else "Open WebUI: Server Connection Error",
-        )
+    return await send_post_request(
+        url=f"{url}/api/embeddings",
+        payload=form_data.model_dump_json(exclude_none=True).encode(),
+        stream=False,
+        key=key,
+        user=user,
+        url_idx=url_idx,
+    )
 
 
 class GenerateCompletionForm(BaseModel):
@@ -1034,7 +1084,7 @@ async def generate_completion(
             model = f"{model}:latest"
 
         if model in models:
-            url_idx = random.choice(models[model]["urls"])
+            url_idx = select_url_idx(request, model, models[model]["urls"])
         else:
             raise HTTPException(
                 status_code=400,
@@ -1047,15 +1097,20 @@ async def generate_completion(
         request.app.state.config.OLLAMA_API_CONFIGS.get(url, {}),  # Legacy support
     )
 
+    model = form_data.model if ":" in form_data.model else f"{form_data.model}:latest"
+
     prefix_id = api_config.get("prefix_id", None)
     if prefix_id:
         form_data.model = form_data.model.replace(f"{prefix_id}.", "")
+        model = model.replace(f"{prefix_id}.", "")
 
     return await send_post_request(
         url=f"{url}/api/generate",
         payload=form_data.model_dump_json(exclude_none=True).encode(),
         key=get_api_key(url_idx, url, request.app.state.config.OLLAMA_API_CONFIGS),
         user=user,
+        url_idx=url_idx,
+        model=model,
     )
 
 
@@ -1090,7 +1145,12 @@ class GenerateChatCompletionForm(BaseModel):
     tools: Optional[list[dict]] = None
 
 
-async def get_ollama_url(request: Request, model: str, url_idx: Optional[int] = None):
+async def get_ollama_url(
+    request: Request,
+    model: str,
+    url_idx: Optional[int] = None,
+    session_id: Optional[str] = None,
+):
     if url_idx is None:
         models = request.app.state.OLLAMA_MODELS
         if model not in models:
@@ -1098,7 +1158,9 @@ async def get_ollama_url(request: Request, model: str, url_idx: Optional[int] =
                 status_code=400,
                 detail=ERROR_MESSAGES.MODEL_NOT_FOUND(model),
             )
-        url_idx = random.choice(models[model].get("urls", []))
+        url_idx = select_url_idx(
+            request, model, models[model].get("urls", []), session_id=session_id
+        )
     url = request.app.state.config.OLLAMA_BASE_URLS[url_idx]
     return url, url_idx
 
@@ -1169,7 +1231,13 @@ async def generate_chat_completion(
     if ":" not in payload["model"]:
         payload["model"] = f"{payload['model']}:latest"
 
-    url, url_idx = await get_ollama_url(request, payload["model"], url_idx)
+    model = payload["model"]
+    url, url_idx = await get_ollama_url(
+        request,
+        model,
+        url_idx,
+        session_id=metadata.get("chat_id") if metadata else None,
+    )
     api_config = request.app.state.config.OLLAMA_API_CONFIGS.get(
         str(url_idx),
         request.app.state.config.OLLAMA_API_CONFIGS.get(url, {}),  # Legacy support
@@ -1186,6 +1254,8 @@ async def generate_chat_completion(
         key=get_api_key(url_idx, url, request.app.state.config.OLLAMA_API_CONFIGS),
         content_type="application/x-ndjson",
         user=user,
+        url_idx=url_idx,
+        model=payload["model"],
     )
 
 
@@ -1272,7 +1342,8 @@ async def generate_openai_completion(
     if ":" not in payload["model"]:
         payload["model"] = f"{payload['model']}:latest"
 
-    url, url_idx = await get_ollama_url(request, payload["model"], url_idx)
+    model = payload["model"]
+    url, url_idx = await get_ollama_url(request, model, url_idx)
     api_config = request.app.state.config.OLLAMA_API_CONFIGS.get(
         str(url_idx),
         request.app.state.config.OLLAMA_API_CONFIGS.get(url, {}),  # Legacy support
@@ -1289,6 +1360,8 @@ async def generate_openai_completion(
         stream=payload.get("stream", False),
         key=get_api_key(url_idx, url, request.app.state.config.OLLAMA_API_CONFIGS),
         user=user,
+        url_idx=url_idx,
+        model=payload["model"],
     )
 
 
@@ -1352,7 +1425,13 @@ async def generate_openai_chat_completion(
     if ":" not in payload["model"]:
         payload["model"] = f"{payload['model']}:latest"
 
-    url, url_idx = await get_ollama_url(request, payload["model"], url_idx)
+    model = payload["model"]
+    url, url_idx = await get_ollama_url(
+        request,
+        model,
+        url_idx,
+        session_id=metadata.get("chat_id") if metadata else None,
+    )
     api_config = request.app.state.config.OLLAMA_API_CONFIGS.get(
         str(url_idx),
         request.app.state.config.OLLAMA_API_CONFIGS.get(url, {}),  # Legacy support
@@ -1368,6 +1447,8 @@ async def generate_openai_chat_completion(
         stream=payload.get("stream", False),
         key=get_api_key(url_idx, url, request.app.state.config.OLLAMA_API_CONFIGS),
         user=user,
+        url_idx=url_idx,
+        model=payload["model"],
     )
 
 
@@ -42,6 +42,8 @@ from open_webui.utils.misc import (
 
 from open_webui.utils.auth import get_admin_user, get_verified_user
 from open_webui.utils.access_control import has_access
+from open_webui.utils.circuit_breaker import get_circuit_breaker
+from open_webui.utils.singleflight import single_flight
 
 
 log = logging.getLogger(__name__)
@@ -56,6 +58,11 @@ log.setLevel(SRC_LOG_LEVELS["OPENAI"])
 
 
 async def send_get_request(url, key=None, user: UserModel = None):
+    breaker = get_circuit_breaker(url)
+    if not breaker.allow():
+        log.debug(f"Skipping {url}, it failed recently")
+        return None
+
     timeout = aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT_MODEL_LIST)
     try:
         async with aiohttp.ClientSession(timeout=timeout, trust_env=True) as session:
@@ -75,13 +82,21 @@ async def send_get_request(url, key=None, user: UserModel = None):
                     ),
                 },
             ) as response:
-                return await response.json()
+                res = await response.json()
+                breaker.record_success()
+                return res
     except Exception as e:
         # Handle connection error here
         log.error(f"Connection error: {e}")
+        breaker.record_failure()
         return None
 
 
+def get_models_flight_key(request: Request, user: UserModel = None):
+    # The model lists only differ between users when user info is forwarded
+    return user.id if ENABLE_FORWARD_USER_INFO_HEADERS and user else None
+
+
 async def cleanup_response(
     response: Optional[aiohttp.ClientResponse],
     session: Optional[aiohttp.ClientSession],
@@ -385,6 +400,7 @@ async def get_filtered_models(models, user):
 
 
 @cached(ttl=1)
+@single_flight(key=get_models_flight_key)
 async def get_all_models(request: Request, user: UserModel) -> dict[str, list]:
     log.info("get_all_models()")
 
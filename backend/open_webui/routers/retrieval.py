@@ -1,3 +1,4 @@
+import asyncio
 import json
 import logging
 import mimetypes
@@ -8,6 +9,7 @@ import uuid
 from datetime import datetime
 from pathlib import Path
 from typing import Iterator, List, Optional, Sequence, Union
+from urllib.parse import urldefrag
 
 from fastapi import (
     Depends,
@@ -35,13 +37,17 @@ from open_webui.storage.provider import Storage
 
 
 from open_webui.retrieval.vector.connector import VECTOR_DB_CLIENT
+from open_webui.retrieval.vector.memory import (
+    EPHEMERAL_COLLECTION_PREFIX,
+    MEMORY_VECTOR_DB_CLIENT,
+)
 
 # Document loaders
 from open_webui.retrieval.loaders.main import Loader
 from open_webui.retrieval.loaders.youtube import YoutubeLoader
 
 # Web search engines
-from open_webui.retrieval.web.main import SearchResult
+from open_webui.retrieval.web.main import SearchResult, get_search_semaphore
 from open_webui.retrieval.web.utils import get_web_loader
 from open_webui.retrieval.web.brave import search_brave
 from open_webui.retrieval.web.kagi import search_kagi
@@ -63,17 +69,20 @@ from open_webui.retrieval.web.perplexity import search_perplexity
 from open_webui.retrieval.web.sougou import search_sougou
 
 from open_webui.retrieval.utils import (
+    generate_cached_embeddings,
     get_embedding_function,
     get_model_path,
     query_collection,
     query_collection_with_hybrid_search,
     query_doc,
     query_doc_with_hybrid_search,
+    web_search_embedding_cache,
 )
 from open_webui.utils.misc import (
     calculate_sha256_string,
 )
 from open_webui.utils.auth import get_admin_user, get_verified_user
+from open_webui.utils.executors import INGESTION_EXECUTOR
 
 from open_webui.config import (
     ENV,
@@ -176,7 +185,8 @@ class ProcessUrlForm(CollectionNameForm):
 
 
 class SearchForm(BaseModel):
-    query: str
+    query: Optional[str] = None
+    queries: Optional[list[str]] = None
 
 
 @router.get("/")
@@ -792,6 +802,31 @@ async def update_rag_config(
 ####################################
 
 
+def split_docs(request: Request, docs: list[Document]) -> list[Document]:
+    if request.app.state.config.TEXT_SPLITTER in ["", "character"]:
+        text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=request.app.state.config.CHUNK_SIZE,
+            chunk_overlap=request.app.state.config.CHUNK_OVERLAP,
+            add_start_index=True,
+        )
+    elif request.app.state.config.TEXT_SPLITTER == "token":
+        log.info(
+            f"Using token text splitter: {request.app.state.config.TIKTOKEN_ENCODING_NAME}"
+        )
+
+        tiktoken.get_encoding(str(request.app.state.config.TIKTOKEN_ENCODING_NAME))
+        text_splitter = TokenTextSplitter(
+            encoding_name=str(request.app.state.config.TIKTOKEN_ENCODING_NAME),
+            chunk_size=request.app.state.config.CHUNK_SIZE,
+            chunk_overlap=request.app.state.config.CHUNK_OVERLAP,
+            add_start_index=True,
+        )
+    else:
+        raise ValueError(ERROR_MESSAGES.DEFAULT("Invalid text splitter"))
+
+    return text_splitter.split_documents(docs)
+
+
 def save_docs_to_vector_db(
     request: Request,
     docs,
@@ -836,28 +871,7 @@ def save_docs_to_vector_db(
                 raise ValueError(ERROR_MESSAGES.DUPLICATE_CONTENT)
 
     if split:
-        if request.app.state.config.TEXT_SPLITTER in ["", "character"]:
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=request.app.state.config.CHUNK_SIZE,
-                chunk_overlap=request.app.state.config.CHUNK_OVERLAP,
-                add_start_index=True,
-            )
-        elif request.app.state.config.TEXT_SPLITTER == "token":
-            log.info(
-                f"Using token text splitter: {request.app.state.config.TIKTOKEN_ENCODING_NAME}"
-            )
-
-            tiktoken.get_encoding(str(request.app.state.config.TIKTOKEN_ENCODING_NAME))
-            text_splitter = TokenTextSplitter(
-                encoding_name=str(request.app.state.config.TIKTOKEN_ENCODING_NAME),
-                chunk_size=request.app.state.config.CHUNK_SIZE,
-                chunk_overlap=request.app.state.config.CHUNK_OVERLAP,
-                add_start_index=True,
-            )
-        else:
-            raise ValueError(ERROR_MESSAGES.DEFAULT("Invalid text splitter"))
-
-        docs = text_splitter.split_documents(docs)
+        docs = split_docs(request, docs)
 
     if len(docs) == 0:
         raise ValueError(ERROR_MESSAGES.EMPTY_CONTENT)
@@ -952,7 +966,6 @@ class ProcessFileForm(BaseModel):
     collection_name: Optional[str] = None
 
 
-@router.post("/process/file")
 def process_file(
     request: Request,
     form_data: ProcessFileForm,
@@ -991,6 +1004,8 @@ def process_file(
             ]
 
             text_content = form_data.content
+            # Edited content is not reused for other uploads
+            content_extraction_engine = None
         elif form_data.collection_name:
             # Check if the file has already been processed and save the content
             # Usage: /knowledge/{id}/file/add, /knowledge/{id}/file/update
@@ -1022,11 +1037,46 @@ def process_file(
                 ]
 
             text_content = file.data.get("content", "")
+            content_extraction_engine = file.data.get("content_extraction_engine")
         else:
             # Process the file and save the content
             # Usage: /files/
             file_path = file.path
-            if file_path:
+
+            # Extracted content is only reused for the same engine
+            content_extraction_engine = (
+                request.app.state.config.CONTENT_EXTRACTION_ENGINE or ""
+            )
+
+            # The same bytes were extracted before, skip the extraction
+            processed_file = (
+                Files.get_processed_file_by_content_hash(
+                    file.content_hash, exclude_id=file.id
+                )
+                if file.content_hash
+                else None
+            )
+            if (
+                processed_file
+                and processed_file.data.get("content_extraction_engine")
+                == content_extraction_engine
+            ):
+                log.info(
+                    f"Reusing the extracted content of {processed_file.id} for {file.id}"
+                )
+                docs = [
+                    Document(
+                        page_content=processed_file.data.get("content", ""),
+                        metadata={
+                            **file.meta,
+                            "name": file.filename,
+                            "created_by": file.user_id,
+                            "file_id": file.id,
+                            "source": file.filename,
+                        },
+                    )
+                ]
+            elif file_path:
                 file_path = Storage.get_file(file_path)
                 loader = Loader(
                     engine=request.app.state.config.CONTENT_EXTRACTION_ENGINE,
@@ -1072,7 +1122,10 @@ def process_file(
         log.debug(f"text_content: {text_content}")
         Files.update_file_data_by_id(
             file.id,
-            {"content": text_content},
+            {
+                "content": text_content,
+                "content_extraction_engine": content_extraction_engine,
+            },
         )
 
         hash = calculate_sha256_string(text_content)
@@ -1131,12 +1184,57 @@ def process_file(
             )
 
 
+@router.post("/process/file")
+async def process_file_endpoint(
+    request: Request,
+    form_data: ProcessFileForm,
+    user=Depends(get_verified_user),
+):
+    # Extraction and embedding block, they run in the shared ingestion threads
+    return await INGESTION_EXECUTOR.run(process_file, request, form_data, user=user)
+
+
 class ProcessTextForm(BaseModel):
     name: str
     content: str
     collection_name: Optional[str] = None
 
 
+def save_docs_to_memory(
+    request: Request, docs: list[Document], collection_name: str, user=None
+):
+    """
+    Chunks and embeds the documents in one batch into an in-memory collection.
+    Used for web search results, which are only needed for the current turn.
+    """
+    docs = split_docs(request, docs)
+    if len(docs) == 0:
+        raise ValueError(ERROR_MESSAGES.EMPTY_CONTENT)
+
+    texts = [doc.page_content for doc in docs]
+    embeddings = generate_cached_embeddings(
+        web_search_embedding_cache,
+        f"{request.app.state.config.RAG_EMBEDDING_ENGINE}:{request.app.state.config.RAG_EMBEDDING_MODEL}",
+        [text.replace("\n", " ") for text in texts],
+        lambda texts: request.app.state.EMBEDDING_FUNCTION(
+            texts, prefix=RAG_EMBEDDING_CONTENT_PREFIX, user=user
+        ),
+    )
+
+    MEMORY_VECTOR_DB_CLIENT.insert(
+        collection_name=collection_name,
+        items=[
+            {
+                "id": str(uuid.uuid4()),
+                "text": text,
+                "vector": embeddings[idx],
+                "metadata": docs[idx].metadata,
+            }
+            for idx, text in enumerate(texts)
+        ],
+    )
+
+
 @router.post("/process/text")
 def process_text(
     request: Request,
@@ -1262,7 +1360,7 @@ def process_web(
         )
 
 
-def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
+async def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
     """Search the web using a search engine and return the results as a list of SearchResult objects.
     Will look for a search engine API key in environment variables in the following order:
     - SEARXNG_QUERY_URL
@@ -1287,7 +1385,7 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
     # TODO: add playwright to search the web
     if engine == "searxng":
         if request.app.state.config.SEARXNG_QUERY_URL:
-            return search_searxng(
+            return await search_searxng(
                 request.app.state.config.SEARXNG_QUERY_URL,
                 query,
                 request.app.state.config.WEB_SEARCH_RESULT_COUNT,
@@ -1300,7 +1398,7 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
             request.app.state.config.GOOGLE_PSE_API_KEY
             and request.app.state.config.GOOGLE_PSE_ENGINE_ID
         ):
-            return search_google_pse(
+            return await search_google_pse(
                 request.app.state.config.GOOGLE_PSE_API_KEY,
                 request.app.state.config.GOOGLE_PSE_ENGINE_ID,
                 query,
@@ -1313,7 +1411,7 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
             )
     elif engine == "brave":
         if request.app.state.config.BRAVE_SEARCH_API_KEY:
-            return search_brave(
+            return await search_brave(
                 request.app.state.config.BRAVE_SEARCH_API_KEY,
                 query,
                 request.app.state.config.WEB_SEARCH_RESULT_COUNT,
@@ -1323,7 +1421,7 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
             raise Exception("No BRAVE_SEARCH_API_KEY found in environment variables")
     elif engine == "kagi":
         if request.app.state.config.KAGI_SEARCH_API_KEY:
-            return search_kagi(
+            return await search_kagi(
                 request.app.state.config.KAGI_SEARCH_API_KEY,
                 query,
                 request.app.state.config.WEB_SEARCH_RESULT_COUNT,
@@ -1333,7 +1431,7 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
             raise Exception("No KAGI_SEARCH_API_KEY found in environment variables")
     elif engine == "mojeek":
         if request.app.state.config.MOJEEK_SEARCH_API_KEY:
-            return search_mojeek(
+            return await search_mojeek(
                 request.app.state.config.MOJEEK_SEARCH_API_KEY,
                 query,
                 request.app.state.config.WEB_SEARCH_RESULT_COUNT,
@@ -1343,7 +1441,7 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
             raise Exception("No MOJEEK_SEARCH_API_KEY found in environment variables")
     elif engine == "bocha":
         if request.app.state.config.BOCHA_SEARCH_API_KEY:
-            return search_bocha(
+            return await search_bocha(
                 request.app.state.config.BOCHA_SEARCH_API_KEY,
                 query,
                 request.app.state.config.WEB_SEARCH_RESULT_COUNT,
@@ -1353,7 +1451,7 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
             raise Exception("No BOCHA_SEARCH_API_KEY found in environment variables")
     elif engine == "serpstack":
         if request.app.state.config.SERPSTACK_API_KEY:
-            return search_serpstack(
+            return await search_serpstack(
                 request.app.state.config.SERPSTACK_API_KEY,
                 query,
                 request.app.state.config.WEB_SEARCH_RESULT_COUNT,
@@ -1364,7 +1462,7 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
             raise Exception("No SERPSTACK_API_KEY found in environment variables")
     elif engine == "serper":
         if request.app.state.config.SERPER_API_KEY:
-            return search_serper(
+            return await search_serper(
                 request.app.state.config.SERPER_API_KEY,
                 query,
                 request.app.state.config.WEB_SEARCH_RESULT_COUNT,
@@ -1374,7 +1472,7 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
             raise Exception("No SERPER_API_KEY found in environment variables")
     elif engine == "serply":
         if request.app.state.config.SERPLY_API_KEY:
-            return search_serply(
+            return await search_serply(
                 request.app.state.config.SERPLY_API_KEY,
                 query,
                 request.app.state.config.WEB_SEARCH_RESULT_COUNT,
@@ -1383,14 +1481,14 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
         else:
             raise Exception("No SERPLY_API_KEY found in environment variables")
     elif engine == "duckduckgo":
-        return search_duckduckgo(
+        return await search_duckduckgo(
             query,
             request.app.state.config.WEB_SEARCH_RESULT_COUNT,
             request.app.state.config.WEB_SEARCH_DOMAIN_FILTER_LIST,
         )
     elif engine == "tavily":
         if request.app.state.config.TAVILY_API_KEY:
-            return search_tavily(
+            return await search_tavily(
                 request.app.state.config.TAVILY_API_KEY,
                 query,
                 request.app.state.config.WEB_SEARCH_RESULT_COUNT,
@@ -1400,7 +1498,7 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
             raise Exception("No TAVILY_API_KEY found in environment variables")
     elif engine == "searchapi":
         if request.app.state.config.SEARCHAPI_API_KEY:
-            return search_searchapi(
+            return await search_searchapi(
                 request.app.state.config.SEARCHAPI_API_KEY,
                 request.app.state.config.SEARCHAPI_ENGINE,
                 query,
@@ -1411,7 +1509,7 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
             raise Exception("No SEARCHAPI_API_KEY found in environment variables")
     elif engine == "serpapi":
         if request.app.state.config.SERPAPI_API_KEY:
-            return search_serpapi(
+            return await search_serpapi(
                 request.app.state.config.SERPAPI_API_KEY,
                 request.app.state.config.SERPAPI_ENGINE,
                 query,
@@ -1421,13 +1519,13 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
         else:
             raise Exception("No SERPAPI_API_KEY found in environment variables")
     elif engine == "jina":
-        return search_jina(
+        return await search_jina(
             request.app.state.config.JINA_API_KEY,
             query,
             request.app.state.config.WEB_SEARCH_RESULT_COUNT,
         )
     elif engine == "bing":
-        return search_bing(
+        return await search_bing(
             request.app.state.config.BING_SEARCH_V7_SUBSCRIPTION_KEY,
             request.app.state.config.BING_SEARCH_V7_ENDPOINT,
             str(DEFAULT_LOCALE),
@@ -1436,14 +1534,14 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
             request.app.state.config.WEB_SEARCH_DOMAIN_FILTER_LIST,
         )
     elif engine == "exa":
-        return search_exa(
+        return await search_exa(
             request.app.state.config.EXA_API_KEY,
             query,
             request.app.state.config.WEB_SEARCH_RESULT_COUNT,
             request.app.state.config.WEB_SEARCH_DOMAIN_FILTER_LIST,
         )
     elif engine == "perplexity":
-        return search_perplexity(
+        return await search_perplexity(
             request.app.state.config.PERPLEXITY_API_KEY,
             query,
             request.app.state.config.WEB_SEARCH_RESULT_COUNT,
@@ -1454,7 +1552,7 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
             request.app.state.config.SOUGOU_API_SID
             and request.app.state.config.SOUGOU_API_SK
         ):
-            return search_sougou(
+            return await search_sougou(
                 request.app.state.config.SOUGOU_API_SID,
                 request.app.state.config.SOUGOU_API_SK,
                 query,
@@ -1473,25 +1571,63 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
 async def process_web_search(
     request: Request, form_data: SearchForm, user=Depends(get_verified_user)
 ):
-    try:
-        logging.info(
-            f"trying to web search with {request.app.state.config.WEB_SEARCH_ENGINE, form_data.query}"
-        )
-        web_results = search_web(
-            request, request.app.state.config.WEB_SEARCH_ENGINE, form_data.query
+    return await search_and_index_web(request, form_data, user)
+
+
+async def search_and_index_web(
+    request: Request, form_data: SearchForm, user, ephemeral: bool = False
+):
+    """
+    Searches the queries and loads the result pages. With ephemeral, the pages
+    are indexed in one in-memory collection (returned as collection_name) that
+    is only meant for the current chat turn. Otherwise every page goes into its
+    own persistent collection (returned as collection_names).
+    """
+    queries = form_data.queries or ([form_data.query] if form_data.query else [])
+    queries = list(dict.fromkeys(query for query in queries if query))
+    if not queries:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.DEFAULT("No search query provided"),
         )
-    except Exception as e:
-        log.exception(e)
 
+    async def search(query: str) -> list[SearchResult]:
+        async with get_search_semaphore():
+            logging.info(
+                f"trying to web search with {request.app.state.config.WEB_SEARCH_ENGINE, query}"
+            )
+            return await search_web(
+                request, request.app.state.config.WEB_SEARCH_ENGINE, query
+            )
+
+    # All queries are searched at once, the pages are only fetched once per URL
+    search_results = await asyncio.gather(
+        *[search(query) for query in queries], return_exceptions=True
+    )
+
+    web_results = []
+    url_queries = {}
+    for query, results in zip(queries, search_results):
+        if isinstance(results, Exception):
+            log.error(f"Error searching {query}: {results}", exc_info=results)
+            continue
+
+        for result in results:
+            url = urldefrag(result.link).url
+            if url not in url_queries:
+                url_queries[url] = query
+                web_results.append(result)
+
+    if all(isinstance(results, Exception) for results in search_results):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=ERROR_MESSAGES.WEB_SEARCH_ERROR(e),
+            detail=ERROR_MESSAGES.WEB_SEARCH_ERROR(search_results[0]),
         )
 
     log.debug(f"web_results: {web_results}")
 
     try:
-        urls = [result.link for result in web_results]
+        urls = [urldefrag(result.link).url for result in web_results]
         loader = get_web_loader(
             urls,
             verify_ssl=request.app.state.config.ENABLE_WEB_LOADER_SSL_VERIFICATION,
@@ -1517,11 +1653,29 @@ async def process_web_search(
                 ],
                 "loaded_count": len(docs),
             }
+        elif ephemeral:
+            # One in-memory index for all pages, discarded after the turn
+            collection_name = f"{EPHEMERAL_COLLECTION_PREFIX}{uuid.uuid4()}"
+            await run_in_threadpool(
+                save_docs_to_memory,
+                request,
+                [doc for doc in docs if doc and doc.page_content],
+                collection_name,
+                user=user,
+            )
+
+            return {
+                "status": True,
+                "collection_name": collection_name,
+                "filenames": urls,
+                "loaded_count": len(docs),
+            }
         else:
             collection_names = []
             for doc_idx, doc in enumerate(docs):
                 if doc and doc.page_content:
-                    collection_name = f"web-search-{calculate_sha256_string(form_data.query + '-' + urls[doc_idx])}"[
+                    query = url_queries.get(urls[doc_idx], queries[0])
+                    collection_name = f"web-search-{calculate_sha256_string(query + '-' + urls[doc_idx])}"[
                         :63
                     ]
 
@@ -13,6 +13,8 @@ from open_webui.utils.task import (
     image_prompt_generation_template,
     autocomplete_generation_template,
     tags_generation_template,
+    combined_task_generation_template,
+    truncate_messages,
     emoji_generation_template,
     moa_response_generation_template,
 )
@@ -25,10 +27,13 @@ from open_webui.utils.filter import (
     process_filter_functions,
 )
 from open_webui.utils.task import get_task_model_id
+from open_webui.utils.task_cache import get_model_params, task_response_cache
 
 from open_webui.config import (
     DEFAULT_TITLE_GENERATION_PROMPT_TEMPLATE,
     DEFAULT_TAGS_GENERATION_PROMPT_TEMPLATE,
+    DEFAULT_COMBINED_TASK_GENERATION_PROMPT_TEMPLATE,
+    TASK_MODEL_HISTORY_TOKEN_BUDGET,
     DEFAULT_IMAGE_PROMPT_GENERATION_PROMPT_TEMPLATE,
     DEFAULT_QUERY_GENERATION_PROMPT_TEMPLATE,
     DEFAULT_AUTOCOMPLETE_GENERATION_PROMPT_TEMPLATE,
@@ -66,6 +71,8 @@ async def get_task_config(request: Request, user=Depends(get_verified_user)):
         "ENABLE_SEARCH_QUERY_GENERATION": request.app.state.config.ENABLE_SEARCH_QUERY_GENERATION,
         "ENABLE_RETRIEVAL_QUERY_GENERATION": request.app.state.config.ENABLE_RETRIEVAL_QUERY_GENERATION,
         "QUERY_GENERATION_PROMPT_TEMPLATE": request.app.state.config.QUERY_GENERATION_PROMPT_TEMPLATE,
+        "ENABLE_COMBINED_TASK_GENERATION": request.app.state.config.ENABLE_COMBINED_TASK_GENERATION,
+        "COMBINED_TASK_GENERATION_PROMPT_TEMPLATE": request.app.state.config.COMBINED_TASK_GENERATION_PROMPT_TEMPLATE,
         "TOOLS_FUNCTION_CALLING_PROMPT_TEMPLATE": request.app.state.config.TOOLS_FUNCTION_CALLING_PROMPT_TEMPLATE,
     }
 
@@ -83,6 +90,8 @@ class TaskConfigForm(BaseModel):
     ENABLE_SEARCH_QUERY_GENERATION: bool
     ENABLE_RETRIEVAL_QUERY_GENERATION: bool
     QUERY_GENERATION_PROMPT_TEMPLATE: str
+    ENABLE_COMBINED_TASK_GENERATION: Optional[bool] = None
+    COMBINED_TASK_GENERATION_PROMPT_TEMPLATE: Optional[str] = None
     TOOLS_FUNCTION_CALLING_PROMPT_TEMPLATE: str
 
 
@@ -122,6 +131,14 @@ async def update_task_config(
     request.app.state.config.QUERY_GENERATION_PROMPT_TEMPLATE = (
         form_data.QUERY_GENERATION_PROMPT_TEMPLATE
     )
+    if form_data.ENABLE_COMBINED_TASK_GENERATION is not None:
+        request.app.state.config.ENABLE_COMBINED_TASK_GENERATION = (
+            form_data.ENABLE_COMBINED_TASK_GENERATION
+        )
+    if form_data.COMBINED_TASK_GENERATION_PROMPT_TEMPLATE is not None:
+        request.app.state.config.COMBINED_TASK_GENERATION_PROMPT_TEMPLATE = (
+            form_data.COMBINED_TASK_GENERATION_PROMPT_TEMPLATE
+        )
     request.app.state.config.TOOLS_FUNCTION_CALLING_PROMPT_TEMPLATE = (
         form_data.TOOLS_FUNCTION_CALLING_PROMPT_TEMPLATE
     )
@@ -139,10 +156,17 @@ async def update_task_config(
         "ENABLE_SEARCH_QUERY_GENERATION": request.app.state.config.ENABLE_SEARCH_QUERY_GENERATION,
         "ENABLE_RETRIEVAL_QUERY_GENERATION": request.app.state.config.ENABLE_RETRIEVAL_QUERY_GENERATION,
         "QUERY_GENERATION_PROMPT_TEMPLATE": request.app.state.config.QUERY_GENERATION_PROMPT_TEMPLATE,
+        "ENABLE_COMBINED_TASK_GENERATION": request.app.state.config.ENABLE_COMBINED_TASK_GENERATION,
+        "COMBINED_TASK_GENERATION_PROMPT_TEMPLATE": request.app.state.config.COMBINED_TASK_GENERATION_PROMPT_TEMPLATE,
         "TOOLS_FUNCTION_CALLING_PROMPT_TEMPLATE": request.app.state.config.TOOLS_FUNCTION_CALLING_PROMPT_TEMPLATE,
     }
 
 
+@router.get("/cache")
+async def get_task_cache_stats(user=Depends(get_admin_user)):
+    return task_response_cache.get_stats()
+
+
 @router.post("/title/completions")
 async def generate_title(
     request: Request, form_data: dict, user=Depends(get_verified_user)
@@ -232,7 +256,13 @@ async def generate_title(
         raise e
 
     try:
-        return await generate_chat_completion(request, form_data=payload, user=user)
+        return await task_response_cache.generate(
+            str(TASKS.TITLE_GENERATION),
+            payload,
+            user.id,
+            lambda: generate_chat_completion(request, form_data=payload, user=user),
+            params=get_model_params(models[task_model_id]),
+        )
     except Exception as e:
         log.error("Exception occurred", exc_info=True)
         return JSONResponse(
@@ -307,7 +337,13 @@ async def generate_chat_tags(
         raise e
 
     try:
-        return await generate_chat_completion(request, form_data=payload, user=user)
+        return await task_response_cache.generate(
+            str(TASKS.TAGS_GENERATION),
+            payload,
+            user.id,
+            lambda: generate_chat_completion(request, form_data=payload, user=user),
+            params=get_model_params(models[task_model_id]),
+        )
     except Exception as e:
         log.error(f"Error generating chat completion: {e}")
         return JSONResponse(
@@ -316,6 +352,114 @@ async def generate_chat_tags(
         )
 
 
+@router.post("/combined/completions")
+async def generate_combined_tasks(
+    request: Request, form_data: dict, user=Depends(get_verified_user)
+):
+    """
+    Generates the title, tags and search queries of a chat with a single task
+    model call, replacing the separate title, tags and queries completions.
+    """
+
+    if not request.app.state.config.ENABLE_COMBINED_TASK_GENERATION:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Combined task generation is disabled",
+        )
+
+    if getattr(request.state, "direct", False) and hasattr(request.state, "model"):
+        models = {
+            request.state.model["id"]: request.state.model,
+        }
+    else:
+        models = request.app.state.MODELS
+
+    model_id = form_data["model"]
+    if model_id not in models:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Model not found",
+        )
+
+    # Check if the user has a custom task model
+    # If the user has a custom task model, use that model
+    task_model_id = get_task_model_id(
+        model_id,
+        request.app.state.config.TASK_MODEL,
+        request.app.state.config.TASK_MODEL_EXTERNAL,
+        models,
+    )
+
+    log.debug(
+        f"generating combined tasks using model {task_model_id} for user {user.email}"
+    )
+
+    if request.app.state.config.COMBINED_TASK_GENERATION_PROMPT_TEMPLATE != "":
+        template = request.app.state.config.COMBINED_TASK_GENERATION_PROMPT_TEMPLATE
+    else:
+        template = DEFAULT_COMBINED_TASK_GENERATION_PROMPT_TEMPLATE
+
+    messages = truncate_messages(form_data["messages"], TASK_MODEL_HISTORY_TOKEN_BUDGET)
+
+    # Remove reasoning details from the messages
+    for message in messages:
+        message["content"] = re.sub(
+            r"<details\s+type=\"reasoning\"[^>]*>.*?<\/details>",
+            "",
+            message["content"],
+            flags=re.S,
+        ).strip()
+
+    content = combined_task_generation_template(
+        template,
+        messages,
+        {
+            "name": user.name,
+            "location": user.info.get("location") if user.info else None,
+        },
+    )
+
+    payload = {
+        "model": task_model_id,
+        "messages": [{"role": "user", "content": content}],
+        "stream": False,
+        **(
+            {"max_tokens": 1000}
+            if models[task_model_id].get("owned_by") == "ollama"
+            else {
+                "max_completion_tokens": 1000,
+            }
+        ),
+        "metadata": {
+            **(request.state.metadata if hasattr(request.state, "metadata") else {}),
+            "task": str(TASKS.COMBINED_TASK_GENERATION),
+            "task_body": form_data,
+            "chat_id": form_data.get("chat_id", None),
+        },
+    }
+
+    # Process the payload through the pipeline
+    try:
+        payload = await process_pipeline_inlet_filter(request, payload, user, models)
+    except Exception as e:
+        raise e
+
+    try:
+        return await task_response_cache.generate(
+            str(TASKS.COMBINED_TASK_GENERATION),
+            payload,
+            user.id,
+            lambda: generate_chat_completion(request, form_data=payload, user=user),
+            params=get_model_params(models[task_model_id]),
+        )
+    except Exception as e:
+        log.error("Exception occurred", exc_info=True)
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"detail": "An internal error has occurred."},
+        )
+
+
 @router.post("/image_prompt/completions")
 async def generate_image_prompt(
     request: Request, form_data: dict, user=Depends(get_verified_user)
@@ -379,7 +523,13 @@ async def generate_image_prompt(
         raise e
 
     try:
-        return await generate_chat_completion(request, form_data=payload, user=user)
+        return await task_response_cache.generate(
+            str(TASKS.IMAGE_PROMPT_GENERATION),
+            payload,
+            user.id,
+            lambda: generate_chat_completion(request, form_data=payload, user=user),
+            params=get_model_params(models[task_model_id]),
+        )
     except Exception as e:
         log.error("Exception occurred", exc_info=True)
         return JSONResponse(
@@ -462,7 +612,13 @@ async def generate_queries(
         raise e
 
     try:
-        return await generate_chat_completion(request, form_data=payload, user=user)
+        return await task_response_cache.generate(
+            str(TASKS.QUERY_GENERATION),
+            payload,
+            user.id,
+            lambda: generate_chat_completion(request, form_data=payload, user=user),
+            params=get_model_params(models[task_model_id]),
+        )
     except Exception as e:
         return JSONResponse(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -549,7 +705,13 @@ async def generate_autocompletion(
         raise e
 
     try:
-        return await generate_chat_completion(request, form_data=payload, user=user)
+        return await task_response_cache.generate(
+            str(TASKS.AUTOCOMPLETE_GENERATION),
+            payload,
+            user.id,
+            lambda: generate_chat_completion(request, form_data=payload, user=user),
+            params=get_model_params(models[task_model_id]),
+        )
     except Exception as e:
         log.error(f"Error generating chat completion: {e}")
         return JSONResponse(
@@ -625,7 +787,13 @@ async def generate_emoji(
         raise e
 
     try:
-        return await generate_chat_completion(request, form_data=payload, user=user)
+        return await task_response_cache.generate(
+            str(TASKS.EMOJI_GENERATION),
+            payload,
+            user.id,
+            lambda: generate_chat_completion(request, form_data=payload, user=user),
+            params=get_model_params(models[task_model_id]),
+        )
     except Exception as e:
         return JSONResponse(
             status_code=status.HTTP_400_BAD_REQUEST,
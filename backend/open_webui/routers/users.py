@@ -17,10 +17,13 @@ from open_webui.socket.main import get_active_status_by_user_id
 from open_webui.constants import ERROR_MESSAGES
 from open_webui.env import SRC_LOG_LEVELS
 from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, Response
 from pydantic import BaseModel
 
 from open_webui.utils.auth import get_admin_user, get_password_hash, get_verified_user
 from open_webui.utils.access_control import get_permissions
+from open_webui.utils.avatar import get_avatar_file_path
 
 
 log = logging.getLogger(__name__)
@@ -245,6 +248,30 @@ class UserResponse(BaseModel):
     active: Optional[bool] = None
 
 
+############################
+# GetAvatar
+############################
+
+
+@router.get("/avatars/{filename}")
+async def get_avatar(request: Request, filename: str, user=Depends(get_verified_user)):
+    # Avatars are stored under their content hash, so they never change
+    etag = f'"{filename.split(".")[0]}"'
+    headers = {"Cache-Control": "private, max-age=31536000, immutable", "ETag": etag}
+
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    file_path = await run_in_threadpool(get_avatar_file_path, filename)
+    if not file_path:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=ERROR_MESSAGES.NOT_FOUND,
+        )
+
+    return FileResponse(file_path, headers=headers)
+
+
 @router.get("/{user_id}", response_model=UserResponse)
 async def get_user_by_id(user_id: str, user=Depends(get_verified_user)):
     # Check if user_id is a shared chat
@@ -267,7 +294,7 @@ async def get_user_by_id(user_id: str, user=Depends(get_verified_user)):
             **{
                 "name": user.name,
                 "profile_image_url": user.profile_image_url,
-                "active": get_active_status_by_user_id(user_id),
+                "active": await get_active_status_by_user_id(user_id),
             }
         )
     else:
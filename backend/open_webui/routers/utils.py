@@ -62,6 +62,7 @@ async def execute_code(
                 else None
             ),
             request.app.state.config.CODE_EXECUTION_JUPYTER_TIMEOUT,
+            user_id=user.id,
         )
 
         return output
@@ -1,6 +1,9 @@
 import json
+import time
 import uuid
-from open_webui.utils.redis import get_redis_connection
+from typing import Optional
+
+from open_webui.utils.redis import get_redis_connection, get_async_redis_connection
 
 
 class RedisLock:
@@ -89,3 +92,205 @@ class RedisDict:
         if key not in self:
             self[key] = default
         return self[key]
+
+
+class AsyncRedisLock:
+    def __init__(self, redis_url, lock_name, timeout_secs, redis_sentinels=[]):
+        self.lock_name = lock_name
+        self.lock_id = str(uuid.uuid4())
+        self.timeout_secs = timeout_secs
+        self.lock_obtained = False
+        self.redis = get_async_redis_connection(
+            redis_url, redis_sentinels, decode_responses=True
+        )
+
+    async def aquire_lock(self):
+        # nx=True will only set this key if it _hasn't_ already been set
+        self.lock_obtained = await self.redis.set(
+            self.lock_name, self.lock_id, nx=True, ex=self.timeout_secs
+        )
+        return self.lock_obtained
+
+    async def renew_lock(self):
+        # xx=True will only set this key if it _has_ already been set
+        return await self.redis.set(
+            self.lock_name, self.lock_id, xx=True, ex=self.timeout_secs
+        )
+
+    async def release_lock(self):
+        lock_value = await self.redis.get(self.lock_name)
+        if lock_value and lock_value == self.lock_id:
+            await self.redis.delete(self.lock_name)
+
+
+class LocalSessionPool:
+    """
+    Tracks socket sessions and which users are online, in process memory.
+    `add_session`/`remove_session` report presence transitions so callers can
+    broadcast deltas instead of the full user list.
+    """
+
+    def __init__(self):
+        self.sessions = {}
+        self.users = {}
+
+    async def add_session(self, sid: str, user: dict) -> bool:
+        """Returns True if this is the first session of the user."""
+        self.sessions[sid] = user
+        sids = self.users.setdefault(user["id"], set())
+        joined = len(sids) == 0
+        sids.add(sid)
+        return joined
+
+    async def remove_session(self, sid: str) -> tuple[Optional[dict], bool]:
+        """Returns the session user and whether it was the last session of the user."""
+        user = self.sessions.pop(sid, None)
+        if user is None:
+            return None, False
+
+        sids = self.users.get(user["id"], set())
+        sids.discard(sid)
+        if not sids:
+            self.users.pop(user["id"], None)
+            return user, True
+        return user, False
+
+    async def get_session(self, sid: str) -> Optional[dict]:
+        return self.sessions.get(sid)
+
+    async def get_sessions(self, sids: list[str]) -> list[Optional[dict]]:
+        return [self.sessions.get(sid) for sid in sids]
+
+    async def get_user_ids(self) -> list[str]:
+        return list(self.users.keys())
+
+    async def get_session_ids_by_user_id(self, user_id: str) -> list[str]:
+        return list(self.users.get(user_id, []))
+
+    async def is_user_active(self, user_id: str) -> bool:
+        return user_id in self.users
+
+
+class RedisSessionPool:
+    """
+    Redis backed session pool. Sessions live in one hash, the sids of each user
+    in a set and the online user ids in another set, all updated in pipelines.
+    """
+
+    # Removes a session and, atomically, the user from the online set if it was
+    # their last session. Returns 1 if the user went offline.
+    REMOVE_SESSION_SCRIPT = """
+    redis.call('HDEL', KEYS[1], ARGV[1])
+    redis.call('SREM', KEYS[2], ARGV[1])
+    if redis.call('SCARD', KEYS[2]) == 0 then
+        redis.call('SREM', KEYS[3], ARGV[2])
+        return 1
+    end
+    return 0
+    """
+
+    def __init__(self, name, redis_url, redis_sentinels=[]):
+        self.name = name
+        self.redis = get_async_redis_connection(
+            redis_url, redis_sentinels, decode_responses=True
+        )
+        self.sessions_key = f"{name}:sessions"
+        self.users_key = f"{name}:users"
+        self.remove_session_script = self.redis.register_script(
+            self.REMOVE_SESSION_SCRIPT
+        )
+
+    def _user_key(self, user_id: str) -> str:
+        return f"{self.name}:user:{user_id}"
+
+    async def add_session(self, sid: str, user: dict) -> bool:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(self.sessions_key, sid, json.dumps(user))
+            pipe.sadd(self._user_key(user["id"]), sid)
+            pipe.sadd(self.users_key, user["id"])
+            pipe.scard(self._user_key(user["id"]))
+            _, added, _, session_count = await pipe.execute()
+        return added == 1 and session_count == 1
+
+    async def remove_session(self, sid: str) -> tuple[Optional[dict], bool]:
+        user = await self.get_session(sid)
+        if user is None:
+            return None, False
+
+        left = await self.remove_session_script(
+            keys=[self.sessions_key, self._user_key(user["id"]), self.users_key],
+            args=[sid, user["id"]],
+        )
+        return user, left == 1
+
+    async def get_session(self, sid: str) -> Optional[dict]:
+        value = await self.redis.hget(self.sessions_key, sid)
+        return json.loads(value) if value is not None else None
+
+    async def get_sessions(self, sids: list[str]) -> list[Optional[dict]]:
+        if not sids:
+            return []
+        values = await self.redis.hmget(self.sessions_key, sids)
+        return [json.loads(value) if value is not None else None for value in values]
+
+    async def get_user_ids(self) -> list[str]:
+        return list(await self.redis.smembers(self.users_key))
+
+    async def get_session_ids_by_user_id(self, user_id: str) -> list[str]:
+        return list(await self.redis.smembers(self._user_key(user_id)))
+
+    async def is_user_active(self, user_id: str) -> bool:
+        return bool(await self.redis.sismember(self.users_key, user_id))
+
+
+class LocalUsagePool:
+    """
+    Records which models each session is using. Entries expire `timeout`
+    seconds after their last ping, so no cleanup scan is needed.
+    """
+
+    def __init__(self, timeout: int):
+        self.timeout = timeout
+        self.usage = {}
+
+    async def touch(self, model_id: str, sid: str) -> None:
+        self.usage[(model_id, sid)] = time.time()
+
+    async def get_models_in_use(self) -> list[str]:
+        cutoff = time.time() - self.timeout
+        self.usage = {
+            key: updated_at
+            for key, updated_at in self.usage.items()
+            if updated_at >= cutoff
+        }
+        return sorted({model_id for model_id, _ in self.usage})
+
+
+class RedisUsagePool:
+    """
+    Redis backed usage pool: one sorted set of `<sid>:<model_id>` members scored
+    by their last ping. Expired members are trimmed by score on read and the whole
+    key expires if no instance keeps it alive.
+    """
+
+    def __init__(self, name, timeout, redis_url, redis_sentinels=[]):
+        self.name = name
+        self.timeout = timeout
+        self.redis = get_async_redis_connection(
+            redis_url, redis_sentinels, decode_responses=True
+        )
+
+    async def touch(self, model_id: str, sid: str) -> None:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.zadd(self.name, {f"{sid}:{model_id}": time.time()})
+            pipe.expire(self.name, self.timeout * 2)
+            await pipe.execute()
+
+    async def get_models_in_use(self) -> list[str]:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.zremrangebyscore(self.name, "-inf", time.time() - self.timeout)
+            pipe.zrange(self.name, 0, -1)
+            _, members = await pipe.execute()
+
+        # Socket.IO sids never contain ":", model ids may
+        return sorted({member.split(":", 1)[1] for member in members})
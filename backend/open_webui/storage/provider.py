@@ -1,9 +1,13 @@
+import hashlib
 import os
 import shutil
 import json
 import logging
+import threading
+import time
 from abc import ABC, abstractmethod
-from typing import BinaryIO, Tuple
+from collections import OrderedDict
+from typing import BinaryIO, Optional, Tuple
 
 import boto3
 from botocore.config import Config
@@ -23,6 +27,7 @@ from open_webui.config import (
     AZURE_STORAGE_CONTAINER_NAME,
     AZURE_STORAGE_KEY,
     STORAGE_PROVIDER,
+    STORAGE_LOCAL_CACHE_MAX_SIZE,
     UPLOAD_DIR,
 )
 from google.cloud import storage
@@ -37,6 +42,8 @@ from open_webui.env import SRC_LOG_LEVELS
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MAIN"])
 
+CHUNK_SIZE = 1024 * 1024
+
 
 class StorageProvider(ABC):
     @abstractmethod
@@ -44,7 +51,12 @@ class StorageProvider(ABC):
         pass
 
     @abstractmethod
-    def upload_file(self, file: BinaryIO, filename: str) -> Tuple[bytes, str]:
+    def upload_file(self, file: BinaryIO, filename: str) -> Tuple[int, str, str]:
+        """Stores the file, returns its size, SHA-256 hex digest and path."""
+        pass
+
+    @abstractmethod
+    def get_file_path(self, filename: str) -> str:
         pass
 
     @abstractmethod
@@ -56,22 +68,107 @@ class StorageProvider(ABC):
         pass
 
 
+class LocalFileCache:
+    """
+    Tracks the local copies of remote objects in the upload dir, keyed by
+    their path and the ETag of the object they were copied from. A copy is
+    only reused while the ETag matches, and the least recently used copies
+    are deleted once the total size goes over the limit.
+
+    Only copies made by this process are tracked.
+    """
+
+    # Recently used copies may still be read by a response, never evict those
+    min_age = 60
+
+    def __init__(self, max_size: int = STORAGE_LOCAL_CACHE_MAX_SIZE * 1024 * 1024):
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        self.entries: OrderedDict[str, tuple[Optional[str], int, float]] = OrderedDict()
+        self.size = 0
+
+    def get(self, local_file_path: str, etag: Optional[str]) -> bool:
+        """Returns True if the local copy is current, and marks it as used."""
+        with self.lock:
+            entry = self.entries.get(local_file_path)
+            if (
+                entry is None
+                or etag is None
+                or entry[0] != etag
+                or not os.path.isfile(local_file_path)
+            ):
+                return False
+            self.entries[local_file_path] = (entry[0], entry[1], time.time())
+            self.entries.move_to_end(local_file_path)
+            return True
+
+    def put(self, local_file_path: str, etag: Optional[str]) -> None:
+        try:
+            size = os.path.getsize(local_file_path)
+        except OSError:
+            return
+
+        with self.lock:
+            if local_file_path in self.entries:
+                self.size -= self.entries.pop(local_file_path)[1]
+            self.entries[local_file_path] = (etag, size, time.time())
+            self.size += size
+            self._evict()
+
+    def remove(self, local_file_path: str) -> None:
+        with self.lock:
+            if local_file_path in self.entries:
+                self.size -= self.entries.pop(local_file_path)[1]
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def _evict(self) -> None:
+        if self.max_size <= 0:
+            return
+
+        now = time.time()
+        for local_file_path, (_, size, used_at) in list(self.entries.items()):
+            if self.size <= self.max_size or now - used_at < self.min_age:
+                break
+            del self.entries[local_file_path]
+            self.size -= size
+            try:
+                os.remove(local_file_path)
+            except OSError as e:
+                log.debug(f"Failed to remove cached file {local_file_path}: {e}")
+
+
 class LocalStorageProvider(StorageProvider):
     @staticmethod
-    def upload_file(file: BinaryIO, filename: str) -> Tuple[bytes, str]:
-        contents = file.read()
-        if not contents:
-            raise ValueError(ERROR_MESSAGES.EMPTY_CONTENT)
+    def upload_file(file: BinaryIO, filename: str) -> Tuple[int, str, str]:
+        # Written in chunks, hashing and counting in the same pass
         file_path = f"{UPLOAD_DIR}/{filename}"
+        sha256 = hashlib.sha256()
+        size = 0
         with open(file_path, "wb") as f:
-            f.write(contents)
-        return contents, file_path
+            while chunk := file.read(CHUNK_SIZE):
+                sha256.update(chunk)
+                size += len(chunk)
+                f.write(chunk)
+
+        if not size:
+            os.remove(file_path)
+            raise ValueError(ERROR_MESSAGES.EMPTY_CONTENT)
+        return size, sha256.hexdigest(), file_path
 
     @staticmethod
     def get_file(file_path: str) -> str:
         """Handles downloading of the file from local storage."""
         return file_path
 
+    @staticmethod
+    def get_file_path(filename: str) -> str:
+        """Returns the path upload_file uses for the filename."""
+        return f"{UPLOAD_DIR}/{filename}"
+
     @staticmethod
     def delete_file(file_path: str) -> None:
         """Handles deletion of the file from local storage."""
@@ -130,15 +227,19 @@ class S3StorageProvider(StorageProvider):
 
         self.bucket_name = S3_BUCKET_NAME
         self.key_prefix = S3_KEY_PREFIX if S3_KEY_PREFIX else ""
+        self.cache = LocalFileCache()
 
-    def upload_file(self, file: BinaryIO, filename: str) -> Tuple[bytes, str]:
+    def upload_file(self, file: BinaryIO, filename: str) -> Tuple[int, str, str]:
         """Handles uploading of the file to S3 storage."""
-        _, file_path = LocalStorageProvider.upload_file(file, filename)
+        size, content_hash, file_path = LocalStorageProvider.upload_file(file, filename)
         try:
             s3_key = os.path.join(self.key_prefix, filename)
+            # Multipart upload streamed from the local copy
             self.s3_client.upload_file(file_path, self.bucket_name, s3_key)
+            self.cache.put(file_path, self._get_etag(s3_key))
             return (
-                open(file_path, "rb").read(),
+                size,
+                content_hash,
                 "s3://" + self.bucket_name + "/" + s3_key,
             )
         except ClientError as e:
@@ -149,11 +250,20 @@ class S3StorageProvider(StorageProvider):
         try:
             s3_key = self._extract_s3_key(file_path)
             local_file_path = self._get_local_file_path(s3_key)
-            self.s3_client.download_file(self.bucket_name, s3_key, local_file_path)
+            etag = self._get_etag(s3_key)
+            if not self.cache.get(local_file_path, etag):
+                self.s3_client.download_file(self.bucket_name, s3_key, local_file_path)
+                self.cache.put(local_file_path, etag)
             return local_file_path
         except ClientError as e:
             raise RuntimeError(f"Error downloading file from S3: {e}")
 
+    def get_file_path(self, filename: str) -> str:
+        """Returns the path upload_file uses for the filename."""
+        return (
+            "s3://" + self.bucket_name + "/" + os.path.join(self.key_prefix, filename)
+        )
+
     def delete_file(self, file_path: str) -> None:
         """Handles deletion of the file from S3 storage."""
         try:
@@ -163,6 +273,7 @@ class S3StorageProvider(StorageProvider):
             raise RuntimeError(f"Error deleting file from S3: {e}")
 
         # Always delete from local storage
+        self.cache.remove(self._get_local_file_path(s3_key))
         LocalStorageProvider.delete_file(file_path)
 
     def delete_all_files(self) -> None:
@@ -182,6 +293,7 @@ class S3StorageProvider(StorageProvider):
             raise RuntimeError(f"Error deleting all files from S3: {e}")
 
         # Always delete from local storage
+        self.cache.clear()
         LocalStorageProvider.delete_all_files()
 
     # The s3 key is the name assigned to an object. It excludes the bucket name, but includes the internal path and the file name.
@@ -191,6 +303,11 @@ class S3StorageProvider(StorageProvider):
     def _get_local_file_path(self, s3_key: str) -> str:
         return f"{UPLOAD_DIR}/{s3_key.split('/')[-1]}"
 
+    def _get_etag(self, s3_key: str) -> Optional[str]:
+        return self.s3_client.head_object(Bucket=self.bucket_name, Key=s3_key).get(
+            "ETag"
+        )
+
 
 class GCSStorageProvider(StorageProvider):
     def __init__(self):
@@ -206,14 +323,17 @@ class GCSStorageProvider(StorageProvider):
             # if running on a Compute Engine instance, credentials would be from Google Metadata server
             self.gcs_client = storage.Client()
         self.bucket = self.gcs_client.bucket(GCS_BUCKET_NAME)
+        self.cache = LocalFileCache()
 
-    def upload_file(self, file: BinaryIO, filename: str) -> Tuple[bytes, str]:
+    def upload_file(self, file: BinaryIO, filename: str) -> Tuple[int, str, str]:
         """Handles uploading of the file to GCS storage."""
-        contents, file_path = LocalStorageProvider.upload_file(file, filename)
+        size, content_hash, file_path = LocalStorageProvider.upload_file(file, filename)
         try:
             blob = self.bucket.blob(filename)
+            # Resumable upload streamed from the local copy
             blob.upload_from_filename(file_path)
-            return contents, "gs://" + self.bucket_name + "/" + filename
+            self.cache.put(file_path, blob.etag)
+            return size, content_hash, "gs://" + self.bucket_name + "/" + filename
         except GoogleCloudError as e:
             raise RuntimeError(f"Error uploading file to GCS: {e}")
 
@@ -223,12 +343,18 @@ class GCSStorageProvider(StorageProvider):
             filename = file_path.removeprefix("gs://").split("/")[1]
             local_file_path = f"{UPLOAD_DIR}/{filename}"
             blob = self.bucket.get_blob(filename)
-            blob.download_to_filename(local_file_path)
+            if not self.cache.get(local_file_path, blob.etag):
+                blob.download_to_filename(local_file_path)
+                self.cache.put(local_file_path, blob.etag)
 
             return local_file_path
         except NotFound as e:
             raise RuntimeError(f"Error downloading file from GCS: {e}")
 
+    def get_file_path(self, filename: str) -> str:
+        """Returns the path upload_file uses for the filename."""
+        return "gs://" + self.bucket_name + "/" + filename
+
     def delete_file(self, file_path: str) -> None:
         """Handles deletion of the file from GCS storage."""
         try:
@@ -239,6 +365,7 @@ class GCSStorageProvider(StorageProvider):
             raise RuntimeError(f"Error deleting file from GCS: {e}")
 
         # Always delete from local storage
+        self.cache.remove(f"{UPLOAD_DIR}/{filename}")
         LocalStorageProvider.delete_file(file_path)
 
     def delete_all_files(self) -> None:
@@ -253,6 +380,7 @@ class GCSStorageProvider(StorageProvider):
             raise RuntimeError(f"Error deleting all files from GCS: {e}")
 
         # Always delete from local storage
+        self.cache.clear()
         LocalStorageProvider.delete_all_files()
 
 
@@ -276,14 +404,22 @@ class AzureStorageProvider(StorageProvider):
         self.container_client = self.blob_service_client.get_container_client(
             self.container_name
         )
+        self.cache = LocalFileCache()
 
-    def upload_file(self, file: BinaryIO, filename: str) -> Tuple[bytes, str]:
+    def upload_file(self, file: BinaryIO, filename: str) -> Tuple[int, str, str]:
         """Handles uploading of the file to Azure Blob Storage."""
-        contents, file_path = LocalStorageProvider.upload_file(file, filename)
+        size, content_hash, file_path = LocalStorageProvider.upload_file(file, filename)
         try:
             blob_client = self.container_client.get_blob_client(filename)
-            blob_client.upload_blob(contents, overwrite=True)
-            return contents, f"{self.endpoint}/{self.container_name}/{filename}"
+            # Uploaded in blocks streamed from the local copy
+            with open(file_path, "rb") as f:
+                result = blob_client.upload_blob(f, overwrite=True)
+            self.cache.put(file_path, result.get("etag"))
+            return (
+                size,
+                content_hash,
+                f"{self.endpoint}/{self.container_name}/{filename}",
+            )
         except Exception as e:
             raise RuntimeError(f"Error uploading file to Azure Blob Storage: {e}")
 
@@ -293,12 +429,19 @@ class AzureStorageProvider(StorageProvider):
             filename = file_path.split("/")[-1]
             local_file_path = f"{UPLOAD_DIR}/{filename}"
             blob_client = self.container_client.get_blob_client(filename)
-            with open(local_file_path, "wb") as download_file:
-                download_file.write(blob_client.download_blob().readall())
+            etag = blob_client.get_blob_properties().etag
+            if not self.cache.get(local_file_path, etag):
+                with open(local_file_path, "wb") as download_file:
+                    blob_client.download_blob().readinto(download_file)
+                self.cache.put(local_file_path, etag)
             return local_file_path
         except ResourceNotFoundError as e:
             raise RuntimeError(f"Error downloading file from Azure Blob Storage: {e}")
 
+    def get_file_path(self, filename: str) -> str:
+        """Returns the path upload_file uses for the filename."""
+        return f"{self.endpoint}/{self.container_name}/{filename}"
+
     def delete_file(self, file_path: str) -> None:
         """Handles deletion of the file from Azure Blob Storage."""
         try:
@@ -309,6 +452,7 @@ class AzureStorageProvider(StorageProvider):
             raise RuntimeError(f"Error deleting file from Azure Blob Storage: {e}")
 
         # Always delete from local storage
+        self.cache.remove(f"{UPLOAD_DIR}/{filename}")
         LocalStorageProvider.delete_file(file_path)
 
     def delete_all_files(self) -> None:
@@ -321,6 +465,7 @@ class AzureStorageProvider(StorageProvider):
             raise RuntimeError(f"Error deleting all files from Azure Blob Storage: {e}")
 
         # Always delete from local storage
+        self.cache.clear()
         LocalStorageProvider.delete_all_files()
 
 
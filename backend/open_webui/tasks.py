@@ -1,43 +1,247 @@
 # tasks.py
 import asyncio
-from typing import Dict
+import logging
+import time
+from typing import Dict, Optional
 from uuid import uuid4
 
-# A dictionary to keep track of active tasks
+from open_webui.env import (
+    REDIS_URL,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+    TASK_REGISTRY_TTL,
+    SRC_LOG_LEVELS,
+)
+from open_webui.utils.redis import get_async_redis_connection, get_sentinels_from_env
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+# A dictionary to keep track of the active tasks of this process
 tasks: Dict[str, asyncio.Task] = {}
-chat_tasks = {}
 
 
-def cleanup_task(task_id: str, id=None):
+class LocalTaskRegistry:
+    """
+    Lists the tasks of this process only, for single worker deployments.
+    """
+
+    def __init__(self):
+        self.chat_tasks: Dict[str, list[str]] = {}
+
+    async def add(self, task_id: str, id=None):
+        self.chat_tasks.setdefault(id, []).append(task_id)
+
+    async def remove(self, task_id: str, id=None):
+        if task_id in self.chat_tasks.get(id, []):
+            self.chat_tasks[id].remove(task_id)
+            if not self.chat_tasks[id]:
+                self.chat_tasks.pop(id, None)
+
+    async def list_task_ids(self) -> list[str]:
+        return list(tasks.keys())
+
+    async def list_task_ids_by_chat_id(self, id) -> list[str]:
+        return list(self.chat_tasks.get(id, []))
+
+    async def request_stop(self, task_id: str) -> bool:
+        # Every task is local, there is nobody else to ask
+        return False
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+
+class RedisTaskRegistry:
+    """
+    Lists the tasks of all the nodes in Redis sorted sets, scored by the time
+    each entry expires. Nodes renew the entries of their running tasks on a
+    heartbeat, so the tasks of a node that died drop out after `ttl` seconds.
+    Stop requests for tasks running on other nodes are sent over pub/sub.
+    """
+
+    def __init__(self, name, redis_url, redis_sentinels=[], ttl: int = 30):
+        self.name = name
+        self.redis = get_async_redis_connection(
+            redis_url, redis_sentinels, decode_responses=True
+        )
+        self.ttl = max(3, ttl)
+        self.ids_key = f"{name}:ids"
+        self.channel = f"{name}:stop"
+
+        # Chat ids of the tasks running on this node
+        self.local: Dict[str, Optional[str]] = {}
+        self.background: list[asyncio.Task] = []
+
+    def get_chat_key(self, id) -> str:
+        return f"{self.name}:chat:{id}"
+
+    async def renew(self, task_ids: list[str]):
+        expires_at = time.time() + self.ttl
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for task_id in task_ids:
+                pipe.zadd(self.ids_key, {task_id: expires_at})
+                if (id := self.local.get(task_id)) is not None:
+                    pipe.zadd(self.get_chat_key(id), {task_id: expires_at})
+                    pipe.expire(self.get_chat_key(id), self.ttl)
+            await pipe.execute()
+
+    async def add(self, task_id: str, id=None):
+        self.local[task_id] = id
+        await self.renew([task_id])
+
+    async def remove(self, task_id: str, id=None):
+        self.local.pop(task_id, None)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.zrem(self.ids_key, task_id)
+            if id is not None:
+                pipe.zrem(self.get_chat_key(id), task_id)
+            await pipe.execute()
+
+    async def get_live_ids(self, key: str) -> list[str]:
+        # Drop the entries nobody renewed in time before listing
+        now = time.time()
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.zremrangebyscore(key, "-inf", now)
+            pipe.zrangebyscore(key, now, "+inf")
+            _, task_ids = await pipe.execute()
+        return task_ids
+
+    async def list_task_ids(self) -> list[str]:
+        return await self.get_live_ids(self.ids_key)
+
+    async def list_task_ids_by_chat_id(self, id) -> list[str]:
+        return await self.get_live_ids(self.get_chat_key(id))
+
+    async def request_stop(self, task_id: str) -> bool:
+        score = await self.redis.zscore(self.ids_key, task_id)
+        if score is None or score < time.time():
+            return False
+
+        await self.redis.publish(self.channel, task_id)
+        return True
+
+    async def heartbeat(self):
+        while True:
+            await asyncio.sleep(self.ttl / 3)
+            try:
+                if self.local:
+                    await self.renew(list(self.local.keys()))
+            except Exception as e:
+                log.warning(f"Error renewing tasks: {e}")
+
+    async def listen(self):
+        while True:
+            try:
+                async with self.redis.pubsub() as pubsub:
+                    await pubsub.subscribe(self.channel)
+                    async for message in pubsub.listen():
+                        if message["type"] != "message":
+                            continue
+
+                        task = tasks.get(message["data"])
+                        if task:
+                            log.info(f"Stopping task {message['data']} on request")
+                            task.cancel()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.warning(f"Error listening for task stop requests: {e}")
+                await asyncio.sleep(1)
+
+    async def start(self):
+        self.background = [
+            asyncio.create_task(self.heartbeat()),
+            asyncio.create_task(self.listen()),
+        ]
+
+    async def close(self):
+        for task in self.background:
+            task.cancel()
+        await asyncio.gather(*self.background, return_exceptions=True)
+        self.background = []
+
+        # Let the other nodes forget the tasks of this one right away
+        for task_id, id in list(self.local.items()):
+            try:
+                await self.remove(task_id, id)
+            except Exception:
+                pass
+        await self.redis.close()
+
+
+if REDIS_URL:
+    TASK_REGISTRY = RedisTaskRegistry(
+        "open-webui:tasks",
+        redis_url=REDIS_URL,
+        redis_sentinels=get_sentinels_from_env(
+            REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT
+        ),
+        ttl=TASK_REGISTRY_TTL,
+    )
+else:
+    TASK_REGISTRY = LocalTaskRegistry()
+
+
+# Registry removals of tasks that were canceled before they started
+background_tasks: set[asyncio.Task] = set()
+
+
+async def unregister_task(task_id: str, id=None):
+    try:
+        await TASK_REGISTRY.remove(task_id, id)
+    except Exception as e:
+        log.warning(f"Error unregistering task {task_id}: {e}")
+
+
+async def run_task(task_id: str, coroutine, id=None):
+    """
+    Runs the coroutine of a task and takes it off the registry once done.
+    """
+    try:
+        return await coroutine
+    finally:
+        await unregister_task(task_id, id)
+
+
+def cleanup_task(task_id: str, id=None, task: Optional[asyncio.Task] = None):
     """
     Remove a completed or canceled task from the global `tasks` dictionary.
     """
     tasks.pop(task_id, None)  # Remove the task if it exists
 
-    # If an ID is provided, remove the task from the chat_tasks dictionary
-    if id and task_id in chat_tasks.get(id, []):
-        chat_tasks[id].remove(task_id)
-        if not chat_tasks[id]:  # If no tasks left for this ID, remove the entry
-            chat_tasks.pop(id, None)
+    if task is not None and task.cancelled():
+        # Canceled before it started, run_task never got to unregister it
+        removal = asyncio.ensure_future(unregister_task(task_id, id))
+        background_tasks.add(removal)
+        removal.add_done_callback(background_tasks.discard)
 
 
-def create_task(coroutine, id=None):
+async def create_task(coroutine, id=None):
     """
-    Create a new asyncio task and add it to the global task dictionary.
+    Create a new asyncio task and add it to the global task dictionary. The
+    task is listed in the registry before its id is handed out, so the id can
+    be looked up or stopped right away.
     """
     task_id = str(uuid4())  # Generate a unique ID for the task
-    task = asyncio.create_task(coroutine)  # Create the task
+
+    try:
+        await TASK_REGISTRY.add(task_id, id)
+    except Exception as e:
+        log.warning(f"Error registering task {task_id}: {e}")
+    except BaseException:
+        coroutine.close()
+        raise
+
+    task = asyncio.create_task(run_task(task_id, coroutine, id))  # Create the task
 
     # Add a done callback for cleanup
-    task.add_done_callback(lambda t: cleanup_task(task_id, id))
+    task.add_done_callback(lambda t: cleanup_task(task_id, id, t))
     tasks[task_id] = task
 
-    # If an ID is provided, associate the task with that ID
-    if chat_tasks.get(id):
-        chat_tasks[id].append(task_id)
-    else:
-        chat_tasks[id] = [task_id]
-
     return task_id, task
 
 
@@ -48,26 +252,29 @@ def get_task(task_id: str):
     return tasks.get(task_id)
 
 
-def list_tasks():
+async def list_tasks():
     """
-    List all currently active task IDs.
+    List all currently active task IDs, across all nodes.
     """
-    return list(tasks.keys())
+    return await TASK_REGISTRY.list_task_ids()
 
 
-def list_task_ids_by_chat_id(id):
+async def list_task_ids_by_chat_id(id):
     """
     List all tasks associated with a specific ID.
     """
-    return chat_tasks.get(id, [])
+    return await TASK_REGISTRY.list_task_ids_by_chat_id(id)
 
 
 async def stop_task(task_id: str):
     """
-    Cancel a running task and remove it from the global task list.
+    Cancel a running task and remove it from the global task list. Tasks of
+    other nodes are asked to stop through the registry.
     """
     task = tasks.get(task_id)
     if not task:
+        if await TASK_REGISTRY.request_stop(task_id):
+            return {"status": True, "message": f"Stop of task {task_id} requested."}
         raise ValueError(f"Task with ID {task_id} not found.")
 
     task.cancel()  # Request task cancellation
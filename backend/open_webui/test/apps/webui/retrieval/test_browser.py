@@ -0,0 +1,190 @@
+import asyncio
+
+import pytest
+from open_webui.retrieval.web import browser
+from open_webui.retrieval.web.browser import BrowserPool, get_browser_pool
+
+
+class FakeContext:
+    def __init__(self):
+        self.closed = False
+
+    async def route(self, pattern, handler):
+        pass
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.connected = True
+        self.contexts: list[FakeContext] = []
+
+    def is_connected(self):
+        return self.connected
+
+    async def new_context(self, **kwargs):
+        context = FakeContext()
+        self.contexts.append(context)
+        return context
+
+    async def close(self):
+        self.connected = False
+
+
+class FakePlaywright:
+    def __init__(self):
+        self.browsers: list[FakeBrowser] = []
+        self.chromium = self
+        self.stopped = False
+
+    async def launch(self, **kwargs):
+        self.browsers.append(FakeBrowser())
+        return self.browsers[-1]
+
+    async def stop(self):
+        self.stopped = True
+
+
+def fake_pool(**kwargs) -> BrowserPool:
+    pool = BrowserPool(**kwargs)
+    pool.playwright = FakePlaywright()
+    return pool
+
+
+async def load_page(pool: BrowserPool) -> FakeContext:
+    async with pool.context() as context:
+        await asyncio.sleep(0)
+        return context
+
+
+class TestBrowserPool:
+    def test_context_reuse(self):
+        async def main():
+            pool = fake_pool()
+            first = await load_page(pool)
+            assert await load_page(pool) is first
+            assert not first.closed
+
+            await pool.close()
+            assert first.closed
+            assert pool.browser is None
+
+        asyncio.run(main())
+
+    def test_context_replaced_after_max_pages(self):
+        async def main():
+            pool = fake_pool(max_pages=2)
+            first = await load_page(pool)
+            assert await load_page(pool) is first
+            assert first.closed
+
+            second = await load_page(pool)
+            assert second is not first and not second.closed
+
+        asyncio.run(main())
+
+    def test_context_closed_on_exception(self):
+        async def main():
+            pool = fake_pool()
+            with pytest.raises(RuntimeError):
+                async with pool.context() as context:
+                    raise RuntimeError("page crashed")
+
+            assert context.closed
+            assert pool.idle == []
+            assert await load_page(pool) is not context
+
+        asyncio.run(main())
+
+    def test_max_contexts(self):
+        async def main():
+            pool = fake_pool(max_contexts=2)
+            contexts = await asyncio.gather(*[load_page(pool) for _ in range(5)])
+            assert len(set(contexts)) == 2
+            assert len(pool.idle) == 2
+
+        asyncio.run(main())
+
+    def test_browser_relaunched_after_crash(self):
+        async def main():
+            pool = fake_pool()
+            context = await load_page(pool)
+            pool.browser.connected = False
+
+            assert await load_page(pool) is not context
+            assert len(pool.playwright.browsers) == 2
+
+        asyncio.run(main())
+
+
+class TestGetBrowserPool:
+    @pytest.fixture(autouse=True)
+    def pools(self, monkeypatch):
+        monkeypatch.setattr(browser, "browser_pools", {})
+        monkeypatch.setattr(browser, "retired_browser_pools", set())
+        monkeypatch.setattr(browser, "BrowserPool", fake_pool)
+
+    def test_same_settings_share_a_pool(self):
+        async def main():
+            pool = await get_browser_pool(headless=True)
+            assert await get_browser_pool(headless=True) is pool
+            assert await get_browser_pool(headless=False) is not pool
+
+        asyncio.run(main())
+
+    def test_old_pools_close_once_drained(self):
+        async def main():
+            idle = await get_browser_pool(ws_url=None)
+            await load_page(idle)
+            busy = await get_browser_pool(headless=False)
+
+            loading = asyncio.Event()
+            done = asyncio.Event()
+
+            async def load():
+                async with busy.context() as context:
+                    loading.set()
+                    await done.wait()
+                return context
+
+            task = asyncio.create_task(load())
+            await loading.wait()
+
+            await get_browser_pool(proxy={"server": "http://proxy"})
+            # Not in use, closed right away
+            assert idle.playwright is None
+            # The page loading keeps its browser until it is done
+            assert busy.browser.is_connected()
+            assert browser.retired_browser_pools == {busy}
+
+            done.set()
+            context = await task
+            assert context.closed
+            assert busy.browser is None
+
+        asyncio.run(main())
+
+    def test_shutdown_closes_retired_pools(self):
+        async def main():
+            pool = await get_browser_pool(headless=True)
+            loading = asyncio.Event()
+
+            async def load():
+                async with pool.context():
+                    loading.set()
+                    await asyncio.sleep(60)
+
+            task = asyncio.create_task(load())
+            await loading.wait()
+            await get_browser_pool(headless=False)
+
+            fake_browser = pool.browser
+            await browser.close_browser_pools()
+            assert not fake_browser.is_connected()
+            assert browser.browser_pools == {}
+            assert browser.retired_browser_pools == set()
+            task.cancel()
+
+        asyncio.run(main())
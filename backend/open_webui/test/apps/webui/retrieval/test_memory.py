@@ -0,0 +1,101 @@
+from open_webui.retrieval.vector import memory
+from open_webui.retrieval.vector.memory import MemoryClient
+
+
+def insert_items(client, collection_name="web-search-ephemeral-test"):
+    client.insert(
+        collection_name,
+        [
+            {"id": "x", "text": "along x", "vector": [1.0, 0.0], "metadata": {"n": 1}},
+            {"id": "y", "text": "along y", "vector": [0.0, 1.0], "metadata": {"n": 2}},
+            {
+                "id": "xy",
+                "text": "between",
+                "vector": [1.0, 1.0],
+                "metadata": {"n": 3},
+            },
+        ],
+    )
+    return collection_name
+
+
+class TestMemoryClient:
+    def test_search_orders_by_similarity(self):
+        client = MemoryClient(ttl=0)
+        collection_name = insert_items(client)
+
+        result = client.search(collection_name, [[1.0, 0.1]], limit=3)
+        assert result.ids == [["x", "xy", "y"]]
+        assert result.documents == [["along x", "between", "along y"]]
+        assert result.metadatas == [[{"n": 1}, {"n": 3}, {"n": 2}]]
+        distances = result.distances[0]
+        assert distances == sorted(distances, reverse=True)
+        assert all(0 <= distance <= 1 for distance in distances)
+
+        result = client.search(collection_name, [[0.0, 1.0], [1.0, 0.0]], limit=1)
+        assert result.ids == [["y"], ["x"]]
+
+    def test_search_missing_collection(self):
+        client = MemoryClient(ttl=0)
+        assert client.search("missing", [[1.0, 0.0]], limit=1) is None
+        assert client.get("missing") is None
+        assert not client.has_collection("missing")
+
+    def test_get_and_query(self):
+        client = MemoryClient(ttl=0)
+        collection_name = insert_items(client)
+
+        assert client.get(collection_name).ids == [["x", "y", "xy"]]
+        assert client.query(collection_name, {"n": 2}).ids == [["y"]]
+
+    def test_delete(self):
+        client = MemoryClient(ttl=0)
+        collection_name = insert_items(client)
+
+        client.delete(collection_name, ids=["x"])
+        assert client.get(collection_name).ids == [["y", "xy"]]
+        assert client.search(collection_name, [[1.0, 0.0]], limit=3).ids == [
+            ["xy", "y"]
+        ]
+
+        client.delete(collection_name, filter={"n": 3})
+        assert client.get(collection_name).ids == [["y"]]
+
+        client.delete_collection(collection_name)
+        assert not client.has_collection(collection_name)
+
+    def test_upsert_replaces_items(self):
+        client = MemoryClient(ttl=0)
+        collection_name = insert_items(client)
+
+        client.upsert(
+            collection_name,
+            [{"id": "x", "text": "new x", "vector": [1.0, 0.0], "metadata": {}}],
+        )
+        result = client.get(collection_name)
+        assert result.ids == [["y", "xy", "x"]]
+        assert result.documents[0][-1] == "new x"
+
+    def test_ttl(self, monkeypatch):
+        now = 1000.0
+        monkeypatch.setattr(memory.time, "monotonic", lambda: now)
+
+        client = MemoryClient(ttl=60)
+        collection_name = insert_items(client)
+
+        now += 59
+        assert client.has_collection(collection_name)
+
+        now += 2
+        assert not client.has_collection(collection_name)
+        assert client.search(collection_name, [[1.0, 0.0]], limit=1) is None
+
+    def test_no_ttl(self, monkeypatch):
+        now = 1000.0
+        monkeypatch.setattr(memory.time, "monotonic", lambda: now)
+
+        client = MemoryClient(ttl=0)
+        collection_name = insert_items(client)
+
+        now += 10**6
+        assert client.has_collection(collection_name)
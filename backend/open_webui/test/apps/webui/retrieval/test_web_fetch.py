@@ -0,0 +1,173 @@
+import asyncio
+import os
+
+import pytest
+from aiohttp import web
+from open_webui.retrieval.web import fetch
+from open_webui.retrieval.web.fetch import WebPageCache, fetch_page, get_max_age
+from open_webui.retrieval.web.utils import SafeWebBaseLoader
+
+PAGE = "<html lang='en'><title>{title}</title><body>{title} body</body></html>"
+
+
+def cached_page(url, **kwargs):
+    return {"text": "text", "metadata": {"source": url}, "url": url, **kwargs}
+
+
+class TestWebPageCache:
+    def test_get_and_put(self, tmp_path):
+        cache = WebPageCache(tmp_path, max_size=10_000)
+        assert cache.get("http://a") is None
+
+        cache.put("http://a", cached_page("http://a"))
+        assert cache.get("http://a") == cached_page("http://a")
+        assert cache.get("http://b") is None
+
+    def test_lru_bound(self, tmp_path):
+        cache = WebPageCache(tmp_path, max_size=10_000)
+        cache.put("http://a", cached_page("http://a"))
+        cache.max_size = cache.size * 2
+
+        cache.put("http://b", cached_page("http://b"))
+        # Used last, so "b" is the one to go
+        cache.get("http://a")
+        cache.put("http://c", cached_page("http://c"))
+
+        assert cache.get("http://b") is None
+        assert cache.get("http://a") is not None
+        assert cache.get("http://c") is not None
+        assert len(list(tmp_path.glob("*.json"))) == 2
+        assert cache.size == sum(path.stat().st_size for path in tmp_path.iterdir())
+
+    def test_lru_order_survives_restart(self, tmp_path):
+        cache = WebPageCache(tmp_path, max_size=10_000)
+        for i, url in enumerate(["http://a", "http://b"]):
+            cache.put(url, cached_page(url))
+            path = tmp_path / f"{cache.get_key(url)}.json"
+            os.utime(path, (1000 + i, 1000 + i))
+
+        cache = WebPageCache(tmp_path, max_size=10_000)
+        assert list(cache.entries) == [
+            cache.get_key("http://a"),
+            cache.get_key("http://b"),
+        ]
+        assert cache.size == sum(path.stat().st_size for path in tmp_path.iterdir())
+
+
+def test_get_max_age():
+    assert get_max_age({"Cache-Control": "no-store"}) is None
+    assert get_max_age({"Cache-Control": "private, max-age=60"}) is None
+    assert get_max_age({"Cache-Control": "no-cache"}) == 0
+    assert get_max_age({"Cache-Control": "public, Max-Age=60"}) == 60
+    assert get_max_age({}) == fetch.WEB_LOADER_CACHE_TTL
+
+
+class StubWebServer:
+    def __init__(self):
+        self.requests: list[web.Request] = []
+        self.app = web.Application()
+        self.app.router.add_get("/{name}", self.page)
+
+    async def __aenter__(self):
+        self.runner = web.AppRunner(self.app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}"
+        return self
+
+    async def __aexit__(self, *args):
+        await fetch.close_fetch_sessions()
+        await self.runner.cleanup()
+
+    async def page(self, request):
+        self.requests.append(request)
+        name = request.match_info["name"]
+        if name == "missing":
+            return web.Response(status=404)
+        if name == "etag" and request.headers.get("If-None-Match") == '"v1"':
+            return web.Response(status=304, headers={"Cache-Control": "max-age=60"})
+
+        headers = {
+            "max-age": {"Cache-Control": "max-age=60"},
+            "etag": {"Cache-Control": "no-cache", "ETag": '"v1"'},
+            "no-store": {"Cache-Control": "no-store"},
+        }.get(name, {})
+        return web.Response(
+            text=PAGE.format(title=name), content_type="text/html", headers=headers
+        )
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = {"now": 1000.0}
+    monkeypatch.setattr(fetch.time, "time", lambda: clock["now"])
+    return clock
+
+
+@pytest.fixture
+def cache(monkeypatch, tmp_path):
+    cache = WebPageCache(tmp_path, max_size=10_000)
+    monkeypatch.setattr(fetch, "web_page_cache", cache)
+    return cache
+
+
+class TestFetchPage:
+    def test_fresh_pages_come_from_cache(self, clock, cache):
+        async def main():
+            async with StubWebServer() as server:
+                page = await fetch_page(f"{server.url}/max-age")
+                assert page["text"] == "max-agemax-age body"
+                assert page["metadata"]["title"] == "max-age"
+
+                clock["now"] += 59
+                assert await fetch_page(f"{server.url}/max-age") == page
+                assert len(server.requests) == 1
+
+                clock["now"] += 2
+                await fetch_page(f"{server.url}/max-age")
+                assert len(server.requests) == 2
+
+        asyncio.run(main())
+
+    def test_revalidation(self, clock, cache):
+        async def main():
+            async with StubWebServer() as server:
+                page = await fetch_page(f"{server.url}/etag")
+                assert page["etag"] == '"v1"'
+
+                # Stale right away, but still valid according to the server
+                revalidated = await fetch_page(f"{server.url}/etag")
+                assert server.requests[1].headers["If-None-Match"] == '"v1"'
+                assert revalidated["text"] == page["text"]
+                assert revalidated["expires_at"] == clock["now"] + 60
+
+                assert await fetch_page(f"{server.url}/etag") == revalidated
+                assert len(server.requests) == 2
+
+        asyncio.run(main())
+
+    def test_no_store(self, clock, cache):
+        async def main():
+            async with StubWebServer() as server:
+                await fetch_page(f"{server.url}/no-store")
+                await fetch_page(f"{server.url}/no-store")
+                assert len(server.requests) == 2
+                assert cache.entries == {}
+
+        asyncio.run(main())
+
+
+def test_safe_web_base_loader_skips_failed_pages(cache):
+    async def main():
+        async with StubWebServer() as server:
+            loader = SafeWebBaseLoader(
+                web_paths=[f"{server.url}/page", f"{server.url}/missing"],
+                continue_on_failure=True,
+                raise_for_status=True,
+            )
+            return await loader.aload()
+
+    documents = asyncio.run(main())
+    assert [document.metadata["title"] for document in documents] == ["page"]
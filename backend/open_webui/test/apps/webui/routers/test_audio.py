@@ -0,0 +1,229 @@
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+from open_webui.routers import audio
+
+
+def get_request(**config):
+    return SimpleNamespace(
+        app=SimpleNamespace(
+            state=SimpleNamespace(
+                config=SimpleNamespace(
+                    **{
+                        "STT_ENGINE": "openai",
+                        "STT_MODEL": "whisper-1",
+                        "WHISPER_MODEL": "base",
+                        "WHISPER_VAD_FILTER": False,
+                        "AUDIO_STT_AZURE_LOCALES": "",
+                        **config,
+                    }
+                ),
+                faster_whisper_model=None,
+            )
+        )
+    )
+
+
+class TestChunkRanges:
+    def test_short_audio_is_one_chunk(self):
+        assert audio.get_chunk_ranges(100, [], 600) == [(0.0, 100)]
+
+    def test_cuts_in_the_last_silence_before_the_limit(self):
+        silences = [(100, 102), (400, 402), (500, 504), (700, 702)]
+        ranges = audio.get_chunk_ranges(1000, silences, 600)
+        # (100, 102) is in the first half of the chunk, (700, 702) past the limit
+        assert ranges == [(0.0, 502.0), (502.0, 1000)]
+
+    def test_cuts_at_the_limit_without_silence(self):
+        ranges = audio.get_chunk_ranges(1300, [(10, 12)], 600)
+        assert ranges == [(0.0, 600.0), (600.0, 1200.0), (1200.0, 1300)]
+
+    def test_chunks_cover_the_audio(self):
+        silences = [(float(t), float(t) + 1) for t in range(250, 3000, 370)]
+        ranges = audio.get_chunk_ranges(3000, silences, 600)
+        assert ranges[0][0] == 0 and ranges[-1][1] == 3000
+        for (_, end), (start, _) in zip(ranges, ranges[1:]):
+            assert end == start
+        assert all(0 < end - start <= 600 for start, end in ranges)
+
+
+class TestTranscriptionCache:
+    def test_key_depends_on_audio_engine_and_model(self, tmp_path):
+        file_path = tmp_path / "audio.mp3"
+        file_path.write_bytes(b"audio")
+        other_path = tmp_path / "other.mp3"
+        other_path.write_bytes(b"other audio")
+
+        key = audio.get_transcription_cache_key(get_request(), file_path)
+        assert key == audio.get_transcription_cache_key(get_request(), file_path)
+        assert key != audio.get_transcription_cache_key(get_request(), other_path)
+        assert key != audio.get_transcription_cache_key(
+            get_request(STT_MODEL="gpt-4o-transcribe"), file_path
+        )
+        assert key != audio.get_transcription_cache_key(
+            get_request(STT_ENGINE="deepgram"), file_path
+        )
+
+    def test_transcribe_uses_cache(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(audio, "TRANSCRIPTION_CACHE_DIR", tmp_path)
+        monkeypatch.setattr(audio, "split_audio", lambda *args: [])
+        calls = []
+
+        def transcribe_file(request, file_path):
+            calls.append(request.app.state.config.STT_MODEL)
+            return {"text": "hello"}
+
+        monkeypatch.setattr(audio, "transcribe_file", transcribe_file)
+
+        file_path = tmp_path / "audio.mp3"
+        file_path.write_bytes(b"audio")
+
+        assert audio.transcribe(get_request(), str(file_path)) == {"text": "hello"}
+        assert audio.transcribe(get_request(), str(file_path)) == {"text": "hello"}
+        assert calls == ["whisper-1"]
+        assert (tmp_path / "audio.json").is_file()
+
+        audio.transcribe(get_request(STT_MODEL="gpt-4o-transcribe"), str(file_path))
+        assert calls == ["whisper-1", "gpt-4o-transcribe"]
+
+
+class TestChunkFutures:
+    def test_caps_submissions_and_cancels_on_close(self, monkeypatch):
+        monkeypatch.setattr(audio, "AUDIO_STT_CHUNK_WORKERS", 2)
+        submitted = []
+
+        class Executor:
+            def submit(self, func, request, chunk):
+                future = Future()
+                submitted.append((chunk, future))
+                return future
+
+        monkeypatch.setattr(audio, "MEDIA_EXECUTOR", Executor())
+
+        chunk_futures = audio.iter_chunk_futures(get_request(), ["a", "b", "c", "d"])
+        first = next(chunk_futures)
+        assert [chunk for chunk, _ in submitted] == ["a", "b"]
+        assert first is submitted[0][1]
+
+        first.set_result({"text": "a"})
+        next(chunk_futures)
+        assert [chunk for chunk, _ in submitted] == ["a", "b", "c"]
+
+        chunk_futures.close()
+        assert submitted[1][1].cancelled() and submitted[2][1].cancelled()
+        assert len(submitted) == 3
+
+    def test_transcribe_joins_chunks_in_order(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(audio, "TRANSCRIPTION_CACHE_DIR", tmp_path)
+        chunks = [str(tmp_path / f"chunk{idx}.wav") for idx in range(3)]
+        monkeypatch.setattr(audio, "split_audio", lambda *args: chunks)
+        threads = set()
+
+        def transcribe_file(request, file_path):
+            threads.add(threading.current_thread().name)
+            return {"text": file_path.split("/")[-1]}
+
+        monkeypatch.setattr(audio, "transcribe_file", transcribe_file)
+
+        file_path = tmp_path / "audio.mp3"
+        file_path.write_bytes(b"audio")
+        data = audio.transcribe(get_request(), str(file_path))
+
+        assert data == {"text": "chunk0.wav chunk1.wav chunk2.wav"}
+        assert all(name.startswith("media") for name in threads)
+
+    def test_stream_cancels_chunks_when_closed(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(audio, "TRANSCRIPTION_CACHE_DIR", tmp_path)
+        monkeypatch.setattr(audio, "AUDIO_STT_CHUNK_WORKERS", 1)
+        chunks = [str(tmp_path / f"chunk{idx}.wav") for idx in range(3)]
+        monkeypatch.setattr(audio, "split_audio", lambda *args: chunks)
+        transcribed = []
+
+        def transcribe_file(request, file_path):
+            time.sleep(0.05)
+            transcribed.append(file_path)
+            return {"text": "text"}
+
+        monkeypatch.setattr(audio, "transcribe_file", transcribe_file)
+
+        file_path = tmp_path / "audio.mp3"
+        file_path.write_bytes(b"audio")
+
+        async def main():
+            stream = audio.stream_transcription(get_request(), str(file_path))
+            event = json.loads((await stream.__anext__())[len("data: ") :])
+            await stream.aclose()
+            await asyncio.sleep(0.2)
+            return event
+
+        event = asyncio.run(main())
+        assert event == {"text": "text", "chunk": 1, "chunks": 3, "done": False}
+        assert len(transcribed) == 1
+        assert not (tmp_path / "audio.json").exists()
+
+
+class TestSpeechCache:
+    def entry_size(self, data, payload):
+        return len(data) + len(json.dumps(payload).encode("utf-8"))
+
+    def test_get_and_put(self, tmp_path):
+        cache = audio.SpeechCache(tmp_path, 0)
+        assert cache.get("a") is None
+
+        file_path = cache.put("a", b"audio", {"input": "a"})
+        assert cache.get("a") == file_path
+        assert file_path.read_bytes() == b"audio"
+        assert json.loads((tmp_path / "a.json").read_text()) == {"input": "a"}
+        # The payload sidecar counts towards the size
+        assert cache.size == self.entry_size(b"audio", {"input": "a"})
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        payload = {"input": "x"}
+        entry_size = self.entry_size(b"0" * 100, payload)
+        cache = audio.SpeechCache(tmp_path, entry_size * 2)
+
+        cache.put("a", b"0" * 100, payload)
+        cache.put("b", b"0" * 100, payload)
+        cache.get("a")
+        cache.put("c", b"0" * 100, payload)
+
+        assert list(cache.entries) == ["a", "c"]
+        assert cache.size == entry_size * 2
+        assert not (tmp_path / "b.mp3").exists()
+        assert not (tmp_path / "b.json").exists()
+        assert cache.get("b") is None
+
+    def test_keeps_the_entry_just_written(self, tmp_path):
+        cache = audio.SpeechCache(tmp_path, 10)
+
+        cache.put("a", b"0" * 5, {})
+        file_path = cache.put("b", b"0" * 100, {})
+
+        assert list(cache.entries) == ["b"]
+        assert file_path.is_file()
+
+    def test_entries_of_other_workers(self, tmp_path):
+        cache = audio.SpeechCache(tmp_path, 0)
+        other = audio.SpeechCache(tmp_path, 0)
+
+        other.put("a", b"audio", {"input": "a"})
+        assert cache.get("a") == tmp_path / "a.mp3"
+        assert cache.size == other.size
+
+        # Removed by the other worker
+        (tmp_path / "a.mp3").unlink()
+        assert cache.get("a") is None
+        assert cache.entries == {}
+        assert cache.size == 0
+
+    def test_restores_entries_on_start(self, tmp_path):
+        cache = audio.SpeechCache(tmp_path, 0)
+        cache.put("a", b"audio", {"input": "a"})
+
+        restored = audio.SpeechCache(tmp_path, 0)
+        assert list(restored.entries) == ["a"]
+        assert restored.size == cache.size
@@ -234,3 +234,142 @@ class TestChats(AbstractPostgresTest):
 
         chat = self.chats.get_chat_by_id(chat_id)
         assert chat.share_id is None
+
+    def get_chat_blob(self, chat_id):
+        from open_webui.internal.db import get_db
+        from open_webui.models.chats import Chat
+
+        with get_db() as db:
+            return db.get(Chat, chat_id).chat
+
+    def get_message_rows(self, chat_id):
+        from open_webui.models.chat_messages import ChatMessages
+
+        return ChatMessages.get_messages_by_chat_id(chat_id)
+
+    def insert_chat_with_messages(self):
+        from open_webui.models.chats import ChatForm
+
+        messages = {
+            "1": {"id": "1", "parentId": None, "role": "user", "content": "hi"},
+            "2": {"id": "2", "parentId": "1", "role": "assistant", "content": "hey"},
+        }
+        chat = self.chats.insert_new_chat(
+            "2",
+            ChatForm(
+                chat={
+                    "title": "split",
+                    "history": {"currentId": "2", "messages": messages},
+                }
+            ),
+        )
+        return chat, messages
+
+    def test_chat_message_table_insert_and_update(self, monkeypatch):
+        monkeypatch.setattr("open_webui.models.chats.ENABLE_CHAT_MESSAGE_TABLE", True)
+        chat, messages = self.insert_chat_with_messages()
+
+        assert chat.chat["history"]["messages"] == messages
+        assert "messages" not in self.get_chat_blob(chat.id)["history"]
+        assert self.get_message_rows(chat.id) == messages
+
+        chat = self.chats.get_chat_by_id(chat.id)
+        assert chat.chat["history"]["messages"] == messages
+        assert chat.chat["messages"] == [messages["1"], messages["2"]]
+
+        edited = {**messages, "2": {**messages["2"], "content": "hello"}}
+        self.chats.update_chat_by_id(
+            chat.id,
+            {"title": "split", "history": {"currentId": "2", "messages": edited}},
+        )
+        assert self.get_message_rows(chat.id) == edited
+
+    def test_chat_message_table_save_keeps_missing_messages(self, monkeypatch):
+        monkeypatch.setattr("open_webui.models.chats.ENABLE_CHAT_MESSAGE_TABLE", True)
+        chat, messages = self.insert_chat_with_messages()
+
+        # A message streamed in after the frontend took the copy it saves
+        streamed = {"id": "3", "parentId": "2", "role": "assistant", "content": "..."}
+        self.chats.upsert_message_to_chat_by_id_and_message_id(chat.id, "3", streamed)
+        self.chats.update_chat_by_id(
+            chat.id,
+            {"title": "split", "history": {"currentId": "2", "messages": messages}},
+        )
+        assert self.get_message_rows(chat.id)["3"] == streamed
+
+        assert self.chats.delete_messages_by_id_and_message_ids(chat.id, ["3"])
+        assert self.get_message_rows(chat.id) == messages
+
+    def test_chat_message_table_upsert_message(self, monkeypatch):
+        monkeypatch.setattr("open_webui.models.chats.ENABLE_CHAT_MESSAGE_TABLE", True)
+        chat, messages = self.insert_chat_with_messages()
+
+        result = self.chats.upsert_message_to_chat_by_id_and_message_id(
+            chat.id, "2", {"content": "updated"}
+        )
+        assert result.chat["history"]["currentId"] == "2"
+
+        message = self.chats.get_message_by_id_and_message_id(chat.id, "2")
+        assert message == {**messages["2"], "content": "updated"}
+        assert self.get_message_rows(chat.id)["1"] == messages["1"]
+
+        self.chats.add_message_status_to_chat_by_id_and_message_id(
+            chat.id, "2", {"description": "done"}
+        )
+        message = self.chats.get_chat_by_id(chat.id).chat["history"]["messages"]["2"]
+        assert message["statusHistory"] == [{"description": "done"}]
+
+    def test_chat_message_table_migrates_legacy_chat(self, monkeypatch):
+        chat, messages = self.insert_chat_with_messages()
+        assert self.get_chat_blob(chat.id)["history"]["messages"] == messages
+
+        monkeypatch.setattr("open_webui.models.chats.ENABLE_CHAT_MESSAGE_TABLE", True)
+        self.chats.upsert_message_to_chat_by_id_and_message_id(
+            chat.id, "2", {"content": "updated"}
+        )
+
+        assert "messages" not in self.get_chat_blob(chat.id)["history"]
+        assert self.get_message_rows(chat.id) == {
+            **messages,
+            "2": {**messages["2"], "content": "updated"},
+        }
+
+        # Split chats still read back whole with the flag turned off again
+        monkeypatch.setattr("open_webui.models.chats.ENABLE_CHAT_MESSAGE_TABLE", False)
+        chat = self.chats.get_chat_by_id(chat.id)
+        assert chat.chat["history"]["messages"]["2"]["content"] == "updated"
+
+    def test_chat_message_table_delete_chat(self, monkeypatch):
+        monkeypatch.setattr("open_webui.models.chats.ENABLE_CHAT_MESSAGE_TABLE", True)
+        chat, _ = self.insert_chat_with_messages()
+
+        assert self.chats.delete_chat_by_id_and_user_id(chat.id, "2")
+        assert self.chats.get_chat_by_id(chat.id) is None
+        assert self.get_message_rows(chat.id) == {}
+
+    def test_chat_message_table_search(self, monkeypatch):
+        from open_webui.internal.db import get_db
+        from open_webui.models.chat_messages import ChatMessages
+
+        legacy, messages = self.insert_chat_with_messages()
+        # Rows copied by the migration, the legacy blob moved on since
+        with get_db() as db:
+            ChatMessages.sync_messages_by_chat_id(
+                db, legacy.id, {"1": {**messages["1"], "content": "stale words"}}
+            )
+            db.commit()
+
+        monkeypatch.setattr("open_webui.models.chats.ENABLE_CHAT_MESSAGE_TABLE", True)
+        split, _ = self.insert_chat_with_messages()
+        self.chats.upsert_message_to_chat_by_id_and_message_id(
+            split.id, "2", {"content": "split words"}
+        )
+
+        def search(text):
+            return [
+                chat.id
+                for chat in self.chats.get_chats_by_user_id_and_search_text("2", text)
+            ]
+
+        assert search("split words") == [split.id]
+        assert search("stale words") == []
@@ -0,0 +1,189 @@
+import asyncio
+
+import pytest
+from open_webui.socket import main as socket_main
+from open_webui.socket import utils
+from open_webui.socket.utils import (
+    LocalSessionPool,
+    LocalUsagePool,
+    RedisSessionPool,
+    RedisUsagePool,
+)
+
+fakeredis = pytest.importorskip("fakeredis")
+
+USER = {"id": "user", "name": "User"}
+OTHER = {"id": "other", "name": "Other"}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = {"now": 1000.0}
+    monkeypatch.setattr(utils.time, "time", lambda: clock["now"])
+    return clock
+
+
+@pytest.fixture(autouse=True)
+def redis_server(monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        utils,
+        "get_async_redis_connection",
+        lambda *args, **kwargs: fakeredis.FakeAsyncRedis(
+            server=server, decode_responses=True
+        ),
+    )
+    return server
+
+
+def session_pools():
+    return [
+        pytest.param(LocalSessionPool, id="local"),
+        pytest.param(
+            lambda: RedisSessionPool("test", "redis://"),
+            id="redis",
+        ),
+    ]
+
+
+def usage_pools():
+    return [
+        pytest.param(lambda: LocalUsagePool(timeout=3), id="local"),
+        pytest.param(
+            lambda: RedisUsagePool("test", 3, "redis://"),
+            id="redis",
+        ),
+    ]
+
+
+class TestSessionPool:
+    @pytest.mark.parametrize("make_pool", session_pools())
+    def test_presence_deltas(self, make_pool):
+        async def main():
+            pool = make_pool()
+            assert await pool.add_session("sid1", USER)
+            # Already online with another session
+            assert not await pool.add_session("sid2", USER)
+            assert await pool.add_session("sid3", OTHER)
+
+            assert sorted(await pool.get_user_ids()) == ["other", "user"]
+            assert sorted(await pool.get_session_ids_by_user_id("user")) == [
+                "sid1",
+                "sid2",
+            ]
+            assert await pool.get_session("sid1") == USER
+            assert await pool.get_sessions(["sid3", "gone"]) == [OTHER, None]
+            assert await pool.get_sessions([]) == []
+
+            assert await pool.remove_session("sid1") == (USER, False)
+            assert await pool.is_user_active("user")
+            assert await pool.remove_session("sid2") == (USER, True)
+            assert not await pool.is_user_active("user")
+            assert await pool.get_user_ids() == ["other"]
+            assert await pool.get_session_ids_by_user_id("user") == []
+
+            # Unknown or already removed sessions change nothing
+            assert await pool.remove_session("sid2") == (None, False)
+
+        asyncio.run(main())
+
+
+class TestUsagePool:
+    @pytest.mark.parametrize("make_pool", usage_pools())
+    def test_usage_expires(self, make_pool, clock):
+        async def main():
+            pool = make_pool()
+            await pool.touch("llama3:latest", "sid1")
+            await pool.touch("org:model", "sid2")
+            assert await pool.get_models_in_use() == ["llama3:latest", "org:model"]
+
+            clock["now"] += 2
+            await pool.touch("llama3:latest", "sid1")
+            clock["now"] += 2
+            assert await pool.get_models_in_use() == ["llama3:latest"]
+
+            clock["now"] += 2
+            assert await pool.get_models_in_use() == []
+
+        asyncio.run(main())
+
+
+class FakeSio:
+    def __init__(self):
+        self.rooms: dict[str, set[str]] = {}
+        self.emitted: list[tuple] = []
+
+    async def enter_room(self, sid, room):
+        self.rooms.setdefault(room, set()).add(sid)
+
+    async def emit(self, event, data, **kwargs):
+        self.emitted.append((event, data, kwargs))
+
+
+class TestSocketSessions:
+    @pytest.fixture
+    def sio(self, monkeypatch):
+        sio = FakeSio()
+        monkeypatch.setattr(socket_main, "sio", sio)
+        monkeypatch.setattr(socket_main, "SESSION_POOL", LocalSessionPool())
+        monkeypatch.setattr(socket_main, "USAGE_POOL", LocalUsagePool(timeout=3))
+        return sio
+
+    def test_user_rooms_and_presence(self, sio):
+        user = socket_main.UserNameResponse(
+            id="user", name="User", role="user", profile_image_url=""
+        )
+
+        async def main():
+            await socket_main.add_session("sid1", user)
+            await socket_main.add_session("sid2", user)
+            assert sio.rooms == {"user:user": {"sid1", "sid2"}}
+
+            presence = [
+                data for event, data, _ in sio.emitted if event == "user-presence"
+            ]
+            assert presence == [{"joined": ["user"]}]
+            # The new session gets the full list
+            assert ("user-list", {"user_ids": ["user"]}, {"to": "sid2"}) in sio.emitted
+
+            sio.emitted.clear()
+            await socket_main.disconnect("sid1")
+            assert sio.emitted == []
+            await socket_main.disconnect("sid2")
+            assert sio.emitted == [("user-presence", {"left": ["user"]}, {})]
+
+        asyncio.run(main())
+
+    def test_chat_events_go_to_the_user_room(self, sio):
+        emitter = socket_main.get_event_emitter(
+            {"user_id": "user", "chat_id": "chat", "message_id": "message"},
+            update_db=False,
+        )
+        asyncio.run(emitter({"type": "chat:title", "data": "Title"}))
+
+        [(event, data, kwargs)] = sio.emitted
+        assert event == "chat-events" and data["chat_id"] == "chat"
+        assert kwargs == {"to": ["user:user"]}
+
+    def test_usage_is_broadcast_on_changes_only(self, sio, clock, monkeypatch):
+        ticks = []
+
+        async def sleep(seconds):
+            ticks.append(seconds)
+            clock["now"] += seconds
+            if len(ticks) == 1:
+                await socket_main.usage("sid", {"model": "llama3:latest"})
+            if len(ticks) == 5:
+                raise asyncio.CancelledError
+
+        monkeypatch.setattr(socket_main.asyncio, "sleep", sleep)
+
+        with pytest.raises(asyncio.CancelledError):
+            asyncio.run(socket_main.periodic_usage_broadcast())
+
+        assert ticks == [socket_main.TIMEOUT_DURATION] * 5
+        # Nothing in use at first, so the first tick that emits is the second
+        assert [data for _, data, _ in sio.emitted] == [
+            {"models": ["llama3:latest"]},
+            {"models": []},
+        ]
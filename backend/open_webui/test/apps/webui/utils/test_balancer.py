@@ -0,0 +1,147 @@
+import time
+from collections import Counter
+from types import SimpleNamespace
+
+import aiohttp
+from open_webui.routers import ollama
+from open_webui.utils import balancer
+from open_webui.utils.balancer import LoadBalancer
+
+
+class TestLoadBalancer:
+    def test_single_backend(self):
+        assert LoadBalancer().select([3]) == 3
+
+    def test_unknown_strategy(self):
+        assert LoadBalancer(strategy="fastest").strategy == "random"
+
+    def test_random(self):
+        lb = LoadBalancer(strategy="random")
+        assert {lb.select([0, 1, 2]) for _ in range(200)} == {0, 1, 2}
+
+    def test_round_robin(self):
+        lb = LoadBalancer(strategy="round_robin")
+        assert [lb.select([0, 1, 2]) for _ in range(6)] == [0, 1, 2, 0, 1, 2]
+
+    def test_smooth_weighted_round_robin(self):
+        lb = LoadBalancer(strategy="round_robin")
+        picks = [lb.select([0, 1, 2], weights={0: 5, 1: 1, 2: 1}) for _ in range(7)]
+
+        assert Counter(picks) == {0: 5, 1: 1, 2: 1}
+        # The heavier backend is spread out instead of picked 5 times in a row
+        assert picks == [0, 0, 1, 0, 2, 0, 0]
+
+    def test_least_requests(self):
+        lb = LoadBalancer(strategy="least_requests")
+        lb.start(0)
+        lb.start(0)
+        lb.start(1)
+        assert lb.select([0, 1, 2]) == 2
+
+        lb.start(2)
+        lb.start(2)
+        # Two in flight on a backend of weight 4 is the lightest load
+        assert lb.select([0, 1, 2], weights={2: 4}) == 2
+
+        lb.finish(0, time.time())
+        lb.finish(0, time.time())
+        assert lb.select([0, 1, 2]) == 0
+
+    def test_model_affinity(self):
+        lb = LoadBalancer(strategy="model_affinity")
+        lb.update_loaded_models({0: ["other:latest"], 1: ["llama3:latest"], 2: None})
+        assert lb.select([0, 1, 2], model="llama3:latest") == 1
+
+        # Falls back to the least loaded backend
+        lb.start(0)
+        lb.start(1)
+        assert lb.select([0, 1, 2], model="unknown:latest") == 2
+
+        # Serving a model loads it
+        lb.finish(2, lb.start(2), model="unknown:latest")
+        assert lb.select([0, 1, 2], model="unknown:latest") == 2
+
+    def test_ejection_and_recovery(self, monkeypatch):
+        now = 1000.0
+        monkeypatch.setattr(balancer.time, "time", lambda: now)
+        lb = LoadBalancer(strategy="round_robin", failure_threshold=2, ejection_time=30)
+        error = aiohttp.ClientConnectionError()
+
+        lb.finish(0, lb.start(0), error=error)
+        assert lb.get_backend(0).ejected_until == 0
+
+        # Errors of the request itself don't count
+        lb.finish(0, lb.start(0), error=ValueError())
+        lb.finish(0, lb.start(0), error=error)
+        assert lb.get_backend(0).ejected_until == 0
+
+        lb.finish(0, lb.start(0), error=error)
+        assert lb.get_backend(0).ejected_until == now + 30
+        assert {lb.select([0, 1]) for _ in range(4)} == {1}
+        assert not lb.get_stats(["a", "b"])["backends"]["a"]["healthy"]
+
+        # Everything down, requests go out anyway
+        for _ in range(2):
+            lb.finish(1, lb.start(1), error=error)
+        assert {lb.select([0, 1]) for _ in range(4)} == {0, 1}
+
+        now += 31
+        assert lb.get_stats(["a", "b"])["backends"]["a"]["healthy"]
+        lb.finish(0, lb.start(0))
+        assert lb.get_backend(0).consecutive_failures == 0
+        assert lb.get_backend(0).failures == 3
+
+    def test_sticky_sessions(self):
+        lb = LoadBalancer(strategy="round_robin", sticky_sessions=True)
+        first = lb.select([0, 1, 2], model="llama3", session_id="chat")
+        assert {
+            lb.select([0, 1, 2], model="llama3", session_id="chat") for _ in range(5)
+        } == {first}
+
+        # Ejected backends don't keep their sessions
+        lb.get_backend(first).ejected_until = time.time() + 30
+        other = lb.select([0, 1, 2], model="llama3", session_id="chat")
+        assert other != first
+        assert lb.select([0, 1, 2], model="llama3", session_id="chat") == other
+
+    def test_sticky_sessions_are_bounded(self):
+        lb = LoadBalancer(
+            strategy="round_robin", sticky_sessions=True, max_sticky_sessions=2
+        )
+        lb.select([0, 1], model="llama3", session_id="a")
+        lb.select([0, 1], model="llama3", session_id="b")
+        lb.select([0, 1], model="llama3", session_id="a")
+        lb.select([0, 1], model="llama3", session_id="c")
+
+        # The least recently used session goes first
+        assert list(lb.sessions) == [("a", "llama3"), ("c", "llama3")]
+
+    def test_reset(self):
+        lb = LoadBalancer(sticky_sessions=True)
+        lb.start(0)
+        lb.select([0, 1], session_id="chat")
+        lb.reset()
+        assert lb.backends == {} and len(lb.sessions) == 0
+
+
+def test_select_url_idx_strips_prefix_id(monkeypatch):
+    lb = LoadBalancer(strategy="model_affinity")
+    monkeypatch.setattr(ollama, "ollama_balancer", lb)
+    request = SimpleNamespace(
+        app=SimpleNamespace(
+            state=SimpleNamespace(
+                config=SimpleNamespace(
+                    OLLAMA_BASE_URLS=["http://a", "http://b"],
+                    OLLAMA_API_CONFIGS={
+                        "0": {"prefix_id": "gpu"},
+                        "1": {"prefix_id": "gpu"},
+                    },
+                )
+            )
+        )
+    )
+
+    ollama.update_loaded_models(
+        [{"models": []}, {"models": [{"model": "llama3:latest"}]}]
+    )
+    assert ollama.select_url_idx(request, "gpu.llama3:latest", [0, 1]) == 1
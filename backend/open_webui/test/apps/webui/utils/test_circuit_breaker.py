@@ -0,0 +1,77 @@
+from open_webui.utils import circuit_breaker
+from open_webui.utils.circuit_breaker import CircuitBreaker
+
+
+def mock_monotonic(monkeypatch, start=1000.0):
+    clock = {"now": start}
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", lambda: clock["now"])
+    return clock
+
+
+class TestCircuitBreaker:
+    def test_opens_after_max_failures(self, monkeypatch):
+        mock_monotonic(monkeypatch)
+        breaker = CircuitBreaker("test", max_failures=3, reset_timeout=30)
+
+        for _ in range(2):
+            assert breaker.allow()
+            breaker.record_failure()
+        assert breaker.allow()
+
+        breaker.record_failure()
+        assert not breaker.allow()
+
+    def test_success_resets_failures(self, monkeypatch):
+        mock_monotonic(monkeypatch)
+        breaker = CircuitBreaker("test", max_failures=2, reset_timeout=30)
+
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        assert breaker.allow()
+
+    def test_half_open_then_closed(self, monkeypatch):
+        clock = mock_monotonic(monkeypatch)
+        breaker = CircuitBreaker("test", max_failures=1, reset_timeout=30)
+
+        breaker.record_failure()
+        assert not breaker.allow()
+
+        clock["now"] += 30
+        # A single trial call is let through, the others are still skipped
+        assert breaker.allow()
+        assert not breaker.allow()
+
+        breaker.record_success()
+        assert breaker.allow()
+        assert breaker.allow()
+        assert breaker.failures == 0
+
+    def test_half_open_then_open_again(self, monkeypatch):
+        clock = mock_monotonic(monkeypatch)
+        breaker = CircuitBreaker("test", max_failures=1, reset_timeout=30)
+
+        breaker.record_failure()
+        clock["now"] += 30
+        assert breaker.allow()
+
+        breaker.record_failure()
+        assert not breaker.allow()
+        clock["now"] += 29
+        assert not breaker.allow()
+        clock["now"] += 1
+        assert breaker.allow()
+
+    def test_disabled_with_zero_max_failures(self, monkeypatch):
+        mock_monotonic(monkeypatch)
+        breaker = CircuitBreaker("test", max_failures=0, reset_timeout=30)
+
+        for _ in range(10):
+            breaker.record_failure()
+            assert breaker.allow()
+        assert breaker.opened_at is None
+
+    def test_get_circuit_breaker_is_shared_by_name(self):
+        assert circuit_breaker.get_circuit_breaker(
+            "test-shared"
+        ) is circuit_breaker.get_circuit_breaker("test-shared")
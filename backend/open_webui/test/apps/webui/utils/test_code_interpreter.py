@@ -0,0 +1,239 @@
+import asyncio
+import json
+import time
+import uuid
+
+from aiohttp import web
+from open_webui.utils.code_interpreter import JupyterKernelPool
+
+
+class StubJupyterServer:
+    """
+    Jupyter server whose kernels understand two statements, `name = value`
+    and `print(name)`, enough to tell whether a kernel kept its variables.
+    """
+
+    def __init__(self):
+        self.kernels: dict[str, dict] = {}
+        self.started = 0
+        self.restarted: list[str] = []
+        self.deleted = 0
+
+        self.app = web.Application()
+        self.app.router.add_post("/api/kernels", self.start_kernel)
+        self.app.router.add_delete("/api/kernels/{id}", self.delete_kernel)
+        self.app.router.add_post("/api/kernels/{id}/restart", self.restart_kernel)
+        self.app.router.add_post("/api/kernels/{id}/interrupt", self.interrupt_kernel)
+        self.app.router.add_get("/api/kernels/{id}/channels", self.channels)
+
+    async def __aenter__(self):
+        self.runner = web.AppRunner(self.app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}"
+        return self
+
+    async def __aexit__(self, *args):
+        await self.runner.cleanup()
+
+    async def start_kernel(self, request):
+        id = str(uuid.uuid4())
+        self.kernels[id] = {}
+        self.started += 1
+        return web.json_response({"id": id})
+
+    async def delete_kernel(self, request):
+        if self.kernels.pop(request.match_info["id"], None) is None:
+            return web.Response(status=404)
+        self.deleted += 1
+        return web.Response(status=204)
+
+    async def restart_kernel(self, request):
+        if request.match_info["id"] not in self.kernels:
+            return web.Response(status=404)
+        self.kernels[request.match_info["id"]] = {}
+        self.restarted.append(request.match_info["id"])
+        return web.json_response({"id": request.match_info["id"]})
+
+    async def interrupt_kernel(self, request):
+        return web.Response(status=204)
+
+    async def channels(self, request):
+        variables = self.kernels.get(request.match_info["id"])
+        if variables is None:
+            return web.Response(status=404)
+
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        async for message in ws:
+            message = json.loads(message.data)
+            code = message["content"]["code"]
+            parent_header = {"msg_id": message["header"]["msg_id"]}
+
+            if "=" in code:
+                name, value = [part.strip() for part in code.split("=")]
+                variables[name] = value
+            else:
+                name = code.strip()[len("print(") : -1]
+                stream = (
+                    {"name": "stdout", "text": variables[name]}
+                    if name in variables
+                    else {"name": "stderr", "text": f"NameError: {name}"}
+                )
+                await ws.send_json(
+                    {
+                        "parent_header": parent_header,
+                        "msg_type": "stream",
+                        "content": stream,
+                    }
+                )
+            await ws.send_json(
+                {
+                    "parent_header": parent_header,
+                    "msg_type": "status",
+                    "content": {"execution_state": "idle"},
+                }
+            )
+        return ws
+
+
+async def settle(pool):
+    while pool.tasks:
+        await asyncio.gather(*pool.tasks, return_exceptions=True)
+
+
+def run_with_pool(test, **kwargs):
+    async def main():
+        async with StubJupyterServer() as server:
+            pool = JupyterKernelPool(
+                server.url,
+                **{
+                    "size": 0,
+                    "idle_timeout": 600,
+                    "max_kernels_per_user": 2,
+                    "kernel_per_chat": False,
+                    **kwargs,
+                },
+            )
+            try:
+                await test(server, pool)
+            finally:
+                await pool.close()
+
+    asyncio.run(main())
+
+
+class TestJupyterKernelPool:
+    def test_take_and_fill(self):
+        async def test(server, pool):
+            await pool.execute("x = 1", user_id="user")
+            await settle(pool)
+            assert len(pool.idle) == 2
+            assert server.started == 3
+
+            # Served from the pool, which is filled up again in the background
+            idle = list(pool.idle)
+            await pool.execute("x = 1", user_id="user")
+            await settle(pool)
+            assert idle[-1] in server.restarted
+            assert len(pool.idle) == 2
+
+        run_with_pool(test, size=2)
+
+    def test_pooled_kernels_are_reset_after_use(self):
+        async def test(server, pool):
+            await pool.execute("x = 1", user_id="user")
+            await settle(pool)
+            result = await pool.execute("print(x)", user_id="user")
+            assert result.stderr == "NameError: x"
+            assert server.restarted or server.deleted
+
+        run_with_pool(test, size=1)
+
+    def test_kernels_are_deleted_without_pool(self):
+        async def test(server, pool):
+            await pool.execute("x = 1", user_id="user")
+            await settle(pool)
+            assert server.kernels == {}
+
+        run_with_pool(test, size=0)
+
+    def test_chat_kernels_keep_state_per_user(self):
+        async def test(server, pool):
+            await pool.execute("x = 1", user_id="user", session_id="chat")
+            result = await pool.execute("print(x)", user_id="user", session_id="chat")
+            assert result.stdout == "1"
+
+            # Another user sending the same chat id gets a kernel of its own
+            result = await pool.execute("print(x)", user_id="other", session_id="chat")
+            assert result.stderr == "NameError: x"
+            assert len(pool.chats) == 2
+
+        run_with_pool(test, kernel_per_chat=True)
+
+    def test_chat_kernels_per_user_cap(self):
+        async def test(server, pool):
+            await pool.execute("x = 1", user_id="user", session_id="chat1")
+            await pool.execute("x = 2", user_id="user", session_id="chat2")
+            await pool.execute("x = 3", user_id="other", session_id="chat3")
+            await settle(pool)
+
+            assert set(pool.chats) == {("user", "chat2"), ("other", "chat3")}
+            assert len(server.kernels) == 2
+            result = await pool.execute("print(x)", user_id="user", session_id="chat1")
+            assert result.stderr == "NameError: x"
+            assert pool.user_semaphores == {} and pool.user_executions == {}
+
+        run_with_pool(test, kernel_per_chat=True, max_kernels_per_user=1)
+
+    def test_user_slots(self):
+        async def test(server, pool):
+            running = 0
+            most_running = 0
+
+            async def execute():
+                nonlocal running, most_running
+                async with pool.user_slot("user"):
+                    running += 1
+                    most_running = max(most_running, running)
+                    await asyncio.sleep(0.01)
+                    running -= 1
+
+            await asyncio.gather(*[execute() for _ in range(5)])
+            assert most_running == 2
+            assert pool.user_semaphores == {} and pool.user_executions == {}
+
+        run_with_pool(test, max_kernels_per_user=2)
+
+    def test_idle_eviction(self):
+        async def test(server, pool):
+            await pool.execute("x = 1", user_id="user", session_id="chat")
+            await settle(pool)
+            assert len(server.kernels) == 2
+
+            await pool.evict_idle()
+            await settle(pool)
+            assert len(pool.chats) == 1 and len(pool.idle) == 1
+
+            pool.last_used = pool.chats[("user", "chat")].last_used = time.time() - 61
+            await pool.evict_idle()
+            await settle(pool)
+            assert pool.chats == {} and pool.idle == []
+            assert server.kernels == {}
+
+        run_with_pool(test, kernel_per_chat=True, size=1, idle_timeout=60)
+
+    def test_dead_kernel_is_replaced(self):
+        async def test(server, pool):
+            await pool.execute("x = 1", user_id="user", session_id="chat")
+            kernel_id = pool.chats[("user", "chat")].id
+
+            # Culled by the server
+            server.kernels.pop(kernel_id)
+            result = await pool.execute("print(x)", user_id="user", session_id="chat")
+            assert result.stderr == "NameError: x"
+            assert pool.chats[("user", "chat")].id != kernel_id
+
+        run_with_pool(test, kernel_per_chat=True)
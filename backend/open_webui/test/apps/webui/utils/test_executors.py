@@ -0,0 +1,120 @@
+import asyncio
+import threading
+
+import pytest
+from open_webui.utils.executors import BoundedExecutor
+
+
+class TestBoundedExecutor:
+    def test_runs_in_named_threads(self):
+        executor = BoundedExecutor("test", 2)
+        try:
+            name = executor.submit(lambda: threading.current_thread().name).result()
+            assert name.startswith("test")
+        finally:
+            executor.shutdown(wait=True)
+
+    def test_counters(self):
+        executor = BoundedExecutor("test", 1)
+        started = threading.Event()
+        release = threading.Event()
+
+        def block():
+            started.set()
+            release.wait(5)
+            return "done"
+
+        def fail():
+            raise RuntimeError("failed")
+
+        try:
+            running = executor.submit(block)
+            started.wait(5)
+            waiting = executor.submit(lambda: "next")
+            assert executor.get_stats() == {
+                "max_workers": 1,
+                "queued": 1,
+                "active": 1,
+                "completed": 0,
+                "failed": 0,
+            }
+
+            release.set()
+            assert running.result(5) == "done"
+            assert waiting.result(5) == "next"
+            with pytest.raises(RuntimeError):
+                executor.submit(fail).result(5)
+
+            stats = executor.get_stats()
+            assert (stats["queued"], stats["active"]) == (0, 0)
+            assert (stats["completed"], stats["failed"]) == (2, 1)
+        finally:
+            release.set()
+            executor.shutdown(wait=True)
+
+    def test_cancelled_calls_leave_the_queue(self):
+        executor = BoundedExecutor("test", 1)
+        started = threading.Event()
+        release = threading.Event()
+
+        def block():
+            started.set()
+            release.wait(5)
+
+        try:
+            executor.submit(block)
+            started.wait(5)
+            waiting = executor.submit(lambda: "never")
+            assert waiting.cancel()
+            assert executor.get_stats()["queued"] == 0
+        finally:
+            release.set()
+            executor.shutdown(wait=True)
+        assert executor.get_stats()["completed"] == 1
+
+    def test_inline_reentry_does_not_deadlock(self):
+        executor = BoundedExecutor("test", 1)
+
+        def outer():
+            # The only thread is taken by this call, a nested call runs inline
+            return executor.submit(threading.get_ident).result(1), threading.get_ident()
+
+        try:
+            inner_ident, outer_ident = executor.submit(outer).result(5)
+            assert inner_ident == outer_ident
+        finally:
+            executor.shutdown(wait=True)
+
+    def test_inline_reentry_keeps_errors(self):
+        executor = BoundedExecutor("test", 1)
+
+        def fail():
+            raise ValueError("inner")
+
+        def outer():
+            return executor.submit(fail).exception(1)
+
+        try:
+            assert isinstance(executor.submit(outer).result(5), ValueError)
+        finally:
+            executor.shutdown(wait=True)
+
+    def test_run(self):
+        executor = BoundedExecutor("test", 2)
+
+        async def main():
+            return await asyncio.gather(
+                executor.run(sum, [1, 2]), executor.run(max, 3, 4)
+            )
+
+        try:
+            assert asyncio.run(main()) == [3, 4]
+        finally:
+            executor.shutdown(wait=True)
+
+    def test_restarts_after_shutdown(self):
+        executor = BoundedExecutor("test", 1)
+        executor.submit(lambda: None).result(5)
+        executor.shutdown(wait=True)
+        assert executor.submit(lambda: "again").result(5) == "again"
+        executor.shutdown(wait=True)
@@ -0,0 +1,108 @@
+from functools import partial
+
+import pytest
+from ldap3 import MOCK_SYNC, Connection, Server
+from ldap3.core.exceptions import LDAPSessionTerminatedByServerError
+from open_webui.utils import ldap
+from open_webui.utils.ldap import LdapConnectionPool
+
+APP_DN = "cn=app,dc=example,dc=org"
+KEY = ("ldap.example.org", 389, APP_DN)
+SEARCH = {
+    "search_base": "dc=example,dc=org",
+    "search_filter": "(uid=jdoe)",
+    "attributes": ["uid", "mail"],
+}
+
+
+@pytest.fixture
+def server():
+    server = Server("ldap.example.org")
+    # Every mock connection to the same server shares its entries
+    connection = Connection(server, client_strategy=MOCK_SYNC)
+    connection.strategy.add_entry(APP_DN, {"userPassword": "secret", "cn": "app"})
+    connection.strategy.add_entry(
+        "uid=jdoe,dc=example,dc=org",
+        {"uid": "jdoe", "mail": "jdoe@example.org", "objectClass": "person"},
+    )
+    return server
+
+
+@pytest.fixture
+def connections(monkeypatch):
+    connections: list[Connection] = []
+
+    def connect(*args, **kwargs):
+        connection = Connection(*args, client_strategy=MOCK_SYNC, **kwargs)
+        connections.append(connection)
+        return connection
+
+    monkeypatch.setattr(ldap, "Connection", connect)
+    return connections
+
+
+class TestLdapConnectionPool:
+    def test_connections_are_reused(self, server, connections):
+        pool = LdapConnectionPool(size=2)
+        search = partial(pool.search, server, APP_DN, "secret", key=KEY, **SEARCH)
+
+        success, entries = search()
+        assert success
+        assert [entry.mail.value for entry in entries] == ["jdoe@example.org"]
+
+        assert search()[0]
+        assert len(connections) == 1
+        assert pool.idle == connections
+
+    def test_failed_bind(self, server, connections):
+        pool = LdapConnectionPool(size=2)
+        with pytest.raises(ValueError):
+            pool.search(server, APP_DN, "wrong", key=KEY, **SEARCH)
+        assert pool.idle == []
+        assert connections[0].closed
+
+    def test_stale_connection_is_replaced(self, server, connections):
+        pool = LdapConnectionPool(size=2)
+        search = partial(pool.search, server, APP_DN, "secret", key=KEY, **SEARCH)
+        search()
+
+        def dropped(**kwargs):
+            raise LDAPSessionTerminatedByServerError("connection reset")
+
+        stale = connections[0]
+        stale.search = dropped
+
+        success, entries = search()
+        assert success and len(entries) == 1
+        assert len(connections) == 2
+        assert not stale.bound
+        assert pool.idle == [connections[1]]
+
+    def test_size_bound(self, server, connections):
+        pool = LdapConnectionPool(size=2)
+        for _ in range(3):
+            connection = ldap.Connection(server, APP_DN, "secret")
+            connection.bind()
+            # All checked out at the same time
+            assert pool._acquire(KEY) is None
+        for connection in connections:
+            pool._release(KEY, connection)
+
+        assert pool.idle == connections[:2]
+        assert not connections[2].bound
+
+    def test_settings_change_drops_connections(self, server, connections):
+        pool = LdapConnectionPool(size=2)
+        pool.search(server, APP_DN, "secret", key=KEY, **SEARCH)
+
+        pool.search(server, APP_DN, "secret", key=KEY + ("changed",), **SEARCH)
+        assert len(connections) == 2
+        assert not connections[0].bound
+        assert pool.idle == [connections[1]]
+
+        # Connections of the old settings are not taken back
+        connection = ldap.Connection(server, APP_DN, "secret")
+        connection.bind()
+        pool._release(KEY, connection)
+        assert not connection.bound
+        assert pool.idle == [connections[1]]
@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+from open_webui.utils.singleflight import SingleFlight, single_flight
+
+
+class TestSingleFlight:
+    def test_coalesces_concurrent_calls(self):
+        flight = SingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "models"
+
+        async def main():
+            return await asyncio.gather(*[flight.do("key", fetch) for _ in range(5)])
+
+        assert asyncio.run(main()) == ["models"] * 5
+        assert len(calls) == 1
+        assert flight.calls == {}
+
+    def test_different_keys_do_not_share(self):
+        flight = SingleFlight()
+        calls = []
+
+        async def fetch(key):
+            calls.append(key)
+            await asyncio.sleep(0.01)
+            return key
+
+        async def main():
+            return await asyncio.gather(
+                flight.do("a", lambda: fetch("a")), flight.do("b", lambda: fetch("b"))
+            )
+
+        assert asyncio.run(main()) == ["a", "b"]
+        assert sorted(calls) == ["a", "b"]
+
+    def test_calls_after_completion_run_again(self):
+        flight = SingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            return len(calls)
+
+        async def main():
+            first = await flight.do("key", fetch)
+            second = await flight.do("key", fetch)
+            return first, second
+
+        assert asyncio.run(main()) == (1, 2)
+
+    def test_errors_are_shared(self):
+        flight = SingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("unreachable")
+
+        async def main():
+            return await asyncio.gather(
+                flight.do("key", fetch), flight.do("key", fetch), return_exceptions=True
+            )
+
+        results = asyncio.run(main())
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert flight.calls == {}
+
+    def test_cancelled_caller_does_not_cancel_others(self):
+        flight = SingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "models"
+
+        async def main():
+            first = asyncio.create_task(flight.do("key", fetch))
+            second = asyncio.create_task(flight.do("key", fetch))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await first
+            return await second
+
+        assert asyncio.run(main()) == "models"
+        assert len(calls) == 1
+
+    def test_decorator_keys_by_arguments(self):
+        calls = []
+
+        @single_flight(key=lambda name: name)
+        async def fetch(name):
+            calls.append(name)
+            await asyncio.sleep(0.01)
+            return name
+
+        async def main():
+            return await asyncio.gather(fetch("a"), fetch("a"), fetch("b"))
+
+        assert asyncio.run(main()) == ["a", "a", "b"]
+        assert sorted(calls) == ["a", "b"]
@@ -0,0 +1,132 @@
+import asyncio
+
+from open_webui.utils.task_cache import TaskResponseCache, is_cacheable
+
+PAYLOAD = {"model": "task-model", "messages": [], "stream": False, "temperature": 0}
+RESPONSE = {"choices": [{"message": {"content": "Title"}}]}
+
+
+def test_is_cacheable():
+    assert is_cacheable(PAYLOAD)
+    assert is_cacheable({**PAYLOAD, "temperature": None, "options": {"temperature": 0}})
+    assert not is_cacheable({**PAYLOAD, "stream": True})
+    assert not is_cacheable({**PAYLOAD, "temperature": 0.7})
+    # Without a temperature the backend's default applies
+    assert not is_cacheable({"model": "task-model", "messages": []})
+    # Model params are applied over the payload
+    assert not is_cacheable(PAYLOAD, {"temperature": 0.7})
+    assert is_cacheable({"model": "task-model"}, {"temperature": 0})
+
+
+class TestTaskResponseCache:
+    def test_cache_hit(self):
+        cache = TaskResponseCache(ttl=60, max_size=10)
+        calls = []
+
+        async def generate():
+            calls.append(1)
+            return RESPONSE
+
+        async def main():
+            first = await cache.generate("title", PAYLOAD, "user", generate)
+            second = await cache.generate("title", PAYLOAD, "user", generate)
+            other_user = await cache.generate("title", PAYLOAD, "other", generate)
+            return first, second, other_user
+
+        assert asyncio.run(main()) == (RESPONSE, RESPONSE, RESPONSE)
+        assert len(calls) == 2
+        assert cache.get_stats()["tasks"]["title"] == {
+            "hits": 1,
+            "misses": 2,
+            "coalesced": 0,
+        }
+
+    def test_not_cacheable(self):
+        cache = TaskResponseCache(ttl=60, max_size=10)
+        calls = []
+
+        async def generate():
+            calls.append(1)
+            return RESPONSE
+
+        async def main():
+            payload = {**PAYLOAD, "temperature": 0.7}
+            await cache.generate("title", payload, "user", generate)
+            await cache.generate("title", payload, "user", generate)
+
+        asyncio.run(main())
+        assert len(calls) == 2
+        assert cache.get_stats()["size"] == 0
+
+    def test_inflight_coalescing(self):
+        cache = TaskResponseCache(ttl=60, max_size=10)
+        calls = []
+
+        async def generate():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return RESPONSE
+
+        async def main():
+            return await asyncio.gather(
+                *[cache.generate("title", PAYLOAD, "user", generate) for _ in range(5)]
+            )
+
+        responses = asyncio.run(main())
+        assert responses == [RESPONSE] * 5
+        assert len(calls) == 1
+        assert cache.get_stats()["tasks"]["title"]["coalesced"] == 4
+
+        # Every waiting caller gets its own copy
+        responses[1]["choices"].clear()
+        assert responses[2] == RESPONSE
+        assert RESPONSE["choices"]
+
+    def test_failure_falls_back_to_own_call(self):
+        cache = TaskResponseCache(ttl=60, max_size=10)
+        calls = []
+
+        async def failing():
+            calls.append("failing")
+            await asyncio.sleep(0.05)
+            raise RuntimeError("model down")
+
+        async def generate():
+            calls.append("generate")
+            return RESPONSE
+
+        async def main():
+            return await asyncio.gather(
+                cache.generate("title", PAYLOAD, "user", failing),
+                cache.generate("title", PAYLOAD, "user", generate),
+                return_exceptions=True,
+            )
+
+        first, second = asyncio.run(main())
+        assert isinstance(first, RuntimeError)
+        assert second == RESPONSE
+        assert calls == ["failing", "generate"]
+
+    def test_error_responses_are_not_stored(self):
+        cache = TaskResponseCache(ttl=60, max_size=10)
+
+        async def generate():
+            return {"error": "rate limited"}
+
+        asyncio.run(cache.generate("title", PAYLOAD, "user", generate))
+        assert cache.get_stats()["size"] == 0
+
+    def test_expiry(self, monkeypatch):
+        now = 1000.0
+        monkeypatch.setattr("open_webui.utils.task_cache.time.monotonic", lambda: now)
+        cache = TaskResponseCache(ttl=60, max_size=10)
+        calls = []
+
+        async def generate():
+            calls.append(1)
+            return RESPONSE
+
+        asyncio.run(cache.generate("title", PAYLOAD, "user", generate))
+        now += 61
+        asyncio.run(cache.generate("title", PAYLOAD, "user", generate))
+        assert len(calls) == 2
@@ -0,0 +1,188 @@
+import asyncio
+
+import pytest
+from open_webui import tasks
+from open_webui.tasks import LocalTaskRegistry, RedisTaskRegistry
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = {"now": 1000.0}
+    monkeypatch.setattr(tasks.time, "time", lambda: clock["now"])
+    return clock
+
+
+@pytest.fixture
+def redis_server(monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        tasks,
+        "get_async_redis_connection",
+        lambda *args, **kwargs: fakeredis.FakeAsyncRedis(
+            server=server, decode_responses=True
+        ),
+    )
+    return server
+
+
+def use_registry(monkeypatch, registry):
+    monkeypatch.setattr(tasks, "TASK_REGISTRY", registry)
+    return registry
+
+
+async def wait_for(condition):
+    for _ in range(100):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition not met")
+
+
+class TestLocalTaskRegistry:
+    def test_task_lifecycle(self, monkeypatch):
+        use_registry(monkeypatch, LocalTaskRegistry())
+
+        async def main():
+            done = asyncio.Event()
+            task_id, task = await tasks.create_task(done.wait(), id="chat")
+
+            # Listed before the task had a chance to run
+            assert await tasks.list_task_ids_by_chat_id("chat") == [task_id]
+            assert await tasks.list_tasks() == [task_id]
+            assert tasks.get_task(task_id) is task
+
+            done.set()
+            await task
+            await asyncio.sleep(0)
+            assert await tasks.list_task_ids_by_chat_id("chat") == []
+            assert await tasks.list_tasks() == []
+            assert tasks.get_task(task_id) is None
+
+        asyncio.run(main())
+
+    def test_stop_task(self, monkeypatch):
+        use_registry(monkeypatch, LocalTaskRegistry())
+
+        async def main():
+            task_id, task = await tasks.create_task(asyncio.sleep(60), id="chat")
+            assert (await tasks.stop_task(task_id))["status"]
+            assert task.cancelled()
+            # Stopped before it started, it is unregistered in the background
+            await asyncio.sleep(0)
+            assert await tasks.list_task_ids_by_chat_id("chat") == []
+
+            with pytest.raises(ValueError):
+                await tasks.stop_task(task_id)
+
+        asyncio.run(main())
+
+
+class TestRedisTaskRegistry:
+    def test_task_lifecycle(self, monkeypatch, redis_server):
+        registry = use_registry(monkeypatch, RedisTaskRegistry("test", "redis://"))
+
+        async def main():
+            done = asyncio.Event()
+            task_id, task = await tasks.create_task(done.wait(), id="chat")
+
+            assert await tasks.list_task_ids_by_chat_id("chat") == [task_id]
+            assert await tasks.list_tasks() == [task_id]
+
+            done.set()
+            await task
+            assert await tasks.list_task_ids_by_chat_id("chat") == []
+            assert await tasks.list_tasks() == []
+            assert registry.local == {}
+            await registry.close()
+
+        asyncio.run(main())
+
+    def test_tasks_of_other_nodes(self, redis_server):
+        async def main():
+            node = RedisTaskRegistry("test", "redis://")
+            other = RedisTaskRegistry("test", "redis://")
+            await other.add("task", "chat")
+
+            assert await node.list_task_ids() == ["task"]
+            assert await node.list_task_ids_by_chat_id("chat") == ["task"]
+            assert await node.list_task_ids_by_chat_id("other") == []
+
+            # Closing a node takes its tasks off the list right away
+            await other.close()
+            assert await node.list_task_ids() == []
+            await node.close()
+
+        asyncio.run(main())
+
+    def test_expiry(self, clock, redis_server):
+        async def main():
+            node = RedisTaskRegistry("test", "redis://", ttl=30)
+            other = RedisTaskRegistry("test", "redis://", ttl=30)
+            await other.add("renewed", "chat")
+            await other.add("dead", "chat")
+            # The node running "dead" went away without cleaning up
+            other.local.pop("dead")
+
+            clock["now"] += 20
+            await other.renew(list(other.local))
+            clock["now"] += 20
+
+            assert await node.list_task_ids() == ["renewed"]
+            assert await node.list_task_ids_by_chat_id("chat") == ["renewed"]
+            assert not await node.request_stop("dead")
+
+            clock["now"] += 31
+            assert await node.list_task_ids() == []
+            assert await node.list_task_ids_by_chat_id("chat") == []
+            await node.close()
+            await other.close()
+
+        asyncio.run(main())
+
+    def test_stop_task_of_other_node(self, monkeypatch, redis_server):
+        use_registry(monkeypatch, RedisTaskRegistry("test", "redis://"))
+        other = RedisTaskRegistry("test", "redis://")
+
+        async def main():
+            pubsub = other.redis.pubsub()
+            await pubsub.subscribe(other.channel)
+            await other.add("task", "chat")
+
+            # Not running here, the node running it is asked to stop it
+            result = await tasks.stop_task("task")
+            assert result["status"]
+            messages = [await pubsub.get_message(timeout=1) for _ in range(2)]
+            assert [message["data"] for message in messages] == [1, "task"]
+
+            with pytest.raises(ValueError):
+                await tasks.stop_task("unknown")
+
+            await pubsub.aclose()
+            await other.close()
+            await tasks.TASK_REGISTRY.close()
+
+        asyncio.run(main())
+
+    def test_stop_requests_cancel_local_tasks(self, monkeypatch, redis_server):
+        node = RedisTaskRegistry("test", "redis://")
+        other = RedisTaskRegistry("test", "redis://")
+        monkeypatch.setattr(tasks, "tasks", {})
+
+        async def main():
+            await node.start()
+            task = asyncio.create_task(asyncio.sleep(60))
+            tasks.tasks["task"] = task
+            await node.add("task", "chat")
+            # Give the listener time to subscribe
+            await asyncio.sleep(0.1)
+
+            assert await other.request_stop("task")
+            await wait_for(task.done)
+            assert task.cancelled()
+
+            await other.close()
+            await node.close()
+
+        asyncio.run(main())
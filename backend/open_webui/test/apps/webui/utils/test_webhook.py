@@ -0,0 +1,148 @@
+import asyncio
+
+from open_webui.utils.webhook import WebhookDispatcher
+
+URL = "https://example.com/hook"
+
+
+def get_dispatcher(results=(), **kwargs):
+    """
+    A dispatcher whose deliveries are recorded instead of posted. `results`
+    are returned by the successive deliveries: None when done, or the delay
+    asked for before a retry.
+    """
+    dispatcher = WebhookDispatcher(
+        **{
+            "concurrency": 2,
+            "queue_size": 10,
+            "max_retries": 2,
+            "retry_backoff": 0.01,
+            "coalesce_window": 0.05,
+            **kwargs,
+        }
+    )
+    dispatcher.deliveries = []
+    results = list(results)
+
+    async def deliver(url, payload):
+        dispatcher.deliveries.append((url, payload, asyncio.get_running_loop().time()))
+        return results.pop(0) if results else None
+
+    dispatcher._deliver = deliver
+    return dispatcher
+
+
+class TestWebhookDispatcher:
+    def test_coalesces_notifications_per_url(self):
+        dispatcher = get_dispatcher()
+
+        async def main():
+            dispatcher.enqueue("Open WebUI", URL, "first", {"action": "a"})
+            dispatcher.enqueue("Open WebUI", URL, "first", {"action": "a"})
+            dispatcher.enqueue("Open WebUI", URL, "second", {"action": "b"})
+            dispatcher.enqueue("Open WebUI", f"{URL}/other", "third", {})
+            await asyncio.sleep(0.2)
+            await dispatcher.stop()
+
+        asyncio.run(main())
+        payloads = {url: payload for url, payload, _ in dispatcher.deliveries}
+        assert len(dispatcher.deliveries) == 2
+        # Identical notifications are sent once, distinct ones are joined
+        assert payloads[URL]["message"] == "first\n\nsecond"
+        assert [event["action"] for event in payloads[URL]["events"]] == ["a", "b"]
+        assert payloads[f"{URL}/other"] == {}
+
+    def test_retries_with_backoff(self):
+        dispatcher = get_dispatcher(results=[0, 0, None])
+
+        async def main():
+            dispatcher.enqueue("Open WebUI", URL, "message", {})
+            await asyncio.sleep(0.3)
+            await dispatcher.stop()
+
+        asyncio.run(main())
+        times = [delivered_at for _, _, delivered_at in dispatcher.deliveries]
+        assert len(times) == 3
+        assert times[1] - times[0] >= 0.01
+        assert times[2] - times[1] >= 0.02
+
+    def test_retry_after_is_respected(self):
+        dispatcher = get_dispatcher(results=[0.1, None])
+
+        async def main():
+            dispatcher.enqueue("Open WebUI", URL, "message", {})
+            await asyncio.sleep(0.3)
+            await dispatcher.stop()
+
+        asyncio.run(main())
+        times = [delivered_at for _, _, delivered_at in dispatcher.deliveries]
+        assert len(times) == 2
+        assert times[1] - times[0] >= 0.1
+
+    def test_gives_up_after_max_retries(self):
+        dispatcher = get_dispatcher(results=[0] * 10)
+
+        async def main():
+            dispatcher.enqueue("Open WebUI", URL, "message", {})
+            await asyncio.sleep(0.3)
+            assert dispatcher.retries == {}
+            await dispatcher.stop()
+
+        asyncio.run(main())
+        assert len(dispatcher.deliveries) == 3
+
+    def test_queue_full(self):
+        dispatcher = get_dispatcher(queue_size=2)
+
+        async def main():
+            assert dispatcher.enqueue("Open WebUI", URL, "1", {})
+            assert dispatcher.enqueue("Open WebUI", URL, "2", {})
+            assert not dispatcher.enqueue("Open WebUI", URL, "3", {})
+            await dispatcher.stop()
+
+        asyncio.run(main())
+        assert len(dispatcher.deliveries) == 1
+        assert dispatcher.deliveries[0][1]["message"] == "1\n\n2"
+
+    def test_stop_flushes_pending_notifications(self):
+        dispatcher = get_dispatcher(coalesce_window=60)
+
+        async def main():
+            dispatcher.enqueue("Open WebUI", URL, "message", {})
+            await dispatcher.stop()
+
+        asyncio.run(main())
+        assert len(dispatcher.deliveries) == 1
+        assert dispatcher.loop is None
+
+    def test_stop_sends_scheduled_retries(self):
+        dispatcher = get_dispatcher(results=[60, None], coalesce_window=0)
+
+        async def main():
+            dispatcher.enqueue("Open WebUI", URL, "message", {})
+            await asyncio.sleep(0.05)
+            assert len(dispatcher.retries) == 1
+            await dispatcher.stop()
+
+        asyncio.run(main())
+        assert len(dispatcher.deliveries) == 2
+
+    def test_stop_timeout_counts_undelivered(self, caplog):
+        dispatcher = get_dispatcher(coalesce_window=0)
+
+        async def slow_deliver(url, payload):
+            await asyncio.sleep(10)
+
+        dispatcher._deliver = slow_deliver
+
+        async def main():
+            dispatcher.enqueue("Open WebUI", URL, "1", {})
+            dispatcher.enqueue("Open WebUI", f"{URL}/2", "2", {})
+            dispatcher.enqueue("Open WebUI", f"{URL}/3", "3", {})
+            await asyncio.sleep(0.05)
+            dispatcher.enqueue("Open WebUI", f"{URL}/4", "4", {})
+            await dispatcher.stop(timeout=0.1)
+
+        with caplog.at_level("WARNING", logger="open_webui.utils.webhook"):
+            asyncio.run(main())
+        assert "Dropping 4 undelivered webhooks on shutdown" in caplog.text
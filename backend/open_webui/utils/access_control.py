@@ -128,10 +128,12 @@ def has_access(
 
 # Get all users with access to a resource
 def get_users_with_access(
-    type: str = "write", access_control: Optional[dict] = None
+    type: str = "write",
+    access_control: Optional[dict] = None,
+    include_settings: bool = False,
 ) -> List[UserModel]:
     if access_control is None:
-        return Users.get_users()
+        return Users.get_users(include_settings=include_settings)
 
     permission_access = access_control.get(type, {})
     permitted_group_ids = permission_access.get("group_ids", [])
@@ -144,4 +146,6 @@ def get_users_with_access(
         if group_user_ids:
             user_ids_with_access.update(group_user_ids)
 
-    return Users.get_users_by_user_ids(list(user_ids_with_access))
+    return Users.get_users_by_user_ids(
+        list(user_ids_with_access), include_settings=include_settings
+    )
@@ -16,11 +16,13 @@ from typing import Optional, Union, List, Dict
 from open_webui.models.users import Users
 
 from open_webui.constants import ERROR_MESSAGES
+from open_webui.utils.executors import AUTH_EXECUTOR
 from open_webui.env import (
     WEBUI_SECRET_KEY,
     TRUSTED_SIGNATURE_KEY,
     STATIC_DIR,
     SRC_LOG_LEVELS,
+    BCRYPT_ROUNDS,
 )
 
 from fastapi import BackgroundTasks, Depends, HTTPException, Request, Response, status
@@ -102,7 +104,15 @@ def get_license_data(app, key):
 
 
 bearer_security = HTTPBearer(auto_error=False)
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS
+)
+
+
+# bcrypt and LDAP binds are blocking; keep them off the event loop and bounded,
+# so a burst of logins cannot starve the default thread pool either.
+async def run_in_auth_executor(func, *args, **kwargs):
+    return await AUTH_EXECUTOR.run(func, *args, **kwargs)
 
 
 def verify_password(plain_password, hashed_password):
@@ -111,6 +121,18 @@ def verify_password(plain_password, hashed_password):
     )
 
 
+def verify_and_update_password(
+    plain_password, hashed_password
+) -> tuple[bool, Optional[str]]:
+    """
+    Returns whether the password matches and, if the stored hash uses a different
+    cost than BCRYPT_ROUNDS, a replacement hash to store.
+    """
+    if not hashed_password:
+        return False, None
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
 def get_password_hash(password):
     return pwd_context.hash(password)
 
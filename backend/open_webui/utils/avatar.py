@@ -0,0 +1,88 @@
+import base64
+import binascii
+import hashlib
+import io
+import logging
+import os
+import re
+from typing import Optional
+
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+AVATAR_URL_PREFIX = "/api/v1/users/avatars/"
+
+# Only raster formats are moved out, an SVG served from our origin could run scripts
+AVATAR_CONTENT_TYPES = {
+    "image/png": ".png",
+    "image/jpeg": ".jpg",
+    "image/jpg": ".jpg",
+    "image/gif": ".gif",
+    "image/webp": ".webp",
+}
+
+AVATAR_FILENAME_PATTERN = re.compile(r"^avatar-[0-9a-f]{64}\.(png|jpg|gif|webp)$")
+
+DATA_URL_PATTERN = re.compile(r"^data:([\w.+-]+/[\w.+-]+);base64,(.*)$", re.DOTALL)
+
+
+def store_avatar(data: bytes, content_type: str) -> str:
+    """
+    Stores the image under a content hash and returns its URL. The same
+    image is only stored once.
+    """
+    # Imported here, the config imports the models (through the migrations)
+    from open_webui.storage.provider import Storage
+
+    filename = (
+        f"avatar-{hashlib.sha256(data).hexdigest()}{AVATAR_CONTENT_TYPES[content_type]}"
+    )
+    Storage.upload_file(io.BytesIO(data), filename)
+    return f"{AVATAR_URL_PREFIX}{filename}"
+
+
+def offload_profile_image_url(profile_image_url: Optional[str]) -> Optional[str]:
+    """
+    Moves a base64 data URL into the storage provider and returns the URL to
+    use instead. Any other value is returned as is.
+    """
+    if not profile_image_url or not profile_image_url.startswith("data:"):
+        return profile_image_url
+
+    match = DATA_URL_PATTERN.match(profile_image_url)
+    if not match or match.group(1).lower() not in AVATAR_CONTENT_TYPES:
+        return profile_image_url
+
+    try:
+        data = base64.b64decode(match.group(2), validate=True)
+        if not data:
+            return profile_image_url
+        return store_avatar(data, match.group(1).lower())
+    except (binascii.Error, ValueError) as e:
+        log.warning(f"Invalid profile image data URL: {e}")
+    except Exception as e:
+        log.exception(f"Error storing profile image: {e}")
+    return profile_image_url
+
+
+def get_avatar_file_path(filename: str) -> Optional[str]:
+    """Returns a local path for the avatar, downloading it if needed."""
+    from open_webui.config import UPLOAD_DIR
+    from open_webui.storage.provider import Storage
+
+    if not AVATAR_FILENAME_PATTERN.match(filename):
+        return None
+
+    # Content addressed, so a local copy is always up to date
+    local_file_path = f"{UPLOAD_DIR}/{filename}"
+    if os.path.isfile(local_file_path):
+        return local_file_path
+
+    try:
+        file_path = Storage.get_file(Storage.get_file_path(filename))
+        return file_path if os.path.isfile(file_path) else None
+    except Exception as e:
+        log.debug(f"Avatar {filename} not found: {e}")
+        return None
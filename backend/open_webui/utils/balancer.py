@@ -0,0 +1,225 @@
+import asyncio
+import logging
+import random
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import aiohttp
+import requests
+
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+# Errors that say something about the backend itself rather than the request
+CONNECTION_ERRORS = (
+    aiohttp.ClientConnectionError,
+    asyncio.TimeoutError,
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+)
+
+STRATEGIES = ["random", "round_robin", "least_requests", "model_affinity"]
+
+
+class BackendStats:
+    def __init__(self):
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        self.latency: Optional[float] = None  # moving average, in seconds
+        self.current_weight = 0  # smooth weighted round robin state
+
+        self.loaded_models: set[str] = set()
+
+    def to_dict(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "failures": self.failures,
+            "healthy": self.ejected_until <= time.time(),
+            "latency": round(self.latency, 4) if self.latency is not None else None,
+            "loaded_models": sorted(self.loaded_models),
+        }
+
+
+class LoadBalancer:
+    """
+    Picks a backend (by url index) for a model that is served by several of
+    them. Tracks in-flight requests and latency per backend, and passively
+    ejects backends that keep failing to connect for a while.
+
+    Stats are kept per process.
+    """
+
+    def __init__(
+        self,
+        strategy: str = "least_requests",
+        sticky_sessions: bool = False,
+        failure_threshold: int = 3,
+        ejection_time: int = 30,
+        loaded_models_ttl: int = 15,
+        max_sticky_sessions: int = 10000,
+    ):
+        if strategy not in STRATEGIES:
+            log.warning(f"Unknown load balancing strategy {strategy}, using random")
+            strategy = "random"
+
+        self.strategy = strategy
+        self.sticky_sessions = sticky_sessions
+        self.failure_threshold = failure_threshold
+        self.ejection_time = ejection_time
+        self.loaded_models_ttl = loaded_models_ttl
+        self.max_sticky_sessions = max_sticky_sessions
+
+        self.backends: dict[int, BackendStats] = {}
+        self.sessions: OrderedDict[tuple[str, str], int] = OrderedDict()
+        self.loaded_models_updated_at = 0.0
+
+    def get_backend(self, idx: int) -> BackendStats:
+        if idx not in self.backends:
+            self.backends[idx] = BackendStats()
+        return self.backends[idx]
+
+    def reset(self):
+        """Drops all state, e.g. after the list of urls has changed."""
+        self.backends = {}
+        self.sessions = OrderedDict()
+        self.loaded_models_updated_at = 0.0
+
+    def should_refresh_loaded_models(self) -> bool:
+        """Returns True at most once per TTL, for the caller to refresh them."""
+        now = time.time()
+        if now - self.loaded_models_updated_at > self.loaded_models_ttl:
+            self.loaded_models_updated_at = now
+            return True
+        return False
+
+    def update_loaded_models(self, loaded_models: dict[int, Optional[list[str]]]):
+        """Takes the models reported by /api/ps per url index."""
+        for idx, models in loaded_models.items():
+            if models is not None:
+                self.get_backend(idx).loaded_models = set(models)
+        self.loaded_models_updated_at = time.time()
+
+    def select(
+        self,
+        idxs: list[int],
+        model: Optional[str] = None,
+        weights: Optional[dict[int, int]] = None,
+        session_id: Optional[str] = None,
+    ) -> int:
+        if not idxs:
+            raise ValueError("No backends to choose from")
+        if len(idxs) == 1:
+            return idxs[0]
+
+        now = time.time()
+        candidates = [idx for idx in idxs if self.get_backend(idx).ejected_until <= now]
+        if not candidates:
+            # Everything looks down, let the requests find out
+            candidates = list(idxs)
+
+        session_key = (session_id, model) if session_id else None
+        if self.sticky_sessions and session_key in self.sessions:
+            idx = self.sessions[session_key]
+            if idx in candidates:
+                self.sessions.move_to_end(session_key)
+                return idx
+
+        weights = weights or {}
+        if self.strategy == "round_robin":
+            idx = self._select_round_robin(candidates, weights)
+        elif self.strategy == "least_requests":
+            idx = self._select_least_requests(candidates, weights)
+        elif self.strategy == "model_affinity":
+            loaded = [
+                idx
+                for idx in candidates
+                if model and model in self.get_backend(idx).loaded_models
+            ]
+            idx = self._select_least_requests(loaded or candidates, weights)
+        else:
+            idx = random.choice(candidates)
+
+        if self.sticky_sessions and session_key:
+            self.sessions[session_key] = idx
+            self.sessions.move_to_end(session_key)
+            while len(self.sessions) > self.max_sticky_sessions:
+                self.sessions.popitem(last=False)
+
+        return idx
+
+    def _select_round_robin(self, idxs: list[int], weights: dict[int, int]) -> int:
+        # Smooth weighted round robin, spreads heavier backends evenly over time
+        total = 0
+        best = None
+        for idx in idxs:
+            weight = max(1, weights.get(idx, 1))
+            backend = self.get_backend(idx)
+            backend.current_weight += weight
+            total += weight
+            if best is None or backend.current_weight > best.current_weight:
+                best, best_idx = backend, idx
+
+        best.current_weight -= total
+        return best_idx
+
+    def _select_least_requests(self, idxs: list[int], weights: dict[int, int]) -> int:
+        def load(idx):
+            return self.get_backend(idx).in_flight / max(1, weights.get(idx, 1))
+
+        lowest = min(load(idx) for idx in idxs)
+        return random.choice([idx for idx in idxs if load(idx) == lowest])
+
+    def start(self, idx: int) -> float:
+        backend = self.get_backend(idx)
+        backend.in_flight += 1
+        backend.requests += 1
+        return time.time()
+
+    def finish(
+        self,
+        idx: int,
+        started_at: float,
+        error: Optional[BaseException] = None,
+        model: Optional[str] = None,
+    ):
+        backend = self.get_backend(idx)
+        backend.in_flight = max(0, backend.in_flight - 1)
+
+        if isinstance(error, CONNECTION_ERRORS):
+            backend.failures += 1
+            backend.consecutive_failures += 1
+            if backend.consecutive_failures >= self.failure_threshold:
+                log.warning(
+                    f"Ejecting backend {idx} for {self.ejection_time}s after {backend.consecutive_failures} failures"
+                )
+                backend.ejected_until = time.time() + self.ejection_time
+            return
+
+        backend.consecutive_failures = 0
+        backend.ejected_until = 0.0
+        if error is None:
+            latency = time.time() - started_at
+            backend.latency = (
+                latency
+                if backend.latency is None
+                else 0.8 * backend.latency + 0.2 * latency
+            )
+            if model:
+                # The backend loads the model to serve it
+                backend.loaded_models.add(model)
+
+    def get_stats(self, urls: list[str]) -> dict:
+        return {
+            "strategy": self.strategy,
+            "sticky_sessions": self.sticky_sessions,
+            "backends": {
+                url: self.get_backend(idx).to_dict() for idx, url in enumerate(urls)
+            },
+        }
@@ -0,0 +1,64 @@
+import logging
+import time
+
+from open_webui.env import (
+    UPSTREAM_CIRCUIT_BREAKER_FAILURES,
+    UPSTREAM_CIRCUIT_BREAKER_RESET_TIMEOUT,
+    SRC_LOG_LEVELS,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+class CircuitBreaker:
+    """
+    Opens after `max_failures` failed calls in a row, calls are then skipped
+    for `reset_timeout` seconds. After that a single trial call is let through,
+    and its outcome closes the breaker or opens it again.
+    """
+
+    def __init__(self, name: str, max_failures: int, reset_timeout: int):
+        self.name = name
+        self.max_failures = max_failures
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+
+    def allow(self) -> bool:
+        if self.max_failures <= 0 or self.opened_at is None:
+            return True
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            # Let one call through, the rest keep being skipped until it is done
+            self.opened_at = time.monotonic()
+            return True
+        return False
+
+    def record_success(self):
+        if self.opened_at is not None:
+            log.info(f"{self.name} is reachable again")
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.max_failures > 0 and self.failures >= self.max_failures:
+            if self.opened_at is None:
+                log.warning(
+                    f"{self.name} failed {self.failures} times in a row, "
+                    f"skipping it for {self.reset_timeout}s"
+                )
+            self.opened_at = time.monotonic()
+
+
+circuit_breakers: dict[str, CircuitBreaker] = {}
+
+
+def get_circuit_breaker(name: str) -> CircuitBreaker:
+    if name not in circuit_breakers:
+        circuit_breakers[name] = CircuitBreaker(
+            name,
+            max_failures=UPSTREAM_CIRCUIT_BREAKER_FAILURES,
+            reset_timeout=UPSTREAM_CIRCUIT_BREAKER_RESET_TIMEOUT,
+        )
+    return circuit_breakers[name]
@@ -1,14 +1,22 @@
 import asyncio
 import json
 import logging
+import time
 import uuid
+from contextlib import asynccontextmanager
 from typing import Optional
 
 import aiohttp
 import websockets
 from pydantic import BaseModel
 
-from open_webui.env import SRC_LOG_LEVELS
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    JUPYTER_KERNEL_POOL_SIZE,
+    JUPYTER_KERNEL_IDLE_TIMEOUT,
+    JUPYTER_MAX_KERNELS_PER_USER,
+    ENABLE_JUPYTER_KERNEL_PER_CHAT,
+)
 
 logger = logging.getLogger(__name__)
 logger.setLevel(SRC_LOG_LEVELS["MAIN"])
@@ -24,94 +32,303 @@ class ResultModel(BaseModel):
     result: Optional[str] = ""
 
 
-class JupyterCodeExecuter:
+class JupyterKernel:
+    def __init__(
+        self,
+        id: str,
+        user_id: Optional[str] = None,
+        session_id: Optional[str] = None,
+    ):
+        self.id = id
+        self.user_id = user_id
+        self.session_id = session_id
+        self.lock = asyncio.Lock()
+        self.last_used = time.time()
+
+
+class JupyterKernelPool:
     """
-    Execute code in jupyter notebook
+    Executes code on a Jupyter server, reusing the signed in HTTP session and
+    a few started kernels instead of starting a kernel for every execution.
+
+    Pooled kernels are restarted in the background after each use, so every
+    execution starts from a clean state. With per chat kernels enabled, a
+    chat keeps its own kernel (and variables) until it goes idle.
     """
 
     def __init__(
         self,
         base_url: str,
-        code: str,
         token: str = "",
         password: str = "",
-        timeout: int = 60,
+        size: int = JUPYTER_KERNEL_POOL_SIZE,
+        idle_timeout: int = JUPYTER_KERNEL_IDLE_TIMEOUT,
+        max_kernels_per_user: int = JUPYTER_MAX_KERNELS_PER_USER,
+        kernel_per_chat: bool = ENABLE_JUPYTER_KERNEL_PER_CHAT,
     ):
         """
         :param base_url: Jupyter server URL (e.g., "http://localhost:8888")
-        :param code: Code to execute
         :param token: Jupyter authentication token (optional)
         :param password: Jupyter password (optional)
-        :param timeout: WebSocket timeout in seconds (default: 60s)
         """
         self.base_url = base_url.rstrip("/")
-        self.code = code
         self.token = token
         self.password = password
-        self.timeout = timeout
-        self.kernel_id = ""
-        self.session = aiohttp.ClientSession(base_url=self.base_url)
+        self.size = max(0, size)
+        self.idle_timeout = idle_timeout
+        self.max_kernels_per_user = max(1, max_kernels_per_user)
+        self.kernel_per_chat = kernel_per_chat
+
+        self.session: Optional[aiohttp.ClientSession] = None
         self.params = {}
-        self.result = ResultModel()
+        self.signed_in = False
+        self.sign_in_lock = asyncio.Lock()
 
-    async def __aenter__(self):
-        return self
+        self.idle: list[str] = []  # started (or reset) kernels ready to use
+        self.starting = 0
+        # Chat kernels by (user id, session id), a chat id alone is not
+        # checked for ownership
+        self.chats: dict[tuple[Optional[str], str], JupyterKernel] = {}
+        # Semaphores of the users with executions running or waiting
+        self.user_semaphores: dict[Optional[str], asyncio.Semaphore] = {}
+        self.user_executions: dict[Optional[str], int] = {}
+        self.last_used = time.time()
 
-    async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.kernel_id:
-            try:
-                async with self.session.delete(
-                    f"/api/kernels/{self.kernel_id}", params=self.params
+        self.tasks: set[asyncio.Task] = set()
+        self.reaper: Optional[asyncio.Task] = None
+
+    def _spawn(self, coroutine):
+        task = asyncio.create_task(coroutine)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def sign_in(self, force: bool = False) -> None:
+        async with self.sign_in_lock:
+            if self.session is None or self.session.closed:
+                self.session = aiohttp.ClientSession(base_url=self.base_url)
+                self.signed_in = False
+
+            if self.signed_in and not force:
+                return
+
+            # password authentication
+            if self.password and not self.token:
+                async with self.session.get("/login") as response:
+                    response.raise_for_status()
+                    xsrf_token = response.cookies["_xsrf"].value
+                    if not xsrf_token:
+                        raise ValueError("_xsrf token not found")
+                    self.session.cookie_jar.update_cookies(response.cookies)
+                    self.session.headers.update({"X-XSRFToken": xsrf_token})
+                async with self.session.post(
+                    "/login",
+                    data={"_xsrf": xsrf_token, "password": self.password},
+                    allow_redirects=False,
                 ) as response:
                     response.raise_for_status()
+                    self.session.cookie_jar.update_cookies(response.cookies)
+
+            # token authentication
+            if self.token:
+                self.params.update({"token": self.token})
+
+            self.signed_in = True
+
+    async def request(self, method: str, url: str) -> Optional[dict]:
+        await self.sign_in()
+        for attempt in range(2):
+            async with self.session.request(
+                method, url, params=self.params
+            ) as response:
+                if response.status in (401, 403) and attempt == 0:
+                    # The login session may have expired
+                    await self.sign_in(force=True)
+                    continue
+
+                response.raise_for_status()
+                if response.content_type == "application/json":
+                    return await response.json()
+                return None
+
+    async def start_kernel(self) -> str:
+        kernel_data = await self.request("POST", "/api/kernels")
+        return kernel_data["id"]
+
+    async def delete_kernel(self, kernel_id: str) -> None:
+        try:
+            await self.request("DELETE", f"/api/kernels/{kernel_id}")
+        except Exception as err:
+            logger.exception("close kernel failed, %s", err)
+
+    async def fill(self) -> None:
+        """Starts kernels until the pool has its configured size."""
+        while len(self.idle) + self.starting < self.size:
+            self.starting += 1
+            try:
+                self.idle.append(await self.start_kernel())
             except Exception as err:
-                logger.exception("close kernel failed, %s", err)
-        await self.session.close()
+                logger.warning("starting pooled kernel failed, %s", err)
+                return
+            finally:
+                self.starting -= 1
 
-    async def run(self) -> ResultModel:
+    async def reset_kernel(self, kernel_id: str) -> None:
         try:
-            await self.sign_in()
-            await self.init_kernel()
-            await self.execute_code()
+            await self.request("POST", f"/api/kernels/{kernel_id}/restart")
         except Exception as err:
-            logger.exception("execute code failed, %s", err)
-            self.result.stderr = f"Error: {err}"
-        return self.result
+            logger.warning("restarting kernel failed, %s", err)
+            await self.delete_kernel(kernel_id)
+            return
+        finally:
+            self.starting -= 1
 
-    async def sign_in(self) -> None:
-        # password authentication
-        if self.password and not self.token:
-            async with self.session.get("/login") as response:
-                response.raise_for_status()
-                xsrf_token = response.cookies["_xsrf"].value
-                if not xsrf_token:
-                    raise ValueError("_xsrf token not found")
-                self.session.cookie_jar.update_cookies(response.cookies)
-                self.session.headers.update({"X-XSRFToken": xsrf_token})
-            async with self.session.post(
-                "/login",
-                data={"_xsrf": xsrf_token, "password": self.password},
-                allow_redirects=False,
-            ) as response:
-                response.raise_for_status()
-                self.session.cookie_jar.update_cookies(response.cookies)
+        if len(self.idle) < self.size:
+            self.idle.append(kernel_id)
+        else:
+            await self.delete_kernel(kernel_id)
+
+    async def take_kernel(self) -> str:
+        if self.idle:
+            kernel_id = self.idle.pop()
+        else:
+            kernel_id = await self.start_kernel()
+
+        if self.size:
+            self._spawn(self.fill())
+        return kernel_id
+
+    def release_kernel(self, kernel: JupyterKernel) -> None:
+        if kernel.session_id is not None:
+            kernel.last_used = time.time()
+        elif self.size:
+            # Counted as starting until it is back in the pool
+            self.starting += 1
+            self._spawn(self.reset_kernel(kernel.id))
+        else:
+            self._spawn(self.delete_kernel(kernel.id))
+
+    def discard_kernel(self, kernel: JupyterKernel) -> None:
+        key = (kernel.user_id, kernel.session_id)
+        if kernel.session_id is not None and self.chats.get(key) is kernel:
+            del self.chats[key]
+        self._spawn(self.delete_kernel(kernel.id))
+
+    async def get_kernel(
+        self, user_id: Optional[str], session_id: Optional[str]
+    ) -> JupyterKernel:
+        if not (self.kernel_per_chat and session_id):
+            return JupyterKernel(await self.take_kernel(), user_id)
 
-        # token authentication
-        if self.token:
-            self.params.update({"token": self.token})
+        kernel = self.chats.get((user_id, session_id))
+        if kernel is None:
+            kernel = JupyterKernel(await self.take_kernel(), user_id, session_id)
+            self.chats[(user_id, session_id)] = kernel
 
-    async def init_kernel(self) -> None:
-        async with self.session.post(
-            url="/api/kernels", params=self.params
-        ) as response:
-            response.raise_for_status()
-            kernel_data = await response.json()
-            self.kernel_id = kernel_data["id"]
+            # Keep at most max_kernels_per_user chat kernels per user
+            user_kernels = sorted(
+                [
+                    chat_kernel
+                    for chat_kernel in self.chats.values()
+                    if chat_kernel.user_id == user_id
+                    and chat_kernel is not kernel
+                    and not chat_kernel.lock.locked()
+                ],
+                key=lambda chat_kernel: chat_kernel.last_used,
+            )
+            for chat_kernel in user_kernels[
+                : max(0, len(user_kernels) + 1 - self.max_kernels_per_user)
+            ]:
+                self.discard_kernel(chat_kernel)
+
+        return kernel
+
+    @asynccontextmanager
+    async def user_slot(self, user_id: Optional[str]):
+        """Lets at most max_kernels_per_user executions of a user run at once."""
+        if user_id not in self.user_semaphores:
+            self.user_semaphores[user_id] = asyncio.Semaphore(self.max_kernels_per_user)
+        semaphore = self.user_semaphores[user_id]
+        self.user_executions[user_id] = self.user_executions.get(user_id, 0) + 1
+        try:
+            async with semaphore:
+                yield
+        finally:
+            self.user_executions[user_id] -= 1
+            if not self.user_executions[user_id]:
+                # Forget users without executions, nothing waits on it
+                del self.user_executions[user_id]
+                del self.user_semaphores[user_id]
+
+    async def evict_idle(self) -> None:
+        now = time.time()
 
-    def init_ws(self) -> (str, dict):
+        for kernel in list(self.chats.values()):
+            if now - kernel.last_used > self.idle_timeout and not kernel.lock.locked():
+                self.discard_kernel(kernel)
+
+        if now - self.last_used > self.idle_timeout:
+            idle, self.idle = self.idle, []
+            for kernel_id in idle:
+                await self.delete_kernel(kernel_id)
+
+    async def evict_idle_kernels(self) -> None:
+        while True:
+            await asyncio.sleep(max(1, min(60, self.idle_timeout)))
+            await self.evict_idle()
+
+    async def execute(
+        self,
+        code: str,
+        timeout: int = 60,
+        user_id: Optional[str] = None,
+        session_id: Optional[str] = None,
+    ) -> ResultModel:
+        if self.reaper is None:
+            self.reaper = asyncio.create_task(self.evict_idle_kernels())
+        self.last_used = time.time()
+
+        async with self.user_slot(user_id):
+            for attempt in range(2):
+                kernel = await self.get_kernel(user_id, session_id)
+                async with kernel.lock:
+                    try:
+                        websocket_url, ws_headers = self.get_websocket_args(kernel.id)
+                        websocket = await websockets.connect(
+                            websocket_url, additional_headers=ws_headers
+                        )
+                    except websockets.exceptions.InvalidHandshake:
+                        # The kernel is gone (culled, or the server restarted),
+                        # so the pooled ones likely are too. Retry on a new one.
+                        self.discard_kernel(kernel)
+                        idle, self.idle = self.idle, []
+                        for kernel_id in idle:
+                            self._spawn(self.delete_kernel(kernel_id))
+                        if attempt:
+                            raise
+                        continue
+
+                    try:
+                        async with websocket:
+                            result = await execute_in_jupyter(websocket, code, timeout)
+                    except Exception:
+                        self.discard_kernel(kernel)
+                        raise
+
+                    if kernel.session_id is not None and result.stderr.endswith(
+                        "Execution timed out."
+                    ):
+                        # Stop the code still running in the chat's kernel
+                        self._spawn(
+                            self.request("POST", f"/api/kernels/{kernel.id}/interrupt")
+                        )
+
+                    self.release_kernel(kernel)
+                    return result
+
+    def get_websocket_args(self, kernel_id: str) -> tuple[str, dict]:
         ws_base = self.base_url.replace("http", "ws")
         ws_params = "?" + "&".join([f"{key}={val}" for key, val in self.params.items()])
-        websocket_url = f"{ws_base}/api/kernels/{self.kernel_id}/channels{ws_params if len(ws_params) > 1 else ''}"
+        websocket_url = f"{ws_base}/api/kernels/{kernel_id}/channels{ws_params if len(ws_params) > 1 else ''}"
         ws_headers = {}
         if self.password and not self.token:
             ws_headers = {
@@ -125,86 +342,125 @@ class JupyterCodeExecuter:
             }
         return websocket_url, ws_headers
 
-    async def execute_code(self) -> None:
-        # initialize ws
-        websocket_url, ws_headers = self.init_ws()
-        # execute
-        async with websockets.connect(
-            websocket_url, additional_headers=ws_headers
-        ) as ws:
-            await self.execute_in_jupyter(ws)
-
-    async def execute_in_jupyter(self, ws) -> None:
-        # send message
-        msg_id = uuid.uuid4().hex
-        await ws.send(
-            json.dumps(
-                {
-                    "header": {
-                        "msg_id": msg_id,
-                        "msg_type": "execute_request",
-                        "username": "user",
-                        "session": uuid.uuid4().hex,
-                        "date": "",
-                        "version": "5.3",
-                    },
-                    "parent_header": {},
-                    "metadata": {},
-                    "content": {
-                        "code": self.code,
-                        "silent": False,
-                        "store_history": True,
-                        "user_expressions": {},
-                        "allow_stdin": False,
-                        "stop_on_error": True,
-                    },
-                    "channel": "shell",
-                }
-            )
+    async def close(self) -> None:
+        if self.reaper is not None:
+            self.reaper.cancel()
+            self.reaper = None
+        for task in list(self.tasks):
+            task.cancel()
+
+        kernel_ids = self.idle + [kernel.id for kernel in self.chats.values()]
+        self.idle = []
+        self.chats = {}
+        if self.session is not None and not self.session.closed:
+            for kernel_id in kernel_ids:
+                await self.delete_kernel(kernel_id)
+            await self.session.close()
+
+
+async def execute_in_jupyter(ws, code: str, timeout: int = 60) -> ResultModel:
+    # send message
+    msg_id = uuid.uuid4().hex
+    await ws.send(
+        json.dumps(
+            {
+                "header": {
+                    "msg_id": msg_id,
+                    "msg_type": "execute_request",
+                    "username": "user",
+                    "session": uuid.uuid4().hex,
+                    "date": "",
+                    "version": "5.3",
+                },
+                "parent_header": {},
+                "metadata": {},
+                "content": {
+                    "code": code,
+                    "silent": False,
+                    "store_history": True,
+                    "user_expressions": {},
+                    "allow_stdin": False,
+                    "stop_on_error": True,
+                },
+                "channel": "shell",
+            }
         )
-        # parse message
-        stdout, stderr, result = "", "", []
-        while True:
-            try:
-                # wait for message
-                message = await asyncio.wait_for(ws.recv(), self.timeout)
-                message_data = json.loads(message)
-                # msg id not match, skip
-                if message_data.get("parent_header", {}).get("msg_id") != msg_id:
-                    continue
-                # check message type
-                msg_type = message_data.get("msg_type")
-                match msg_type:
-                    case "stream":
-                        if message_data["content"]["name"] == "stdout":
-                            stdout += message_data["content"]["text"]
-                        elif message_data["content"]["name"] == "stderr":
-                            stderr += message_data["content"]["text"]
-                    case "execute_result" | "display_data":
-                        data = message_data["content"]["data"]
-                        if "image/png" in data:
-                            result.append(f"data:image/png;base64,{data['image/png']}")
-                        elif "text/plain" in data:
-                            result.append(data["text/plain"])
-                    case "error":
-                        stderr += "\n".join(message_data["content"]["traceback"])
-                    case "status":
-                        if message_data["content"]["execution_state"] == "idle":
-                            break
-
-            except asyncio.TimeoutError:
-                stderr += "\nExecution timed out."
-                break
-        self.result.stdout = stdout.strip()
-        self.result.stderr = stderr.strip()
-        self.result.result = "\n".join(result).strip() if result else ""
+    )
+    # parse message
+    stdout, stderr, result = "", "", []
+    while True:
+        try:
+            # wait for message
+            message = await asyncio.wait_for(ws.recv(), timeout)
+            message_data = json.loads(message)
+            # msg id not match, skip
+            if message_data.get("parent_header", {}).get("msg_id") != msg_id:
+                continue
+            # check message type
+            msg_type = message_data.get("msg_type")
+            match msg_type:
+                case "stream":
+                    if message_data["content"]["name"] == "stdout":
+                        stdout += message_data["content"]["text"]
+                    elif message_data["content"]["name"] == "stderr":
+                        stderr += message_data["content"]["text"]
+                case "execute_result" | "display_data":
+                    data = message_data["content"]["data"]
+                    if "image/png" in data:
+                        result.append(f"data:image/png;base64,{data['image/png']}")
+                    elif "text/plain" in data:
+                        result.append(data["text/plain"])
+                case "error":
+                    stderr += "\n".join(message_data["content"]["traceback"])
+                case "status":
+                    if message_data["content"]["execution_state"] == "idle":
+                        break
+
+        except asyncio.TimeoutError:
+            stderr += "\nExecution timed out."
+            break
+
+    return ResultModel(
+        stdout=stdout.strip(),
+        stderr=stderr.strip(),
+        result="\n".join(result).strip() if result else "",
+    )
+
+
+kernel_pools: dict[tuple[str, str, str], JupyterKernelPool] = {}
+
+
+def get_kernel_pool(base_url: str, token: str = "", password: str = ""):
+    key = (base_url.rstrip("/"), token or "", password or "")
+    if key not in kernel_pools:
+        kernel_pools[key] = JupyterKernelPool(*key)
+    return kernel_pools[key]
+
+
+async def close_kernel_pools() -> None:
+    for pool in list(kernel_pools.values()):
+        await pool.close()
+    kernel_pools.clear()
 
 
 async def execute_code_jupyter(
-    base_url: str, code: str, token: str = "", password: str = "", timeout: int = 60
+    base_url: str,
+    code: str,
+    token: str = "",
+    password: str = "",
+    timeout: int = 60,
+    user_id: Optional[str] = None,
+    session_id: Optional[str] = None,
 ) -> dict:
-    async with JupyterCodeExecuter(
-        base_url, code, token, password, timeout
-    ) as executor:
-        result = await executor.run()
-        return result.model_dump()
+    """
+    :param session_id: Executions sharing a session id (e.g. a chat id) share
+        the kernel state, if ENABLE_JUPYTER_KERNEL_PER_CHAT is set
+    """
+    try:
+        result = await get_kernel_pool(base_url, token, password).execute(
+            code, timeout, user_id=user_id, session_id=session_id
+        )
+    except Exception as err:
+        logger.exception("execute code failed, %s", err)
+        result = ResultModel(stderr=f"Error: {err}")
+    return result.model_dump()
@@ -0,0 +1,150 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
+
+from open_webui.env import (
+    AUTH_EXECUTOR_WORKERS,
+    INGESTION_EXECUTOR_WORKERS,
+    MEDIA_EXECUTOR_WORKERS,
+    RAG_EXECUTOR_WORKERS,
+    RAG_QUERY_EXECUTOR_WORKERS,
+    SRC_LOG_LEVELS,
+    WEB_EXECUTOR_WORKERS,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+class BoundedExecutor:
+    """
+    Named thread pool of at most `max_workers` threads for one kind of blocking
+    work, so a burst of it waits for its own threads instead of starving the
+    event loop or the thread pool the other kinds run in. Keeps count of the
+    calls waiting for a thread and of the ones running.
+    """
+
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+        self.queued = 0
+        self.active = 0
+        self.completed = 0
+        self.failed = 0
+
+    def start(self):
+        with self.lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix=self.name
+                )
+
+    def shutdown(self, wait: bool = False):
+        with self.lock:
+            executor, self.executor = self.executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def call(self, func, args, kwargs):
+        with self.lock:
+            self.queued -= 1
+            self.active += 1
+        self.local.running = True
+        try:
+            result = func(*args, **kwargs)
+        except BaseException:
+            with self.lock:
+                self.failed += 1
+            raise
+        finally:
+            self.local.running = False
+            with self.lock:
+                self.active -= 1
+        with self.lock:
+            self.completed += 1
+        return result
+
+    def on_done(self, future: Future):
+        # Calls cancelled before they got a thread never run `call`
+        if future.cancelled():
+            with self.lock:
+                self.queued -= 1
+
+    def submit(self, func, *args, **kwargs) -> Future:
+        if getattr(self.local, "running", False):
+            # Called from one of our own threads: waiting for another one could
+            # deadlock once they are all taken, so run it right here instead
+            future = Future()
+            try:
+                future.set_result(func(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+            return future
+
+        self.start()
+        with self.lock:
+            self.queued += 1
+        try:
+            future = self.executor.submit(self.call, func, args, kwargs)
+        except BaseException:
+            with self.lock:
+                self.queued -= 1
+            raise
+        future.add_done_callback(self.on_done)
+        return future
+
+    async def run(self, func, *args, **kwargs):
+        return await asyncio.wrap_future(self.submit(func, *args, **kwargs))
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            return {
+                "max_workers": self.max_workers,
+                "queued": self.queued,
+                "active": self.active,
+                "completed": self.completed,
+                "failed": self.failed,
+            }
+
+
+# Retrieval for chat turns, e.g. get_sources_from_files
+RAG_EXECUTOR = BoundedExecutor("rag", RAG_EXECUTOR_WORKERS)
+# Per collection queries of a hybrid search, fanned out from the RAG executor
+RAG_QUERY_EXECUTOR = BoundedExecutor("rag-query", RAG_QUERY_EXECUTOR_WORKERS)
+# Uploads, file extraction and embedding
+INGESTION_EXECUTOR = BoundedExecutor("ingestion", INGESTION_EXECUTOR_WORKERS)
+# Parsing and caching of fetched web pages, for web search in chat turns
+WEB_EXECUTOR = BoundedExecutor("web", WEB_EXECUTOR_WORKERS)
+# Audio transcription chunks and image decoding
+MEDIA_EXECUTOR = BoundedExecutor("media", MEDIA_EXECUTOR_WORKERS)
+# Password hashing and LDAP binds
+AUTH_EXECUTOR = BoundedExecutor("auth", AUTH_EXECUTOR_WORKERS)
+
+EXECUTORS = [
+    RAG_EXECUTOR,
+    RAG_QUERY_EXECUTOR,
+    INGESTION_EXECUTOR,
+    WEB_EXECUTOR,
+    MEDIA_EXECUTOR,
+    AUTH_EXECUTOR,
+]
+
+
+def start_executors():
+    for executor in EXECUTORS:
+        executor.start()
+
+
+def shutdown_executors():
+    for executor in EXECUTORS:
+        executor.shutdown()
+
+
+def get_executors_stats() -> dict:
+    return {executor.name: executor.get_stats() for executor in EXECUTORS}
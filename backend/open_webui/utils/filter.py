@@ -32,6 +32,23 @@ def get_sorted_filter_ids(model: dict):
     return filter_ids
 
 
+def get_filter_function_module(request, filter_id: str):
+    if filter_id in request.app.state.FUNCTIONS:
+        return request.app.state.FUNCTIONS[filter_id]
+
+    function_module, _, _ = load_function_module_by_id(filter_id)
+    request.app.state.FUNCTIONS[filter_id] = function_module
+    return function_module
+
+
+def has_filter_handler(request, filter_functions, filter_type: str) -> bool:
+    return any(
+        function
+        and hasattr(get_filter_function_module(request, function.id), filter_type)
+        for function in filter_functions
+    )
+
+
 async def process_filter_functions(
     request, filter_functions, filter_type, form_data, extra_params
 ):
@@ -43,11 +60,7 @@ async def process_filter_functions(
         if not filter:
             continue
 
-        if filter_id in request.app.state.FUNCTIONS:
-            function_module = request.app.state.FUNCTIONS[filter_id]
-        else:
-            function_module, _, _ = load_function_module_by_id(filter_id)
-            request.app.state.FUNCTIONS[filter_id] = function_module
+        function_module = get_filter_function_module(request, filter_id)
 
         # Prepare handler function
         handler = getattr(function_module, filter_type, None)
@@ -3,11 +3,12 @@ import json
 import logging
 import random
 import urllib.parse
-import urllib.request
-from typing import Optional
+import uuid
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional
 
-import websocket  # NOTE: websocket-client (https://github.com/websocket-client/websocket-client)
-from open_webui.env import SRC_LOG_LEVELS
+import aiohttp
+from open_webui.env import SRC_LOG_LEVELS, AIOHTTP_CLIENT_TIMEOUT
 from pydantic import BaseModel
 
 log = logging.getLogger(__name__)
@@ -15,80 +16,216 @@ log.setLevel(SRC_LOG_LEVELS["COMFYUI"])
 
 default_headers = {"User-Agent": "Mozilla/5.0"}
 
-
-def queue_prompt(prompt, client_id, base_url, api_key):
-    log.info("queue_prompt")
-    p = {"prompt": prompt, "client_id": client_id}
-    data = json.dumps(p).encode("utf-8")
-    log.debug(f"queue_prompt data: {data}")
-    try:
-        req = urllib.request.Request(
-            f"{base_url}/prompt",
-            data=data,
-            headers={**default_headers, "Authorization": f"Bearer {api_key}"},
-        )
-        response = urllib.request.urlopen(req).read()
-        return json.loads(response)
-    except Exception as e:
-        log.exception(f"Error while queuing prompt: {e}")
-        raise e
-
-
-def get_image(filename, subfolder, folder_type, base_url, api_key):
-    log.info("get_image")
-    data = {"filename": filename, "subfolder": subfolder, "type": folder_type}
-    url_values = urllib.parse.urlencode(data)
-    req = urllib.request.Request(
-        f"{base_url}/view?{url_values}",
-        headers={**default_headers, "Authorization": f"Bearer {api_key}"},
-    )
-    with urllib.request.urlopen(req) as response:
-        return response.read()
+# Seconds between history checks, in case a websocket message got lost
+HISTORY_POLL_INTERVAL = 5
 
 
 def get_image_url(filename, subfolder, folder_type, base_url):
-    log.info("get_image")
     data = {"filename": filename, "subfolder": subfolder, "type": folder_type}
     url_values = urllib.parse.urlencode(data)
     return f"{base_url}/view?{url_values}"
 
 
-def get_history(prompt_id, base_url, api_key):
-    log.info("get_history")
+class ComfyUIClient:
+    """
+    Async client for a ComfyUI server. Keeps one HTTP session and one
+    websocket open, execution events for all prompts queued through the
+    client arrive on that websocket and are routed by prompt id.
+    """
 
-    req = urllib.request.Request(
-        f"{base_url}/history/{prompt_id}",
-        headers={**default_headers, "Authorization": f"Bearer {api_key}"},
-    )
-    with urllib.request.urlopen(req) as response:
-        return json.loads(response.read())
-
-
-def get_images(ws, prompt, client_id, base_url, api_key):
-    prompt_id = queue_prompt(prompt, client_id, base_url, api_key)["prompt_id"]
-    output_images = []
-    while True:
-        out = ws.recv()
-        if isinstance(out, str):
-            message = json.loads(out)
-            if message["type"] == "executing":
-                data = message["data"]
-                if data["node"] is None and data["prompt_id"] == prompt_id:
-                    break  # Execution is done
+    def __init__(self, base_url: str, api_key: str = ""):
+        self.base_url = base_url
+        self.ws_url = base_url.replace("http://", "ws://").replace("https://", "wss://")
+        self.headers = {**default_headers}
+        if api_key:
+            self.headers["Authorization"] = f"Bearer {api_key}"
+
+        self.client_id = str(uuid.uuid4())
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.ws: Optional[aiohttp.ClientWebSocketResponse] = None
+        self.reader: Optional[asyncio.Task] = None
+        self.lock = asyncio.Lock()
+
+        self.pending: dict[str, asyncio.Future] = {}
+        self.progress_callbacks: dict[str, Callable[[int, int], Awaitable]] = {}
+        # Prompts that finished before anyone waited on them
+        self.finished: OrderedDict[str, Optional[str]] = OrderedDict()
+
+    def get_session(self) -> aiohttp.ClientSession:
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                headers=self.headers,
+                trust_env=True,
+                timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT),
+            )
+        return self.session
+
+    async def connect(self):
+        async with self.lock:
+            if self.ws is not None and not self.ws.closed:
+                return
+
+            self.ws = await self.get_session().ws_connect(
+                f"{self.ws_url}/ws?clientId={self.client_id}", heartbeat=30
+            )
+            self.reader = asyncio.create_task(self.read_messages(self.ws))
+            log.info("WebSocket connection established.")
+
+    async def read_messages(self, ws: aiohttp.ClientWebSocketResponse):
+        try:
+            async for msg in ws:
+                # Binary messages are previews
+                if msg.type == aiohttp.WSMsgType.TEXT:
+                    await self.handle_message(json.loads(msg.data))
+                elif msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                    break
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            log.warning(f"ComfyUI websocket failed: {e}")
+        finally:
+            # Waiting prompts fall back to polling the history until reconnected
+            log.info("WebSocket connection closed.")
+
+    async def handle_message(self, message: dict):
+        data = message.get("data") or {}
+        prompt_id = data.get("prompt_id")
+        if not prompt_id:
+            return
+
+        message_type = message.get("type")
+        if message_type == "progress":
+            if callback := self.progress_callbacks.get(prompt_id):
+                try:
+                    await callback(data.get("value", 0), data.get("max", 0))
+                except Exception as e:
+                    log.debug(f"Progress callback failed: {e}")
+        elif (message_type == "executing" and data.get("node") is None) or (
+            message_type == "execution_success"
+        ):
+            self.set_finished(prompt_id)
+        elif message_type == "execution_error":
+            self.set_finished(
+                prompt_id, data.get("exception_message") or "Execution failed"
+            )
+
+    def set_finished(self, prompt_id: str, error: Optional[str] = None):
+        future = self.pending.get(prompt_id)
+        if future is None:
+            self.finished[prompt_id] = error
+            while len(self.finished) > 100:
+                self.finished.popitem(last=False)
+        elif not future.done():
+            future.set_result(error)
+
+    async def queue_prompt(self, prompt: dict) -> str:
+        log.info("queue_prompt")
+        log.debug(f"queue_prompt data: {prompt}")
+        async with self.get_session().post(
+            f"{self.base_url}/prompt",
+            json={"prompt": prompt, "client_id": self.client_id},
+        ) as r:
+            r.raise_for_status()
+            res = await r.json(content_type=None)
+        return res["prompt_id"]
+
+    async def get_history(self, prompt_id: str) -> dict:
+        log.info("get_history")
+        async with self.get_session().get(f"{self.base_url}/history/{prompt_id}") as r:
+            r.raise_for_status()
+            return await r.json(content_type=None)
+
+    async def get_image(self, url: str) -> Optional[tuple[bytes, str]]:
+        """Downloads an output image, returns its data and content type."""
+        try:
+            async with self.get_session().get(url) as r:
+                r.raise_for_status()
+                content_type = r.headers.get("content-type", "")
+                if content_type.split("/")[0] != "image":
+                    log.error("Url does not point to an image.")
+                    return None
+                return await r.read(), content_type
+        except Exception as e:
+            log.exception(f"Error downloading image: {e}")
+            return None
+
+    async def wait_for_prompt(self, prompt_id: str) -> dict:
+        """Waits for the prompt to finish and returns its history entry."""
+        if prompt_id in self.finished:
+            error = self.finished.pop(prompt_id)
         else:
-            continue  # previews are binary data
-
-    history = get_history(prompt_id, base_url, api_key)[prompt_id]
-    for o in history["outputs"]:
-        for node_id in history["outputs"]:
-            node_output = history["outputs"][node_id]
-            if "images" in node_output:
-                for image in node_output["images"]:
-                    url = get_image_url(
-                        image["filename"], image["subfolder"], image["type"], base_url
-                    )
-                    output_images.append({"url": url})
-    return {"data": output_images}
+            future = asyncio.get_running_loop().create_future()
+            self.pending[prompt_id] = future
+            try:
+                while True:
+                    try:
+                        error = await asyncio.wait_for(
+                            asyncio.shield(future), HISTORY_POLL_INTERVAL
+                        )
+                        break
+                    except asyncio.TimeoutError:
+                        if prompt_id in await self.get_history(prompt_id):
+                            error = None
+                            break
+            finally:
+                self.pending.pop(prompt_id, None)
+
+        if error:
+            raise Exception(f"ComfyUI: {error}")
+
+        history = await self.get_history(prompt_id)
+        return history[prompt_id]
+
+    async def get_images(
+        self,
+        prompt: dict,
+        on_progress: Optional[Callable[[int, int], Awaitable]] = None,
+    ) -> list[dict]:
+        await self.connect()
+        prompt_id = await self.queue_prompt(prompt)
+        if on_progress:
+            self.progress_callbacks[prompt_id] = on_progress
+
+        try:
+            history = await self.wait_for_prompt(prompt_id)
+        finally:
+            self.progress_callbacks.pop(prompt_id, None)
+
+        output_images = []
+        for node_output in history["outputs"].values():
+            for image in node_output.get("images", []):
+                url = get_image_url(
+                    image["filename"], image["subfolder"], image["type"], self.base_url
+                )
+                output_images.append({"url": url})
+        return output_images
+
+    async def close(self):
+        if self.reader is not None:
+            self.reader.cancel()
+        if self.ws is not None:
+            await self.ws.close()
+        if self.session is not None:
+            await self.session.close()
+
+
+comfyui_clients: dict[tuple[str, str], ComfyUIClient] = {}
+
+
+def get_comfyui_client(base_url: str, api_key: str = "") -> ComfyUIClient:
+    key = (base_url, api_key or "")
+    if key not in comfyui_clients:
+        comfyui_clients[key] = ComfyUIClient(base_url, api_key)
+    return comfyui_clients[key]
+
+
+async def close_comfyui_clients():
+    for client in list(comfyui_clients.values()):
+        try:
+            await client.close()
+        except Exception as e:
+            log.debug(f"Error closing ComfyUI client: {e}")
+    comfyui_clients.clear()
 
 
 class ComfyUINodeInput(BaseModel):
@@ -116,10 +253,9 @@ class ComfyUIGenerateImageForm(BaseModel):
     seed: Optional[int] = None
 
 
-async def comfyui_generate_image(
-    model: str, payload: ComfyUIGenerateImageForm, client_id, base_url, api_key
-):
-    ws_url = base_url.replace("http://", "ws://").replace("https://", "wss://")
+def build_workflow(
+    model: str, payload: ComfyUIGenerateImageForm, seed: Optional[int] = None
+) -> dict:
     workflow = json.loads(payload.workflow.workflow)
 
     for node in payload.workflow.nodes:
@@ -158,36 +294,86 @@ async def comfyui_generate_image(
                         node.key if node.key else "steps"
                     ] = payload.steps
             elif node.type == "seed":
-                seed = (
-                    payload.seed
-                    if payload.seed
-                    else random.randint(0, 1125899906842624)
-                )
+                if seed is None:
+                    seed = (
+                        payload.seed
+                        if payload.seed
+                        else random.randint(0, 1125899906842624)
+                    )
                 for node_id in node.node_ids:
                     workflow[node_id]["inputs"][node.key] = seed
         else:
             for node_id in node.node_ids:
                 workflow[node_id]["inputs"][node.key] = node.value
 
-    try:
-        ws = websocket.WebSocket()
-        headers = {"Authorization": f"Bearer {api_key}"}
-        ws.connect(f"{ws_url}/ws?clientId={client_id}", header=headers)
-        log.info("WebSocket connection established.")
-    except Exception as e:
-        log.exception(f"Failed to connect to WebSocket server: {e}")
-        return None
+    return workflow
+
+
+async def comfyui_generate_image(
+    model: str,
+    payload: ComfyUIGenerateImageForm,
+    base_url: str,
+    api_key: str,
+    event_emitter: Optional[Callable[[dict], Awaitable]] = None,
+):
+    client = get_comfyui_client(base_url, api_key)
+
+    # Without a batch size node each image is its own prompt, queued together
+    has_batch_node = any(
+        node.type == "n" and node.node_ids for node in payload.workflow.nodes
+    )
+    if has_batch_node or payload.n <= 1:
+        workflows = [build_workflow(model, payload)]
+    else:
+        workflows = [
+            build_workflow(
+                model,
+                payload,
+                (
+                    payload.seed + idx
+                    if payload.seed
+                    else random.randint(0, 1125899906842624)
+                ),
+            )
+            for idx in range(payload.n)
+        ]
+
+    progress = [0.0] * len(workflows)
+    last_percentage = -1
+
+    def get_progress_callback(idx):
+        async def on_progress(value, maximum):
+            nonlocal last_percentage
+            progress[idx] = value / maximum if maximum else 0
+            percentage = int(100 * sum(progress) / len(progress))
+            if percentage != last_percentage:
+                last_percentage = percentage
+                await event_emitter(
+                    {
+                        "type": "status",
+                        "data": {
+                            "description": f"Generating an image ({percentage}%)",
+                            "done": False,
+                        },
+                    }
+                )
+
+        return on_progress
 
     try:
-        log.info("Sending workflow to WebSocket server.")
-        log.info(f"Workflow: {workflow}")
-        images = await asyncio.to_thread(
-            get_images, ws, workflow, client_id, base_url, api_key
+        log.info("Sending workflow to ComfyUI server.")
+        log.debug(f"Workflows: {workflows}")
+        results = await asyncio.gather(
+            *[
+                client.get_images(
+                    workflow,
+                    get_progress_callback(idx) if event_emitter else None,
+                )
+                for idx, workflow in enumerate(workflows)
+            ]
         )
     except Exception as e:
         log.exception(f"Error while receiving images: {e}")
-        images = None
-
-    ws.close()
+        return None
 
-    return images
+    return {"data": [image for images in results for image in images]}
@@ -0,0 +1,100 @@
+import logging
+import threading
+from typing import Optional
+
+from ldap3 import Server, Connection
+from ldap3.core.exceptions import LDAPException
+
+from open_webui.env import SRC_LOG_LEVELS, LDAP_POOL_SIZE
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+class LdapConnectionPool:
+    """
+    Keeps bound application (service account) connections around, so a sign in
+    only pays the user bind instead of a service bind and a user bind.
+    Connections are dropped when the LDAP settings change.
+    """
+
+    def __init__(self, size: int = LDAP_POOL_SIZE):
+        self.size = size
+        self.lock = threading.Lock()
+        self.key: Optional[tuple] = None
+        self.idle: list[Connection] = []
+
+    def _acquire(self, key: tuple) -> Optional[Connection]:
+        with self.lock:
+            if key != self.key:
+                idle, self.idle, self.key = self.idle, [], key
+            else:
+                idle = []
+                if self.idle:
+                    return self.idle.pop()
+
+        for connection in idle:
+            self._close(connection)
+        return None
+
+    def _release(self, key: tuple, connection: Connection):
+        with self.lock:
+            if key == self.key and connection.bound and len(self.idle) < self.size:
+                self.idle.append(connection)
+                return
+        self._close(connection)
+
+    @staticmethod
+    def _close(connection: Connection):
+        try:
+            connection.unbind()
+        except Exception:
+            pass
+
+    def search(
+        self,
+        server: Server,
+        app_dn: Optional[str],
+        app_password: Optional[str],
+        key: tuple,
+        **kwargs,
+    ) -> tuple[bool, list]:
+        """
+        Runs a search on a pooled application connection. Returns whether the
+        search succeeded and its entries. Raises ValueError if the bind fails.
+        """
+        connection = self._acquire(key)
+        if connection is not None:
+            try:
+                success = connection.search(**kwargs)
+                entries = list(connection.entries)
+                self._release(key, connection)
+                return success, entries
+            except LDAPException as e:
+                # The server may have dropped an idle connection, retry on a new one
+                log.debug(f"Discarding stale LDAP connection: {e}")
+                self._close(connection)
+
+        connection = Connection(
+            server,
+            app_dn,
+            app_password,
+            auto_bind="NONE",
+            authentication="SIMPLE" if app_dn else "ANONYMOUS",
+        )
+        if not connection.bind():
+            self._close(connection)
+            raise ValueError("Application account bind failed")
+
+        try:
+            success = connection.search(**kwargs)
+            entries = list(connection.entries)
+        except Exception:
+            self._close(connection)
+            raise
+
+        self._release(key, connection)
+        return success, entries
+
+
+ldap_connection_pool = LdapConnectionPool()
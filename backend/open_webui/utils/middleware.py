@@ -15,7 +15,6 @@ import re
 import ast
 
 from uuid import uuid4
-from concurrent.futures import ThreadPoolExecutor
 
 
 from fastapi import Request, HTTPException
@@ -34,9 +33,10 @@ from open_webui.routers.tasks import (
     generate_title,
     generate_image_prompt,
     generate_chat_tags,
+    generate_combined_tasks,
 )
-from open_webui.routers.retrieval import process_web_search, SearchForm
-from open_webui.routers.images import image_generations, GenerateImageForm
+from open_webui.routers.retrieval import search_and_index_web, SearchForm
+from open_webui.routers.images import generate_images, GenerateImageForm
 from open_webui.routers.pipelines import (
     process_pipeline_inlet_filter,
     process_pipeline_outlet_filter,
@@ -50,6 +50,10 @@ from open_webui.models.functions import Functions
 from open_webui.models.models import Models
 
 from open_webui.retrieval.utils import get_sources_from_files
+from open_webui.retrieval.vector.memory import (
+    EPHEMERAL_COLLECTION_PREFIX,
+    MEMORY_VECTOR_DB_CLIENT,
+)
 
 
 from open_webui.utils.chat import generate_chat_completion
@@ -68,13 +72,15 @@ from open_webui.utils.misc import (
     prepend_to_first_user_message_content,
     convert_logit_bias_input_to_json,
 )
-from open_webui.utils.tools import get_tools
+from open_webui.utils.tools import get_tools, execute_tool_calls
 from open_webui.utils.plugin import load_function_module_by_id
 from open_webui.utils.filter import (
     get_sorted_filter_ids,
+    has_filter_handler,
     process_filter_functions,
 )
 from open_webui.utils.code_interpreter import execute_code_jupyter
+from open_webui.utils.executors import RAG_EXECUTOR
 
 from open_webui.tasks import create_task
 
@@ -88,6 +94,7 @@ from open_webui.env import (
     GLOBAL_LOG_LEVEL,
     BYPASS_MODEL_ACCESS_CONTROL,
     ENABLE_REALTIME_CHAT_SAVE,
+    ENABLE_STREAM_FAST_PATH,
 )
 from open_webui.constants import TASKS
 
@@ -97,6 +104,77 @@ log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MAIN"])
 
 
+def get_combined_tasks(request: Request, form_data: dict, user) -> asyncio.Task:
+    """
+    Starts the combined title, tags and queries generation of a chat request
+    once, everything that needs any of them awaits the same task.
+    """
+    task = getattr(request.state, "combined_tasks", None)
+    if task is None:
+        # Later handlers update the messages in place, keep them as they are now
+        messages = [{**message} for message in form_data["messages"]]
+        task = asyncio.create_task(
+            generate_combined_tasks_result(
+                request,
+                {
+                    "model": form_data["model"],
+                    "messages": messages,
+                    "chat_id": form_data.get("metadata", {}).get("chat_id"),
+                },
+                user,
+            )
+        )
+        request.state.combined_tasks = task
+    return task
+
+
+async def generate_combined_tasks_result(request: Request, form_data: dict, user):
+    """Returns the valid parts of the combined tasks, an empty dict on failure."""
+    try:
+        res = await generate_combined_tasks(request, form_data, user)
+        content = res["choices"][0]["message"]["content"]
+        content = content[content.find("{") : content.rfind("}") + 1]
+        data = json.loads(content)
+    except Exception as e:
+        log.debug(f"Error generating combined tasks: {e}")
+        return {}
+
+    result = {}
+    if isinstance(data.get("title"), str):
+        result["title"] = data["title"]
+    for key in ["tags", "queries"]:
+        if isinstance(data.get(key), list):
+            result[key] = [item for item in data[key] if isinstance(item, str)]
+    return result
+
+
+def get_plain_chunk_content(data) -> Optional[str]:
+    """
+    Returns the text of a streamed chunk that carries nothing but text, None if
+    the chunk needs the full handling. Text with "<" might open a reasoning,
+    solution or code interpreter tag.
+    """
+    if not isinstance(data, dict) or "event" in data or "selected_model_id" in data:
+        return None
+
+    choices = data.get("choices")
+    if not choices:
+        return None
+
+    delta = choices[0].get("delta") or {}
+    if (
+        delta.get("tool_calls")
+        or delta.get("reasoning_content")
+        or delta.get("reasoning")
+    ):
+        return None
+
+    value = delta.get("content") or ""
+    if not isinstance(value, str) or "<" in value:
+        return None
+    return value
+
+
 async def chat_completion_tools_handler(
     request: Request, body: dict, extra_params: dict, user: UserModel, models, tools
 ) -> tuple[dict, dict]:
@@ -177,49 +255,48 @@ async def chat_completion_tools_handler(
 
             result = json.loads(content)
 
-            async def tool_call_handler(tool_call):
-                nonlocal skip_files
-
+            def get_tool_call(tool_call):
                 log.debug(f"{tool_call=}")
 
                 tool_function_name = tool_call.get("name", None)
-                if tool_function_name not in tools:
-                    return body, {}
-
                 tool_function_params = tool_call.get("parameters", {})
 
-                try:
+                async def execute_tool_call():
                     tool = tools[tool_function_name]
 
                     spec = tool.get("spec", {})
                     allowed_params = (
                         spec.get("parameters", {}).get("properties", {}).keys()
                     )
-                    tool_function_params = {
+                    params = {
                         k: v
                         for k, v in tool_function_params.items()
                         if k in allowed_params
                     }
 
                     if tool.get("direct", False):
-                        tool_result = await event_caller(
+                        return await event_caller(
                             {
                                 "type": "execute:tool",
                                 "data": {
                                     "id": str(uuid4()),
                                     "name": tool_function_name,
-                                    "params": tool_function_params,
+                                    "params": params,
                                     "server": tool.get("server", {}),
                                     "session_id": metadata.get("session_id", None),
                                 },
                             }
                         )
-                    else:
-                        tool_function = tool["callable"]
-                        tool_result = await tool_function(**tool_function_params)
 
-                except Exception as e:
-                    tool_result = str(e)
+                    tool_function = tool["callable"]
+                    return await tool_function(**params)
+
+                return execute_tool_call
+
+            def tool_result_handler(tool_call, tool_result):
+                nonlocal skip_files
+
+                tool_function_name = tool_call.get("name", None)
 
                 tool_result_files = []
                 if isinstance(tool_result, list):
@@ -269,11 +346,18 @@ async def chat_completion_tools_handler(
                         skip_files = True
 
             # check if "tool_calls" in result
-            if result.get("tool_calls"):
-                for tool_call in result.get("tool_calls"):
-                    await tool_call_handler(tool_call)
-            else:
-                await tool_call_handler(result)
+            tool_calls = [
+                tool_call
+                for tool_call in (result.get("tool_calls") or [result])
+                if tool_call.get("name", None) in tools
+            ]
+
+            # Execute concurrently, then apply the results in call order
+            tool_results = await execute_tool_calls(
+                [get_tool_call(tool_call) for tool_call in tool_calls]
+            )
+            for tool_call, tool_result in zip(tool_calls, tool_results):
+                tool_result_handler(tool_call, tool_result)
 
         except Exception as e:
             log.debug(f"Error: {e}")
@@ -309,36 +393,46 @@ async def chat_web_search_handler(
     user_message = get_last_user_message(messages)
 
     queries = []
-    try:
-        res = await generate_queries(
-            request,
-            {
-                "model": form_data["model"],
-                "messages": messages,
-                "prompt": user_message,
-                "type": "web_search",
-            },
-            user,
-        )
-
-        response = res["choices"][0]["message"]["content"]
+    combined_tasks = {}
+    if (
+        request.app.state.config.ENABLE_COMBINED_TASK_GENERATION
+        and request.app.state.config.ENABLE_SEARCH_QUERY_GENERATION
+    ):
+        combined_tasks = await get_combined_tasks(request, form_data, user)
 
+    if "queries" in combined_tasks:
+        queries = combined_tasks["queries"]
+    else:
         try:
-            bracket_start = response.find("{")
-            bracket_end = response.rfind("}") + 1
+            res = await generate_queries(
+                request,
+                {
+                    "model": form_data["model"],
+                    "messages": messages,
+                    "prompt": user_message,
+                    "type": "web_search",
+                },
+                user,
+            )
 
-            if bracket_start == -1 or bracket_end == -1:
-                raise Exception("No JSON object found in the response")
+            response = res["choices"][0]["message"]["content"]
 
-            response = response[bracket_start:bracket_end]
-            queries = json.loads(response)
-            queries = queries.get("queries", [])
-        except Exception as e:
-            queries = [response]
+            try:
+                bracket_start = response.find("{")
+                bracket_end = response.rfind("}") + 1
 
-    except Exception as e:
-        log.exception(e)
-        queries = [user_message]
+                if bracket_start == -1 or bracket_end == -1:
+                    raise Exception("No JSON object found in the response")
+
+                response = response[bracket_start:bracket_end]
+                queries = json.loads(response)
+                queries = queries.get("queries", [])
+            except Exception as e:
+                queries = [response]
+
+        except Exception as e:
+            log.exception(e)
+            queries = [user_message]
 
     if len(queries) == 0:
         await event_emitter(
@@ -368,75 +462,75 @@ async def chat_web_search_handler(
             }
         )
 
-        try:
-            results = await process_web_search(
-                request,
-                SearchForm(
-                    **{
-                        "query": searchQuery,
-                    }
-                ),
-                user=user,
-            )
+    # One search for all the queries, they run concurrently and share page loads
+    searchQuery = ", ".join(queries)
+    try:
+        results = await search_and_index_web(
+            request,
+            SearchForm(
+                **{
+                    "queries": queries,
+                }
+            ),
+            user=user,
+            ephemeral=True,
+        )
 
-            if results:
-                all_results.append(results)
-                files = form_data.get("files", [])
+        if results:
+            all_results.append(results)
+            files = form_data.get("files", [])
 
-                if results.get("collection_names"):
-                    for col_idx, collection_name in enumerate(
-                        results.get("collection_names")
-                    ):
-                        files.append(
-                            {
-                                "collection_name": collection_name,
-                                "name": searchQuery,
-                                "type": "web_search",
-                                "urls": [results["filenames"][col_idx]],
-                            }
-                        )
-                elif results.get("docs"):
-                    # Invoked when bypass embedding and retrieval is set to True
-                    docs = results["docs"]
-
-                    if len(docs) == len(results["filenames"]):
-                        # the number of docs and filenames (urls) should be the same
-                        for doc_idx, doc in enumerate(docs):
-                            files.append(
-                                {
-                                    "docs": [doc],
-                                    "name": searchQuery,
-                                    "type": "web_search",
-                                    "urls": [results["filenames"][doc_idx]],
-                                }
-                            )
-                    else:
-                        # edge case when the number of docs and filenames (urls) are not the same
-                        # this should not happen, but if it does, we will just append the docs
+            if results.get("collection_name"):
+                files.append(
+                    {
+                        "collection_name": results["collection_name"],
+                        "name": searchQuery,
+                        "type": "web_search",
+                        "urls": results["filenames"],
+                    }
+                )
+            elif results.get("docs"):
+                # Invoked when bypass embedding and retrieval is set to True
+                docs = results["docs"]
+
+                if len(docs) == len(results["filenames"]):
+                    # the number of docs and filenames (urls) should be the same
+                    for doc_idx, doc in enumerate(docs):
                         files.append(
                             {
-                                "docs": results.get("docs", []),
+                                "docs": [doc],
                                 "name": searchQuery,
                                 "type": "web_search",
-                                "urls": results["filenames"],
+                                "urls": [results["filenames"][doc_idx]],
                             }
                         )
+                else:
+                    # edge case when the number of docs and filenames (urls) are not the same
+                    # this should not happen, but if it does, we will just append the docs
+                    files.append(
+                        {
+                            "docs": results.get("docs", []),
+                            "name": searchQuery,
+                            "type": "web_search",
+                            "urls": results["filenames"],
+                        }
+                    )
 
-                form_data["files"] = files
-        except Exception as e:
-            log.exception(e)
-            await event_emitter(
-                {
-                    "type": "status",
-                    "data": {
-                        "action": "web_search",
-                        "description": 'Error searching "{{searchQuery}}"',
-                        "query": searchQuery,
-                        "done": True,
-                        "error": True,
-                    },
-                }
-            )
+            form_data["files"] = files
+    except Exception as e:
+        log.exception(e)
+        await event_emitter(
+            {
+                "type": "status",
+                "data": {
+                    "action": "web_search",
+                    "description": 'Error searching "{{searchQuery}}"',
+                    "query": searchQuery,
+                    "done": True,
+                    "error": True,
+                },
+            }
+        )
 
     if all_results:
         urls = []
@@ -521,10 +615,11 @@ async def chat_image_generation_handler(
     system_message_content = ""
 
     try:
-        images = await image_generations(
+        images = await generate_images(
             request=request,
             form_data=GenerateImageForm(**{"prompt": prompt}),
             user=user,
+            event_emitter=__event_emitter__,
         )
 
         await __event_emitter__(
@@ -579,63 +674,77 @@ async def chat_completion_files_handler(
 
     if files := body.get("metadata", {}).get("files", None):
         queries = []
-        try:
-            queries_response = await generate_queries(
-                request,
-                {
-                    "model": body["model"],
-                    "messages": body["messages"],
-                    "type": "retrieval",
-                },
-                user,
-            )
-            queries_response = queries_response["choices"][0]["message"]["content"]
+        combined_tasks = {}
+        if (
+            request.app.state.config.ENABLE_COMBINED_TASK_GENERATION
+            and request.app.state.config.ENABLE_RETRIEVAL_QUERY_GENERATION
+        ):
+            combined_tasks = await get_combined_tasks(request, body, user)
 
+        if "queries" in combined_tasks:
+            queries = combined_tasks["queries"]
+        else:
             try:
-                bracket_start = queries_response.find("{")
-                bracket_end = queries_response.rfind("}") + 1
+                queries_response = await generate_queries(
+                    request,
+                    {
+                        "model": body["model"],
+                        "messages": body["messages"],
+                        "type": "retrieval",
+                    },
+                    user,
+                )
+                queries_response = queries_response["choices"][0]["message"]["content"]
 
-                if bracket_start == -1 or bracket_end == -1:
-                    raise Exception("No JSON object found in the response")
+                try:
+                    bracket_start = queries_response.find("{")
+                    bracket_end = queries_response.rfind("}") + 1
 
-                queries_response = queries_response[bracket_start:bracket_end]
-                queries_response = json.loads(queries_response)
-            except Exception as e:
-                queries_response = {"queries": [queries_response]}
+                    if bracket_start == -1 or bracket_end == -1:
+                        raise Exception("No JSON object found in the response")
 
-            queries = queries_response.get("queries", [])
-        except:
-            pass
+                    queries_response = queries_response[bracket_start:bracket_end]
+                    queries_response = json.loads(queries_response)
+                except Exception as e:
+                    queries_response = {"queries": [queries_response]}
+
+                queries = queries_response.get("queries", [])
+            except:
+                pass
 
         if len(queries) == 0:
             queries = [get_last_user_message(body["messages"])]
 
         try:
-            # Offload get_sources_from_files to a separate thread
-            loop = asyncio.get_running_loop()
-            with ThreadPoolExecutor() as executor:
-                sources = await loop.run_in_executor(
-                    executor,
-                    lambda: get_sources_from_files(
-                        request=request,
-                        files=files,
-                        queries=queries,
-                        embedding_function=lambda query, prefix: request.app.state.EMBEDDING_FUNCTION(
-                            query, prefix=prefix, user=user
-                        ),
-                        k=request.app.state.config.TOP_K,
-                        reranking_function=request.app.state.rf,
-                        k_reranker=request.app.state.config.TOP_K_RERANKER,
-                        r=request.app.state.config.RELEVANCE_THRESHOLD,
-                        hybrid_search=request.app.state.config.ENABLE_RAG_HYBRID_SEARCH,
-                        full_context=request.app.state.config.RAG_FULL_CONTEXT,
-                    ),
-                )
+            # Offload get_sources_from_files to the shared RAG threads
+            sources = await RAG_EXECUTOR.run(
+                get_sources_from_files,
+                request=request,
+                files=files,
+                queries=queries,
+                embedding_function=lambda query, prefix: request.app.state.EMBEDDING_FUNCTION(
+                    query, prefix=prefix, user=user
+                ),
+                k=request.app.state.config.TOP_K,
+                reranking_function=request.app.state.rf,
+                k_reranker=request.app.state.config.TOP_K_RERANKER,
+                r=request.app.state.config.RELEVANCE_THRESHOLD,
+                hybrid_search=request.app.state.config.ENABLE_RAG_HYBRID_SEARCH,
+                full_context=request.app.state.config.RAG_FULL_CONTEXT,
+            )
         except Exception as e:
             log.exception(e)
 
         log.debug(f"rag_contexts:sources: {sources}")
 
+        # Web search results are only indexed for this turn
+        for file in files:
+            collection_name = file.get("collection_name")
+            if collection_name and collection_name.startswith(
+                EPHEMERAL_COLLECTION_PREFIX
+            ):
+                MEMORY_VECTOR_DB_CLIENT.delete_collection(collection_name)
+
     return body, {"sources": sources}
 
 
@@ -791,6 +900,20 @@ async def process_chat_payload(request, form_data, user, metadata, model):
         raise Exception(f"Error: {e}")
 
     features = form_data.pop("features", None)
+
+    # Queries will be needed, generate them while the tools and features run
+    if request.app.state.config.ENABLE_COMBINED_TASK_GENERATION and (
+        (
+            (features or {}).get("web_search")
+            and request.app.state.config.ENABLE_SEARCH_QUERY_GENERATION
+        )
+        or (
+            form_data.get("metadata", {}).get("files")
+            and request.app.state.config.ENABLE_RETRIEVAL_QUERY_GENERATION
+        )
+    ):
+        get_combined_tasks(request, form_data, user)
+
     if features:
         if "web_search" in features and features["web_search"]:
             form_data = await chat_web_search_handler(
@@ -823,6 +946,11 @@ async def process_chat_payload(request, form_data, user, metadata, model):
         **metadata,
         "tool_ids": tool_ids,
         "files": files,
+        # Streamed chunks can be relayed as they are unless every one of them
+        # has to be saved or go through a stream filter
+        "stream_fast_path": ENABLE_STREAM_FAST_PATH
+        and not ENABLE_REALTIME_CHAT_SAVE
+        and not has_filter_handler(request, filter_functions, "stream"),
     }
     form_data["metadata"] = metadata
 
@@ -962,8 +1090,29 @@ async def process_chat_response(
             messages = get_message_list(message_map, message.get("id"))
 
             if tasks and messages:
+                combined_tasks = {}
+                if request.app.state.config.ENABLE_COMBINED_TASK_GENERATION and (
+                    tasks.get(TASKS.TITLE_GENERATION)
+                    or tasks.get(TASKS.TAGS_GENERATION)
+                ):
+                    combined_tasks = await get_combined_tasks(request, form_data, user)
+
                 if TASKS.TITLE_GENERATION in tasks:
-                    if tasks[TASKS.TITLE_GENERATION]:
+                    if tasks[TASKS.TITLE_GENERATION] and "title" in combined_tasks:
+                        if request.app.state.config.ENABLE_TITLE_GENERATION:
+                            title = combined_tasks["title"] or messages[0].get(
+                                "content", "New Chat"
+                            )
+
+                            Chats.update_chat_title_by_id(metadata["chat_id"], title)
+
+                            await event_emitter(
+                                {
+                                    "type": "chat:title",
+                                    "data": title,
+                                }
+                            )
+                    elif tasks[TASKS.TITLE_GENERATION]:
                         res = await generate_title(
                             request,
                             {
@@ -1019,32 +1168,9 @@ async def process_chat_response(
                         )
 
                 if TASKS.TAGS_GENERATION in tasks and tasks[TASKS.TAGS_GENERATION]:
-                    res = await generate_chat_tags(
-                        request,
-                        {
-                            "model": message["model"],
-                            "messages": messages,
-                            "chat_id": metadata["chat_id"],
-                        },
-                        user,
-                    )
-
-                    if res and isinstance(res, dict):
-                        if len(res.get("choices", [])) == 1:
-                            tags_string = (
-                                res.get("choices", [])[0]
-                                .get("message", {})
-                                .get("content", "")
-                            )
-                        else:
-                            tags_string = ""
-
-                        tags_string = tags_string[
-                            tags_string.find("{") : tags_string.rfind("}") + 1
-                        ]
-
-                        try:
-                            tags = json.loads(tags_string).get("tags", [])
+                    if "tags" in combined_tasks:
+                        if request.app.state.config.ENABLE_TAGS_GENERATION:
+                            tags = combined_tasks["tags"]
                             Chats.update_chat_tags_by_id(
                                 metadata["chat_id"], tags, user
                             )
@@ -1055,8 +1181,45 @@ async def process_chat_response(
                                     "data": tags,
                                 }
                             )
-                        except Exception as e:
-                            pass
+                    else:
+                        res = await generate_chat_tags(
+                            request,
+                            {
+                                "model": message["model"],
+                                "messages": messages,
+                                "chat_id": metadata["chat_id"],
+                            },
+                            user,
+                        )
+
+                        if res and isinstance(res, dict):
+                            if len(res.get("choices", [])) == 1:
+                                tags_string = (
+                                    res.get("choices", [])[0]
+                                    .get("message", {})
+                                    .get("content", "")
+                                )
+                            else:
+                                tags_string = ""
+
+                            tags_string = tags_string[
+                                tags_string.find("{") : tags_string.rfind("}") + 1
+                            ]
+
+                            try:
+                                tags = json.loads(tags_string).get("tags", [])
+                                Chats.update_chat_tags_by_id(
+                                    metadata["chat_id"], tags, user
+                                )
+
+                                await event_emitter(
+                                    {
+                                        "type": "chat:tags",
+                                        "data": tags,
+                                    }
+                                )
+                            except Exception as e:
+                                pass
 
     event_emitter = None
     event_caller = None
@@ -1071,6 +1234,15 @@ async def process_chat_response(
         event_emitter = get_event_emitter(metadata)
         event_caller = get_event_call(metadata)
 
+    # Title and tags will be needed, generate them while the response is streamed
+    if (
+        event_emitter
+        and tasks
+        and request.app.state.config.ENABLE_COMBINED_TASK_GENERATION
+        and (tasks.get(TASKS.TITLE_GENERATION) or tasks.get(TASKS.TAGS_GENERATION))
+    ):
+        get_combined_tasks(request, form_data, user)
+
     # Non-streaming response
     if not isinstance(response, StreamingResponse):
         if event_emitter:
@@ -1129,7 +1301,7 @@ async def process_chat_response(
                     )
 
                     # Send a webhook notification if the user is not active
-                    if get_active_status_by_user_id(user.id) is None:
+                    if not await get_active_status_by_user_id(user.id):
                         webhook_url = Users.get_user_webhook_url_by_id(user.id)
                         if webhook_url:
                             post_webhook(
@@ -1577,6 +1749,25 @@ async def process_chat_response(
 
                     response_tool_calls = []
 
+                    # Plain text chunks are only relayed and collected until a
+                    # chunk needs the full handling, e.g. a tool call or a tag
+                    fast_path = (
+                        metadata.get("stream_fast_path", False)
+                        and content_blocks
+                        and content_blocks[-1]["type"] == "text"
+                    )
+                    fast_path_parts = []
+
+                    def flush_fast_path_parts():
+                        nonlocal content
+
+                        if fast_path_parts:
+                            text = "".join(fast_path_parts)
+                            fast_path_parts.clear()
+
+                            content = f"{content}{text}"
+                            content_blocks[-1]["content"] += text
+
                     async for line in response.body_iterator:
                         line = line.decode("utf-8") if isinstance(line, bytes) else line
                         data = line
@@ -1592,6 +1783,27 @@ async def process_chat_response(
                         # Remove the prefix
                         data = data[len("data:") :].strip()
 
+                        if fast_path:
+                            try:
+                                chunk = json.loads(data)
+                            except Exception as e:
+                                continue
+
+                            value = get_plain_chunk_content(chunk)
+                            if value is not None:
+                                if value or "usage" in chunk:
+                                    fast_path_parts.append(value)
+                                    await event_emitter(
+                                        {
+                                            "type": "chat:completion",
+                                            "data": chunk,
+                                        }
+                                    )
+                                continue
+
+                            fast_path = False
+                            flush_fast_path_parts()
+
                         try:
                             data = json.loads(data)
 
@@ -1827,6 +2039,8 @@ async def process_chat_response(
                                 log.debug("Error: ", e)
                                 continue
 
+                    flush_fast_path_parts()
+
                     if content_blocks:
                         # Clean up the last text block
                         if content_blocks[-1]["type"] == "text":
@@ -1879,9 +2093,7 @@ async def process_chat_response(
 
                     tools = metadata.get("tools", {})
 
-                    results = []
-                    for tool_call in response_tool_calls:
-                        tool_call_id = tool_call.get("id", "")
+                    def get_tool_call(tool_call):
                         tool_name = tool_call.get("function", {}).get("name", "")
 
                         tool_function_params = {}
@@ -1902,49 +2114,54 @@ async def process_chat_response(
                                     f"Error parsing tool call arguments: {tool_call.get('function', {}).get('arguments', '{}')}"
                                 )
 
-                        tool_result = None
+                        async def execute_tool_call():
+                            if tool_name not in tools:
+                                return None
 
-                        if tool_name in tools:
                             tool = tools[tool_name]
                             spec = tool.get("spec", {})
 
-                            try:
-                                allowed_params = (
-                                    spec.get("parameters", {})
-                                    .get("properties", {})
-                                    .keys()
+                            allowed_params = (
+                                spec.get("parameters", {}).get("properties", {}).keys()
+                            )
+
+                            params = {
+                                k: v
+                                for k, v in tool_function_params.items()
+                                if k in allowed_params
+                            }
+
+                            if tool.get("direct", False):
+                                return await event_caller(
+                                    {
+                                        "type": "execute:tool",
+                                        "data": {
+                                            "id": str(uuid4()),
+                                            "name": tool_name,
+                                            "params": params,
+                                            "server": tool.get("server", {}),
+                                            "session_id": metadata.get(
+                                                "session_id", None
+                                            ),
+                                        },
+                                    }
                                 )
 
-                                tool_function_params = {
-                                    k: v
-                                    for k, v in tool_function_params.items()
-                                    if k in allowed_params
-                                }
+                            tool_function = tool["callable"]
+                            return await tool_function(**params)
 
-                                if tool.get("direct", False):
-                                    tool_result = await event_caller(
-                                        {
-                                            "type": "execute:tool",
-                                            "data": {
-                                                "id": str(uuid4()),
-                                                "name": tool_name,
-                                                "params": tool_function_params,
-                                                "server": tool.get("server", {}),
-                                                "session_id": metadata.get(
-                                                    "session_id", None
-                                                ),
-                                            },
-                                        }
-                                    )
+                        return execute_tool_call
 
-                                else:
-                                    tool_function = tool["callable"]
-                                    tool_result = await tool_function(
-                                        **tool_function_params
-                                    )
+                    # Calls of one response are independent, run them concurrently
+                    tool_results = await execute_tool_calls(
+                        [get_tool_call(tool_call) for tool_call in response_tool_calls]
+                    )
 
-                            except Exception as e:
-                                tool_result = str(e)
+                    results = []
+                    for tool_call, tool_result in zip(
+                        response_tool_calls, tool_results
+                    ):
+                        tool_call_id = tool_call.get("id", "")
 
                         tool_result_files = []
                         if isinstance(tool_result, list):
@@ -2073,6 +2290,8 @@ async def process_chat_response(
                                             else None
                                         ),
                                         request.app.state.config.CODE_INTERPRETER_JUPYTER_TIMEOUT,
+                                        user_id=user.id,
+                                        session_id=metadata.get("chat_id", None),
                                     )
                                 else:
                                     output = {
@@ -2211,7 +2430,7 @@ async def process_chat_response(
                     )
 
                 # Send a webhook notification if the user is not active
-                if get_active_status_by_user_id(user.id) is None:
+                if not await get_active_status_by_user_id(user.id):
                     webhook_url = Users.get_user_webhook_url_by_id(user.id)
                     if webhook_url:
                         post_webhook(
@@ -2252,7 +2471,7 @@ async def process_chat_response(
                 await response.background()
 
         # background_tasks.add_task(post_response_handler, response, events)
-        task_id, _ = create_task(
+        task_id, _ = await create_task(
             post_response_handler(response, events), id=metadata["chat_id"]
         )
         return {"status": True, "task_id": task_id}
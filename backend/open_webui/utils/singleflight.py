@@ -0,0 +1,41 @@
+import asyncio
+import functools
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class SingleFlight:
+    """
+    Concurrent calls with the same key share one call in flight, e.g. the
+    model list fetched by many requests at once after the cache expires.
+    """
+
+    def __init__(self):
+        self.calls: dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable]) -> Any:
+        task = self.calls.get(key)
+        if task is None:
+            # A task of its own, so a caller that gives up does not cancel it
+            # for the others
+            task = asyncio.create_task(func())
+            self.calls[key] = task
+            task.add_done_callback(lambda _: self.calls.pop(key, None))
+        return await asyncio.shield(task)
+
+
+def single_flight(key: Callable[..., Hashable]):
+    """
+    Decorates a coroutine function so concurrent calls for which `key`, called
+    with the same arguments, returns the same value share one call.
+    """
+
+    def decorator(func):
+        flight = SingleFlight()
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            return await flight.do(key(*args, **kwargs), lambda: func(*args, **kwargs))
+
+        return wrapper
+
+    return decorator
@@ -6,7 +6,11 @@ from typing import Optional
 import uuid
 
 
-from open_webui.utils.misc import get_last_user_message, get_messages_content
+from open_webui.utils.misc import (
+    get_last_user_message,
+    get_messages_content,
+    get_content_from_message,
+)
 
 from open_webui.env import SRC_LOG_LEVELS
 from open_webui.config import DEFAULT_RAG_TEMPLATE
@@ -281,6 +285,54 @@ def autocomplete_generation_template(
     return template
 
 
+def truncate_messages(messages: list[dict], token_budget: int) -> list[dict]:
+    """
+    Keeps the latest chat messages that fit in about `token_budget` tokens,
+    counting 4 characters per token. The last message is always kept and cut
+    down to the budget on its own.
+    """
+    budget = token_budget * 4
+    truncated = []
+
+    for message in reversed(messages):
+        if message.get("role") == "system":
+            continue
+
+        content = get_content_from_message(message) or ""
+        if not content:
+            continue
+
+        if len(content) > budget:
+            if not truncated:
+                truncated.append(
+                    {"role": message["role"], "content": content[-budget:]}
+                )
+            break
+
+        truncated.append({"role": message["role"], "content": content})
+        budget -= len(content)
+
+    return list(reversed(truncated))
+
+
+def combined_task_generation_template(
+    template: str, messages: list[dict], user: Optional[dict] = None
+) -> str:
+    prompt = get_last_user_message(messages)
+    template = replace_prompt_variable(template, prompt)
+    template = replace_messages_variable(template, messages)
+
+    template = prompt_template(
+        template,
+        **(
+            {"user_name": user.get("name"), "user_location": user.get("location")}
+            if user
+            else {}
+        ),
+    )
+    return template
+
+
 def query_generation_template(
     template: str, messages: list[dict], user: Optional[dict] = None
 ) -> str:
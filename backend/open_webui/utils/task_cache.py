@@ -0,0 +1,191 @@
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional
+
+from open_webui.config import (
+    ENABLE_TASK_RESPONSE_CACHE,
+    ENABLE_TASK_RESPONSE_CACHE_REDIS,
+    TASK_RESPONSE_CACHE_TTL,
+    TASK_RESPONSE_CACHE_SIZE,
+)
+from open_webui.env import (
+    REDIS_URL,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+    SRC_LOG_LEVELS,
+)
+from open_webui.utils.redis import get_async_redis_connection, get_sentinels_from_env
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+
+def get_model_params(model: dict) -> dict:
+    """The params of a workspace model, applied when the model is called."""
+    return (model.get("info") or {}).get("params") or {}
+
+
+def is_cacheable(payload: dict, params: Optional[dict] = None) -> bool:
+    """
+    Only non-streamed calls that sample with an explicit temperature of 0 give
+    reusable responses. The model params take precedence over the payload, as
+    they do when the model is called. Without any temperature the backend's
+    default applies, which is usually above 0.
+    """
+    if payload.get("stream", False):
+        return False
+
+    temperature = (params or {}).get("temperature")
+    if temperature is None:
+        temperature = payload.get("temperature")
+    if temperature is None:
+        temperature = (payload.get("options") or {}).get("temperature")
+
+    try:
+        return temperature is not None and float(temperature) == 0
+    except (TypeError, ValueError):
+        return False
+
+
+class TaskResponseCache:
+    """
+    LRU of task model responses that expire after `ttl` seconds, keyed by the
+    user and the payload sent to the model: the model, the rendered prompt and
+    the generation parameters. With a Redis connection the responses are also
+    shared between workers. Identical calls made while one is in flight wait
+    for its response instead of reaching the model again.
+    """
+
+    def __init__(self, ttl: int, max_size: int, redis=None):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.redis = redis
+        self.entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self.inflight: dict[str, asyncio.Future] = {}
+        self.stats: dict[str, dict[str, int]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_size > 0
+
+    @staticmethod
+    def get_key(user_id: str, payload: dict) -> str:
+        payload = {
+            key: value
+            for key, value in payload.items()
+            if key not in ["metadata", "stream"]
+        }
+        data = json.dumps([user_id, payload], sort_keys=True, default=str)
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+    def count(self, task: str, name: str):
+        stats = self.stats.setdefault(task, {"hits": 0, "misses": 0, "coalesced": 0})
+        stats[name] += 1
+
+    async def get(self, key: str) -> Optional[dict]:
+        entry = self.entries.get(key)
+        if entry is not None:
+            if time.monotonic() - entry[0] <= self.ttl:
+                self.entries.move_to_end(key)
+                return entry[1]
+            del self.entries[key]
+
+        if self.redis is not None:
+            try:
+                value = await self.redis.get(f"open-webui:task-cache:{key}")
+                if value is not None:
+                    response = json.loads(value)
+                    self.put_local(key, response)
+                    return response
+            except Exception as e:
+                log.debug(f"Error reading the task response cache: {e}")
+        return None
+
+    def put_local(self, key: str, response: dict):
+        self.entries[key] = (time.monotonic(), response)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    async def put(self, key: str, response: dict):
+        self.put_local(key, response)
+        if self.redis is not None:
+            try:
+                await self.redis.set(
+                    f"open-webui:task-cache:{key}", json.dumps(response), ex=self.ttl
+                )
+            except Exception as e:
+                log.debug(f"Error writing the task response cache: {e}")
+
+    async def generate(
+        self,
+        task: str,
+        payload: dict,
+        user_id: str,
+        generate: Callable[[], Awaitable],
+        params: Optional[dict] = None,
+    ):
+        """
+        Returns the cached response of the payload, or the one of `generate()`.
+        Only successful, non-streamed responses are stored. `params` are the
+        model params that will be applied to the payload.
+        """
+        if not self.enabled or not is_cacheable(payload, params):
+            return await generate()
+
+        key = self.get_key(user_id, payload)
+
+        response = await self.get(key)
+        if response is not None:
+            self.count(task, "hits")
+            return copy.deepcopy(response)
+
+        if key in self.inflight:
+            response = await asyncio.shield(self.inflight[key])
+            if response is not None:
+                self.count(task, "coalesced")
+                return copy.deepcopy(response)
+            # The call in flight failed, try again on our own
+            return await generate()
+
+        self.count(task, "misses")
+        future = asyncio.get_running_loop().create_future()
+        self.inflight[key] = future
+        response = None
+        try:
+            response = await generate()
+            if isinstance(response, dict) and response.get("choices"):
+                await self.put(key, response)
+                future.set_result(copy.deepcopy(response))
+            return response
+        finally:
+            if not future.done():
+                future.set_result(None)
+            self.inflight.pop(key, None)
+
+    def get_stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "size": len(self.entries),
+            "tasks": self.stats,
+        }
+
+
+task_response_cache = TaskResponseCache(
+    TASK_RESPONSE_CACHE_TTL if ENABLE_TASK_RESPONSE_CACHE else 0,
+    TASK_RESPONSE_CACHE_SIZE,
+    redis=(
+        get_async_redis_connection(
+            REDIS_URL,
+            get_sentinels_from_env(REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT),
+            decode_responses=True,
+        )
+        if ENABLE_TASK_RESPONSE_CACHE and ENABLE_TASK_RESPONSE_CACHE_REDIS and REDIS_URL
+        else None
+    ),
+)
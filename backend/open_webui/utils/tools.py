@@ -1,4 +1,5 @@
 import inspect
+import json
 import logging
 import re
 import inspect
@@ -26,6 +27,7 @@ from functools import update_wrapper, partial
 
 
 from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field, create_model
 
 from langchain_core.utils.function_calling import (
@@ -36,7 +38,13 @@ from langchain_core.utils.function_calling import (
 from open_webui.models.tools import Tools
 from open_webui.models.users import UserModel
 from open_webui.utils.plugin import load_tool_module_by_id
-from open_webui.env import AIOHTTP_CLIENT_TIMEOUT_TOOL_SERVER_DATA
+from open_webui.utils.circuit_breaker import get_circuit_breaker
+from open_webui.utils.singleflight import single_flight
+from open_webui.env import (
+    AIOHTTP_CLIENT_TIMEOUT_TOOL_SERVER_DATA,
+    TOOL_CALL_MAX_CONCURRENCY,
+    TOOL_CALL_TIMEOUT,
+)
 
 import copy
 
@@ -54,14 +62,41 @@ def get_async_tool_function_and_apply_extra_params(
         update_wrapper(partial_func, function)
         return partial_func
     else:
-        # Make it a coroutine function
+        # Make it a coroutine function, run in a thread so it does not block
+        # the event loop (or other tool calls of the same turn)
         async def new_function(*args, **kwargs):
-            return partial_func(*args, **kwargs)
+            return await run_in_threadpool(partial_func, *args, **kwargs)
 
         update_wrapper(new_function, function)
         return new_function
 
 
+async def execute_tool_calls(
+    tool_calls: list[Callable[[], Awaitable[Any]]],
+    max_concurrency: int = TOOL_CALL_MAX_CONCURRENCY,
+    timeout: Optional[int] = TOOL_CALL_TIMEOUT,
+) -> list[Any]:
+    """
+    Runs the tool calls of one response concurrently, at most max_concurrency
+    at a time, and returns their results in call order. A call that fails or
+    times out returns the error message as its result.
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def execute(tool_call):
+        async with semaphore:
+            try:
+                if timeout:
+                    return await asyncio.wait_for(tool_call(), timeout)
+                return await tool_call()
+            except asyncio.TimeoutError:
+                return f"Tool call timed out after {timeout} seconds"
+            except Exception as e:
+                return str(e)
+
+    return await asyncio.gather(*[execute(tool_call) for tool_call in tool_calls])
+
+
 def get_tools(
     request: Request, tool_ids: list[str], user: UserModel, extra_params: dict
 ) -> dict[str, dict]:
@@ -461,6 +496,13 @@ async def get_tool_server_data(token: str, url: str) -> Dict[str, Any]:
     return data
 
 
+def get_tool_servers_flight_key(
+    servers: List[Dict[str, Any]], session_token: Optional[str] = None
+) -> str:
+    return json.dumps([servers, session_token], sort_keys=True, default=str)
+
+
+@single_flight(key=get_tool_servers_flight_key)
 async def get_tool_servers_data(
     servers: List[Dict[str, Any]], session_token: Optional[str] = None
 ) -> List[Dict[str, Any]]:
@@ -478,6 +520,10 @@ async def get_tool_servers_data(
                 token = server.get("key", "")
             elif auth_type == "session":
                 token = session_token
+
+            if not get_circuit_breaker(full_url).allow():
+                log.debug(f"Skipping {full_url}, it failed recently")
+                continue
             server_entries.append((idx, server, full_url, token))
 
     # Create async tasks to fetch data
@@ -491,7 +537,9 @@ async def get_tool_servers_data(
     for (idx, server, url, _), response in zip(server_entries, responses):
         if isinstance(response, Exception):
             print(f"Failed to connect to {url} OpenAPI tool server")
+            get_circuit_breaker(url).record_failure()
             continue
+        get_circuit_breaker(url).record_success()
 
         results.append(
             {
@@ -573,7 +621,14 @@ async def execute_tool_server(
         if token:
             headers["Authorization"] = f"Bearer {token}"
 
-        async with aiohttp.ClientSession() as session:
+        # Keep aiohttp's default timeout unless one is configured
+        async with aiohttp.ClientSession(
+            **(
+                {"timeout": aiohttp.ClientTimeout(total=TOOL_CALL_TIMEOUT)}
+                if TOOL_CALL_TIMEOUT
+                else {}
+            )
+        ) as session:
             request_method = getattr(session, http_method.lower())
 
             if http_method in ["post", "put", "patch"]:
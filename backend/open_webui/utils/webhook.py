@@ -1,60 +1,321 @@
+import asyncio
+import itertools
 import json
 import logging
+from typing import Optional
 
+import aiohttp
 import requests
 from open_webui.config import WEBUI_FAVICON_URL
-from open_webui.env import SRC_LOG_LEVELS, VERSION
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    VERSION,
+    WEBHOOK_COALESCE_WINDOW,
+    WEBHOOK_MAX_CONCURRENCY,
+    WEBHOOK_MAX_RETRIES,
+    WEBHOOK_QUEUE_SIZE,
+    WEBHOOK_RETRY_BACKOFF,
+    WEBHOOK_TIMEOUT,
+)
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["WEBHOOK"])
 
 
-def post_webhook(name: str, url: str, message: str, event_data: dict) -> bool:
+def get_webhook_payload(name: str, url: str, message: str, event_data: dict) -> dict:
+    payload = {}
+
+    # Slack and Google Chat Webhooks
+    if "https://hooks.slack.com" in url or "https://chat.googleapis.com" in url:
+        payload["text"] = message
+    # Discord Webhooks
+    elif "https://discord.com/api/webhooks" in url:
+        payload["content"] = (
+            message if len(message) < 2000 else f"{message[: 2000 - 20]}... (truncated)"
+        )
+    # Microsoft Teams Webhooks
+    elif "webhook.office.com" in url:
+        action = event_data.get("action", "undefined")
+        facts = [
+            {"name": name, "value": value}
+            for name, value in json.loads(event_data.get("user", "{}")).items()
+        ]
+        payload = {
+            "@type": "MessageCard",
+            "@context": "http://schema.org/extensions",
+            "themeColor": "0076D7",
+            "summary": message,
+            "sections": [
+                {
+                    "activityTitle": message,
+                    "activitySubtitle": f"{name} ({VERSION}) - {action}",
+                    "activityImage": WEBUI_FAVICON_URL,
+                    "facts": facts,
+                    "markdown": True,
+                }
+            ],
+        }
+    # Default Payload
+    else:
+        payload = {**event_data}
+
+    return payload
+
+
+def get_coalesced_webhook_payload(
+    url: str, notifications: list[tuple[str, str, dict]]
+) -> dict:
+    """
+    Builds a single payload for notifications queued for the same URL.
+    Identical notifications (e.g. several members sharing a channel webhook)
+    are sent once, distinct ones are joined into one message.
+    """
+    unique = {}
+    for name, message, event_data in notifications:
+        key = (message, json.dumps(event_data, sort_keys=True, default=str))
+        unique.setdefault(key, (name, message, event_data))
+    notifications = list(unique.values())
+
+    name, message, event_data = notifications[-1]
+    if len(notifications) > 1:
+        message = "\n\n".join(message for _, message, _ in notifications)
+        event_data = {
+            **event_data,
+            "message": message,
+            "events": [event_data for _, _, event_data in notifications],
+        }
+
+    return get_webhook_payload(name, url, message, event_data)
+
+
+class WebhookDispatcher:
+    """
+    Delivers webhooks from a bounded queue with a fixed number of workers and a
+    shared, pooled HTTP session. Failed deliveries are retried with exponential
+    backoff and logged as dead letters once retries are exhausted.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = WEBHOOK_MAX_CONCURRENCY,
+        queue_size: int = WEBHOOK_QUEUE_SIZE,
+        max_retries: int = WEBHOOK_MAX_RETRIES,
+        retry_backoff: float = WEBHOOK_RETRY_BACKOFF,
+        coalesce_window: float = WEBHOOK_COALESCE_WINDOW,
+        timeout: int = WEBHOOK_TIMEOUT,
+    ):
+        self.concurrency = max(1, concurrency)
+        self.queue_size = queue_size
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.coalesce_window = coalesce_window
+        self.timeout = timeout
+
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.queue: Optional[asyncio.Queue] = None
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.workers: list[asyncio.Task] = []
+
+        # url -> notifications waiting for the coalesce window to close
+        self.pending: dict[str, list[tuple[str, str, dict]]] = {}
+        self.pending_count = 0
+        self.flush_timers: dict[str, asyncio.TimerHandle] = {}
+
+        # Failed deliveries waiting for their backoff delay, by retry id
+        self.retries: dict[int, tuple[asyncio.TimerHandle, str, dict, int]] = {}
+        self.retry_ids = itertools.count()
+        self.active = 0
+
+    def start(self):
+        if self.loop is not None:
+            return
+
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=self.concurrency,
+                limit_per_host=max(1, self.concurrency // 2),
+            ),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            trust_env=True,
+        )
+        self.workers = [
+            asyncio.create_task(self._worker()) for _ in range(self.concurrency)
+        ]
+
+    def get_undelivered_count(self) -> int:
+        return self.queue.qsize() + self.active + self.pending_count + len(self.retries)
+
+    async def stop(self, timeout: float = 5):
+        if self.loop is None:
+            return
+
+        deadline = self.loop.time() + timeout
+        try:
+            while True:
+                # Send what waits for its coalesce window or its retry right
+                # away, rather than dropping it
+                for url in list(self.pending):
+                    self.flush_timers[url].cancel()
+                    self._flush(url)
+                for retry_id in list(self.retries):
+                    self.retries[retry_id][0].cancel()
+                    self._retry(retry_id)
+
+                await asyncio.wait_for(
+                    self.queue.join(), max(0, deadline - self.loop.time())
+                )
+                if not self.pending and not self.retries:
+                    break
+        except asyncio.TimeoutError:
+            log.warning(
+                f"Dropping {self.get_undelivered_count()} undelivered webhooks on shutdown"
+            )
+
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        await self.session.close()
+
+        for timer in self.flush_timers.values():
+            timer.cancel()
+        for timer, *_ in self.retries.values():
+            timer.cancel()
+
+        self.loop = self.queue = self.session = None
+        self.workers = []
+        self.pending = {}
+        self.pending_count = 0
+        self.flush_timers = {}
+        self.retries = {}
+        self.active = 0
+
+    def enqueue(self, name: str, url: str, message: str, event_data: dict) -> bool:
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+
+        if running_loop is not None and self.loop in (None, running_loop):
+            self.start()
+            return self._enqueue(name, url, message, event_data)
+
+        if self.loop is not None and self.loop.is_running():
+            # Called from a worker thread (e.g. a sync route)
+            self.loop.call_soon_threadsafe(
+                self._enqueue, name, url, message, event_data
+            )
+            return True
+
+        # No event loop available, deliver inline
+        return post_webhook_sync(name, url, message, event_data)
+
+    def _enqueue(self, name: str, url: str, message: str, event_data: dict) -> bool:
+        if self.get_undelivered_count() >= self.queue_size:
+            log.error(f"Webhook queue full, dropping notification to {url}: {message}")
+            return False
+
+        if url not in self.pending:
+            self.pending[url] = []
+            self.flush_timers[url] = self.loop.call_later(
+                self.coalesce_window, self._flush, url
+            )
+
+        self.pending[url].append((name, message, event_data))
+        self.pending_count += 1
+        return True
+
+    def _flush(self, url: str):
+        self.flush_timers.pop(url, None)
+        notifications = self.pending.pop(url, [])
+        self.pending_count -= len(notifications)
+
+        if notifications and self.queue is not None:
+            payload = get_coalesced_webhook_payload(url, notifications)
+            self.queue.put_nowait((url, payload, 0))
+
+    def _schedule_retry(self, delay: float, url: str, payload: dict, attempt: int):
+        retry_id = next(self.retry_ids)
+        timer = self.loop.call_later(delay, self._retry, retry_id)
+        self.retries[retry_id] = (timer, url, payload, attempt)
+
+    def _retry(self, retry_id: int):
+        retry = self.retries.pop(retry_id, None)
+        if retry is not None and self.queue is not None:
+            _, url, payload, attempt = retry
+            self.queue.put_nowait((url, payload, attempt))
+
+    async def _worker(self):
+        while True:
+            url, payload, attempt = await self.queue.get()
+            self.active += 1
+            try:
+                retry_after = await self._deliver(url, payload)
+                if retry_after is None:
+                    continue
+
+                if attempt < self.max_retries:
+                    delay = max(retry_after, self.retry_backoff * (2**attempt))
+                    # Re-queue later instead of sleeping, so the worker is free meanwhile
+                    self._schedule_retry(delay, url, payload, attempt + 1)
+                else:
+                    log.error(
+                        f"Webhook delivery to {url} failed after {attempt + 1} attempts, dropping payload: {payload}"
+                    )
+            except Exception as e:
+                log.exception(f"Unexpected error delivering webhook to {url}: {e}")
+            finally:
+                self.active -= 1
+                self.queue.task_done()
+
+    async def _deliver(self, url: str, payload: dict) -> Optional[float]:
+        """Returns None when done, or the minimum delay before a retry."""
+        try:
+            log.debug(f"payload: {payload}")
+            async with self.session.post(url, json=payload) as r:
+                if r.status == 429 or r.status >= 500:
+                    log.warning(f"Webhook {url} responded {r.status}, retrying")
+                    try:
+                        return float(r.headers.get("Retry-After", 0))
+                    except ValueError:
+                        return 0
+
+                if r.status >= 400:
+                    log.error(
+                        f"Webhook {url} rejected payload with {r.status}: {await r.text()}"
+                    )
+                    return None
+
+                log.debug(f"r.text: {await r.text()}")
+                return None
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            log.warning(f"Webhook delivery to {url} failed: {e!r}, retrying")
+            return 0
+
+
+webhook_dispatcher = WebhookDispatcher()
+
+
+def post_webhook_sync(name: str, url: str, message: str, event_data: dict) -> bool:
     try:
         log.debug(f"post_webhook: {url}, {message}, {event_data}")
-        payload = {}
-
-        # Slack and Google Chat Webhooks
-        if "https://hooks.slack.com" in url or "https://chat.googleapis.com" in url:
-            payload["text"] = message
-        # Discord Webhooks
-        elif "https://discord.com/api/webhooks" in url:
-            payload["content"] = (
-                message
-                if len(message) < 2000
-                else f"{message[: 2000 - 20]}... (truncated)"
-            )
-        # Microsoft Teams Webhooks
-        elif "webhook.office.com" in url:
-            action = event_data.get("action", "undefined")
-            facts = [
-                {"name": name, "value": value}
-                for name, value in json.loads(event_data.get("user", {})).items()
-            ]
-            payload = {
-                "@type": "MessageCard",
-                "@context": "http://schema.org/extensions",
-                "themeColor": "0076D7",
-                "summary": message,
-                "sections": [
-                    {
-                        "activityTitle": message,
-                        "activitySubtitle": f"{name} ({VERSION}) - {action}",
-                        "activityImage": WEBUI_FAVICON_URL,
-                        "facts": facts,
-                        "markdown": True,
-                    }
-                ],
-            }
-        # Default Payload
-        else:
-            payload = {**event_data}
+        payload = get_webhook_payload(name, url, message, event_data)
 
         log.debug(f"payload: {payload}")
-        r = requests.post(url, json=payload)
+        r = requests.post(url, json=payload, timeout=WEBHOOK_TIMEOUT)
         r.raise_for_status()
         log.debug(f"r.text: {r.text}")
         return True
     except Exception as e:
         log.exception(e)
         return False
+
+
+def post_webhook(name: str, url: str, message: str, event_data: dict) -> bool:
+    """
+    Queues a webhook notification for asynchronous delivery and returns
+    immediately. Returns False if the notification was dropped.
+    """
+    log.debug(f"post_webhook: {url}, {message}, {event_data}")
+    return webhook_dispatcher.enqueue(name, url, message, event_data)